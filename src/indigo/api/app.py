@@ -4,39 +4,145 @@ import logging
 
 from flask import Flask, jsonify
 
-from indigo.api.blueprints.devices import bp as devices_bp
 from indigo.api.blueprints.health import bp as health_bp
-from indigo.api.blueprints.lanes import bp as lanes_bp
-from indigo.api.blueprints.recipes import bp as recipes_bp  # NEW
-from indigo.config.settings import get_settings
+from indigo.api.coalesce import COALESCE_EXT, SingleFlight
+from indigo.api.state import COMMANDS_EXT, REGISTRY_EXT, meta_fields
+from indigo.config.settings import Settings, get_settings
+from indigo.services.device_registry import DeviceRegistry
+from indigo.util.logging import configure_logging
+from indigo.util.startup import StartupPhases
 
+STARTUP_EXT = "indigo.startup"
 
-def create_app() -> Flask:
+log = logging.getLogger("indigo.api")
+
+
+def create_app(registry: DeviceRegistry | None = None, *, warmup: bool | None = None, commands=None) -> Flask:
+    """
+    Builds the app in explicit phases (timed, logged, reported by /api/_meta):
+
+      blueprints  feature blueprints are imported only when enabled
+                  (ENABLE_API pulls in SQLAlchemy; ENABLE_ADMIN the profiler)
+      db          engine + schema check now, not inside the first request
+      warmup      one internal request (URL map, request machinery) and the
+                  active recipe of every lane into the RecipeCache
+                  (STARTUP_WARMUP, or warmup= to override)
+
+    commands= replaces the channel to the runner process (commands, health;
+    default: a CommandClient on COMMAND_SOCKET), e.g. with an in-process CommandServer.
+    """
+    boot = StartupPhases("api")
     s = get_settings()
     app = Flask(__name__)
+    app.extensions[REGISTRY_EXT] = registry
+    app.extensions[COALESCE_EXT] = SingleFlight()
+    if commands is not None:
+        app.extensions[COMMANDS_EXT] = commands
+
+    with boot.phase("blueprints"):
+        app.register_blueprint(health_bp)
+        if s.ENABLE_API:
+            from indigo.api.blueprints.alarms import bp as alarms_bp
+            from indigo.api.blueprints.commands import bp as commands_bp
+            from indigo.api.blueprints.devices import bp as devices_bp
+            from indigo.api.blueprints.export import bp as export_bp
+            from indigo.api.blueprints.lanes import bp as lanes_bp
+            from indigo.api.blueprints.recipes import bp as recipes_bp
+            from indigo.api.blueprints.snapshot import bp as snapshot_bp
+
+            app.register_blueprint(devices_bp)
+            app.register_blueprint(lanes_bp)
+            app.register_blueprint(recipes_bp)
+            app.register_blueprint(snapshot_bp)
+            app.register_blueprint(commands_bp)
+            app.register_blueprint(alarms_bp)
+            app.register_blueprint(export_bp)
+        if s.ENABLE_ADMIN:
+            from indigo.api.blueprints.admin import bp as admin_bp
 
-    app.register_blueprint(health_bp)
-    app.register_blueprint(devices_bp)
-    app.register_blueprint(lanes_bp)
-    app.register_blueprint(recipes_bp)  # NEW
+            app.register_blueprint(admin_bp)
 
     @app.get("/api/_meta")
     def meta():
-        return jsonify(
-            {
-                "ok": True,
-                "simulation_mode": s.SIMULATION_MODE,
-                "poll_hz": s.POLL_HZ,
-                "lane_addrs": list(s.LANE_ADDRS),
-                "utility_addr": s.UTILITY_ADDR,
-                "enable_api": s.ENABLE_API,
-                "enable_ui": s.ENABLE_UI,
-            }
-        )
+        return jsonify({"ok": True, **meta_fields(s), "startup": boot.as_dict()})
 
+    if s.ENABLE_API:
+        with boot.phase("db"):
+            from indigo.api.blueprints.recipes import RECIPE_CACHE_EXT, build_recipe_cache
+
+            app.extensions[RECIPE_CACHE_EXT] = build_recipe_cache()
+
+    if s.STARTUP_WARMUP if warmup is None else warmup:
+        with boot.phase("warmup"):
+            _warmup(app, s)
+
+    app.extensions[STARTUP_EXT] = boot
+    boot.log_summary(log)
     return app
 
 
+def _warmup(app: Flask, s: Settings) -> None:
+    # after this no routes can be added to the app, so it runs last
+    app.test_client().get("/api/health")
+    if s.ENABLE_API:
+        from indigo.api.blueprints.recipes import RECIPE_CACHE_EXT
+
+        cache = app.extensions[RECIPE_CACHE_EXT]
+        for lane in s.LANE_ADDRS:
+            cache.get(lane)
+
+
+# Largest accepted request body (bulk recipe upserts are well under this)
+MAX_REQUEST_BODY_BYTES = 1024 * 1024
+
+
+def make_server(app: Flask | None = None, *, host: str | None = None, port: int | None = None):
+    """
+    waitress server for the app, tuned from settings (API_THREADS worker threads,
+    API_CONNECTION_LIMIT open connections, API_CHANNEL_TIMEOUT_S idle keep-alive
+    timeout, API_BACKLOG listen backlog). Call .run() to serve; port=0 picks a free port.
+    """
+    from waitress import create_server
+
+    s = get_settings()
+    return create_server(
+        app if app is not None else create_app(),
+        host=s.API_HOST if host is None else host,
+        port=s.API_PORT if port is None else port,
+        threads=s.API_THREADS,
+        connection_limit=s.API_CONNECTION_LIMIT,
+        channel_timeout=s.API_CHANNEL_TIMEOUT_S,
+        backlog=s.API_BACKLOG,
+        cleanup_interval=min(10, s.API_CHANNEL_TIMEOUT_S),
+        asyncore_use_poll=True,  # no select() FD_SETSIZE ceiling
+        max_request_body_size=MAX_REQUEST_BODY_BYTES,
+        clear_untrusted_proxy_headers=True,
+        ident="indigo",
+    )
+
+
+def run_prod() -> None:
+    """Used by: `make prod` and indigo-api.service."""
+    s = get_settings()
+    # stdout only: journald collects it; the runner owns LOG_DIR/indigo.log
+    configure_logging(s.LOG_LEVEL)
+    server = make_server()
+    log.info(
+        "Serving on http://%s:%s (threads=%d connection_limit=%d channel_timeout=%ds)",
+        s.API_HOST,
+        server.effective_port,
+        s.API_THREADS,
+        s.API_CONNECTION_LIMIT,
+        s.API_CHANNEL_TIMEOUT_S,
+    )
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        log.info("KeyboardInterrupt; stopping API")
+    finally:
+        server.close()
+
+
 def run_dev() -> None:
     s = get_settings()
     logging.getLogger("werkzeug").setLevel(logging.WARNING)
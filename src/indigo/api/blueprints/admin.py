@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from flask import Blueprint, Response, jsonify, request
+
+from indigo.api.coalesce import get_single_flight
+from indigo.util.profiler import MAX_PROFILE_S, ProfilerBusy, sample
+from indigo.util.trace import dump_all
+
+bp = Blueprint("admin", __name__)
+
+TRACE_DEFAULT_SPANS = 512
+
+
+@bp.get("/api/admin/trace")
+def trace():
+    """Phase tracer ring buffers of this process. Query: last (spans per tracer, default 512)."""
+    try:
+        last = int(request.args.get("last", TRACE_DEFAULT_SPANS))
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_last"}), 400
+    return jsonify({"ok": True, **dump_all(last)})
+
+
+@bp.get("/api/admin/profile")
+def profile():
+    """
+    Sample every thread of this process for `seconds` (<= 60, default 5); blocks
+    for that long. format=collapsed (flamegraph input, default) or top (pstats-like).
+    """
+    fmt = request.args.get("format", "collapsed")
+    if fmt not in ("collapsed", "top"):
+        return jsonify({"ok": False, "error": "invalid_format"}), 400
+    try:
+        seconds = float(request.args.get("seconds", 5.0))
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_seconds"}), 400
+    if not 0.0 < seconds <= MAX_PROFILE_S:
+        return jsonify({"ok": False, "error": "invalid_seconds", "max_seconds": MAX_PROFILE_S}), 400
+
+    try:
+        prof = sample(seconds)
+    except ProfilerBusy:
+        return jsonify({"ok": False, "error": "profile_in_progress"}), 409
+    body = prof.collapsed() if fmt == "collapsed" else prof.top()
+    return Response(body, mimetype="text/plain")
+
+
+@bp.get("/api/admin/coalescing")
+def coalescing():
+    """How many identical concurrent reads were served by another request's work."""
+    return jsonify({"ok": True, **get_single_flight().stats()})
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from flask import Blueprint, jsonify, request
+
+from indigo.api.state import get_command_channel
+from indigo.db.engine import get_session_factory
+from indigo.services.alarm_store import AlarmStore
+from indigo.services.command_ipc import CommandUnavailable
+
+bp = Blueprint("alarms", __name__, url_prefix="/api")
+
+_HTTP_STATUS = {
+    "unknown_alarm_rule": 404,
+    "unknown_lane": 404,
+    "alarm_not_active": 409,
+    "alarms_unavailable": 503,
+}
+
+
+def _call(req: dict):
+    try:
+        reply = get_command_channel().request(req)
+    except CommandUnavailable as e:
+        return None, (jsonify({"ok": False, "error": "services_unavailable", "detail": str(e)}), 503)
+    if not reply.get("ok"):
+        return None, (jsonify(reply), _HTTP_STATUS.get(reply.get("error"), 400))
+    return reply, None
+
+
+def _no_store(resp):
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+@bp.get("/alarms")
+def active_alarms():
+    """Raised alarms on every lane (from the runner's AlarmEngine) and evaluation stats."""
+    reply, err = _call({"op": "alarms"})
+    if err is not None:
+        return err
+    return _no_store(jsonify({"ok": True, "active": reply["active"], "stats": reply["stats"]}))
+
+
+@bp.post("/alarms/ack")
+def ack_alarm():
+    """{"rule": "reflux_over_temp", "lane": 3}: acknowledge (and so release a latched) alarm."""
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not body.get("rule") or not isinstance(body.get("lane"), int):
+        return jsonify({"ok": False, "error": "invalid_json", "detail": "rule and lane required"}), 400
+    reply, err = _call({"op": "alarm_ack", "rule": body["rule"], "addr": body["lane"]})
+    if err is not None:
+        return err
+    return _no_store(jsonify({"ok": True, "event": reply["event"]}))
+
+
+@bp.get("/alarms/history")
+def alarm_history():
+    """Raised/cleared/acked events, newest first. Query: lane, limit (<=200), cursor (from next_cursor)."""
+    try:
+        limit = int(request.args.get("limit", 50))
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_limit"}), 400
+    try:
+        lane = int(request.args["lane"]) if request.args.get("lane") else None
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_lane"}), 400
+    try:
+        items, next_cursor = AlarmStore(get_session_factory()).history(
+            lane=lane, limit=limit, cursor=request.args.get("cursor") or None
+        )
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_cursor"}), 400
+    return jsonify({"ok": True, "items": items, "next_cursor": next_cursor})
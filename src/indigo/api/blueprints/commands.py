@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from flask import Blueprint, jsonify, request
+
+from indigo.api.state import get_command_channel
+from indigo.config.settings import get_settings
+from indigo.services.command_ipc import CommandUnavailable
+from indigo.services.commands import (
+    COMMANDS,
+    TARGET_LANE,
+    TARGET_UTILITY,
+    CommandError,
+    build_command,
+)
+
+bp = Blueprint("commands", __name__, url_prefix="/api")
+
+_HTTP_STATUS = {
+    "unknown_lane": 404,
+    "unknown_utility": 404,
+    "command_not_found": 404,
+    "interlock_tripped": 409,
+}
+
+
+def _call(req: dict):
+    try:
+        reply = get_command_channel().request(req)
+    except CommandUnavailable as e:
+        return None, (
+            jsonify({"ok": False, "error": "services_unavailable", "detail": str(e)}),
+            503,
+        )
+    if not reply.get("ok"):
+        return None, (jsonify(reply), _HTTP_STATUS.get(reply.get("error"), 400))
+    return reply, None
+
+
+def _no_store(resp):
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+def _submit(target: str, addr: int):
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"ok": False, "error": "invalid_json"}), 400
+    command, args = body.get("command"), body.get("args") or {}
+    try:
+        # reject bad requests here rather than a round trip to the runner
+        build_command(target, addr, command, args)
+    except CommandError as e:
+        return jsonify(
+            {"ok": False, "error": e.code, "detail": e.detail, "commands": sorted(COMMANDS[target])}
+        ), 400
+
+    reply, err = _call(
+        {"op": "submit", "target": target, "addr": addr, "command": command, "args": args}
+    )
+    if err is not None:
+        return err
+    job = reply["job"]
+    resp = jsonify({"ok": True, "job": job})
+    resp.status_code = 202
+    resp.headers["Location"] = f"/api/commands/{job['id']}"
+    return _no_store(resp)
+
+
+@bp.post("/lanes/<int:lane_addr>/commands")
+def lane_command(lane_addr: int):
+    """
+    {"command": "vac_valve", "args": {"open": true}} -> 202 + job. Queued for
+    the poll loop's next tick; poll GET /api/commands/<id> for sent/acked/failed.
+    """
+    return _submit(TARGET_LANE, lane_addr)
+
+
+@bp.post("/utility/commands")
+def utility_command():
+    return _submit(TARGET_UTILITY, get_settings().UTILITY_ADDR)
+
+
+@bp.get("/commands/<job_id>")
+def command_status(job_id: str):
+    reply, err = _call({"op": "status", "id": job_id})
+    if err is not None:
+        return err
+    return _no_store(jsonify({"ok": True, "job": reply["job"]}))
+
+
+@bp.get("/commands")
+def recent_commands():
+    """Newest jobs first (limit=, default 50) and end-to-end latency histograms."""
+    try:
+        limit = min(max(int(request.args.get("limit", 50)), 0), 1000)
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_limit"}), 400
+    jobs, err = _call({"op": "recent", "limit": limit})
+    if err is not None:
+        return err
+    stats, err = _call({"op": "stats"})
+    if err is not None:
+        return err
+    return _no_store(jsonify({"ok": True, "jobs": jobs["jobs"], "stats": stats["stats"]}))
@@ -2,10 +2,23 @@ from __future__ import annotations
 
 from flask import Blueprint, jsonify
 
+from indigo.api.http_cache import client_has, not_modified, with_cache_headers
+from indigo.api.state import get_registry, status_etag, with_staleness
+
 bp = Blueprint("devices", __name__)
 
 
 @bp.get("/api/devices")
-def devices() -> tuple[dict, int]:
-    # Stub for Phase 2.x: API returns something sane even before DB integration.
-    return jsonify({"devices": []}), 200
+def devices():
+    reg = get_registry()
+    etag = status_etag("devices", reg)
+    addrs = [reg.utility_addr, *reg.lane_addrs] if reg else []
+    if client_has(etag):
+        return with_staleness(not_modified(etag), reg, addrs)
+
+    if reg is None:
+        # No registry attached (API-only process): return something sane.
+        return with_cache_headers(jsonify({"devices": []}), etag)
+
+    body = {"devices": [reg.utility_snapshot(include_seen=False), *reg.lane_snapshot(include_seen=False)]}
+    return with_staleness(with_cache_headers(jsonify(body), etag), reg, addrs)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import time
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from indigo.config.settings import get_settings
+from indigo.db.engine import get_session_factory
+from indigo.services.export import (
+    FORMATS,
+    SOURCES,
+    ExportLog,
+    ExportQuery,
+    ExportRun,
+    export_stream,
+    parquet_available,
+    parse_lanes,
+    parse_time,
+)
+
+bp = Blueprint("export", __name__, url_prefix="/api")
+
+EXPORT_LOG_EXT = "indigo.exports"
+
+
+def _export_log() -> ExportLog:
+    return current_app.extensions.setdefault(EXPORT_LOG_EXT, ExportLog())
+
+
+def _bad(error: str, detail: str, status: int = 400):
+    return jsonify({"ok": False, "error": error, "detail": detail}), status
+
+
+@bp.get("/export")
+def export_index():
+    """Sources, formats, and the most recent export runs with their throughput (rows/s)."""
+    resp = jsonify(
+        {
+            "ok": True,
+            "sources": list(SOURCES),
+            "formats": [f for f in FORMATS if f != "parquet" or parquet_available()],
+            "batch_rows": get_settings().EXPORT_BATCH_ROWS,
+            "recent": _export_log().snapshot(),
+        }
+    )
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+@bp.get("/export/<source>")
+def export(source: str):
+    """
+    Stream one source as a chunked download. Query:
+      format   csv (default) | ndjson | parquet (needs pyarrow)
+      since    start, inclusive: epoch seconds or ISO 8601 (naive = UTC)
+      until    end, exclusive
+      lanes    "1,3,5-8" (default: all)
+      gzip     1: a .gz file; 0: never; absent: Content-Encoding if accepted
+    """
+    s = get_settings()
+    if source not in SOURCES:
+        return _bad("unknown_export", f"source must be one of {', '.join(SOURCES)}", 404)
+    fmt = request.args.get("format", "csv")
+    if fmt not in FORMATS:
+        return _bad("invalid_format", f"format must be one of {', '.join(FORMATS)}")
+    if fmt == "parquet" and not parquet_available():
+        return _bad("parquet_unavailable", "pip install 'indigo-machine[export]'", 501)
+    try:
+        since = parse_time(request.args["since"]) if request.args.get("since") else None
+        until = parse_time(request.args["until"]) if request.args.get("until") else None
+    except ValueError as e:
+        return _bad("invalid_time", str(e))
+    try:
+        lanes = parse_lanes(request.args["lanes"]) if request.args.get("lanes") else None
+    except ValueError as e:
+        return _bad("invalid_lanes", str(e))
+
+    mimetype, ext = FORMATS[fmt]
+    headers = {"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+    gz = request.args.get("gzip")
+    # Parquet pages are already compressed
+    if fmt == "parquet" or gz == "0":
+        gzip_level = None
+    elif gz == "1":
+        gzip_level = s.EXPORT_GZIP_LEVEL
+        mimetype, ext = "application/gzip", f"{ext}.gz"
+    else:
+        gzip_level = s.EXPORT_GZIP_LEVEL if request.accept_encodings["gzip"] else None
+        headers["Vary"] = "Accept-Encoding"
+        if gzip_level is not None:
+            headers["Content-Encoding"] = "gzip"
+
+    stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    headers["Content-Disposition"] = f'attachment; filename="indigo-{source}-{stamp}.{ext}"'
+
+    run = ExportRun(source, fmt, gzip_level is not None)
+    _export_log().add(run)
+    stream = export_stream(
+        get_session_factory(),
+        ExportQuery(source, since, until, lanes),
+        fmt,
+        batch_rows=s.EXPORT_BATCH_ROWS,
+        gzip_level=gzip_level,
+        run=run,
+    )
+    # no Content-Length: waitress sends it chunked as the generator yields
+    return Response(stream, mimetype=mimetype, headers=headers)
@@ -2,9 +2,32 @@ from __future__ import annotations
 
 from flask import Blueprint, jsonify
 
+from indigo.api.state import get_command_channel
+from indigo.services.command_ipc import CommandUnavailable
+from indigo.services.health import DEGRADED, FAILED
+
 bp = Blueprint("health", __name__)
 
 
 @bp.get("/api/health")
-def health() -> tuple[dict, int]:
-    return jsonify({"ok": True}), 200
+def health():
+    """
+    Machine health as judged by the runner process (services.health.HealthMonitor:
+    poll/cycle loop heartbeats, device freshness): status ok | degraded | failed.
+
+    200 unless failed (503), so a plain HTTP check catches a stalled loop. A
+    runner that cannot be reached is reported as degraded: this process still
+    serves, and systemd (watchdog / Restart=) owns bringing the runner back.
+    """
+    try:
+        reply = get_command_channel().request({"op": "health"})
+    except CommandUnavailable as e:
+        reply = {"ok": False, "error": "services_unavailable", "detail": str(e)}
+    if reply.get("ok"):
+        body = {"status": reply["health"]["status"], **reply["health"]}
+    else:
+        body = {"status": DEGRADED, "services": reply.get("error", "unavailable")}
+    failed = body["status"] == FAILED
+    resp = jsonify({"ok": not failed, **body})
+    resp.headers["Cache-Control"] = "no-store"
+    return resp, 503 if failed else 200
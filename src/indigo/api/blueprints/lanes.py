@@ -2,10 +2,56 @@ from __future__ import annotations
 
 from flask import Blueprint, jsonify
 
+from indigo.api.http_cache import client_has, not_modified, with_cache_headers
+from indigo.api.state import get_command_channel, get_registry, status_etag, with_staleness
+from indigo.services.command_ipc import CommandUnavailable
+
 bp = Blueprint("lanes", __name__)
 
 
 @bp.get("/api/lanes")
-def lanes() -> tuple[dict, int]:
-    # Stub for Phase 2.x: later we’ll pull from DeviceRegistry snapshots
-    return jsonify({"lanes": []}), 200
+def lanes():
+    reg = get_registry()
+    etag = status_etag("lanes", reg)
+    addrs = list(reg.lane_addrs) if reg else []
+    if client_has(etag):
+        return with_staleness(not_modified(etag), reg, addrs)
+
+    lanes_out = reg.lane_snapshot(include_seen=False) if reg is not None else []
+    return with_staleness(with_cache_headers(jsonify({"lanes": lanes_out}), etag), reg, addrs)
+
+
+def _lane_stats(req: dict) -> dict:
+    # in-process registry if one is attached, else the runner's (which polls the bus)
+    reg = get_registry()
+    if reg is not None:
+        if req.get("addr") is None:
+            return {"ok": True, "lanes": reg.stats.snapshot()}
+        lane = reg.lane_stats(req["addr"])
+        return {"ok": True, "lane": lane} if lane is not None else {"ok": False, "error": "unknown_lane"}
+    try:
+        return get_command_channel().request(req)
+    except CommandUnavailable as e:
+        return {"ok": False, "error": "services_unavailable", "detail": str(e)}
+
+
+def _stats_response(reply: dict):
+    # streaming values move every poll: never cached, no ETag
+    if reply.get("ok"):
+        resp, status = jsonify(reply), 200
+    else:
+        status = 404 if reply.get("error") == "unknown_lane" else 503
+        resp = jsonify({"ok": False, "error": reply.get("error"), "detail": reply.get("detail")})
+    resp.headers["Cache-Control"] = "no-store"
+    return resp, status
+
+
+@bp.get("/api/lanes/stats")
+def lanes_stats():
+    """Rolling temperature statistics of every lane (services.lane_stats.LaneStats)."""
+    return _stats_response(_lane_stats({"op": "lane_stats"}))
+
+
+@bp.get("/api/lanes/<int:lane>/stats")
+def lane_stats(lane: int):
+    return _stats_response(_lane_stats({"op": "lane_stats", "addr": lane}))
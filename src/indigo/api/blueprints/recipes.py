@@ -1,19 +1,53 @@
 from __future__ import annotations
 
-from flask import Blueprint, jsonify, request
+import threading
 
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from indigo.api.coalesce import coalesced
+from indigo.api.http_cache import client_has, not_modified, with_cache_headers
+from indigo.config.settings import get_settings
 from indigo.db.engine import get_session_factory
-from indigo.services.recipe_service import RecipeService
+from indigo.services.recipe_cache import RecipeCache
+from indigo.services.recipe_service import RecipeService, RecipeValidationError
 
 bp = Blueprint("recipes", __name__, url_prefix="/api")
 
+RECIPE_CACHE_EXT = "indigo.recipe_cache"
+_cache_lock = threading.Lock()
+
+
+def build_recipe_cache() -> RecipeCache:
+    """RecipeService + RecipeCache over the process session factory (initializes the DB)."""
+    s = get_settings()
+    return RecipeCache(
+        RecipeService(get_session_factory()),
+        max_entries=s.RECIPE_CACHE_MAX_ENTRIES,
+        revalidate_s=s.RECIPE_CACHE_REVALIDATE_S,
+    )
+
+
+def get_recipe_cache() -> RecipeCache:
+    """One RecipeCache per app; create_app builds it at boot, this is the fallback."""
+    cache = current_app.extensions.get(RECIPE_CACHE_EXT)
+    if cache is None:
+        with _cache_lock:
+            cache = current_app.extensions.get(RECIPE_CACHE_EXT)
+            if cache is None:
+                cache = current_app.extensions[RECIPE_CACHE_EXT] = build_recipe_cache()
+    return cache
+
 
 @bp.post("/lanes/<int:lane_addr>/recipe")
 def upsert_lane_recipe(lane_addr: int):
     payload = request.get_json(silent=True) or {}
-    svc = RecipeService(get_session_factory())
+    cache = get_recipe_cache()
 
-    res = svc.upsert_lane_recipe(lane_addr=lane_addr, payload=payload)
+    try:
+        res = cache.service.upsert_lane_recipe(lane_addr=lane_addr, payload=payload)
+    except RecipeValidationError as e:
+        return jsonify({"ok": False, "error": "validation_failed", "errors": e.errors}), 400
+    cache.invalidate(lane_addr)
     return jsonify(
         {
             "ok": True,
@@ -25,9 +59,72 @@ def upsert_lane_recipe(lane_addr: int):
 
 
 @bp.get("/lanes/<int:lane_addr>/recipe")
+@coalesced
 def get_lane_recipe(lane_addr: int):
-    svc = RecipeService(get_session_factory())
-    r = svc.get_lane_recipe(lane_addr=lane_addr)
-    if r is None:
+    entry = get_recipe_cache().get(lane_addr)
+    if entry is None:
         return jsonify({"ok": False, "error": "recipe_not_found", "lane_addr": lane_addr}), 404
-    return jsonify({"ok": True, "recipe": r})
+
+    if client_has(entry.etag):
+        return not_modified(entry.etag)
+    return with_cache_headers(Response(entry.body, mimetype="application/json"), entry.etag)
+
+
+@bp.get("/lanes/<int:lane_addr>/recipes")
+@coalesced
+def lane_recipe_history(lane_addr: int):
+    """Recipe history summaries, newest first. Query: limit (<=200), cursor (from next_cursor)."""
+    try:
+        limit = int(request.args.get("limit", 50))
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_limit"}), 400
+
+    try:
+        items, next_cursor = get_recipe_cache().service.list_lane_history(
+            lane_addr, limit=limit, cursor=request.args.get("cursor") or None
+        )
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_cursor"}), 400
+    return jsonify({"ok": True, "lane_addr": lane_addr, "items": items, "next_cursor": next_cursor})
+
+
+@bp.post("/recipes/bulk")
+def bulk_upsert_recipes():
+    """
+    Body: {"recipes": {"<lane_addr>": {<recipe payload>}, ...}}
+    All lanes are validated first, then written in one transaction.
+    """
+    body = request.get_json(silent=True) or {}
+    recipes = body.get("recipes")
+    if not isinstance(recipes, dict) or not recipes:
+        return jsonify({"ok": False, "error": "recipes_required"}), 400
+
+    payloads: dict[int, dict] = {}
+    for key, p in recipes.items():
+        try:
+            lane = int(key)
+        except (TypeError, ValueError):
+            return jsonify({"ok": False, "error": "invalid_lane_addr", "lane_addr": key}), 400
+        if lane in payloads:
+            # e.g. "1" and "01": refuse rather than silently drop one payload
+            return jsonify({"ok": False, "error": "duplicate_lane_addr", "lane_addr": lane}), 400
+        payloads[lane] = p
+
+    cache = get_recipe_cache()
+    try:
+        results = cache.service.bulk_upsert_lane_recipes(payloads)
+    except RecipeValidationError as e:
+        return jsonify({"ok": False, "error": "validation_failed", "errors": e.errors}), 400
+
+    for res in results:
+        if res.updated_at_ts:
+            cache.invalidate(res.lane_addr)
+    return jsonify(
+        {
+            "ok": True,
+            "results": [
+                {"lane_addr": r.lane_addr, "recipe_id": r.recipe_id, "updated_at_ts": r.updated_at_ts}
+                for r in results
+            ],
+        }
+    )
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from flask import Blueprint, current_app, jsonify, request
+
+from indigo.api.blueprints.recipes import get_recipe_cache
+from indigo.api.coalesce import coalesced
+from indigo.api.http_cache import client_has, not_modified, with_cache_headers
+from indigo.api.state import get_registry, meta_fields, with_staleness
+from indigo.config.settings import get_settings
+from indigo.services.device_registry import DeviceRegistry
+from indigo.services.recipe_cache import ActiveVersions
+from indigo.services.system_state import compute_system_state
+
+bp = Blueprint("snapshot", __name__)
+
+SNAPSHOT_EXT = "indigo.snapshot"
+
+UNIT_FIELDS = ("addr", "online", "error_status", "staleness_s", "status")
+# top-level field -> sub-fields selectable as "lanes.addr" etc. (None: not projectable)
+FIELDS: dict[str, tuple[str, ...] | None] = {
+    "system": None,
+    "utility": UNIT_FIELDS,
+    "lanes": (*UNIT_FIELDS, "recipe"),
+    "meta": None,
+}
+
+
+def parse_fields(raw: str | None) -> dict[str, frozenset[str] | None]:
+    """
+    "system,lanes.addr,lanes.recipe" -> {"system": None, "lanes": {"addr", "recipe"}}.
+    None / empty selects everything. Raises ValueError on an unknown field.
+    """
+    if not raw or not raw.strip():
+        return dict.fromkeys(FIELDS)
+    picked: dict[str, set[str] | None] = {}
+    for item in (x.strip() for x in raw.split(",")):
+        if not item:
+            continue
+        top, _, sub = item.partition(".")
+        if top not in FIELDS or (sub and sub not in (FIELDS[top] or ())):
+            raise ValueError(item)
+        if not sub:
+            picked[top] = None
+        elif top not in picked or picked[top] is not None:
+            picked.setdefault(top, set()).add(sub)
+    return {k: (None if v is None else frozenset(v)) for k, v in picked.items()}
+
+
+class SnapshotCache:
+    """
+    The version-dependent part of the snapshot (statuses, readiness, recipe
+    versions, meta), rebuilt only when the registry version or the recipe
+    version token changes. Staleness is added per request.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._key: tuple | None = None
+        self._base: dict | None = None
+        self.builds = 0
+
+    def base(self, key: tuple, reg: DeviceRegistry | None, versions: ActiveVersions) -> dict:
+        with self._lock:
+            if key == self._key and self._base is not None:
+                return self._base
+        base = _build_base(reg, versions)
+        with self._lock:
+            self._key, self._base = key, base
+            self.builds += 1
+        return base
+
+
+def _build_base(reg: DeviceRegistry | None, versions: ActiveVersions) -> dict:
+    s = get_settings()
+    state = compute_system_state(reg.utility if reg else None)
+    if reg is not None:
+        utility = reg.utility_snapshot(include_seen=False)
+        lanes = reg.lane_snapshot(include_seen=False)
+    else:
+        utility = {"addr": s.UTILITY_ADDR, "online": False, "error_status": None, "status": None}
+        lanes = [
+            {"addr": a, "online": False, "error_status": None, "status": None} for a in s.LANE_ADDRS
+        ]
+    for lane in lanes:
+        v = versions.versions.get(lane["addr"])
+        lane["recipe"] = {"recipe_id": v[0], "sha256": v[1]} if v else None
+    return {
+        "system": {"ready": state.system_ready, "reason": state.reason},
+        "utility": utility,
+        "lanes": lanes,
+        "meta": meta_fields(s),
+    }
+
+
+def _get_snapshot_cache() -> SnapshotCache:
+    cache = current_app.extensions.get(SNAPSHOT_EXT)
+    if cache is None:
+        cache = current_app.extensions.setdefault(SNAPSHOT_EXT, SnapshotCache())
+    return cache
+
+
+def _unit(entry: dict, seen: dict[int, float], now: float, sub: frozenset[str] | None) -> dict:
+    ts = seen.get(entry["addr"])
+    out = {**entry, "staleness_s": None if ts is None else round(max(0.0, now - ts), 3)}
+    return out if sub is None else {k: v for k, v in out.items() if k in sub}
+
+
+@bp.get("/api/snapshot")
+@coalesced
+def snapshot():
+    """
+    Everything one machine screen needs in one response, from cached state:
+    system readiness, utility + lane statuses with staleness_s, each lane's
+    active recipe (id, sha256) and the machine config (meta).
+
+    fields= projects the body, e.g. fields=system,lanes.addr,lanes.online.
+    The ETag covers statuses and recipes (not staleness): a 304 means nothing
+    but the poll age changed, which is in X-Indigo-Staleness-S.
+    """
+    try:
+        fields = parse_fields(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify(
+            {"ok": False, "error": "invalid_fields", "field": str(e), "fields": FIELDS}
+        ), 400
+
+    s = get_settings()
+    reg = get_registry()
+    lane_addrs = list(reg.lane_addrs) if reg else list(s.LANE_ADDRS)
+    versions = get_recipe_cache().active_versions(lane_addrs)
+    key = (reg.boot_id, reg.version) if reg else ("none", 0)
+    fields_key = ",".join(
+        f"{k}.{'+'.join(sorted(v))}" if v else k for k, v in sorted(fields.items())
+    )
+    etag = f"snapshot-{key[0]}-{key[1]}-{versions.token}-{fields_key}"
+    addrs = [reg.utility_addr, *reg.lane_addrs] if reg else []
+    if client_has(etag):
+        return with_staleness(not_modified(etag), reg, addrs)
+
+    base = _get_snapshot_cache().base((*key, versions.token), reg, versions)
+    now = time.time()
+    seen = dict(reg.last_seen_ts) if reg else {}
+    body: dict = {"ok": True, "generated_ts": round(now, 3)}
+    for name, sub in fields.items():
+        if name == "utility":
+            body[name] = _unit(base["utility"], seen, now, sub)
+        elif name == "lanes":
+            body[name] = [_unit(lane, seen, now, sub) for lane in base["lanes"]]
+        else:
+            body[name] = base[name]
+    return with_staleness(with_cache_headers(jsonify(body), etag), reg, addrs)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import functools
+import threading
+from collections import Counter
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from flask import Response, current_app, request
+
+COALESCE_EXT = "indigo.coalesce"
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one execution: the first caller
+    (leader) runs fn, callers arriving while it runs wait and get its result
+    or its exception. Nothing is kept once the call finishes, so this never
+    serves stale data; it only collapses simultaneous work.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_waiters = 0
+        self.by_name: Counter[str] = Counter()  # coalesced calls per name
+
+    def do(self, key: Hashable, fn: Callable[[], Any], *, name: str = "") -> tuple[Any, bool]:
+        """Returns (result, shared); shared is True for callers that did not run fn."""
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                self.executions += 1
+            else:
+                call.followers += 1
+                self.coalesced += 1
+                self.by_name[name] += 1
+                self.max_waiters = max(self.max_waiters, call.followers)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.executions + self.coalesced
+            return {
+                "requests": total,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "coalesced_ratio": (self.coalesced / total) if total else 0.0,
+                "errors": self.errors,
+                "in_flight": len(self._inflight),
+                "max_waiters": self.max_waiters,
+                "coalesced_by_endpoint": dict(self.by_name),
+            }
+
+
+def get_single_flight() -> SingleFlight:
+    flight = current_app.extensions.get(COALESCE_EXT)
+    if flight is None:
+        flight = current_app.extensions.setdefault(COALESCE_EXT, SingleFlight())
+    return flight
+
+
+def _freeze(resp: Response) -> tuple[bytes, int, list[tuple[str, str]]]:
+    return resp.get_data(), resp.status_code, list(resp.headers.items())
+
+
+def coalesced(view: Callable) -> Callable:
+    """
+    Collapse identical concurrent GETs of a read endpoint into one view call.
+
+    Requests are identical when endpoint, URL arguments, query string and
+    If-None-Match all match. The leader's response is serialized once and each
+    waiter gets its own Response built from the same bytes and headers.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != "GET":
+            return view(*args, **kwargs)
+        key = (
+            request.endpoint,
+            tuple(sorted(kwargs.items())),
+            request.query_string,
+            request.headers.get("If-None-Match"),
+        )
+        (body, status, headers), _ = get_single_flight().do(
+            key, lambda: _freeze(current_app.make_response(view(*args, **kwargs))), name=request.endpoint or ""
+        )
+        return Response(body, status=status, headers=headers)
+
+    return wrapper
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from flask import Response, request
+
+# Clients may keep a copy but must revalidate it (cheap 304) before reuse.
+CACHE_REVALIDATE = "no-cache"
+
+
+def client_has(etag: str) -> bool:
+    """
+    True if the request's If-None-Match already names this entity tag.
+
+    Uses the weak comparison RFC 9110 requires for If-None-Match; our tags are
+    always strong, so this only matters for clients that echo them back as W/.
+    """
+    return request.if_none_match.contains_weak(etag)
+
+
+def not_modified(etag: str, cache_control: str = CACHE_REVALIDATE) -> Response:
+    resp = Response(status=304)
+    return with_cache_headers(resp, etag, cache_control)
+
+
+def with_cache_headers(resp: Response, etag: str, cache_control: str = CACHE_REVALIDATE) -> Response:
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = cache_control
+    return resp
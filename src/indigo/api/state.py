@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import time
+
+from flask import current_app
+
+from indigo.config.settings import Settings, get_settings
+from indigo.services.command_ipc import CommandClient
+from indigo.services.device_registry import DeviceRegistry
+
+REGISTRY_EXT = "indigo.registry"
+# Anything with request(dict) -> dict: a CommandClient to the runner process, or
+# (in-process, tests) the CommandServer itself
+COMMANDS_EXT = "indigo.commands"
+
+
+def get_registry() -> DeviceRegistry | None:
+    """
+    Registry attached by create_app(registry=...), if any.
+
+    The API process does not poll the bus itself; without an injected registry
+    status endpoints fall back to empty (stub) responses.
+    """
+    return current_app.extensions.get(REGISTRY_EXT)
+
+
+def get_command_channel():
+    """Channel to the runner process (commands, health); create_app(commands=...) overrides it."""
+    channel = current_app.extensions.get(COMMANDS_EXT)
+    if channel is None:
+        s = get_settings()
+        channel = current_app.extensions.setdefault(
+            COMMANDS_EXT, CommandClient(s.COMMAND_SOCKET, timeout_s=s.COMMAND_IPC_TIMEOUT_S)
+        )
+    return channel
+
+
+def meta_fields(s: Settings) -> dict:
+    """Machine configuration shared by /api/_meta and /api/snapshot."""
+    return {
+        "simulation_mode": s.SIMULATION_MODE,
+        "poll_hz": s.POLL_HZ,
+        "lane_addrs": list(s.LANE_ADDRS),
+        "utility_addr": s.UTILITY_ADDR,
+        "enable_api": s.ENABLE_API,
+        "enable_ui": s.ENABLE_UI,
+        "enable_admin": s.ENABLE_ADMIN,
+    }
+
+
+def status_etag(kind: str, reg: DeviceRegistry | None) -> str:
+    if reg is None:
+        return f"{kind}-none"
+    return f"{kind}-{reg.boot_id}-{reg.version}"
+
+
+def with_staleness(resp, reg: DeviceRegistry | None, addrs: list[int]):
+    """
+    Poll freshness travels in a header, not the body, so it can change every poll
+    without invalidating the ETag. X-Indigo-Staleness-S is the age of the oldest
+    sample among addrs ("unknown" if one was never seen).
+    """
+    if reg is None:
+        return resp
+    oldest = reg.oldest_seen_ts(addrs)
+    resp.headers["X-Indigo-Staleness-S"] = "unknown" if oldest is None else f"{max(0.0, time.time() - oldest):.3f}"
+    return resp
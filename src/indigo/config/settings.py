@@ -70,6 +70,7 @@ class Settings:
     # Core toggles (keep stable for deployment)
     ENABLE_API: bool
     ENABLE_UI: bool
+    ENABLE_ADMIN: bool  # /api/admin/* (trace dump, profiler)
 
     # Mode
     SIMULATION_MODE: bool
@@ -77,9 +78,27 @@ class Settings:
     # API
     API_HOST: str
     API_PORT: int
+    # waitress (run_prod)
+    API_THREADS: int
+    API_CONNECTION_LIMIT: int
+    API_CHANNEL_TIMEOUT_S: int  # idle keep-alive connections are closed after this
+    API_BACKLOG: int
 
     # Polling
     POLL_HZ: float
+    # Bus loop in its own process (runner): pinned core (-1 = any), SCHED_FIFO
+    # priority (0 = off), nice (0 = unchanged)
+    BUS_PROCESS: bool
+    BUS_CPU: int
+    BUS_SCHED_FIFO: int
+    BUS_NICE: int
+
+    # Per-lane temperature statistics (services.lane_stats): EWMA weight,
+    # regression window (samples), setpoint tolerance and hold time for "stable"
+    LANE_STATS_ALPHA: float
+    LANE_STATS_WINDOW: int
+    SETPOINT_TOLERANCE_C: float
+    SETPOINT_STABLE_S: float
 
     # Addresses
     LANE_ADDRS: tuple[int, ...]
@@ -89,11 +108,56 @@ class Settings:
     INDIGO_DATA_DIR: Path
     LOG_DIR: Path
     LOG_LEVEL: str
+    LOG_MAX_BYTES: int
+    LOG_BACKUP_COUNT: int
+    LOG_ROTATE_WHEN: str  # "" = rotate by size; else TimedRotatingFileHandler `when` (e.g. "midnight")
+    LOG_COMPRESS: bool
+    LOG_RATE_LIMIT_BURST: int
+    LOG_RATE_LIMIT_WINDOW_S: float
 
     # Database
     DATABASE_URL: str
     SQLITE_WAL: bool
 
+    # Recipe read cache (API process)
+    RECIPE_CACHE_MAX_ENTRIES: int
+    RECIPE_CACHE_REVALIDATE_S: float
+
+    # Safety interlocks (evaluated inline in the poll loop)
+    SAFETY_INTERLOCKS: bool
+    SAFETY_MAX_TEMP_C: float
+    SAFETY_OVERTEMP_MARGIN_C: float
+
+    # Alarms (services.alarms): evaluated every poll tick in the runner process.
+    # ALARM_RULES_FILE is a JSON list of rules; empty = the built-in set below
+    ALARMS: bool
+    ALARM_RULES_FILE: str
+    ALARM_MAX_TEMP_C: float
+    ALARM_PRESSURE_RAW_MIN: float
+    ALARM_PRESSURE_RAW_MAX: float
+
+    # Lane telemetry samples (runner -> lane_telemetry; 0 = off) and streaming
+    # exports (GET /api/export/<source>): rows per SQLite batch, gzip level
+    TELEMETRY_INTERVAL_S: float
+    EXPORT_BATCH_ROWS: int
+    EXPORT_GZIP_LEVEL: int
+
+    # Cycle runner (runner process)
+    CYCLE_SPIN_S: float
+
+    # Health (/api/health, systemd watchdog): a loop or board is degraded after
+    # this many of its periods without progress, failed after the second
+    HEALTH_DEGRADED_PERIODS: float
+    HEALTH_FAILED_PERIODS: float
+
+    # Command API -> runner process IPC (unix socket)
+    COMMAND_SOCKET: Path
+    COMMAND_IPC_TIMEOUT_S: float
+    COMMAND_JOBS_MAX: int  # newest jobs kept for status reads
+
+    # Boot: prefill caches (API recipe cache, runner plan cache) before serving
+    STARTUP_WARMUP: bool
+
     @staticmethod
     def load() -> Settings:
         """
@@ -114,17 +178,56 @@ class Settings:
         return Settings(
             ENABLE_API=_env_bool("ENABLE_API", True),
             ENABLE_UI=_env_bool("ENABLE_UI", False),
+            ENABLE_ADMIN=_env_bool("ENABLE_ADMIN", True),
             SIMULATION_MODE=_env_bool("SIMULATION_MODE", True),
             API_HOST=os.getenv("API_HOST", "127.0.0.1"),
             API_PORT=_env_int("API_PORT", 5000),
+            API_THREADS=_env_int("API_THREADS", 4),
+            API_CONNECTION_LIMIT=_env_int("API_CONNECTION_LIMIT", 64),
+            API_CHANNEL_TIMEOUT_S=_env_int("API_CHANNEL_TIMEOUT_S", 30),
+            API_BACKLOG=_env_int("API_BACKLOG", 128),
             POLL_HZ=_env_float("POLL_HZ", 2.0),
+            BUS_PROCESS=_env_bool("BUS_PROCESS", False),
+            BUS_CPU=_env_int("BUS_CPU", -1),
+            BUS_SCHED_FIFO=_env_int("BUS_SCHED_FIFO", 0),
+            BUS_NICE=_env_int("BUS_NICE", 0),
+            LANE_STATS_ALPHA=_env_float("LANE_STATS_ALPHA", 0.2),
+            LANE_STATS_WINDOW=_env_int("LANE_STATS_WINDOW", 32),
+            SETPOINT_TOLERANCE_C=_env_float("SETPOINT_TOLERANCE_C", 0.5),
+            SETPOINT_STABLE_S=_env_float("SETPOINT_STABLE_S", 30.0),
             LANE_ADDRS=lane_addrs,
             UTILITY_ADDR=_env_int("UTILITY_ADDR", 9),
             INDIGO_DATA_DIR=data_dir,
             LOG_DIR=log_dir,
             LOG_LEVEL=os.getenv("LOG_LEVEL", "INFO"),
+            LOG_MAX_BYTES=_env_int("LOG_MAX_BYTES", 10 * 1024 * 1024),
+            LOG_BACKUP_COUNT=_env_int("LOG_BACKUP_COUNT", 5),
+            LOG_ROTATE_WHEN=os.getenv("LOG_ROTATE_WHEN", ""),
+            LOG_COMPRESS=_env_bool("LOG_COMPRESS", True),
+            LOG_RATE_LIMIT_BURST=_env_int("LOG_RATE_LIMIT_BURST", 5),
+            LOG_RATE_LIMIT_WINDOW_S=_env_float("LOG_RATE_LIMIT_WINDOW_S", 60.0),
             DATABASE_URL=os.getenv("DATABASE_URL", default_db),
             SQLITE_WAL=_env_bool("SQLITE_WAL", True),
+            RECIPE_CACHE_MAX_ENTRIES=_env_int("RECIPE_CACHE_MAX_ENTRIES", 64),
+            RECIPE_CACHE_REVALIDATE_S=_env_float("RECIPE_CACHE_REVALIDATE_S", 1.0),
+            SAFETY_INTERLOCKS=_env_bool("SAFETY_INTERLOCKS", True),
+            SAFETY_MAX_TEMP_C=_env_float("SAFETY_MAX_TEMP_C", 150.0),
+            SAFETY_OVERTEMP_MARGIN_C=_env_float("SAFETY_OVERTEMP_MARGIN_C", 10.0),
+            ALARMS=_env_bool("ALARMS", True),
+            ALARM_RULES_FILE=os.getenv("ALARM_RULES_FILE", ""),
+            ALARM_MAX_TEMP_C=_env_float("ALARM_MAX_TEMP_C", 140.0),
+            ALARM_PRESSURE_RAW_MIN=_env_float("ALARM_PRESSURE_RAW_MIN", 0.0),
+            ALARM_PRESSURE_RAW_MAX=_env_float("ALARM_PRESSURE_RAW_MAX", 65535.0),
+            TELEMETRY_INTERVAL_S=_env_float("TELEMETRY_INTERVAL_S", 5.0),
+            EXPORT_BATCH_ROWS=_env_int("EXPORT_BATCH_ROWS", 1000),
+            EXPORT_GZIP_LEVEL=_env_int("EXPORT_GZIP_LEVEL", 6),
+            CYCLE_SPIN_S=_env_float("CYCLE_SPIN_S", 0.002),
+            HEALTH_DEGRADED_PERIODS=_env_float("HEALTH_DEGRADED_PERIODS", 3.0),
+            HEALTH_FAILED_PERIODS=_env_float("HEALTH_FAILED_PERIODS", 10.0),
+            COMMAND_SOCKET=Path(os.getenv("COMMAND_SOCKET", str(data_dir / "commands.sock"))).resolve(),
+            COMMAND_IPC_TIMEOUT_S=_env_float("COMMAND_IPC_TIMEOUT_S", 1.0),
+            COMMAND_JOBS_MAX=_env_int("COMMAND_JOBS_MAX", 1024),
+            STARTUP_WARMUP=_env_bool("STARTUP_WARMUP", True),
         )
 
 
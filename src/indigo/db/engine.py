@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+import threading
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
 from indigo.config.settings import Settings, get_settings
@@ -14,6 +18,10 @@ def build_engine(settings: Settings):
         connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {},
     )
 
+    db_file = engine.url.database if engine.url.get_backend_name() == "sqlite" else None
+    if db_file and db_file != ":memory:" and not db_file.startswith("file:"):
+        Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+
     # Optional WAL mode for SQLite (recommended on SBC)
     if settings.DATABASE_URL.startswith("sqlite") and settings.SQLITE_WAL:
         with engine.connect() as conn:
@@ -22,17 +30,63 @@ def build_engine(settings: Settings):
     return engine
 
 
+MIGRATIONS_DIR = Path(__file__).with_name("migrations")
+
+# Newest revision in migrations/versions (a test keeps the two in sync). A
+# database already stamped with it is used as-is, so boot does not import alembic.
+SCHEMA_HEAD = "0004"
+
+
+def schema_is_current(engine: Engine) -> bool:
+    with engine.connect() as conn:
+        if "alembic_version" not in inspect(conn).get_table_names():
+            return False
+        return conn.execute(text("SELECT version_num FROM alembic_version")).scalar() == SCHEMA_HEAD
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """
+    Brings the database to the current schema.
+
+    An empty database is created from the models and stamped at head; anything
+    else (including pre-migration databases with no alembic_version table) is
+    upgraded through the revisions in migrations/versions.
+    """
+    # alembic is ~0.35 s of imports; only pay it when there is something to do
+    from alembic import command
+    from alembic.config import Config
+
+    cfg = Config()
+    cfg.set_main_option("script_location", str(MIGRATIONS_DIR))
+    cfg.set_main_option("sqlalchemy.url", engine.url.render_as_string(hide_password=False))
+
+    with engine.begin() as conn:
+        cfg.attributes["connection"] = conn
+        if set(inspect(conn).get_table_names()) <= {"alembic_version"}:
+            Base.metadata.create_all(conn)
+            command.stamp(cfg, "head")
+        else:
+            command.upgrade(cfg, "head")
+
+
 def init_db(settings: Settings) -> sessionmaker:
     engine = build_engine(settings)
-    Base.metadata.create_all(engine)
+    if not schema_is_current(engine):
+        upgrade_schema(engine)
     return sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
 
 _SESSION_FACTORY: sessionmaker | None = None
+_SESSION_LOCK = threading.Lock()
 
 
 def get_session_factory() -> sessionmaker:
+    """Process-wide session factory; the first caller builds the engine and checks the schema."""
     global _SESSION_FACTORY
-    if _SESSION_FACTORY is None:
-        _SESSION_FACTORY = init_db(get_settings())
-    return _SESSION_FACTORY
+    factory = _SESSION_FACTORY
+    if factory is None:
+        with _SESSION_LOCK:
+            factory = _SESSION_FACTORY
+            if factory is None:
+                factory = _SESSION_FACTORY = init_db(get_settings())
+    return factory
@@ -0,0 +1,210 @@
+"""Content-addressed recipe bodies
+
+Moves the body columns and pin-break steps of every existing recipes row into
+recipe_bodies (one row per distinct content) and leaves recipes as the per-lane
+assignment/history table pointing at it via body_id.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0001"
+down_revision: str | None = None
+branch_labels: str | None = None
+depends_on: str | None = None
+
+# Frozen copy of the schema this revision works with; migrations must not import
+# the live ORM models, which keep changing after this file is written.
+BODY_COLUMNS: tuple[str, ...] = (
+    "cycle_type",
+    "fixed_hold_time",
+    "autopinbreak_enabled",
+    "num_autopinbreaks",
+    "attempt_time_s",
+    "thermal_temp_c",
+    "reflux_enabled",
+    "reflux_temp_c",
+    "purge_vac_switchpoint",
+    "stir_speed_rpm",
+    "purge_set_pressure",
+)
+STEP_COLUMNS: tuple[str, ...] = (
+    "autopinbreak_time_ms",
+    "autopinbreak_pressure",
+    "postpinbreak_thermal_temp_c",
+    "postpinbreak_pressure",
+    "postpinbreak_reflux_temp_c",
+    "postpinbreak_stir_speed_rpm",
+)
+
+
+def _body_columns() -> list[sa.Column]:
+    return [
+        sa.Column("cycle_type", sa.String(32), nullable=False),
+        sa.Column("fixed_hold_time", sa.Boolean(), nullable=False),
+        sa.Column("autopinbreak_enabled", sa.Boolean(), nullable=False),
+        sa.Column("num_autopinbreaks", sa.Integer(), nullable=False),
+        sa.Column("attempt_time_s", sa.Integer(), nullable=False),
+        sa.Column("thermal_temp_c", sa.Float(), nullable=False),
+        sa.Column("reflux_enabled", sa.Boolean(), nullable=False),
+        sa.Column("reflux_temp_c", sa.Float(), nullable=False),
+        sa.Column("purge_vac_switchpoint", sa.Float(), nullable=False),
+        sa.Column("stir_speed_rpm", sa.Integer(), nullable=False),
+        sa.Column("purge_set_pressure", sa.Float(), nullable=False),
+    ]
+
+
+def _step_columns() -> list[sa.Column]:
+    return [
+        sa.Column("autopinbreak_time_ms", sa.Integer()),
+        sa.Column("autopinbreak_pressure", sa.Float()),
+        sa.Column("postpinbreak_thermal_temp_c", sa.Float()),
+        sa.Column("postpinbreak_pressure", sa.Float()),
+        sa.Column("postpinbreak_reflux_temp_c", sa.Float()),
+        sa.Column("postpinbreak_stir_speed_rpm", sa.Integer()),
+    ]
+
+
+def _content_sha256(columns: dict[str, Any], steps: list[dict[str, Any]]) -> str:
+    # must stay identical to RecipeBody.compute_content_sha256 as of this revision
+    body = {
+        "columns": {k: columns[k] for k in sorted(columns) if k in BODY_COLUMNS},
+        "steps": [{k: v for k, v in sorted(st.items()) if k not in ("id", "body_id")} for st in steps],
+    }
+    normalized = json.dumps(body, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    recipe_bodies = op.create_table(
+        "recipe_bodies",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("content_sha256", sa.String(64), nullable=False, unique=True),
+        *_body_columns(),
+        sa.Column("created_ts", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+
+    old_recipes = sa.table("recipes", sa.column("id", sa.Integer()), *_body_columns())
+    old_steps = sa.table(
+        "recipe_pinbreak_steps",
+        sa.column("recipe_id", sa.Integer()),
+        sa.column("step_index", sa.Integer()),
+        *_step_columns(),
+    )
+
+    steps_by_recipe: dict[int, list[dict[str, Any]]] = {}
+    for row in conn.execute(sa.select(old_steps).order_by(old_steps.c.recipe_id, old_steps.c.step_index)).mappings():
+        steps_by_recipe.setdefault(row["recipe_id"], []).append(
+            {"step_index": row["step_index"], **{k: row[k] for k in STEP_COLUMNS}}
+        )
+
+    body_of_recipe: dict[int, str] = {}
+    bodies: dict[str, tuple[dict[str, Any], list[dict[str, Any]]]] = {}
+    for row in conn.execute(sa.select(old_recipes).order_by(old_recipes.c.id)).mappings():
+        cols = {k: row[k] for k in BODY_COLUMNS}
+        steps = steps_by_recipe.get(row["id"], [])
+        sha = _content_sha256(cols, steps)
+        body_of_recipe[row["id"]] = sha
+        bodies.setdefault(sha, (cols, steps))
+
+    body_ids: dict[str, int] = {}
+    for sha, (cols, _) in bodies.items():
+        body_ids[sha] = conn.execute(
+            recipe_bodies.insert().values(content_sha256=sha, **cols).returning(recipe_bodies.c.id)
+        ).scalar_one()
+
+    # steps now hang off the body
+    op.rename_table("recipe_pinbreak_steps", "_recipe_pinbreak_steps_old")
+    op.drop_index("ix_recipe_pinbreak_steps_recipe_id", table_name="_recipe_pinbreak_steps_old")
+    new_steps = op.create_table(
+        "recipe_pinbreak_steps",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("body_id", sa.Integer(), sa.ForeignKey("recipe_bodies.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("step_index", sa.Integer(), nullable=False),
+        *_step_columns(),
+        sa.UniqueConstraint("body_id", "step_index", name="uq_recipe_body_step_index"),
+    )
+    op.create_index("ix_recipe_pinbreak_steps_body_id", "recipe_pinbreak_steps", ["body_id"])
+    step_rows = [{"body_id": body_ids[sha], **st} for sha, (_, steps) in bodies.items() for st in steps]
+    if step_rows:
+        conn.execute(new_steps.insert(), step_rows)
+    op.drop_table("_recipe_pinbreak_steps_old")
+
+    # recipes becomes the assignment table
+    with op.batch_alter_table("recipes") as batch:
+        batch.add_column(sa.Column("body_id", sa.Integer(), nullable=True))
+    assignments = sa.table("recipes", sa.column("id", sa.Integer()), sa.column("body_id", sa.Integer()))
+    for recipe_id, sha in body_of_recipe.items():
+        conn.execute(assignments.update().where(assignments.c.id == recipe_id).values(body_id=body_ids[sha]))
+    with op.batch_alter_table("recipes", recreate="always") as batch:
+        batch.alter_column("body_id", existing_type=sa.Integer(), nullable=False)
+        batch.create_foreign_key("fk_recipes_body_id_recipe_bodies", "recipe_bodies", ["body_id"], ["id"])
+        batch.create_index("ix_recipes_body_id", ["body_id"])
+        for name in BODY_COLUMNS:
+            batch.drop_column(name)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+
+    with op.batch_alter_table("recipes") as batch:
+        for col in _body_columns():
+            batch.add_column(sa.Column(col.name, col.type, nullable=True))
+
+    bodies = sa.table("recipe_bodies", sa.column("id", sa.Integer()), *_body_columns())
+    recipes = sa.table(
+        "recipes", sa.column("id", sa.Integer()), sa.column("body_id", sa.Integer()), *_body_columns()
+    )
+    body_rows = {row["id"]: dict(row) for row in conn.execute(sa.select(bodies)).mappings()}
+    recipe_rows = conn.execute(sa.select(recipes.c.id, recipes.c.body_id)).all()
+    for recipe_id, body_id in recipe_rows:
+        cols = {k: body_rows[body_id][k] for k in BODY_COLUMNS}
+        conn.execute(recipes.update().where(recipes.c.id == recipe_id).values(**cols))
+
+    steps = sa.table(
+        "recipe_pinbreak_steps",
+        sa.column("body_id", sa.Integer()),
+        sa.column("step_index", sa.Integer()),
+        *_step_columns(),
+    )
+    steps_by_body: dict[int, list[dict[str, Any]]] = {}
+    for row in conn.execute(sa.select(steps)).mappings():
+        steps_by_body.setdefault(row["body_id"], []).append(
+            {"step_index": row["step_index"], **{k: row[k] for k in STEP_COLUMNS}}
+        )
+
+    op.drop_table("recipe_pinbreak_steps")
+    old_steps = op.create_table(
+        "recipe_pinbreak_steps",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("recipe_id", sa.Integer(), sa.ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("step_index", sa.Integer(), nullable=False),
+        *_step_columns(),
+        sa.UniqueConstraint("recipe_id", "step_index", name="uq_recipe_step_index"),
+    )
+    op.create_index("ix_recipe_pinbreak_steps_recipe_id", "recipe_pinbreak_steps", ["recipe_id"])
+    step_rows = [
+        {"recipe_id": recipe_id, **st} for recipe_id, body_id in recipe_rows for st in steps_by_body.get(body_id, [])
+    ]
+    if step_rows:
+        conn.execute(old_steps.insert(), step_rows)
+
+    with op.batch_alter_table("recipes", recreate="always") as batch:
+        batch.drop_index("ix_recipes_body_id")
+        batch.drop_constraint("fk_recipes_body_id_recipe_bodies", type_="foreignkey")
+        batch.drop_column("body_id")
+        for col in _body_columns():
+            batch.alter_column(col.name, existing_type=col.type, nullable=False)
+    op.drop_table("recipe_bodies")
@@ -0,0 +1,58 @@
+"""Recipe lookup indexes and one active recipe per lane
+
+Replaces the single-column lane/active indexes (and the redundant (id, lane)
+unique constraint) with composite indexes for active lookups and id-keyset
+history paging, plus a partial unique index enforcing at most one active
+recipe per lane. Lanes that already have several active rows keep only the
+newest one active.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.execute(
+        sa.text(
+            "UPDATE recipes SET active = 0 WHERE active = 1 AND id < "
+            "(SELECT max(r2.id) FROM recipes AS r2 WHERE r2.lane = recipes.lane AND r2.active = 1)"
+        )
+    )
+
+    op.drop_index("ix_recipes_lane", table_name="recipes")
+    op.drop_index("ix_recipes_active", table_name="recipes")
+    with op.batch_alter_table("recipes") as batch:
+        batch.drop_constraint("uq_recipe_id_lane", type_="unique")
+
+    op.create_index("ix_recipes_lane_active", "recipes", ["lane", "active"])
+    op.create_index("ix_recipes_lane_id", "recipes", ["lane", "id"])
+    op.create_index(
+        "uq_recipes_one_active_per_lane",
+        "recipes",
+        ["lane"],
+        unique=True,
+        sqlite_where=sa.text("active = 1"),
+        postgresql_where=sa.text("active"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_recipes_one_active_per_lane", table_name="recipes")
+    op.drop_index("ix_recipes_lane_id", table_name="recipes")
+    op.drop_index("ix_recipes_lane_active", table_name="recipes")
+
+    with op.batch_alter_table("recipes") as batch:
+        batch.create_unique_constraint("uq_recipe_id_lane", ["id", "lane"])
+    op.create_index("ix_recipes_active", "recipes", ["active"])
+    op.create_index("ix_recipes_lane", "recipes", ["lane"])
@@ -0,0 +1,39 @@
+"""Alarm event history
+
+Adds alarm_events: one row per alarm transition (raised, cleared, acked),
+written by the runner's alarm recorder.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0003"
+down_revision: str | None = "0002"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "alarm_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("ts", sa.Float(), nullable=False),
+        sa.Column("rule", sa.String(64), nullable=False),
+        sa.Column("lane", sa.Integer(), nullable=False),
+        sa.Column("severity", sa.String(16), nullable=False),
+        sa.Column("state", sa.String(16), nullable=False),
+        sa.Column("value", sa.Float(), nullable=True),
+        sa.Column("message", sa.String(200), nullable=True),
+    )
+    op.create_index("ix_alarm_events_lane_id", "alarm_events", ["lane", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alarm_events_lane_id", table_name="alarm_events")
+    op.drop_table("alarm_events")
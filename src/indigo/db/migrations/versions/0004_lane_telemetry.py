@@ -0,0 +1,45 @@
+"""Lane telemetry samples and alarm event time index
+
+Adds lane_telemetry (periodic lane status samples written by the runner) and
+an index on alarm_events.ts, both used to bound export time ranges.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0004"
+down_revision: str | None = "0003"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "lane_telemetry",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("ts", sa.Float(), nullable=False),
+        sa.Column("lane", sa.Integer(), nullable=False),
+        sa.Column("reflux_temp_c", sa.Float(), nullable=False),
+        sa.Column("thermal_temp_c", sa.Float(), nullable=False),
+        sa.Column("reflux_sp_c", sa.Float(), nullable=False),
+        sa.Column("thermal_sp_c", sa.Float(), nullable=False),
+        sa.Column("stir_speed_cmd", sa.Integer(), nullable=False),
+        sa.Column("pressure_raw", sa.Integer(), nullable=False),
+        sa.Column("stir_running", sa.Boolean(), nullable=False),
+        sa.Column("error_status", sa.Integer(), nullable=False),
+        sa.Column("io_bits", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_lane_telemetry_ts", "lane_telemetry", ["ts"])
+    op.create_index("ix_alarm_events_ts", "alarm_events", ["ts"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alarm_events_ts", table_name="alarm_events")
+    op.drop_index("ix_lane_telemetry_ts", table_name="lane_telemetry")
+    op.drop_table("lane_telemetry")
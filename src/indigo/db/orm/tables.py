@@ -10,11 +10,14 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
     func,
+    text,
 )
+from sqlalchemy.ext.associationproxy import AssociationProxy, association_proxy
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -22,13 +25,35 @@ class Base(DeclarativeBase):
     pass
 
 
-class Recipe(Base):
-    __tablename__ = "recipes"
+# Columns that live on RecipeBody (and are proxied read-only from Recipe).
+BODY_COLUMNS: tuple[str, ...] = (
+    "cycle_type",
+    "fixed_hold_time",
+    "autopinbreak_enabled",
+    "num_autopinbreaks",
+    "attempt_time_s",
+    "thermal_temp_c",
+    "reflux_enabled",
+    "reflux_temp_c",
+    "purge_vac_switchpoint",
+    "stir_speed_rpm",
+    "purge_set_pressure",
+)
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    lane: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
 
-    name: Mapped[str | None] = mapped_column(String(200))
+class RecipeBody(Base):
+    """
+    Content-addressed recipe body: everything that affects execution, stored once.
+
+    content_sha256 is computed from the normalized columns + steps (not the raw
+    payload), so cosmetic differences (name, key spelling, extra keys) map to
+    the same row. Lanes point at bodies through Recipe rows.
+    """
+
+    __tablename__ = "recipe_bodies"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    content_sha256: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
 
     # Scalars
     cycle_type: Mapped[str] = mapped_column(String(32), default="full")
@@ -47,21 +72,78 @@ class Recipe(Base):
     stir_speed_rpm: Mapped[int] = mapped_column(Integer, default=0)
     purge_set_pressure: Mapped[float] = mapped_column(Float, default=0.0)
 
-    # Versioning / selection
-    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
     created_ts: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
-    active: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
 
     # Children
     pinbreak_steps: Mapped[list[RecipePinBreakStep]] = relationship(
-        back_populates="recipe",
+        back_populates="body",
         cascade="all, delete-orphan",
         order_by="RecipePinBreakStep.step_index",
     )
 
+    @staticmethod
+    def compute_content_sha256(columns: dict[str, Any], steps: list[dict[str, Any]]) -> str:
+        """Hash of the normalized body columns and step rows (no name, no ids)."""
+        body = {
+            "columns": {k: columns[k] for k in sorted(columns) if k in BODY_COLUMNS},
+            "steps": [{k: v for k, v in sorted(st.items()) if k not in ("id", "body_id")} for st in steps],
+        }
+        normalized = json.dumps(body, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class Recipe(Base):
+    """
+    A lane's recipe assignment (one row per activation, i.e. the lane's history).
+
+    The body itself is shared via body_id; assigning an already-stored body to a
+    lane is a single small insert here. Body fields and steps are readable
+    through the proxies below (e.g. recipe.thermal_temp_c, recipe.pinbreak_steps).
+    """
+
+    __tablename__ = "recipes"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    lane: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    name: Mapped[str | None] = mapped_column(String(200))
+
+    body_id: Mapped[int] = mapped_column(ForeignKey("recipe_bodies.id"), nullable=False, index=True)
+    body: Mapped[RecipeBody] = relationship()
+
+    # Versioning / selection (sha256 is of the raw payload; used for idempotent upserts)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_ts: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    active: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    # Read-only views of the shared body
+    cycle_type: AssociationProxy[str] = association_proxy("body", "cycle_type")
+    fixed_hold_time: AssociationProxy[bool] = association_proxy("body", "fixed_hold_time")
+    autopinbreak_enabled: AssociationProxy[bool] = association_proxy("body", "autopinbreak_enabled")
+    num_autopinbreaks: AssociationProxy[int] = association_proxy("body", "num_autopinbreaks")
+    attempt_time_s: AssociationProxy[int] = association_proxy("body", "attempt_time_s")
+    thermal_temp_c: AssociationProxy[float] = association_proxy("body", "thermal_temp_c")
+    reflux_enabled: AssociationProxy[bool] = association_proxy("body", "reflux_enabled")
+    reflux_temp_c: AssociationProxy[float] = association_proxy("body", "reflux_temp_c")
+    purge_vac_switchpoint: AssociationProxy[float] = association_proxy("body", "purge_vac_switchpoint")
+    stir_speed_rpm: AssociationProxy[int] = association_proxy("body", "stir_speed_rpm")
+    purge_set_pressure: AssociationProxy[float] = association_proxy("body", "purge_set_pressure")
+    content_sha256: AssociationProxy[str] = association_proxy("body", "content_sha256")
+    pinbreak_steps: AssociationProxy[list[RecipePinBreakStep]] = association_proxy("body", "pinbreak_steps")
+
     __table_args__ = (
-        # You can enforce only one active per lane at the app level (recommended).
-        UniqueConstraint("id", "lane", name="uq_recipe_id_lane"),
+        # active-recipe lookups and keyset-paginated history per lane
+        Index("ix_recipes_lane_active", "lane", "active"),
+        Index("ix_recipes_lane_id", "lane", "id"),
+        # at most one active recipe per lane, enforced by the DB (API and services
+        # processes both write; app-level checks alone are racy)
+        Index(
+            "uq_recipes_one_active_per_lane",
+            "lane",
+            unique=True,
+            sqlite_where=text("active = 1"),
+            postgresql_where=text("active"),
+        ),
     )
 
     @staticmethod
@@ -74,7 +156,7 @@ class RecipePinBreakStep(Base):
     __tablename__ = "recipe_pinbreak_steps"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    recipe_id: Mapped[int] = mapped_column(ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False, index=True)
+    body_id: Mapped[int] = mapped_column(ForeignKey("recipe_bodies.id", ondelete="CASCADE"), nullable=False, index=True)
     step_index: Mapped[int] = mapped_column(Integer, nullable=False)
 
     # Arrays (now rows)
@@ -86,8 +168,54 @@ class RecipePinBreakStep(Base):
     postpinbreak_reflux_temp_c: Mapped[float | None] = mapped_column(Float)
     postpinbreak_stir_speed_rpm: Mapped[int | None] = mapped_column(Integer)
 
-    recipe: Mapped[Recipe] = relationship(back_populates="pinbreak_steps")
+    body: Mapped[RecipeBody] = relationship(back_populates="pinbreak_steps")
+
+    __table_args__ = (
+        UniqueConstraint("body_id", "step_index", name="uq_recipe_body_step_index"),
+    )
+
+
+class AlarmRecord(Base):
+    """One alarm transition (raised / cleared / acked) as produced by services.alarms."""
+
+    __tablename__ = "alarm_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    ts: Mapped[float] = mapped_column(Float, nullable=False)  # epoch seconds
+    rule: Mapped[str] = mapped_column(String(64), nullable=False)
+    lane: Mapped[int] = mapped_column(Integer, nullable=False)
+    severity: Mapped[str] = mapped_column(String(16), nullable=False)
+    state: Mapped[str] = mapped_column(String(16), nullable=False)
+    value: Mapped[float | None] = mapped_column(Float)
+    message: Mapped[str] = mapped_column(String(200), default="")
+
+    __table_args__ = (
+        # id-keyset history paging, all lanes or one; time-range exports
+        Index("ix_alarm_events_lane_id", "lane", "id"),
+        Index("ix_alarm_events_ts", "ts"),
+    )
+
+
+class LaneTelemetry(Base):
+    """One lane status sample, recorded every TELEMETRY_INTERVAL_S by services.telemetry."""
+
+    __tablename__ = "lane_telemetry"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    ts: Mapped[float] = mapped_column(Float, nullable=False)  # epoch seconds the sample was received
+    lane: Mapped[int] = mapped_column(Integer, nullable=False)
+    reflux_temp_c: Mapped[float] = mapped_column(Float, nullable=False)
+    thermal_temp_c: Mapped[float] = mapped_column(Float, nullable=False)
+    reflux_sp_c: Mapped[float] = mapped_column(Float, nullable=False)
+    thermal_sp_c: Mapped[float] = mapped_column(Float, nullable=False)
+    stir_speed_cmd: Mapped[int] = mapped_column(Integer, nullable=False)
+    pressure_raw: Mapped[int] = mapped_column(Integer, nullable=False)
+    stir_running: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    error_status: Mapped[int] = mapped_column(Integer, nullable=False)
+    # status payload bytes 0-1 (valve / solenoid / switch bits), group A in the low byte
+    io_bits: Mapped[int] = mapped_column(Integer, nullable=False)
 
     __table_args__ = (
-        UniqueConstraint("recipe_id", "step_index", name="uq_recipe_step_index"),
+        # export ranges: find the first/last id of a time range, then walk ids
+        Index("ix_lane_telemetry_ts", "ts"),
     )
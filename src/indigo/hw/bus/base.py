@@ -9,3 +9,14 @@ class Bus(ABC):
     @abstractmethod
     def send_and_recv(self, frame: Frame, timeout_s: float = 0.25) -> Frame | None:
         raise NotImplementedError
+
+    def burst(self, frames: list[Frame], timeout_s: float = 0.25) -> list[Frame]:
+        """
+        Write frames back to back, then collect every reply until the line is
+        quiet for timeout_s (bulk transfer windows: several chunks, one ack; or
+        one read request, several chunks back). A frame may have no reply.
+
+        Default: one send_and_recv per frame (correct for boards that answer
+        every frame, without the pipelining); buses override it.
+        """
+        return [r for f in frames if (r := self.send_and_recv(f, timeout_s)) is not None]
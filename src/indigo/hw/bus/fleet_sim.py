@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+except ImportError as e:  # pragma: no cover - depends on the environment
+    raise ImportError("the fleet simulator needs numpy: pip install 'indigo-machine[sim]'") from e
+
+from indigo.hw.bus.base import Bus
+from indigo.hw.devices.laneboard import (
+    MSG_ARM,
+    MSG_CYCLE,
+    MSG_LID,
+    MSG_N2_VALVE,
+    MSG_PRESSURE,
+    MSG_RECOVER,
+    MSG_REFLUX_ONLY,
+    MSG_SOLVENT_VALVE,
+    MSG_STATUS_REQ,
+    MSG_STIR,
+    MSG_THERMAL,
+    MSG_THERMAL_ONLY,
+    MSG_VAC_VALVE,
+    MSG_WATER_VALVE,
+    RESP_ACK,
+    RESP_LANE_STATUS,
+    _i16_from_le,
+)
+from indigo.hw.devices.utilityboard import MSG_STOP, RESP_UTILITY_STATUS
+from indigo.hw.protocol.codec import Frame
+from indigo.util.clock import SYSTEM_CLOCK, Clock
+
+CYCLE_IDLE = 0
+CYCLE_RUNNING = 1
+
+# status byte0 (group A) bits
+_A_COOL_THERMAL = 1 << 0
+_A_COOL_REFLUX = 1 << 1
+_A_WATER = 1 << 2
+_A_SOLVENT = 1 << 3
+_A_N2 = 1 << 4
+_A_VAC = 1 << 5
+_A_LID_DOWN = 1 << 6
+_A_LID_UP = 1 << 7
+# status byte1 (group B) bits
+_B_ARM_EXTEND = 1 << 0
+_B_ARM_RETRACT = 1 << 1
+_B_LID_SW_UP = 1 << 2
+_B_LID_SW_DOWN = 1 << 4
+_B_ARM_SW_RETRACT = 1 << 5
+_B_ARM_SW_EXTEND = 1 << 6
+_B_HEATER = 1 << 7
+
+_VALVE_BITS = {
+    MSG_VAC_VALVE: _A_VAC,
+    MSG_SOLVENT_VALVE: _A_SOLVENT,
+    MSG_WATER_VALVE: _A_WATER,
+    MSG_N2_VALVE: _A_N2,
+}
+
+_ACK = b"\x00"
+
+
+@dataclass(frozen=True)
+class FleetPhysics:
+    """First-order plant model shared by every simulated lane."""
+
+    ambient_c: float = 20.0
+    thermal_tau_s: float = 120.0
+    reflux_tau_s: float = 60.0
+    pressure_tau_s: float = 5.0
+    stir_tau_s: float = 2.0
+    control_band_c: float = 0.5  # heater / cooling valve hysteresis around setpoint
+    ambient_pressure: float = 10.0
+    vac_floor_pressure: float = 0.0
+    runaway_temp_c: float = 250.0  # where a stuck-on heater drives the probe
+    temp_noise_c: float = 0.02
+
+
+@dataclass(frozen=True)
+class FleetFaults:
+    """Random fault injection; rates are per lane per simulated second."""
+
+    drop_rate: float = 0.0  # probability that a bus transaction gets no response
+    error_rate_per_s: float = 0.0  # lane raises error_status
+    stuck_heater_rate_per_s: float = 0.0  # heater stays on regardless of setpoint
+
+
+class FleetSimulator:
+    """
+    Many machines' lane boards simulated in NumPy arrays, advanced in one vectorized step.
+
+    State lives in flat arrays indexed by lane (machine * lanes_per_machine + k).
+    Time follows the injected clock: every bus transaction first advances the
+    whole fleet to clock.monotonic() (one vectorized step, at most every
+    min_step_s), which also re-encodes all 16-byte status payloads at once, so
+    a status request is a row lookup.
+
+    Commands (cycle, thermal/reflux setpoints, pressure, stir, valves, lid/arm,
+    recover) update the addressed lane's arrays; the plant then moves toward
+    them with first-order dynamics (FleetPhysics). Faults come from FleetFaults
+    rates or from the inject/set_* methods.
+    """
+
+    def __init__(
+        self,
+        machines: int = 1,
+        lanes_per_machine: int = 8,
+        *,
+        lane_addrs: list[int] | None = None,
+        utility_addr: int = 0x09,
+        physics: FleetPhysics | None = None,
+        faults: FleetFaults | None = None,
+        clock: Clock | None = None,
+        seed: int | None = 539,
+        min_step_s: float = 0.01,
+    ) -> None:
+        self.machines = int(machines)
+        self.lanes_per_machine = int(lanes_per_machine)
+        if lane_addrs is None:
+            lane_addrs = [a for a in range(1, self.lanes_per_machine + 2) if a != utility_addr][: self.lanes_per_machine]
+        if len(lane_addrs) != self.lanes_per_machine or utility_addr in lane_addrs:
+            raise ValueError("lane_addrs must have lanes_per_machine distinct addresses, excluding utility_addr")
+        self.lane_addrs = list(lane_addrs)
+        self.utility_addr = utility_addr
+        self._slot = {a: k for k, a in enumerate(self.lane_addrs)}
+
+        self.physics = physics or FleetPhysics()
+        self.faults = faults or FleetFaults()
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.min_step_s = float(min_step_s)
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+        n = self.size = self.machines * self.lanes_per_machine
+        amb = self.physics.ambient_c
+        self.thermal_c = np.full(n, amb)
+        self.reflux_c = np.full(n, amb)
+        self.thermal_sp = np.zeros(n)
+        self.reflux_sp = np.zeros(n)
+        self.reflux_enabled = np.zeros(n, dtype=bool)
+        self.pressure = np.full(n, self.physics.ambient_pressure)
+        self.pressure_sp = np.full(n, self.physics.ambient_pressure)
+        self.stir_on = np.zeros(n, dtype=bool)
+        self.stir_cmd = np.zeros(n)
+        self.stir_rpm = np.zeros(n)
+        self.cycle = np.zeros(n, dtype=np.uint8)
+        self.error_status = np.zeros(n, dtype=np.uint8)
+        self.heater_stuck = np.zeros(n, dtype=bool)
+        self.offline = np.zeros(n, dtype=bool)
+        self.out_a = np.zeros(n, dtype=np.uint8)  # commanded valve/solenoid bits
+        self.out_b = np.zeros(n, dtype=np.uint8)  # commanded arm/switch bits
+        self.heater_on = np.zeros(n, dtype=bool)
+        self.cool_thermal = np.zeros(n, dtype=bool)
+        self.cool_reflux = np.zeros(n, dtype=bool)
+
+        self.safe_chain_ok = np.ones(self.machines, dtype=bool)
+        self.utility_error = np.zeros(self.machines, dtype=np.uint8)
+
+        self.payloads = np.zeros((n, 16), dtype=np.uint8)
+        self.steps = 0
+        self.transactions = 0
+        self._t = self.clock.monotonic()
+        self._encode()
+
+    # ---- addressing ----
+
+    def index(self, machine: int, addr: int) -> int | None:
+        k = self._slot.get(addr)
+        if k is None or not 0 <= machine < self.machines:
+            return None
+        return machine * self.lanes_per_machine + k
+
+    def bus(self, machine: int = 0, *, delay_s: float = 0.0) -> FleetSimBus:
+        return FleetSimBus(self, machine, delay_s=delay_s)
+
+    # ---- fault injection ----
+
+    def inject_error(self, idx: int, code: int = 1) -> None:
+        with self._lock:
+            self.error_status[idx] = code & 0xFF
+            self._encode([idx])
+
+    def set_heater_stuck(self, idx: int, stuck: bool = True) -> None:
+        with self._lock:
+            self.heater_stuck[idx] = stuck
+
+    def set_offline(self, idx: int, offline: bool = True) -> None:
+        with self._lock:
+            self.offline[idx] = offline
+
+    def set_safe_chain(self, machine: int, ok: bool) -> None:
+        with self._lock:
+            self.safe_chain_ok[machine] = ok
+
+    # ---- simulation ----
+
+    def advance(self) -> None:
+        """Bring every lane up to clock.monotonic()."""
+        with self._lock:
+            self._advance()
+
+    def step(self, dt: float) -> None:
+        """Advance every lane by dt seconds in one vectorized update."""
+        with self._lock:
+            self._step(dt)
+
+    def handle(self, machine: int, frame: Frame) -> Frame | None:
+        with self._lock:
+            self._advance()
+            self.transactions += 1
+            if self.faults.drop_rate and self._rng.random() < self.faults.drop_rate:
+                return None
+            if frame.addr == self.utility_addr:
+                return self._handle_utility(machine, frame)
+            idx = self.index(machine, frame.addr)
+            if idx is None or self.offline[idx]:
+                return None
+            if frame.msg_type == MSG_STATUS_REQ:
+                return Frame(frame.addr, RESP_LANE_STATUS, self.payloads[idx].tobytes())
+            self._command(idx, frame)
+            return Frame(frame.addr, RESP_ACK, _ACK)
+
+    def _handle_utility(self, machine: int, frame: Frame) -> Frame:
+        if frame.msg_type == MSG_STATUS_REQ:
+            payload = bytes([0, 1 if self.safe_chain_ok[machine] else 0, 0, 0, int(self.utility_error[machine])])
+            return Frame(frame.addr, RESP_UTILITY_STATUS, payload)
+        if frame.msg_type == MSG_STOP:
+            lanes = slice(machine * self.lanes_per_machine, (machine + 1) * self.lanes_per_machine)
+            self.cycle[lanes] = CYCLE_IDLE
+            self.stir_on[lanes] = False
+        return Frame(frame.addr, RESP_ACK, _ACK)
+
+    def _command(self, i: int, frame: Frame) -> None:
+        t, p = frame.msg_type, frame.payload
+        if t == MSG_CYCLE and p:
+            # 1=start; stop/complete/anything else idles the lane
+            self.cycle[i] = CYCLE_RUNNING if p[0] == 1 else CYCLE_IDLE
+            if p[0] != 1:
+                self.stir_on[i] = False
+        elif t == MSG_THERMAL and len(p) >= 4:
+            self.thermal_sp[i] = _i16_from_le(p[0], p[1]) / 100.0
+            self.reflux_sp[i] = _i16_from_le(p[2], p[3]) / 100.0
+            self.reflux_enabled[i] = True
+        elif t == MSG_THERMAL_ONLY and len(p) >= 2:
+            self.thermal_sp[i] = _i16_from_le(p[0], p[1]) / 100.0
+            self.reflux_enabled[i] = False
+        elif t == MSG_REFLUX_ONLY and len(p) >= 2:
+            self.reflux_sp[i] = _i16_from_le(p[0], p[1]) / 100.0
+            self.reflux_enabled[i] = True
+        elif t == MSG_PRESSURE and len(p) >= 2:
+            self.pressure_sp[i] = _i16_from_le(p[0], p[1]) / 100.0
+        elif t == MSG_STIR and len(p) >= 3:
+            self.stir_on[i] = bool(p[0])
+            self.stir_cmd[i] = p[1] | (p[2] << 8)
+        elif t in _VALVE_BITS and p:
+            bit = _VALVE_BITS[t]
+            self.out_a[i] = (self.out_a[i] | bit) if p[0] else (self.out_a[i] & ~bit & 0xFF)
+        elif t == MSG_LID and p:
+            a = self.out_a[i] & ~(_A_LID_DOWN | _A_LID_UP) & 0xFF
+            b = self.out_b[i] & ~(_B_LID_SW_DOWN | _B_LID_SW_UP) & 0xFF
+            self.out_a[i] = a | (_A_LID_DOWN if p[0] else _A_LID_UP)
+            self.out_b[i] = b | (_B_LID_SW_DOWN if p[0] else _B_LID_SW_UP)
+        elif t == MSG_ARM and p:
+            b = self.out_b[i] & ~(_B_ARM_EXTEND | _B_ARM_RETRACT | _B_ARM_SW_EXTEND | _B_ARM_SW_RETRACT) & 0xFF
+            self.out_b[i] = b | ((_B_ARM_EXTEND | _B_ARM_SW_EXTEND) if p[0] else (_B_ARM_RETRACT | _B_ARM_SW_RETRACT))
+        elif t == MSG_RECOVER:
+            self.error_status[i] = 0
+            self.heater_stuck[i] = False
+        self._encode([i])
+
+    def _advance(self) -> None:
+        now = self.clock.monotonic()
+        dt = now - self._t
+        if dt >= self.min_step_s:
+            self._step(dt)
+            self._t = now
+
+    def _step(self, dt: float) -> None:
+        ph, fl = self.physics, self.faults
+        n = self.size
+        running = self.cycle == CYCLE_RUNNING
+        band = ph.control_band_c
+
+        # thermal loop: bang-bang heater / cooling valve around the setpoint while running
+        t_target = np.where(running, self.thermal_sp, ph.ambient_c)
+        t_target = np.where(self.heater_stuck, ph.runaway_temp_c, t_target)
+        self.heater_on = self.heater_stuck | (running & (t_target > self.thermal_c + band))
+        self.cool_thermal = running & ~self.heater_stuck & (t_target < self.thermal_c - band)
+        self.thermal_c += (t_target - self.thermal_c) * (1.0 - math.exp(-dt / ph.thermal_tau_s))
+
+        r_active = running & self.reflux_enabled
+        r_target = np.where(r_active, self.reflux_sp, ph.ambient_c)
+        self.cool_reflux = r_active & (r_target < self.reflux_c - band)
+        self.reflux_c += (r_target - self.reflux_c) * (1.0 - math.exp(-dt / ph.reflux_tau_s))
+
+        if ph.temp_noise_c:
+            self.thermal_c += self._rng.normal(0.0, ph.temp_noise_c, n)
+            self.reflux_c += self._rng.normal(0.0, ph.temp_noise_c, n)
+
+        vac_open = (self.out_a & _A_VAC) != 0
+        p_target = np.where(vac_open, ph.vac_floor_pressure, np.where(running, self.pressure_sp, ph.ambient_pressure))
+        self.pressure += (p_target - self.pressure) * (1.0 - math.exp(-dt / ph.pressure_tau_s))
+
+        s_target = np.where(self.stir_on, self.stir_cmd, 0.0)
+        self.stir_rpm += (s_target - self.stir_rpm) * (1.0 - math.exp(-dt / ph.stir_tau_s))
+
+        if fl.error_rate_per_s:
+            hit = self._rng.random(n) < fl.error_rate_per_s * dt
+            self.error_status[hit & (self.error_status == 0)] = 1
+        if fl.stuck_heater_rate_per_s:
+            self.heater_stuck |= self._rng.random(n) < fl.stuck_heater_rate_per_s * dt
+
+        self.steps += 1
+        self._encode()
+
+    def _encode(self, rows: slice | list[int] = slice(None)) -> None:
+        """Re-encode the 16-byte status payloads (LaneboardClient format) of rows (default: all)."""
+        pl = self.payloads
+        pl[rows, 0] = (
+            self.out_a[rows]
+            | np.where(self.cool_thermal[rows], _A_COOL_THERMAL, 0)
+            | np.where(self.cool_reflux[rows], _A_COOL_REFLUX, 0)
+        )
+        pl[rows, 1] = self.out_b[rows] | np.where(self.heater_on[rows], _B_HEATER, 0)
+        for col, values in (
+            (2, self.reflux_c[rows]),
+            (4, self.thermal_c[rows]),
+            (6, np.where(self.reflux_enabled[rows], self.reflux_sp[rows], 0.0)),
+            (8, self.thermal_sp[rows]),
+        ):
+            v = np.rint(np.clip(values, -327.68, 327.67) * 100.0).astype(np.int64) & 0xFFFF
+            pl[rows, col] = v & 0xFF
+            pl[rows, col + 1] = v >> 8
+        stir = self.stir_cmd[rows].astype(np.int64) & 0xFFFF
+        pl[rows, 10] = stir & 0xFF
+        pl[rows, 11] = stir >> 8
+        pressure = np.clip(np.rint(self.pressure[rows] * 100.0), 0, 0xFFFF).astype(np.int64)
+        pl[rows, 12] = pressure & 0xFF
+        pl[rows, 13] = pressure >> 8
+        pl[rows, 14] = self.stir_rpm[rows] > 10.0
+        pl[rows, 15] = self.error_status[rows]
+
+
+class FleetSimBus(Bus):
+    """Bus for one simulated machine of a FleetSimulator (utility board + its lanes)."""
+
+    def __init__(self, sim: FleetSimulator, machine: int = 0, *, delay_s: float = 0.0) -> None:
+        self.sim = sim
+        self.machine = machine
+        self.delay_s = delay_s
+
+    def send_and_recv(self, frame: Frame, timeout_s: float = 0.25) -> Frame | None:
+        if self.delay_s > 0:
+            self.sim.clock.sleep(min(timeout_s, self.delay_s))
+        return self.sim.handle(self.machine, frame)
@@ -1,9 +1,18 @@
 from __future__ import annotations
 
-import time
+import random
 
 from indigo.hw.bus.base import Bus
-from indigo.hw.protocol.codec import Frame
+from indigo.hw.devices.laneboard import RESP_LANE_STATUS
+from indigo.hw.devices.utilityboard import RESP_UTILITY_STATUS
+from indigo.hw.protocol.bulk import MSG_BULK, BulkReceiver
+from indigo.hw.protocol.codec import Frame, wire_bytes
+from indigo.util.clock import SYSTEM_CLOCK, Clock
+
+MSG_STATUS_REQ = 0x20
+RESP_ACK = 0xFF
+
+LANE_STATUS_LEN = 16
 
 
 class SimBus(Bus):
@@ -14,35 +23,113 @@ class SimBus(Bus):
       - Echoes status responses for UtilityBoard and LaneBoards
       - ACKs other messages
 
+    Status payloads are plain bytearrays so tests can inject faults, e.g.
+    set_safe_chain(False) or set_lane_payload(addr, ...).
+
+    Lane boards also run the receiving side of the bulk transfer protocol
+    (hw.protocol.bulk.BulkReceiver, one per lane in self.bulk). With baud set,
+    every frame costs its wire time (10 bits per encoded byte) on the clock on
+    top of delay_s per transaction (turnaround), so transfer throughput can be
+    measured at a given baud rate; drop_rate loses that fraction of frames
+    (either direction, seeded) to exercise retransmits.
+
     This is intentionally simple; it exists to keep the app runnable and testable
     while we evolve real RS-485 transport in Phase 3.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        utility_addr: int = 0x09,
+        delay_s: float = 0.01,
+        *,
+        clock: Clock | None = None,
+        baud: int | None = None,
+        drop_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
         # You can add deterministic simulated state here later.
-        self._t0 = time.time()
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self._t0 = self.clock.time()
+        self.utility_addr = utility_addr
+        self.delay_s = delay_s
+
+        # payload1, payload2, reserved, reserved, error_status(last)
+        # safe_chain_ok bit set => payload2 bit0 = 1
+        self.utility_payload = bytearray([0b00000000, 0b00000001, 0, 0, 0])
+        self.lane_payloads: dict[int, bytearray] = {}
+
+        self.baud = baud
+        self.drop_rate = drop_rate
+        self._rng = random.Random(seed)
+        self.bulk: dict[int, BulkReceiver] = {}
+        self.frames_dropped = 0
+
+    def set_safe_chain(self, ok: bool) -> None:
+        if ok:
+            self.utility_payload[1] |= 0x01
+        else:
+            self.utility_payload[1] &= ~0x01 & 0xFF
+
+    def set_utility_error(self, error_status: int) -> None:
+        self.utility_payload[-1] = error_status & 0xFF
+
+    def set_lane_payload(self, addr: int, payload: bytes) -> None:
+        self.lane_payloads[addr] = bytearray(payload)
 
     def send_and_recv(self, frame: Frame, timeout_s: float = 0.25) -> Frame | None:
         # Very small simulated delay
-        time.sleep(min(timeout_s, 0.01))
-
-        # Message types we know about:
-        # Utility status request: 0x20 -> respond 0x83
-        # Lane status request: 0x20 -> respond 0x82 (assuming laneboard uses that)
-        if frame.msg_type == 0x20:
-            # Heuristic: utility is addr 0x09 by your old code.
-            if frame.addr == 0x09:
-                # payload1, payload2, reserved..., error_status(last)
-                # safe_chain_ok bit set => payload2 bit0 = 1
-                payload1 = 0b00000000
-                payload2 = 0b00000001
-                error_status = 0
-                payload = bytes([payload1, payload2, 0, 0, error_status])
-                return Frame(addr=frame.addr, msg_type=0x83, payload=payload)
-
-            # Lane default simulated response
-            payload = bytes([0, 0, 0, 0, 0])  # keep it simple for now
-            return Frame(addr=frame.addr, msg_type=0x82, payload=payload)
+        if self.delay_s > 0:
+            self.clock.sleep(min(timeout_s, self.delay_s))
+        if not (self.baud or self.drop_rate or frame.msg_type == MSG_BULK):
+            return self._respond(frame)
+        replies = self._wire([frame], timeout_s)
+        return replies[0] if replies else None
+
+    def burst(self, frames: list[Frame], timeout_s: float = 0.25) -> list[Frame]:
+        if self.delay_s > 0:
+            self.clock.sleep(min(timeout_s, self.delay_s))
+        return self._wire(frames, timeout_s)
+
+    def _wire(self, frames: list[Frame], timeout_s: float) -> list[Frame]:
+        out: list[Frame] = []
+        nbytes = 0
+        for f in frames:
+            nbytes += wire_bytes(len(f.payload))
+            if self._lost():
+                continue
+            for r in self._replies(f):
+                nbytes += wire_bytes(len(r.payload))
+                if not self._lost():
+                    out.append(r)
+        if self.baud:
+            self.clock.sleep(nbytes * 10 / self.baud)
+        if not out and frames:
+            self.clock.sleep(timeout_s)  # the master waits out its timeout
+        return out
+
+    def _lost(self) -> bool:
+        if self.drop_rate and self._rng.random() < self.drop_rate:
+            self.frames_dropped += 1
+            return True
+        return False
+
+    def _replies(self, frame: Frame) -> list[Frame]:
+        if frame.msg_type == MSG_BULK and frame.addr != self.utility_addr:
+            rx = self.bulk.get(frame.addr)
+            if rx is None:
+                rx = self.bulk[frame.addr] = BulkReceiver(frame.addr)
+            return rx.handle(frame)
+        return [self._respond(frame)]
+
+    def _respond(self, frame: Frame) -> Frame:
+        if frame.msg_type == MSG_STATUS_REQ:
+            if frame.addr == self.utility_addr:
+                return Frame(addr=frame.addr, msg_type=RESP_UTILITY_STATUS, payload=bytes(self.utility_payload))
+
+            payload = self.lane_payloads.get(frame.addr)
+            if payload is None:
+                payload = bytes(LANE_STATUS_LEN)  # idle lane: all off, 0.0C
+            return Frame(addr=frame.addr, msg_type=RESP_LANE_STATUS, payload=bytes(payload))
 
         # Otherwise, return ACK
-        return Frame(addr=frame.addr, msg_type=0xFF, payload=b"\x00")
+        return Frame(addr=frame.addr, msg_type=RESP_ACK, payload=b"\x00")
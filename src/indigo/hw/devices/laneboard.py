@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+from indigo.hw.protocol import bulk
+from indigo.hw.protocol.bulk import TransferError, TransferResult
 from indigo.hw.protocol.codec import Frame
 
 # ----------------------------
@@ -27,11 +29,14 @@ MSG_THERMAL = 0x60
 MSG_REFLUX_ONLY = 0x61
 MSG_THERMAL_ONLY = 0x62
 
-MSG_CAL_PARAMS = 0x70
+MSG_CAL_PARAMS = 0x70  # bulk transfer channel (hw.protocol.bulk)
 
 RESP_LANE_STATUS = 0x80
 RESP_ACK = 0xFF
 
+# Status response payload length
+LANE_STATUS_LEN = 16
+
 
 def _i16_from_le(b0: int, b1: int) -> int:
     v = b0 | (b1 << 8)
@@ -44,6 +49,10 @@ def _scaled_i16_100(b0: int, b1: int) -> float:
     return _i16_from_le(b0, b1) / 100.0
 
 
+def _i16_100_to_le(v: float) -> bytes:
+    return (int(round(v * 100.0)) & 0xFFFF).to_bytes(2, "little")
+
+
 @dataclass(frozen=True)
 class LaneStatus:
     addr: int
@@ -137,11 +146,91 @@ class LaneboardClient:
         s = int(speed) & 0xFFFF
         return Frame(addr=self.addr, msg_type=MSG_STIR, payload=bytes([1 if on else 0, s & 0xFF, (s >> 8) & 0xFF]))
 
+    def build_pressure(self, setpoint: float) -> Frame:
+        # payload: setpoint (i16, /100)
+        return Frame(addr=self.addr, msg_type=MSG_PRESSURE, payload=_i16_100_to_le(setpoint))
+
+    def build_thermal(self, thermal_sp_c: float, reflux_sp_c: float) -> Frame:
+        # payload: thermal setpoint (i16, /100), reflux setpoint (i16, /100)
+        return Frame(
+            addr=self.addr, msg_type=MSG_THERMAL, payload=_i16_100_to_le(thermal_sp_c) + _i16_100_to_le(reflux_sp_c)
+        )
+
+    def build_thermal_only(self, thermal_sp_c: float) -> Frame:
+        return Frame(addr=self.addr, msg_type=MSG_THERMAL_ONLY, payload=_i16_100_to_le(thermal_sp_c))
+
+    def build_reflux_only(self, reflux_sp_c: float) -> Frame:
+        return Frame(addr=self.addr, msg_type=MSG_REFLUX_ONLY, payload=_i16_100_to_le(reflux_sp_c))
+
+    # ---- bulk transfers (MSG_CAL_PARAMS, hw.protocol.bulk) ----
+    # Unlike the builders above these run a whole exchange on `bus` (windowed
+    # chunks, selective retransmit, sha256 check) and raise TransferError.
+    # kw: chunk_size, window, timeout_s, retries, clock.
+
+    def upload_cal_params(self, bus, table: bytes, **kw) -> TransferResult:
+        return bulk.upload(bus, self.addr, bulk.KIND_CAL, table, **kw)
+
+    def download_cal_params(self, bus, **kw) -> TransferResult:
+        """The board's calibration table in .data."""
+        return bulk.download(bus, self.addr, bulk.KIND_CAL, **kw)
+
+    def upload_firmware(self, bus, image: bytes, **kw) -> TransferResult:
+        """Stage a firmware image (the board verifies its sha256 before keeping it)."""
+        return bulk.upload(bus, self.addr, bulk.KIND_FIRMWARE, image, **kw)
+
+    def download_firmware(self, bus, **kw) -> TransferResult:
+        return bulk.download(bus, self.addr, bulk.KIND_FIRMWARE, **kw)
+
+    @staticmethod
+    def upload_cal_params_all(bus, addrs: list[int], table: bytes, **kw) -> dict[int, TransferResult | TransferError]:
+        """One lane after another; a failed lane is reported, not raised."""
+        return bulk.upload_all(bus, addrs, bulk.KIND_CAL, table, **kw)
+
+    @staticmethod
+    def upload_firmware_all(bus, addrs: list[int], image: bytes, **kw) -> dict[int, TransferResult | TransferError]:
+        return bulk.upload_all(bus, addrs, bulk.KIND_FIRMWARE, image, **kw)
+
+    @staticmethod
+    def encode_status_payload(st: LaneStatus) -> bytes:
+        """Inverse of parse_status_response (used by simulators and tests)."""
+        group_a = (
+            st.cooling_valve_thermal,
+            st.cooling_valve_reflux,
+            st.cleaning_valve_water,
+            st.cleaning_valve_solvent,
+            st.vial_valve_n2,
+            st.vial_valve_vac,
+            st.lid_solenoid_down,
+            st.lid_solenoid_up,
+        )
+        group_b = (
+            st.arm_solenoid_extend,
+            st.arm_solenoid_retract,
+            st.lid_switch_up,
+            st.lid_switch_mid,
+            st.lid_switch_down,
+            st.arm_switch_retract,
+            st.arm_switch_extend,
+            st.heater_relay_on,
+        )
+        b0 = sum(1 << i for i, on in enumerate(group_a) if on)
+        b1 = sum(1 << i for i, on in enumerate(group_b) if on)
+        return (
+            bytes([b0, b1])
+            + _i16_100_to_le(st.reflux_temp_c)
+            + _i16_100_to_le(st.thermal_temp_c)
+            + _i16_100_to_le(st.reflux_sp_c)
+            + _i16_100_to_le(st.thermal_sp_c)
+            + (int(st.stir_speed_cmd) & 0xFFFF).to_bytes(2, "little")
+            + (int(st.pressure_raw) & 0xFFFF).to_bytes(2, "little")
+            + bytes([1 if st.stir_running else 0, st.error_status & 0xFF])
+        )
+
     @staticmethod
     def parse_status_response(frame: Frame) -> LaneStatus | None:
         if frame.msg_type != RESP_LANE_STATUS:
             return None
-        if len(frame.payload) < 16:
+        if len(frame.payload) < LANE_STATUS_LEN:
             return None
 
         b0 = frame.payload[0]
@@ -22,6 +22,9 @@ MSG_WASTE_PUMP = 0x9D
 RESP_UTILITY_STATUS = 0x83
 RESP_ACK = 0xFF
 
+# Shortest valid status response payload (payload1, payload2, ..., error_status)
+UTILITY_STATUS_MIN_LEN = 3
+
 
 @dataclass(frozen=True)
 class UtilityStatus:
@@ -101,7 +104,7 @@ class UtilityBoardClient:
         # payload[0] = payload1 byte (main outputs + asp)
         # payload[1] = payload2 byte (safe_chain_ok + waste_pump)
         # payload[-1] = error_status
-        if len(frame.payload) < 3:
+        if len(frame.payload) < UTILITY_STATUS_MIN_LEN:
             return None
 
         payload1 = frame.payload[0]
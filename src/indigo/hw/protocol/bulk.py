@@ -0,0 +1,462 @@
+"""
+Chunked bulk transfer (calibration tables, firmware images) over lane-board frames.
+
+A frame payload is at most 255 bytes (one length byte), so a transfer is split
+into numbered chunks, each carrying its seq and byte offset. Every frame is a
+MSG_BULK request from the master or a RESP_BULK reply from the board; the first
+payload byte is the op.
+
+  master -> board (MSG_BULK)
+    OPEN   op session dir kind total:u32 chunk:u8 window:u8 sha256[32]
+           dir 0 = upload (sha256 of the image), 1 = download (sha256 zero)
+    DATA   op session seq:u16 offset:u32 flags data...     (upload chunk)
+           flags & F_ACK_REQ: last chunk of a window, the board answers with ACK
+    READ   op session base:u16 bitmap:u32                  (download window)
+           the board streams a DATA reply for base+i for every bit i set
+    END    op session                                      (verify / release)
+  board -> master (RESP_BULK)
+    OPENED op session status total:u32 sha256[32]         (download: size and hash)
+    ACK    op session base:u16 bitmap:u32                  (selective ack)
+           every chunk < base is held; bit i: chunk base+i is held
+    DATA   op session seq:u16 offset:u32 flags data...    (download chunk)
+    ENDED  op session status
+
+Windowed: up to `window` (<= 32) chunks are written back to back per bus
+burst and acknowledged together; only the chunks the ACK does not cover are
+sent again (selective retransmit), and a lost ACK or burst just costs a round.
+End to end, the sha256 of the whole image is checked by the board on END
+(upload) or by the master after the last chunk (download), on top of the
+per-frame CRC16 of the wire codec.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import struct
+import time
+from dataclasses import dataclass, field
+
+from indigo.hw.protocol.codec import Frame
+
+MSG_BULK = 0x70  # laneboard MSG_CAL_PARAMS
+RESP_BULK = 0x81
+
+OP_OPEN = 0x01
+OP_DATA = 0x02
+OP_READ = 0x03
+OP_END = 0x04
+OP_OPENED = 0x81
+OP_ACK = 0x82
+OP_ENDED = 0x84
+
+DIR_UPLOAD = 0
+DIR_DOWNLOAD = 1
+
+KIND_CAL = 1
+KIND_FIRMWARE = 2
+KIND_NAMES = {KIND_CAL: "cal_params", KIND_FIRMWARE: "firmware"}
+
+# largest image per kind the board accepts
+KIND_MAX_BYTES = {KIND_CAL: 64 * 1024, KIND_FIRMWARE: 4 * 1024 * 1024}
+
+ST_OK = 0
+ST_BAD_SESSION = 1
+ST_SHA_MISMATCH = 2
+ST_INCOMPLETE = 3
+ST_TOO_LARGE = 4
+ST_NOT_FOUND = 5
+ST_BAD_REQUEST = 6
+STATUS_NAMES = {
+    ST_OK: "ok",
+    ST_BAD_SESSION: "bad_session",
+    ST_SHA_MISMATCH: "sha_mismatch",
+    ST_INCOMPLETE: "incomplete",
+    ST_TOO_LARGE: "too_large",
+    ST_NOT_FOUND: "not_found",
+    ST_BAD_REQUEST: "bad_request",
+}
+
+F_ACK_REQ = 0x01
+
+_OPEN = struct.Struct("<BBBBIBB32s")
+_OPENED = struct.Struct("<BBBI32s")
+_DATA = struct.Struct("<BBHIB")
+_WINDOW = struct.Struct("<BBHI")  # READ and ACK: op session base bitmap
+_END = struct.Struct("<BB")
+_ENDED = struct.Struct("<BBB")
+
+MAX_PAYLOAD = 255
+MAX_CHUNK = MAX_PAYLOAD - _DATA.size
+MAX_WINDOW = 32
+DEFAULT_CHUNK = 240
+DEFAULT_WINDOW = 8
+
+
+class TransferError(RuntimeError):
+    """A bulk transfer failed; code is one of STATUS_NAMES or "timeout" / "protocol"."""
+
+    def __init__(self, code: str, detail: str = "") -> None:
+        super().__init__(f"{code}: {detail}" if detail else code)
+        self.code = code
+        self.detail = detail
+
+
+# ---- wire helpers ----
+
+
+def open_frame(addr: int, session: int, direction: int, kind: int, total: int, chunk: int, window: int, sha: bytes) -> Frame:
+    return Frame(addr, MSG_BULK, _OPEN.pack(OP_OPEN, session, direction, kind, total, chunk, window, sha))
+
+
+def data_frame(addr: int, msg_type: int, session: int, seq: int, offset: int, data: bytes, *, ack_req: bool = False) -> Frame:
+    return Frame(addr, msg_type, _DATA.pack(OP_DATA, session, seq, offset, F_ACK_REQ if ack_req else 0) + data)
+
+
+def window_frame(addr: int, msg_type: int, op: int, session: int, base: int, bitmap: int) -> Frame:
+    return Frame(addr, msg_type, _WINDOW.pack(op, session, base, bitmap))
+
+
+def _bitmap(base: int, seqs) -> int:
+    out = 0
+    for s in seqs:
+        out |= 1 << (s - base)
+    return out
+
+
+def _seqs(base: int, bitmap: int, limit: int) -> list[int]:
+    return [base + i for i in range(MAX_WINDOW) if bitmap >> i & 1 and base + i < limit]
+
+
+# ---- board side ----
+
+
+@dataclass
+class _Session:
+    session: int
+    direction: int
+    kind: int
+    total: int
+    chunk: int
+    sha: bytes
+    nchunks: int
+    buf: bytearray
+    have: bytearray  # one flag per chunk (upload)
+    base: int = 0  # lowest chunk not yet held (upload)
+
+
+class BulkReceiver:
+    """
+    Board side of the protocol (what a lane board's firmware does), used by
+    SimBus. Holds one session at a time; a new OPEN replaces it. Completed
+    uploads land in images[kind]; downloads read from there.
+    """
+
+    def __init__(self, addr: int) -> None:
+        self.addr = addr
+        self.images: dict[int, bytes] = {}
+        self.session: _Session | None = None
+        self.last_end: tuple[int, int] | None = None  # (session, status)
+
+    def handle(self, frame: Frame) -> list[Frame]:
+        """Reply frames for one request frame (none for a DATA chunk without F_ACK_REQ)."""
+        p = frame.payload
+        op = p[0] if p else 0
+        try:
+            if op == OP_OPEN:
+                return [self._open(*_OPEN.unpack_from(p)[1:])]
+            if op == OP_DATA:
+                return self._data(p)
+            if op == OP_READ:
+                return self._read(*_WINDOW.unpack_from(p)[1:])
+            if op == OP_END:
+                return [self._end(_END.unpack_from(p)[1])]
+        except struct.error:
+            pass
+        return [Frame(self.addr, RESP_BULK, _ENDED.pack(OP_ENDED, p[1] if len(p) > 1 else 0, ST_BAD_REQUEST))]
+
+    def _open(self, session: int, direction: int, kind: int, total: int, chunk: int, window: int, sha: bytes) -> Frame:
+        def reply(status: int, total_: int = 0, sha_: bytes = bytes(32)) -> Frame:
+            return Frame(self.addr, RESP_BULK, _OPENED.pack(OP_OPENED, session, status, total_, sha_))
+
+        self.session = None
+        if kind not in KIND_MAX_BYTES or not 0 < chunk <= MAX_CHUNK or not 0 < window <= MAX_WINDOW:
+            return reply(ST_BAD_REQUEST)
+        if direction == DIR_DOWNLOAD:
+            image = self.images.get(kind)
+            if image is None:
+                return reply(ST_NOT_FOUND)
+            total, buf, sha = len(image), bytearray(image), hashlib.sha256(image).digest()
+        else:
+            if total > KIND_MAX_BYTES[kind]:
+                return reply(ST_TOO_LARGE)
+            buf = bytearray(total)
+        nchunks = -(-total // chunk)
+        self.session = _Session(session, direction, kind, total, chunk, sha, nchunks, buf, bytearray(nchunks))
+        return reply(ST_OK, total, sha)
+
+    def _current(self, session: int, direction: int) -> _Session | None:
+        s = self.session
+        return s if s is not None and s.session == session and s.direction == direction else None
+
+    def _ack(self, s: _Session) -> Frame:
+        while s.base < s.nchunks and s.have[s.base]:
+            s.base += 1
+        bitmap = _bitmap(s.base, (q for q in range(s.base, min(s.base + MAX_WINDOW, s.nchunks)) if s.have[q]))
+        return window_frame(self.addr, RESP_BULK, OP_ACK, s.session, s.base, bitmap)
+
+    def _data(self, p: bytes) -> list[Frame]:
+        _, session, seq, offset, flags = _DATA.unpack_from(p)
+        s = self._current(session, DIR_UPLOAD)
+        if s is None:
+            return [Frame(self.addr, RESP_BULK, _ENDED.pack(OP_ENDED, session, ST_BAD_SESSION))]
+        data = p[_DATA.size :]
+        # a chunk that does not line up is dropped like a lost one (retransmitted later)
+        if seq < s.nchunks and offset == seq * s.chunk and len(data) == min(s.chunk, s.total - offset):
+            s.buf[offset : offset + len(data)] = data
+            s.have[seq] = 1
+        return [self._ack(s)] if flags & F_ACK_REQ else []
+
+    def _read(self, session: int, base: int, bitmap: int) -> list[Frame]:
+        s = self._current(session, DIR_DOWNLOAD)
+        if s is None:
+            return [Frame(self.addr, RESP_BULK, _ENDED.pack(OP_ENDED, session, ST_BAD_SESSION))]
+        out = []
+        seqs = _seqs(base, bitmap, s.nchunks)
+        for seq in seqs:
+            off = seq * s.chunk
+            out.append(data_frame(self.addr, RESP_BULK, session, seq, off, bytes(s.buf[off : off + s.chunk])))
+        return out
+
+    def _end(self, session: int) -> Frame:
+        s = self.session
+        status = ST_OK
+        if s is None or s.session != session:
+            # a repeated END (its ENDED was lost) gets the same answer again
+            status = self.last_end[1] if self.last_end and self.last_end[0] == session else ST_BAD_SESSION
+        elif s.direction == DIR_UPLOAD:
+            if not all(s.have):
+                status = ST_INCOMPLETE
+            elif hashlib.sha256(s.buf).digest() != s.sha:
+                status = ST_SHA_MISMATCH
+            else:
+                self.images[s.kind] = bytes(s.buf)
+        if status != ST_INCOMPLETE and s is not None and s.session == session:
+            self.session = None
+            self.last_end = (session, status)
+        return Frame(self.addr, RESP_BULK, _ENDED.pack(OP_ENDED, session, status))
+
+
+# ---- master side ----
+
+
+@dataclass
+class TransferResult:
+    addr: int
+    kind: str
+    direction: str
+    nbytes: int
+    chunks: int
+    frames_sent: int = 0
+    retransmits: int = 0
+    windows: int = 0
+    elapsed_s: float = 0.0
+    sha256: str = ""
+    data: bytes | None = field(default=None, repr=False)  # downloads
+
+    @property
+    def throughput_Bps(self) -> float:  # noqa: N802 (unit suffix)
+        return self.nbytes / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "addr": self.addr,
+            "kind": self.kind,
+            "direction": self.direction,
+            "bytes": self.nbytes,
+            "chunks": self.chunks,
+            "frames_sent": self.frames_sent,
+            "retransmits": self.retransmits,
+            "windows": self.windows,
+            "elapsed_s": round(self.elapsed_s, 6),
+            "throughput_Bps": round(self.throughput_Bps, 1),
+            "sha256": self.sha256,
+        }
+
+
+_sessions = itertools.count(1)
+
+
+def _next_session() -> int:
+    return next(_sessions) & 0xFF
+
+
+def _reply(frames: list[Frame], op: int, session: int) -> bytes | None:
+    for f in frames:
+        p = f.payload
+        if f.msg_type == RESP_BULK and len(p) >= 2 and p[1] == session:
+            if p[0] == OP_ENDED and len(p) >= _ENDED.size and p[2] != ST_OK:
+                code = STATUS_NAMES.get(p[2], str(p[2]))
+                raise TransferError(code, f"board rejected op 0x{op:02x}")
+            if p[0] == op:
+                return p
+    return None
+
+
+def _check(window: int, chunk: int) -> None:
+    if not 0 < window <= MAX_WINDOW:
+        raise ValueError(f"window must be 1..{MAX_WINDOW}")
+    if not 0 < chunk <= MAX_CHUNK:
+        raise ValueError(f"chunk_size must be 1..{MAX_CHUNK}")
+
+
+def _open(bus, addr, session, direction, kind, total, chunk, window, sha, timeout_s, retries) -> bytes:
+    req = open_frame(addr, session, direction, kind, total, chunk, window, sha)
+    for _ in range(retries + 1):
+        reply = _reply(bus.burst([req], timeout_s), OP_OPENED, session)
+        if reply is not None:
+            _, _, status, total_, sha_ = _OPENED.unpack_from(reply)
+            if status != ST_OK:
+                raise TransferError(STATUS_NAMES.get(status, str(status)), f"open {KIND_NAMES.get(kind, kind)}")
+            return reply
+    raise TransferError("timeout", f"addr={addr} open")
+
+
+def _end(bus, addr, session, timeout_s, retries) -> None:
+    req = Frame(addr, MSG_BULK, _END.pack(OP_END, session))
+    for _ in range(retries + 1):
+        # _reply raises on a failed ENDED (sha_mismatch, incomplete, ...)
+        if _reply(bus.burst([req], timeout_s), OP_ENDED, session) is not None:
+            return
+    raise TransferError("timeout", f"addr={addr} end")
+
+
+def upload(
+    bus,
+    addr: int,
+    kind: int,
+    data: bytes,
+    *,
+    chunk_size: int = DEFAULT_CHUNK,
+    window: int = DEFAULT_WINDOW,
+    timeout_s: float = 0.25,
+    retries: int = 5,
+    clock=None,
+) -> TransferResult:
+    """
+    Send data to board addr as image `kind`. Raises TransferError if the board
+    refuses it, `retries` rounds in a row make no progress, or the board's
+    sha256 of the received image does not match.
+    """
+    _check(window, chunk_size)
+    now = (clock or time).perf_counter
+    t0 = now()
+    data = bytes(data)
+    sha = hashlib.sha256(data).digest()
+    n = -(-len(data) // chunk_size)
+    res = TransferResult(addr, KIND_NAMES.get(kind, str(kind)), "upload", len(data), n, sha256=sha.hex())
+    session = _next_session()
+    _open(bus, addr, session, DIR_UPLOAD, kind, len(data), chunk_size, window, sha, timeout_s, retries)
+
+    acked = bytearray(n)
+    sent = bytearray(n)
+    nacked = 0
+    low = 0  # lowest chunk not acknowledged
+    stalled = 0
+    while low < n:
+        seqs = [q for q in range(low, min(low + MAX_WINDOW, n)) if not acked[q]][:window]
+        frames = [
+            data_frame(addr, MSG_BULK, session, q, q * chunk_size, data[q * chunk_size : (q + 1) * chunk_size], ack_req=i == len(seqs) - 1)
+            for i, q in enumerate(seqs)
+        ]
+        res.retransmits += sum(sent[q] for q in seqs)
+        for q in seqs:
+            sent[q] = 1
+        res.frames_sent += len(frames)
+        res.windows += 1
+        reply = _reply(bus.burst(frames, timeout_s), OP_ACK, session)
+        before = nacked
+        if reply is not None:
+            _, _, base, bitmap = _WINDOW.unpack_from(reply)
+            for q in itertools.chain(range(low, min(base, n)), _seqs(base, bitmap, n)):
+                if not acked[q]:
+                    acked[q] = 1
+                    nacked += 1
+            while low < n and acked[low]:
+                low += 1
+        stalled = 0 if nacked > before else stalled + 1
+        if stalled > retries:
+            raise TransferError("timeout", f"addr={addr} no progress at chunk {low}/{n}")
+
+    _end(bus, addr, session, timeout_s, retries)
+    res.elapsed_s = now() - t0
+    return res
+
+
+def download(
+    bus,
+    addr: int,
+    kind: int,
+    *,
+    chunk_size: int = DEFAULT_CHUNK,
+    window: int = DEFAULT_WINDOW,
+    timeout_s: float = 0.25,
+    retries: int = 5,
+    clock=None,
+) -> TransferResult:
+    """Read image `kind` from board addr; raises TransferError on a sha256 mismatch."""
+    _check(window, chunk_size)
+    now = (clock or time).perf_counter
+    t0 = now()
+    session = _next_session()
+    reply = _open(bus, addr, session, DIR_DOWNLOAD, kind, 0, chunk_size, window, bytes(32), timeout_s, retries)
+    _, _, _, total, sha = _OPENED.unpack_from(reply)
+    n = -(-total // chunk_size)
+    res = TransferResult(addr, KIND_NAMES.get(kind, str(kind)), "download", total, n, sha256=sha.hex())
+
+    buf = bytearray(total)
+    have = bytearray(n)
+    low = 0
+    stalled = 0
+    requested = bytearray(n)
+    while low < n:
+        seqs = [q for q in range(low, min(low + MAX_WINDOW, n)) if not have[q]][:window]
+        res.retransmits += sum(requested[q] for q in seqs)
+        for q in seqs:
+            requested[q] = 1
+        res.frames_sent += 1
+        res.windows += 1
+        got = 0
+        for f in bus.burst([window_frame(addr, MSG_BULK, OP_READ, session, low, _bitmap(low, seqs))], timeout_s):
+            p = f.payload
+            if f.msg_type != RESP_BULK or len(p) < _DATA.size or p[0] != OP_DATA or p[1] != session:
+                continue
+            _, _, seq, offset, _ = _DATA.unpack_from(p)
+            chunk = p[_DATA.size :]
+            if seq < n and not have[seq] and offset == seq * chunk_size and len(chunk) == min(chunk_size, total - offset):
+                buf[offset : offset + len(chunk)] = chunk
+                have[seq] = 1
+                got += 1
+        while low < n and have[low]:
+            low += 1
+        stalled = 0 if got else stalled + 1
+        if stalled > retries:
+            raise TransferError("timeout", f"addr={addr} no progress at chunk {low}/{n}")
+
+    _end(bus, addr, session, timeout_s, retries)
+    if hashlib.sha256(buf).digest() != sha:
+        raise TransferError("sha_mismatch", f"addr={addr} downloaded {KIND_NAMES.get(kind, kind)}")
+    res.data = bytes(buf)
+    res.elapsed_s = now() - t0
+    return res
+
+
+def upload_all(bus, addrs: list[int], kind: int, data: bytes, **kw) -> dict[int, TransferResult | TransferError]:
+    """upload() to every lane in turn; a lane that fails does not stop the others."""
+    out: dict[int, TransferResult | TransferError] = {}
+    for addr in addrs:
+        try:
+            out[addr] = upload(bus, addr, kind, data, **kw)
+        except TransferError as e:
+            out[addr] = e
+    return out
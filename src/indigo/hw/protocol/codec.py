@@ -67,6 +67,12 @@ def cobs_decode(data: bytes) -> bytes:
     return bytes(out)
 
 
+def wire_bytes(payload_len: int) -> int:
+    """Upper bound of len(encode_frame()) for a payload_len payload (COBS adds 1 byte per 254)."""
+    raw = 4 + payload_len + 2
+    return raw + 1 + raw // 254 + 1
+
+
 def encode_frame(frame: Frame) -> bytes:
     # Placeholder for Phase 3 UART framing:
     # [ver][addr][type][len][payload...][crc_lo][crc_hi]
@@ -21,6 +21,7 @@ class LaneTransport(ABC):
     The rest of the system ONLY talks to this interface.
     You can swap implementations:
       - SimLaneTransport (dev/testing)
+      - BusLaneTransport (lane boards over a Bus)
       - RealSerialLaneTransport (production hardware)
       - ReplayLaneTransport (future)
     """
@@ -37,6 +38,17 @@ class LaneTransport(ABC):
     def get_lane_status(self, lane_id: str) -> LaneStatus:
         raise NotImplementedError
 
+    def get_lane_statuses(self, lane_ids: list[str] | None = None) -> list[LaneStatus]:
+        """
+        Status of many lanes (all of list_lanes() if lane_ids is None), in order.
+
+        Default: one get_lane_status() per lane. Transports override it to read
+        every lane in a single pass (one lock / bus sweep / array snapshot).
+        """
+        if lane_ids is None:
+            lane_ids = self.list_lanes()
+        return [self.get_lane_status(lane_id) for lane_id in lane_ids]
+
     @abstractmethod
     def start_lane(self, lane_id: str) -> None:
         raise NotImplementedError
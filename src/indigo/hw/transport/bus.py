@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import threading
+
+from indigo.hw.bus.base import Bus
+from indigo.hw.devices.laneboard import LaneboardClient
+from indigo.hw.devices.laneboard import LaneStatus as BoardStatus
+from indigo.hw.transport.base import LaneStatus, LaneTransport
+from indigo.services.recipe_plan import CYCLE_START, CYCLE_STOP
+
+
+class BusLaneTransport(LaneTransport):
+    """
+    LaneTransport over lane boards on a Bus.
+
+    Lane ids are "lane<addr>". The status payload has no cycle bit, so the
+    running/idle state is the last cycle command this transport had acknowledged;
+    a non-zero error_status reports "error".
+
+    Bus access is serialized; get_lane_statuses() takes the lock once and sweeps
+    the requested lanes back to back (one status transaction per lane, no
+    interleaved commands).
+    """
+
+    def __init__(self, bus: Bus, lane_addrs: list[int], *, timeout_s: float = 0.25) -> None:
+        self.bus = bus
+        self.timeout_s = timeout_s
+        self._lock = threading.Lock()
+        self._clients = {f"lane{a}": LaneboardClient(a) for a in lane_addrs}
+        self._running: set[str] = set()
+
+    def ping(self) -> bool:
+        return bool(self._clients) and all(s.connected for s in self.get_lane_statuses())
+
+    def list_lanes(self) -> list[str]:
+        return list(self._clients)
+
+    def get_lane_status(self, lane_id: str) -> LaneStatus:
+        with self._lock:
+            return self._status(lane_id)
+
+    def get_lane_statuses(self, lane_ids: list[str] | None = None) -> list[LaneStatus]:
+        with self._lock:
+            return [self._status(lane_id) for lane_id in (self._clients if lane_ids is None else lane_ids)]
+
+    def start_lane(self, lane_id: str) -> None:
+        self._cycle(lane_id, CYCLE_START)
+
+    def stop_lane(self, lane_id: str) -> None:
+        self._cycle(lane_id, CYCLE_STOP)
+
+    def _cycle(self, lane_id: str, action: int) -> None:
+        client = self._clients.get(lane_id)
+        if client is None:
+            raise KeyError(f"Unknown lane_id: {lane_id}")
+        with self._lock:
+            if self.bus.send_and_recv(client.build_cycle(action), timeout_s=self.timeout_s) is None:
+                raise TimeoutError(f"No response from {lane_id}")
+            if action == CYCLE_START:
+                self._running.add(lane_id)
+            else:
+                self._running.discard(lane_id)
+
+    def _status(self, lane_id: str) -> LaneStatus:
+        # caller holds self._lock
+        client = self._clients.get(lane_id)
+        if client is None:
+            return LaneStatus(lane_id=lane_id, connected=False, state="error", message="Unknown lane")
+        try:
+            resp = self.bus.send_and_recv(client.build_status_request(), timeout_s=self.timeout_s)
+        except Exception as e:
+            return LaneStatus(lane_id=lane_id, connected=False, state="error", message=f"Bus error: {e}")
+        st = LaneboardClient.parse_status_response(resp) if resp is not None else None
+        if st is None:
+            return LaneStatus(lane_id=lane_id, connected=False, state="error", message="No response")
+        return self._to_lane_status(lane_id, st)
+
+    def _to_lane_status(self, lane_id: str, st: BoardStatus) -> LaneStatus:
+        if st.error_status:
+            state, message = "error", f"error_status={st.error_status}"
+        else:
+            state, message = ("running" if lane_id in self._running else "idle"), None
+        return LaneStatus(
+            lane_id=lane_id,
+            connected=True,
+            state=state,
+            message=message,
+            extra={
+                "thermal_temp_c": st.thermal_temp_c,
+                "reflux_temp_c": st.reflux_temp_c,
+                "thermal_sp_c": st.thermal_sp_c,
+                "reflux_sp_c": st.reflux_sp_c,
+                "pressure_raw": st.pressure_raw,
+                "stir_running": st.stir_running,
+            },
+        )
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from indigo.hw.bus.fleet_sim import CYCLE_RUNNING, FleetSimulator
+from indigo.hw.devices.laneboard import LaneboardClient
+from indigo.hw.transport.base import LaneStatus, LaneTransport
+from indigo.services.recipe_plan import CYCLE_START, CYCLE_STOP
+
+
+class FleetLaneTransport(LaneTransport):
+    """
+    LaneTransport over a FleetSimulator.
+
+    Lane ids are "m<machine>-lane<addr>". Commands go through the simulator's
+    bus handling (same path as FleetSimBus); status is read from the arrays.
+    Pass machine= to expose a single machine's lanes.
+    """
+
+    def __init__(self, sim: FleetSimulator, *, machine: int | None = None) -> None:
+        self.sim = sim
+        machines = range(sim.machines) if machine is None else [machine]
+        self._lanes: dict[str, tuple[int, int, int]] = {}
+        for m in machines:
+            for addr in sim.lane_addrs:
+                self._lanes[f"m{m}-lane{addr}"] = (m, addr, sim.index(m, addr))
+
+    def ping(self) -> bool:
+        return True
+
+    def list_lanes(self) -> list[str]:
+        return list(self._lanes)
+
+    def get_lane_status(self, lane_id: str) -> LaneStatus:
+        self.sim.advance()
+        return self._status(lane_id)
+
+    def get_lane_statuses(self, lane_ids: list[str] | None = None) -> list[LaneStatus]:
+        # one physics step for the whole batch
+        self.sim.advance()
+        return [self._status(lane_id) for lane_id in (self._lanes if lane_ids is None else lane_ids)]
+
+    def start_lane(self, lane_id: str) -> None:
+        self._send(lane_id, CYCLE_START)
+
+    def stop_lane(self, lane_id: str) -> None:
+        self._send(lane_id, CYCLE_STOP)
+
+    def _send(self, lane_id: str, action: int) -> None:
+        lane = self._lanes.get(lane_id)
+        if lane is None:
+            raise KeyError(f"Unknown lane_id: {lane_id}")
+        machine, addr, _ = lane
+        if self.sim.handle(machine, LaneboardClient(addr).build_cycle(action)) is None:
+            raise TimeoutError(f"No response from {lane_id}")
+
+    def _status(self, lane_id: str) -> LaneStatus:
+        lane = self._lanes.get(lane_id)
+        if lane is None:
+            return LaneStatus(lane_id=lane_id, connected=False, state="error", message="Unknown lane")
+        sim = self.sim
+        _, _, i = lane
+        if sim.offline[i]:
+            return LaneStatus(lane_id=lane_id, connected=False, state="error", message="No response")
+        error = int(sim.error_status[i])
+        if error:
+            state = "error"
+        elif sim.cycle[i] == CYCLE_RUNNING:
+            state = "running"
+        else:
+            state = "idle"
+        return LaneStatus(
+            lane_id=lane_id,
+            connected=True,
+            state=state,
+            message=f"error_status={error}" if error else None,
+            extra={
+                "thermal_temp_c": float(sim.thermal_c[i]),
+                "reflux_temp_c": float(sim.reflux_c[i]),
+                "pressure": float(sim.pressure[i]),
+                "stir_rpm": float(sim.stir_rpm[i]),
+            },
+        )
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
 import random
-import time
 from dataclasses import dataclass
 from typing import Any
 
 from indigo.hw.transport.base import LaneStatus, LaneTransport
+from indigo.util.clock import SYSTEM_CLOCK, Clock
 
 
 @dataclass
@@ -34,12 +34,13 @@ class SimLaneTransport(LaneTransport):
     Deterministic enough for dev, simple enough to evolve.
     """
 
-    def __init__(self, lane_count: int = 4, seed: int | None = 539):
+    def __init__(self, lane_count: int = 4, seed: int | None = 539, *, clock: Clock | None = None):
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
         self._rng = random.Random(seed)
         self._lanes: dict[str, _SimLane] = {}
         for i in range(1, lane_count + 1):
             lane_id = f"lane{i}"
-            self._lanes[lane_id] = _SimLane(lane_id=lane_id, last_change_ts=time.time())
+            self._lanes[lane_id] = _SimLane(lane_id=lane_id, last_change_ts=self.clock.time())
 
     def ping(self) -> bool:
         return True
@@ -53,6 +54,12 @@ class SimLaneTransport(LaneTransport):
             return LaneStatus(lane_id=lane_id, connected=False, state="error", message="Unknown lane")
         return lane.to_status()
 
+    def get_lane_statuses(self, lane_ids: list[str] | None = None) -> list[LaneStatus]:
+        lanes = self._lanes
+        if lane_ids is None:
+            return [lanes[k].to_status() for k in sorted(lanes)]
+        return [lanes[k].to_status() if k in lanes else self.get_lane_status(k) for k in lane_ids]
+
     def start_lane(self, lane_id: str) -> None:
         lane = self._lanes.get(lane_id)
         if not lane:
@@ -65,13 +72,13 @@ class SimLaneTransport(LaneTransport):
             lane.message = None
 
         lane.state = "running"
-        lane.last_change_ts = time.time()
+        lane.last_change_ts = self.clock.time()
 
         # Optional small chance to simulate a fault after start
         if self._rng.random() < 0.03:
             lane.state = "error"
             lane.message = "Simulated fault on start"
-            lane.last_change_ts = time.time()
+            lane.last_change_ts = self.clock.time()
 
     def stop_lane(self, lane_id: str) -> None:
         lane = self._lanes.get(lane_id)
@@ -79,4 +86,4 @@ class SimLaneTransport(LaneTransport):
             raise KeyError(f"Unknown lane_id: {lane_id}")
         lane.state = "idle"
         lane.message = None
-        lane.last_change_ts = time.time()
+        lane.last_change_ts = self.clock.time()
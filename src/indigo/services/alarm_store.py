@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from indigo.db.orm.tables import AlarmRecord
+from indigo.services.alarms import AlarmEngine, AlarmEvent
+from indigo.services.recipe_service import (
+    HISTORY_MAX_LIMIT,
+    decode_history_cursor,
+    encode_history_cursor,
+)
+
+
+class AlarmStore:
+    """alarm_events table: append-only alarm transitions, read newest first."""
+
+    def __init__(self, session_factory: sessionmaker) -> None:
+        self._session_factory = session_factory
+
+    def record(self, events: list[AlarmEvent]) -> None:
+        """Insert a batch of events in one transaction (one executemany)."""
+        if not events:
+            return
+        rows = [
+            {
+                "ts": e.ts,
+                "rule": e.rule,
+                "lane": e.addr,
+                "severity": e.severity,
+                "state": e.state,
+                "value": e.value,
+                "message": e.message,
+            }
+            for e in events
+        ]
+        with self._session_factory() as session:  # type: Session
+            session.execute(insert(AlarmRecord), rows)
+            session.commit()
+
+    def history(
+        self, *, lane: int | None = None, limit: int = 50, cursor: str | None = None
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """
+        One page of alarm events, newest first, all lanes or one (keyset on id,
+        like recipe history). Returns (items, next_cursor). Raises ValueError on
+        a bad cursor.
+        """
+        limit = max(1, min(int(limit), HISTORY_MAX_LIMIT))
+        with self._session_factory() as session:  # type: Session
+            q = session.query(AlarmRecord)
+            if lane is not None:
+                q = q.filter(AlarmRecord.lane == lane)
+            if cursor:
+                q = q.filter(AlarmRecord.id < decode_history_cursor(cursor))
+            rows = q.order_by(AlarmRecord.id.desc()).limit(limit + 1).all()
+
+        page = rows[:limit]
+        next_cursor = encode_history_cursor(page[-1].id) if len(rows) > limit else None
+        items = [
+            {
+                "id": r.id,
+                "ts": r.ts,
+                "rule": r.rule,
+                "addr": r.lane,
+                "severity": r.severity,
+                "state": r.state,
+                "value": r.value,
+                "message": r.message,
+            }
+            for r in page
+        ]
+        return items, next_cursor
+
+
+class AlarmRecorder:
+    """
+    Moves alarm events from an AlarmEngine's outbox into the AlarmStore every
+    interval_s, off the poll thread (evaluate() never touches SQLite). A batch
+    that fails to write is logged and dropped; the engine's `recent` still has it.
+    """
+
+    def __init__(self, engine: AlarmEngine, store: AlarmStore, *, interval_s: float = 1.0) -> None:
+        self.log = logging.getLogger("indigo.alarms")
+        self.engine = engine
+        self.store = store
+        self.interval_s = interval_s
+        self.written = 0
+        self._stop_evt = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def flush(self) -> int:
+        n = 0
+        while batch := self.engine.drain():
+            try:
+                self.store.record(batch)
+            except Exception as e:
+                self.log.warning("Alarm history write failed (%d events dropped): %s", len(batch), e)
+                continue
+            n += len(batch)
+        self.written += n
+        return n
+
+    def _run(self) -> None:
+        while not self._stop_evt.wait(self.interval_s):
+            self.flush()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run, name="AlarmRecorder", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        self.flush()
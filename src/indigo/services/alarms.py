@@ -0,0 +1,595 @@
+from __future__ import annotations
+
+import json
+import math
+import operator
+import struct
+import threading
+import time
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from itertools import repeat
+from pathlib import Path
+from typing import Any
+
+from indigo.config.settings import Settings
+from indigo.hw.devices.laneboard import LaneboardClient
+from indigo.util.clock import SYSTEM_CLOCK, Clock
+from indigo.util.histogram import LatencyHistogram
+
+# Lane status payload (LaneboardClient.parse_status_response): output/input bit
+# groups, reflux/thermal temp and setpoint (i16 /100), stir speed command and raw
+# pressure (u16), stir running, error status
+_LANE = struct.Struct("<BBhhhhHHBB")
+_BITS_A = (
+    "cooling_valve_thermal",
+    "cooling_valve_reflux",
+    "cleaning_valve_water",
+    "cleaning_valve_solvent",
+    "vial_valve_n2",
+    "vial_valve_vac",
+    "lid_solenoid_down",
+    "lid_solenoid_up",
+)
+_BITS_B = (
+    "arm_solenoid_extend",
+    "arm_solenoid_retract",
+    "lid_switch_up",
+    "lid_switch_mid",
+    "lid_switch_down",
+    "arm_switch_retract",
+    "arm_switch_extend",
+    "heater_relay_on",
+)
+# Columns of the lanes x fields matrix; age_s is seconds since the lane last answered
+FIELDS: tuple[str, ...] = (
+    "reflux_temp_c",
+    "thermal_temp_c",
+    "reflux_sp_c",
+    "thermal_sp_c",
+    "stir_speed_cmd",
+    "pressure_raw",
+    "stir_running",
+    "error_status",
+    *_BITS_A,
+    *_BITS_B,
+    "age_s",
+)
+FIELD_INDEX = {f: i for i, f in enumerate(FIELDS)}
+_AGE = FIELD_INDEX["age_s"]
+
+SEVERITIES = ("info", "warning", "critical")
+
+RAISED = "raised"
+CLEARED = "cleared"
+ACKED = "acked"
+
+# op -> (compare column to column, compare column to constant t as t.<method>(a))
+_OPS: dict[str, tuple[Any, str]] = {
+    ">": (operator.gt, "__lt__"),
+    ">=": (operator.ge, "__le__"),
+    "<": (operator.lt, "__gt__"),
+    "<=": (operator.le, "__ge__"),
+    "==": (operator.eq, "__eq__"),
+    "!=": (operator.ne, "__ne__"),
+}
+_BAND_OPS = ("outside", "inside")
+
+
+@dataclass(frozen=True)
+class Condition:
+    """
+    One comparison on a lane field:
+      field op value               e.g. reflux_temp_c > 140
+      field op ref + value         e.g. thermal_temp_c > thermal_sp_c + 10
+      field outside/inside [low, high]
+    """
+
+    field: str
+    op: str
+    value: float = 0.0
+    ref: str | None = None
+    low: float = 0.0
+    high: float = 0.0
+
+    @staticmethod
+    def from_dict(d: dict[str, Any]) -> Condition:
+        c = Condition(
+            field=str(d.get("field")),
+            op=str(d.get("op")),
+            value=float(d.get("value", 0.0)),
+            ref=d.get("ref"),
+            low=float(d.get("low", 0.0)),
+            high=float(d.get("high", 0.0)),
+        )
+        if c.field not in FIELD_INDEX:
+            raise ValueError(f"unknown field {c.field!r}")
+        if c.ref is not None and c.ref not in FIELD_INDEX:
+            raise ValueError(f"unknown ref field {c.ref!r}")
+        if c.op not in _OPS and c.op not in _BAND_OPS:
+            raise ValueError(f"unknown op {c.op!r}")
+        if c.op in _BAND_OPS and c.low > c.high:
+            raise ValueError(f"{c.field}: low > high")
+        return c
+
+
+@dataclass(frozen=True)
+class AlarmRule:
+    """
+    Raised on a lane when all of `when` hold for on_delay_s; cleared once they
+    stop holding for off_delay_s. hysteresis widens the thresholds for clearing
+    (a > 140 with hysteresis 2 clears below 138). A latching alarm stays raised
+    after its condition clears until it is acknowledged.
+    """
+
+    name: str
+    when: tuple[Condition, ...]
+    severity: str = "warning"
+    message: str = ""
+    hysteresis: float = 0.0
+    on_delay_s: float = 0.0
+    off_delay_s: float = 0.0
+    latch: bool = False
+
+    @staticmethod
+    def from_dict(d: dict[str, Any]) -> AlarmRule:
+        """{"name", "when": [condition, ...] or a single condition's keys inline, ...}"""
+        if not d.get("name"):
+            raise ValueError("rule name required")
+        when = d.get("when", [d])
+        if isinstance(when, dict):
+            when = [when]
+        rule = AlarmRule(
+            name=str(d["name"]),
+            when=tuple(Condition.from_dict(c) for c in when),
+            severity=str(d.get("severity", "warning")),
+            message=str(d.get("message", "")),
+            hysteresis=float(d.get("hysteresis", 0.0)),
+            on_delay_s=float(d.get("on_delay_s", 0.0)),
+            off_delay_s=float(d.get("off_delay_s", 0.0)),
+            latch=bool(d.get("latch", False)),
+        )
+        if not rule.when:
+            raise ValueError(f"{rule.name}: no conditions")
+        if rule.severity not in SEVERITIES:
+            raise ValueError(f"{rule.name}: severity must be one of {SEVERITIES}")
+        if rule.hysteresis < 0 or rule.on_delay_s < 0 or rule.off_delay_s < 0:
+            raise ValueError(f"{rule.name}: hysteresis and delays must be >= 0")
+        return rule
+
+
+def default_rules(s: Settings) -> list[AlarmRule]:
+    """Built-in rule set, used when ALARM_RULES_FILE is not set."""
+    return [
+        AlarmRule.from_dict(d)
+        for d in (
+            {
+                "name": "reflux_over_temp",
+                "field": "reflux_temp_c",
+                "op": ">",
+                "value": s.ALARM_MAX_TEMP_C,
+                "severity": "critical",
+                "message": "reflux temperature above limit",
+                "hysteresis": 2.0,
+                "on_delay_s": 1.0,
+                "latch": True,
+            },
+            {
+                "name": "thermal_over_temp",
+                "field": "thermal_temp_c",
+                "op": ">",
+                "value": s.ALARM_MAX_TEMP_C,
+                "severity": "critical",
+                "message": "thermal temperature above limit",
+                "hysteresis": 2.0,
+                "on_delay_s": 1.0,
+                "latch": True,
+            },
+            {
+                "name": "pressure_out_of_band",
+                "field": "pressure_raw",
+                "op": "outside",
+                "low": s.ALARM_PRESSURE_RAW_MIN,
+                "high": s.ALARM_PRESSURE_RAW_MAX,
+                "message": "pressure outside band",
+                "hysteresis": 10.0,
+                "on_delay_s": 2.0,
+            },
+            {
+                "name": "stir_not_running",
+                "when": [
+                    {"field": "stir_speed_cmd", "op": ">", "value": 0},
+                    {"field": "stir_running", "op": "==", "value": 0},
+                ],
+                "message": "stirrer commanded but not running",
+                "on_delay_s": 3.0,
+            },
+            {
+                "name": "lid_down_mismatch",
+                "when": [
+                    {"field": "lid_solenoid_down", "op": "==", "value": 1},
+                    {"field": "lid_switch_down", "op": "==", "value": 0},
+                ],
+                "message": "lid solenoid down but lid not down",
+                "on_delay_s": 2.0,
+            },
+            {
+                "name": "lid_up_mismatch",
+                "when": [
+                    {"field": "lid_solenoid_up", "op": "==", "value": 1},
+                    {"field": "lid_switch_up", "op": "==", "value": 0},
+                ],
+                "message": "lid solenoid up but lid not up",
+                "on_delay_s": 2.0,
+            },
+        )
+    ]
+
+
+def load_rules(s: Settings) -> list[AlarmRule]:
+    """ALARM_RULES_FILE (a JSON list of rule objects) if set, else default_rules()."""
+    if not s.ALARM_RULES_FILE:
+        return default_rules(s)
+    raw = json.loads(Path(s.ALARM_RULES_FILE).read_text(encoding="utf-8"))
+    rules = [AlarmRule.from_dict(d) for d in raw]
+    names = [r.name for r in rules]
+    if len(set(names)) != len(names):
+        raise ValueError("duplicate alarm rule names")
+    return rules
+
+
+@dataclass(frozen=True, slots=True)
+class AlarmEvent:
+    ts: float
+    rule: str
+    addr: int
+    severity: str
+    state: str  # raised | cleared | acked
+    value: float | None
+    message: str
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "ts": self.ts,
+            "rule": self.rule,
+            "addr": self.addr,
+            "severity": self.severity,
+            "state": self.state,
+            "value": self.value,
+            "message": self.message,
+        }
+
+
+def _compile_condition(c: Condition, relax: float):
+    """
+    fn(cols) -> iterator of bools, one per lane. relax widens the alarm region
+    (the hold test under hysteresis). Runs as C-level map() over whole columns.
+    """
+    j = FIELD_INDEX[c.field]
+    if c.op == "outside":
+        lo, hi = c.low + relax, c.high - relax
+        return lambda cols: map(operator.or_, map(lo.__gt__, cols[j]), map(hi.__lt__, cols[j]))
+    if c.op == "inside":
+        lo, hi = c.low - relax, c.high + relax
+        return lambda cols: map(operator.and_, map(lo.__le__, cols[j]), map(hi.__ge__, cols[j]))
+    cmp, method = _OPS[c.op]
+    if c.op in (">", ">="):
+        t = c.value - relax
+    elif c.op in ("<", "<="):
+        t = c.value + relax
+    else:
+        t = c.value
+    if c.ref is not None:
+        k = FIELD_INDEX[c.ref]
+        return lambda cols: map(cmp, cols[j], map(operator.add, cols[k], repeat(t)))
+    test = getattr(float(t), method)
+    return lambda cols: map(test, cols[j])
+
+
+def _compile_all(conds: tuple[Condition, ...], relax: float):
+    """fn(cols) -> byte mask (int, one byte per lane: 1 where every condition holds)."""
+    fns = [_compile_condition(c, relax) for c in conds]
+    first, rest = fns[0], fns[1:]
+
+    def check(cols) -> int:
+        out = first(cols)
+        for fn in rest:
+            out = map(operator.and_, out, fn(cols))
+        return int.from_bytes(bytes(out), "little")
+
+    return check
+
+
+class AlarmEngine:
+    """
+    Declarative alarm rules evaluated over every lane at once.
+
+    Lane fields live in one preallocated column-major lanes x fields array
+    (`matrix`), refreshed from the registry's raw payloads only for lanes whose
+    status changed since the last pass. Each rule is compiled once into
+    column-wise checks (C-level map() over whole columns) that yield a byte
+    mask over all lanes (byte i = lane i). A rule's masks are recomputed only
+    when a column it reads changed, and otherwise reused; when only a few
+    lanes changed (the usual case: one lane is polled per tick) just their
+    bytes are recomputed, so the cost tracks changes, not lanes x rules. Delays, hysteresis
+    and latching are big-int operations on those masks; the per-lane state
+    machine only runs for lanes whose mask differs from their alarm state or
+    that have a delay pending, i.e. around transitions.
+
+    Raised / cleared / acked events go to `recent` (for the API) and `outbox`
+    (drained by services.alarm_store.AlarmRecorder into SQLite). evaluate()
+    runs on the poll thread; ack() and readers may come from the command
+    socket thread, so both take `_lock` (uncontended: held for one pass).
+    """
+
+    def __init__(
+        self,
+        registry,
+        rules: list[AlarmRule],
+        *,
+        clock: Clock | None = None,
+        recent_max: int = 500,
+    ) -> None:
+        names = [r.name for r in rules]
+        if len(set(names)) != len(names):
+            raise ValueError("duplicate alarm rule names")
+        self.registry = registry
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.rules = tuple(rules)
+        self.rule_index = {r.name: i for i, r in enumerate(self.rules)}
+        self.lane_addrs = list(registry.lane_addrs)
+        self.index = {a: i for i, a in enumerate(self.lane_addrs)}
+        n = self._n = len(self.lane_addrs)
+        self._ones = int.from_bytes(b"\x01" * n, "little")
+
+        self.matrix = array("d", [math.nan]) * (len(FIELDS) * n)
+        self._seen = 0  # lanes with a status (byte mask); unseen lanes never alarm
+        self._version = -1
+
+        self._checks = []
+        self._rule_cols: list[frozenset[int]] = []
+        for r in self.rules:
+            raise_fn = _compile_all(r.when, 0.0)
+            hold_fn = _compile_all(r.when, r.hysteresis) if r.hysteresis else raise_fn
+            self._checks.append((raise_fn, hold_fn))
+            self._rule_cols.append(
+                frozenset(FIELD_INDEX[f] for c in r.when for f in (c.field, c.ref) if f is not None)
+            )
+        self._used = sorted(frozenset().union(*self._rule_cols))
+        # columns changed since the last pass: only rules reading them recompute their masks
+        self._dirty: set[int] = set(self._used)
+        self._dirty_lanes: set[int] = set()  # lanes whose row changed (with the columns above)
+        self._acked_rules: set[int] = set()  # acked since the last pass (may release a latch)
+
+        nr = len(self.rules)
+        self._on = [0] * nr  # last raise / hold masks per rule
+        self._hold = [0] * nr
+        self._active = [0] * nr
+        self._acked = [0] * nr
+        self._pending = [0] * nr
+        self._since = array("d", [math.nan]) * (nr * n)  # start of a pending transition
+        self._raised_ts = array("d", [math.nan]) * (nr * n)
+
+        self.recent: deque[AlarmEvent] = deque(maxlen=recent_max)
+        self.outbox: deque[AlarmEvent] = deque()
+        self.evaluations = 0
+        self.latency = LatencyHistogram()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_settings(registry, s: Settings, *, clock: Clock | None = None) -> AlarmEngine:
+        return AlarmEngine(registry, load_rules(s), clock=clock)
+
+    # ---- evaluation (poll thread) ----
+
+    def _set_row(self, i: int, payload: bytes) -> None:
+        b0, b1, rt, tt, rsp, tsp, stir, pressure, running, err = _LANE.unpack_from(payload)
+        row = array(
+            "d",
+            (
+                rt / 100.0,
+                tt / 100.0,
+                rsp / 100.0,
+                tsp / 100.0,
+                stir,
+                pressure,
+                running & 1,
+                err,
+                *((b0 >> k) & 1 for k in range(8)),
+                *((b1 >> k) & 1 for k in range(8)),
+            ),
+        )
+        old = self.matrix[i : _AGE * self._n : self._n]
+        if old != row:
+            self._dirty.update(j for j, (a, b) in enumerate(zip(old, row, strict=True)) if a != b)
+            self._dirty_lanes.add(i)
+            self.matrix[i : _AGE * self._n : self._n] = row
+
+    def _refresh(self, ts: float) -> None:
+        reg = self.registry
+        version = reg.version
+        if version != self._version:
+            for addr in reg.changed_since(self._version):
+                i = self.index.get(addr)
+                if i is None:
+                    continue
+                payload = reg.raw(addr)
+                if payload is None:  # stored already decoded (tests, tools)
+                    payload = LaneboardClient.encode_status_payload(reg.lane(addr))
+                self._set_row(i, payload)
+                self._seen |= 1 << (8 * i)
+            self._version = version
+        if _AGE in self._used:
+            seen = reg.last_seen_ts
+            base = _AGE * self._n
+            for i, addr in enumerate(self.lane_addrs):
+                last = seen.get(addr)
+                self.matrix[base + i] = math.nan if last is None else ts - last
+            self._dirty.add(_AGE)
+
+    def evaluate(self, ts: float | None = None) -> list[AlarmEvent]:
+        """One pass of every rule over every lane; returns the events it produced."""
+        t0 = time.perf_counter()
+        ts = self.clock.time() if ts is None else ts
+        events: list[AlarmEvent] = []
+        with self._lock:
+            self._refresh(ts)
+            n, m = self._n, self.matrix
+            dirty, lanes = self._dirty, self._dirty_lanes
+            seen = self._seen
+            since = self._since
+            cols = None
+            # a few changed lanes (one per poll tick): patch their bytes of each mask
+            # rather than rescanning whole columns
+            patch = {}
+            if lanes and len(lanes) * 8 <= n:
+                patch = {i: {j: m[j * n + i : j * n + i + 1] for j in self._used} for i in lanes}
+            acked_rules, self._acked_rules = self._acked_rules, set()
+            for r, rule in enumerate(self.rules):
+                rule_cols = self._rule_cols[r]
+                if dirty.isdisjoint(rule_cols):
+                    if not self._pending[r] and r not in acked_rules:
+                        continue  # same masks, nothing pending: no transition possible
+                else:
+                    raise_fn, hold_fn = self._checks[r]
+                    if patch and _AGE not in rule_cols:
+                        on, hold = self._on[r], self._hold[r]
+                        for i, lane_cols in patch.items():
+                            keep = ~(0xFF << (8 * i))
+                            hit = raise_fn(lane_cols)
+                            on = (on & keep) | (hit << (8 * i))
+                            if hold_fn is not raise_fn:
+                                hit = hold_fn(lane_cols)
+                            hold = (hold & keep) | (hit << (8 * i))
+                        self._on[r], self._hold[r] = on & seen, hold & seen
+                    else:
+                        if cols is None:
+                            cols = {j: m[j * n : (j + 1) * n] for j in self._used}
+                        self._on[r] = raise_fn(cols) & seen
+                        self._hold[r] = self._on[r] if hold_fn is raise_fn else hold_fn(cols) & seen
+                on, hold = self._on[r], self._hold[r]
+                active = self._active[r]
+                target = (active & hold) | (on & ~active)
+                if rule.latch:
+                    target |= active & ~self._acked[r]
+                diff = target ^ active
+                pending = self._pending[r]
+                work = diff | pending
+                if not work:
+                    continue
+                mask = work.to_bytes(n, "little")
+                i = mask.find(1)
+                while i >= 0:
+                    bit = 1 << (8 * i)
+                    k = r * n + i
+                    if not diff & bit:
+                        # condition went back before its delay ran out
+                        pending &= ~bit
+                        since[k] = math.nan
+                    else:
+                        if not pending & bit:
+                            pending |= bit
+                            since[k] = ts
+                        delay = rule.off_delay_s if active & bit else rule.on_delay_s
+                        if ts - since[k] >= delay:
+                            pending &= ~bit
+                            since[k] = math.nan
+                            active ^= bit
+                            self._acked[r] &= ~bit
+                            if active & bit:
+                                self._raised_ts[k] = ts
+                                events.append(self._event(ts, rule, i, RAISED))
+                            else:
+                                events.append(self._event(ts, rule, i, CLEARED))
+                    i = mask.find(1, i + 1)
+                self._active[r] = active
+                self._pending[r] = pending
+            dirty.clear()
+            lanes.clear()
+            self.evaluations += 1
+            self._emit(events)
+        self.latency.record((time.perf_counter() - t0) * 1000.0)
+        return events
+
+    def _event(self, ts: float, rule: AlarmRule, i: int, state: str) -> AlarmEvent:
+        v = self.matrix[FIELD_INDEX[rule.when[0].field] * self._n + i]
+        return AlarmEvent(
+            ts=ts,
+            rule=rule.name,
+            addr=self.lane_addrs[i],
+            severity=rule.severity,
+            state=state,
+            value=None if math.isnan(v) else v,
+            message=rule.message,
+        )
+
+    def _emit(self, events: list[AlarmEvent]) -> None:
+        self.recent.extend(events)
+        self.outbox.extend(events)
+
+    # ---- operator actions / readers (any thread) ----
+
+    def ack(self, rule: str, addr: int, ts: float | None = None) -> AlarmEvent | None:
+        """
+        Acknowledge an active alarm (None if it is not active or already
+        acknowledged). A latched alarm whose condition has cleared then clears on
+        the next evaluate().
+        Raises KeyError for an unknown rule or lane.
+        """
+        r, i = self.rule_index[rule], self.index[addr]
+        bit = 1 << (8 * i)
+        with self._lock:
+            if not self._active[r] & bit or self._acked[r] & bit:
+                return None
+            self._acked[r] |= bit
+            self._acked_rules.add(r)
+            ev = self._event(self.clock.time() if ts is None else ts, self.rules[r], i, ACKED)
+            self._emit([ev])
+        return ev
+
+    def active(self) -> list[dict[str, Any]]:
+        """Raised alarms, rule order then lane order."""
+        out = []
+        with self._lock:
+            for r, rule in enumerate(self.rules):
+                active = self._active[r]
+                if not active:
+                    continue
+                mask = active.to_bytes(self._n, "little")
+                i = mask.find(1)
+                while i >= 0:
+                    v = self.matrix[FIELD_INDEX[rule.when[0].field] * self._n + i]
+                    out.append(
+                        {
+                            "rule": rule.name,
+                            "addr": self.lane_addrs[i],
+                            "severity": rule.severity,
+                            "message": rule.message,
+                            "since": self._raised_ts[r * self._n + i],
+                            "acked": bool(self._acked[r] & (1 << (8 * i))),
+                            "latched": rule.latch,
+                            "value": None if math.isnan(v) else v,
+                        }
+                    )
+                    i = mask.find(1, i + 1)
+        return out
+
+    def is_active(self, rule: str, addr: int) -> bool:
+        return bool(self._active[self.rule_index[rule]] & (1 << (8 * self.index[addr])))
+
+    def drain(self, limit: int = 1000) -> list[AlarmEvent]:
+        """Events not yet persisted, oldest first (deque popleft is thread-safe)."""
+        out = []
+        while self.outbox and len(out) < limit:
+            out.append(self.outbox.popleft())
+        return out
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "rules": len(self.rules),
+            "lanes": self._n,
+            "active": sum(bin(a).count("1") for a in self._active),
+            "evaluations": self.evaluations,
+            "eval_ms": self.latency.snapshot(),
+        }
@@ -2,14 +2,27 @@ from __future__ import annotations
 
 import logging
 import threading
-import time
+from collections import deque
 
 from indigo.config.settings import get_settings
 
 # Import bus types lazily-ish, but still type-safe enough for runtime.
 from indigo.hw.bus.sim_bus import SimBus
 from indigo.hw.devices import LaneboardClient, UtilityBoardClient
+from indigo.hw.protocol.codec import Frame
+from indigo.services.alarms import AlarmEngine
+from indigo.services.commands import CommandError, CommandJob, CommandTracker, resolve_command
 from indigo.services.device_registry import DeviceRegistry
+from indigo.services.lane_stats import LaneStats
+from indigo.services.safety import InterlockRules, SafetyEvaluator
+from indigo.util.clock import SYSTEM_CLOCK, Clock
+from indigo.util.heartbeat import Heartbeat
+from indigo.util.histogram import LatencyHistogram
+from indigo.util.trace import PhaseTracer
+
+# Tick phases recorded by the tracer (ids are indexes)
+POLL_PHASES = ("commands", "build", "io", "parse", "safety", "registry", "alarms", "sleep")
+PH_COMMANDS, PH_BUILD, PH_IO, PH_PARSE, PH_SAFETY, PH_REGISTRY, PH_ALARMS, PH_SLEEP = range(len(POLL_PHASES))
 
 
 class BusPollService:
@@ -19,6 +32,21 @@ class BusPollService:
     Phase 2.6 behavior:
       - Poll UtilityBoard every cycle (critical)
       - Poll lanes in round-robin
+      - Send queued commands (FIFO) at the start of each tick; commands
+        submitted with submit_command() are tracked (queued/sent/acked/failed)
+        in self.commands
+
+    Responses are stored in the registry as raw payloads (no decoding on the
+    poll path). With safety on, every status is then run through the
+    SafetyEvaluator, decoded through the registry's memo (once per change).
+    Stop frames from a trip jump the command queue and are sent immediately,
+    i.e. on the next bus transaction after detection.
+
+    With alarms (services.alarms), every rule is evaluated over every lane at
+    the end of each tick.
+
+    Every tick is traced into self.tracer (perf_counter_ns spans per phase:
+    commands, build, io, parse, safety, registry, alarms, and the sleep after it).
     """
 
     def __init__(
@@ -28,8 +56,15 @@ class BusPollService:
         poll_hz: float,
         bus=None,
         registry: DeviceRegistry | None = None,
+        safety: SafetyEvaluator | None = None,
+        clock: Clock | None = None,
+        tracer: PhaseTracer | None = None,
+        commands: CommandTracker | None = None,
+        alarms: AlarmEngine | None = None,
     ) -> None:
         self.log = logging.getLogger("indigo.bus_poll_service")
+        self.tracer = tracer if tracer is not None else PhaseTracer("bus_poll", POLL_PHASES)
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
 
         self.simulation_mode = simulation_mode
         self.poll_period_s = 1.0 / max(float(poll_hz), 0.1)
@@ -37,19 +72,40 @@ class BusPollService:
         s = get_settings()
 
         # Construct defaults if not injected.
-        self.bus = bus if bus is not None else SimBus()
+        self.bus = bus if bus is not None else SimBus(clock=self.clock)
         self.registry = registry if registry is not None else DeviceRegistry(
             lane_addrs=list(s.LANE_ADDRS),
             utility_addr=int(s.UTILITY_ADDR),
+            stats=LaneStats.from_settings(list(s.LANE_ADDRS), s),
         )
 
         self._stop_evt = threading.Event()
         self._thread: threading.Thread | None = None
 
+        if safety is None and s.SAFETY_INTERLOCKS:
+            safety = SafetyEvaluator(
+                InterlockRules.from_settings(s),
+                lane_addrs=list(self.registry.lane_addrs),
+                utility_addr=self.registry.utility_addr,
+            )
+        self.safety = safety
+
+        if alarms is None and s.ALARMS:
+            alarms = AlarmEngine.from_settings(self.registry, s, clock=self.clock)
+        self.alarms = alarms
+
         self._lane_clients = {a: LaneboardClient(a) for a in self.registry.lane_addrs}
         self._utility_client = UtilityBoardClient(self.registry.utility_addr)
         self._lane_idx = 0
 
+        # Outgoing commands (frame, tracked job or None). deque append/appendleft/popleft are thread-safe.
+        self._cmd_q: deque[tuple[Frame, CommandJob | None]] = deque()
+        self.commands = commands if commands is not None else CommandTracker(clock=self.clock)
+        # start() loop: how late each tick started vs its fixed-rate schedule (ms)
+        self.jitter = LatencyHistogram()
+        # beats after every completed tick (a hung bus read stops it); see services.health
+        self.heartbeat = Heartbeat("bus_poll", self.poll_period_s, fixed_rate=True, clock=self.clock)
+
     def start(self) -> None:
         if self._thread and self._thread.is_alive():
             return
@@ -72,43 +128,196 @@ class BusPollService:
         """
         self.start()
         try:
-            while not self._stop_evt.is_set():
-                time.sleep(0.25)
+            while not self.clock.wait(self._stop_evt, 0.25):
+                pass
         except KeyboardInterrupt:
             self.log.info("KeyboardInterrupt; stopping BusPollService")
         finally:
             self.stop()
 
+    def submit(self, frame: Frame) -> None:
+        """Queue a command; it is sent at the start of the next tick."""
+        self._cmd_q.append((frame, None))
+
+    def submit_command(self, target: str, addr: int, command: str, args: dict | None = None) -> CommandJob:
+        """
+        Validate, build and queue a named command (see services.commands) and
+        return its tracked job. Raises CommandError for an unknown address or
+        command, bad arguments, or an unsafe command while the target (or the
+        utility board) is tripped by an interlock.
+        """
+        reg = self.registry
+        spec, frame = resolve_command(
+            target, addr, command, args, lane_addrs=reg.lane_addrs, utility_addr=reg.utility_addr
+        )
+        if not spec.safe and self.interlocked(addr):
+            raise CommandError("interlock_tripped", f"addr={addr}")
+        job = self.commands.new(target, addr, command, args or {})
+        self._cmd_q.append((frame, job))
+        return job
+
+    def interlocked(self, addr: int) -> bool:
+        """True while an interlock on addr (or on the utility board) is tripped."""
+        if self.safety is None:
+            return False
+        tripped = self.safety.tripped
+        return addr in tripped or self.registry.utility_addr in tripped
+
+    def run_for(self, duration_s: float) -> int:
+        """
+        Tick in the calling thread, once per poll period, for duration_s of clock time.
+
+        With a VirtualClock this runs as fast as ticks execute (days of polling in
+        seconds); returns the number of ticks.
+        """
+        start = self.clock.monotonic()
+        ticks = 0
+        while not self._stop_evt.is_set():
+            due = start + ticks * self.poll_period_s
+            if due >= start + duration_s:
+                break
+            t = self.tracer.now()
+            self.clock.sleep_until(due)
+            if ticks:
+                self.tracer.span(PH_SLEEP, t)  # attributed to the previous tick
+            self.tick()
+            self.heartbeat.beat()
+            ticks += 1
+        return ticks
+
     def _run(self) -> None:
+        # fixed-rate schedule: tick k is due at start + k * period; lateness is jitter
+        due = self.clock.monotonic()
         while not self._stop_evt.is_set():
-            ts = time.time()
+            now = self.clock.monotonic()
+            self.jitter.record((now - due) * 1000.0)
+            if now - due > self.poll_period_s:
+                due = now  # overran a whole period: skip the missed ticks rather than burst
+            self.tick()
+            self.heartbeat.beat()
+            due += self.poll_period_s
+            t = self.tracer.now()
+            self._idle(due)
+            self.tracer.span(PH_SLEEP, t)
 
-            # 1) poll utility first (critical)
+    def _idle(self, due: float) -> None:
+        """Wait between ticks until monotonic() reaches due (or stop)."""
+        self.clock.wait(self._stop_evt, max(0.0, due - self.clock.monotonic()))
+
+    def tick(self) -> None:
+        """One poll cycle: queued commands, utility status, one lane status."""
+        tr = self.tracer
+        t = tr.begin_tick()
+        ts = self.clock.time()
+
+        # 0) commands queued since the last tick
+        self._drain_commands()
+        t = tr.span(PH_COMMANDS, t)
+
+        # 1) poll utility first (critical)
+        try:
+            req = self._utility_client.build_status_request()
+            t = tr.span(PH_BUILD, t)
+            resp = self.bus.send_and_recv(req, timeout_s=0.25)
+            t = tr.span(PH_IO, t)
+            if resp is None:
+                self.log.warning("Utility poll: no response")
+            else:
+                detected = self.clock.perf_counter()
+                stored = self.registry.set_raw_status(resp.addr, resp.msg_type, resp.payload, ts)
+                t = tr.span(PH_REGISTRY, t)
+                if stored and self.safety is not None:
+                    ust = self.registry.utility  # decoded once per change (memoized)
+                    t = tr.span(PH_PARSE, t)
+                    self._preempt(ust.addr, self.safety.on_utility_status(ust), detected)
+                    t = tr.span(PH_SAFETY, t)
+        except Exception as e:
+            # Non-fatal in Phase 2.x, but log it (rate-limited by the logging pipeline).
+            self.log.warning("Utility poll failed: %s", e)
+            t = tr.now()
+
+        # 2) poll one lane per tick (round-robin)
+        lane_addrs = self.registry.lane_addrs
+        if lane_addrs:
+            addr = lane_addrs[self._lane_idx % len(lane_addrs)]
+            self._lane_idx += 1
             try:
-                req = self._utility_client.build_status_request()
+                client = self._lane_clients[addr]
+                req = client.build_status_request()
+                t = tr.span(PH_BUILD, t)
                 resp = self.bus.send_and_recv(req, timeout_s=0.25)
-                if resp:
-                    ust = UtilityBoardClient.parse_status_response(resp)
-                    if ust:
-                        self.registry.set_utility_status(ust, ts)
+                t = tr.span(PH_IO, t)
+                if resp is None:
+                    self.log.warning("Lane %s poll: no response", addr)
+                else:
+                    detected = self.clock.perf_counter()
+                    stored = self.registry.set_raw_status(resp.addr, resp.msg_type, resp.payload, ts)
+                    t = tr.span(PH_REGISTRY, t)
+                    if stored and self.safety is not None:
+                        st = self.registry.lane(resp.addr)
+                        t = tr.span(PH_PARSE, t)
+                        self._preempt(st.addr, self.safety.on_lane_status(st), detected)
+                        t = tr.span(PH_SAFETY, t)
             except Exception as e:
-                # Non-fatal in Phase 2.x, but log it.
-                self.log.debug("Utility poll failed: %s", e)
-
-            # 2) poll one lane per tick (round-robin)
-            lane_addrs = self.registry.lane_addrs
-            if lane_addrs:
-                addr = lane_addrs[self._lane_idx % len(lane_addrs)]
-                self._lane_idx += 1
-                try:
-                    client = self._lane_clients[addr]
-                    req = client.build_status_request()
-                    resp = self.bus.send_and_recv(req, timeout_s=0.25)
-                    if resp:
-                        st = client.parse_status_response(resp)
-                        if st:
-                            self.registry.set_lane_status(st, ts)
-                except Exception as e:
-                    self.log.debug("Lane %s poll failed: %s", addr, e)
-
-            time.sleep(self.poll_period_s)
+                self.log.warning("Lane %s poll failed: %s", addr, e)
+                t = tr.now()
+
+        # 3) every alarm rule over every lane, once per tick
+        if self.alarms is not None:
+            try:
+                self.alarms.evaluate(ts)
+            except Exception as e:
+                self.log.warning("Alarm evaluation failed: %s", e)
+            tr.span(PH_ALARMS, t)
+
+    def _preempt(self, addr: int, frames: list[Frame], detected: float) -> None:
+        """
+        Put safety frames at the head of the queue and send them right away.
+
+        If any stop frame is not acknowledged the trip is released, so the next
+        status that still shows the violation sends the stops again.
+        """
+        if not frames:
+            return
+        self._cmd_q.extendleft((f, None) for f in reversed(frames))
+        all_sent = True
+        for i in range(len(frames)):
+            sent = self._send_next()
+            if i == 0 and sent:
+                # detection -> first stop frame acknowledged by the bus
+                self.safety.record_latency((self.clock.perf_counter() - detected) * 1000.0)
+            all_sent = all_sent and sent
+
+        if all_sent:
+            self.log.warning("Interlock stop sent (%d frames)", len(frames))
+        else:
+            self.safety.stop_failed(addr)
+            self.log.error("Interlock stop for addr=%s not delivered; retrying on next status", addr)
+
+    def _drain_commands(self) -> None:
+        while self._cmd_q:
+            self._send_next()
+
+    def _send_next(self) -> bool:
+        """Send the head of the queue; True if the bus answered."""
+        try:
+            frame, job = self._cmd_q.popleft()
+        except IndexError:
+            return False
+        if job is not None:
+            self.commands.sent(job)
+        try:
+            resp = self.bus.send_and_recv(frame, timeout_s=0.25)
+        except Exception as e:
+            self.log.warning("Command 0x%02X to addr=%s failed: %s", frame.msg_type, frame.addr, e)
+            if job is not None:
+                self.commands.failed(job, f"bus_error: {e}")
+            return False
+        if resp is None:
+            self.log.warning("Command 0x%02X to addr=%s: no response", frame.msg_type, frame.addr)
+            if job is not None:
+                self.commands.failed(job, "no_response")
+            return False
+        if job is not None:
+            self.commands.acked(job)
+        return True
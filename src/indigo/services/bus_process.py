@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing as mp
+import os
+import signal
+import struct
+import threading
+import time
+from dataclasses import dataclass
+
+from indigo.config.settings import Settings
+from indigo.hw.devices.laneboard import RESP_ACK, RESP_LANE_STATUS
+from indigo.hw.devices.utilityboard import RESP_UTILITY_STATUS
+from indigo.hw.protocol.codec import Frame
+from indigo.services.alarms import AlarmEngine, AlarmRule
+from indigo.services.bus_poll_service import BusPollService
+from indigo.services.commands import CommandJob, CommandTracker, resolve_command
+from indigo.services.device_registry import DeviceRegistry
+from indigo.services.safety import is_stop_frame
+from indigo.util.heartbeat import Heartbeat
+from indigo.util.histogram import LatencyHistogram
+from indigo.util.shm_ring import ShmRing
+
+# bus process -> services process records (first byte is the kind)
+K_STATUS = 1  # a status response off the bus
+K_RESULT = 2  # outcome of a command frame
+K_TICK = 3  # poll tick lateness
+K_INFO = 4  # JSON: pid and the scheduling policy actually applied
+
+_STATUS = struct.Struct("<BBBxd")  # kind, addr, msg_type, ts; then payload
+_RESULT = struct.Struct("<BBxxIdd")  # kind, ok, seq, t_sent, t_done (perf_counter); then error text
+_TICK = struct.Struct("<Bxxxd")  # kind, lateness ms
+
+# services process -> bus process: seq, flags, addr, msg_type; then payload
+_CMD = struct.Struct("<IBBB")
+F_SAFE = 0x01  # stop frame: sent even while an interlock is tripped
+
+SLOT_BYTES = 256
+CMD_SLOTS = 256
+OUT_SLOTS = 4096
+
+
+@dataclass(frozen=True)
+class BusProcessConfig:
+    poll_hz: float
+    lane_addrs: tuple[int, ...]
+    utility_addr: int
+    simulation_mode: bool = True
+    cpu: int | None = None  # pin the bus process to this core
+    fifo_priority: int | None = None  # SCHED_FIFO priority (1..99)
+    nice: int | None = None
+    log_level: str = "INFO"
+    sim_delay_s: float = 0.01  # SimBus per-transaction delay
+
+    @staticmethod
+    def from_settings(s: Settings) -> BusProcessConfig:
+        return BusProcessConfig(
+            poll_hz=s.POLL_HZ,
+            lane_addrs=tuple(s.LANE_ADDRS),
+            utility_addr=s.UTILITY_ADDR,
+            simulation_mode=s.SIMULATION_MODE,
+            cpu=s.BUS_CPU if s.BUS_CPU >= 0 else None,
+            fifo_priority=s.BUS_SCHED_FIFO or None,
+            nice=s.BUS_NICE or None,
+            log_level=s.LOG_LEVEL,
+        )
+
+
+# ---- bus process side ----
+
+
+class _Outbox:
+    def __init__(self, ring: ShmRing, bell) -> None:
+        self.ring = ring
+        self.bell = bell
+
+    def push(self, record: bytes) -> None:
+        self.ring.push(record)  # full: dropped and counted in the ring
+        self.bell.set()
+
+
+class _TapBus:
+    """The real bus, publishing every status response it returns."""
+
+    def __init__(self, bus, out: _Outbox) -> None:
+        self.bus = bus
+        self.out = out
+
+    def send_and_recv(self, frame: Frame, timeout_s: float = 0.25) -> Frame | None:
+        resp = self.bus.send_and_recv(frame, timeout_s)
+        if resp is not None and resp.msg_type in (RESP_LANE_STATUS, RESP_UTILITY_STATUS):
+            self.out.push(_STATUS.pack(K_STATUS, resp.addr, resp.msg_type, time.time()) + resp.payload)
+        return resp
+
+
+class _RemoteJob:
+    __slots__ = ("seq", "t_sent")
+
+    def __init__(self, seq: int) -> None:
+        self.seq = seq
+        self.t_sent: float | None = None
+
+
+class _ResultPublisher:
+    """Stands in for CommandTracker in the bus process: outcomes go back over the ring."""
+
+    def __init__(self, out: _Outbox) -> None:
+        self.out = out
+
+    def sent(self, job: _RemoteJob, at: float | None = None) -> None:
+        job.t_sent = time.perf_counter()
+
+    def acked(self, job: _RemoteJob, at: float | None = None) -> None:
+        self._publish(job, True, "")
+
+    def failed(self, job: _RemoteJob, error: str, at: float | None = None) -> None:
+        self._publish(job, False, error)
+
+    def _publish(self, job: _RemoteJob, ok: bool, error: str) -> None:
+        done = time.perf_counter()
+        sent = done if job.t_sent is None else job.t_sent
+        self.out.push(_RESULT.pack(K_RESULT, int(ok), job.seq, sent, done) + error.encode()[:200])
+
+
+class _PublishedHistogram(LatencyHistogram):
+    def __init__(self, out: _Outbox) -> None:
+        super().__init__()
+        self.out = out
+
+    def record(self, value_ms: float) -> None:
+        super().record(value_ms)
+        self.out.push(_TICK.pack(K_TICK, value_ms))
+
+
+class _IsolatedPoller(BusPollService):
+    """
+    BusPollService whose commands arrive over a ring: between ticks it sleeps on
+    the command doorbell instead of the stop event, so a command is sent as soon
+    as it arrives rather than at the next tick.
+    """
+
+    def __init__(self, *, cmd_ring: ShmRing, cmd_bell, out: _Outbox, **kw) -> None:
+        super().__init__(commands=_ResultPublisher(out), **kw)
+        self.jitter = _PublishedHistogram(out)
+        self.alarms = None  # evaluated by the services process (BusProcess), off the real-time loop
+        self._cmd_ring = cmd_ring
+        self._cmd_bell = cmd_bell
+
+    def tick(self) -> None:
+        self._take_commands()
+        super().tick()
+
+    def _idle(self, due: float) -> None:
+        while not self._stop_evt.is_set():
+            remaining = due - self.clock.monotonic()
+            if remaining <= 0:
+                return
+            if self._cmd_bell.wait(min(remaining, 0.25)):
+                self._cmd_bell.clear()
+                self._take_commands()
+                self._drain_commands()
+
+    def _take_commands(self) -> None:
+        for rec in self._cmd_ring.pop_many():
+            seq, flags, addr, msg_type = _CMD.unpack_from(rec)
+            job = _RemoteJob(seq)
+            if not flags & F_SAFE and self.interlocked(addr):
+                self.commands.failed(job, "interlock_tripped")
+                continue
+            self._cmd_q.append((Frame(addr=addr, msg_type=msg_type, payload=rec[_CMD.size :]), job))
+
+
+def _bus_main(cfg: BusProcessConfig, cmd_spec: tuple, out_spec: tuple, cmd_bell, out_bell, stop) -> None:
+    # the services process owns shutdown; Ctrl-C reaches the whole process group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from indigo.hw.bus.sim_bus import SimBus
+    from indigo.util.logging import configure_logging
+    from indigo.util.rt import apply_rt_policy
+
+    configure_logging(cfg.log_level)
+    log = logging.getLogger("indigo.bus_process")
+    # before any thread starts: the poll thread inherits affinity and policy
+    policy = apply_rt_policy(cpu=cfg.cpu, fifo_priority=cfg.fifo_priority, nice=cfg.nice)
+    for err in policy["errors"]:
+        log.warning("Scheduling policy not applied: %s", err)
+
+    cmd_ring, out_ring = ShmRing.attach(cmd_spec), ShmRing.attach(out_spec)
+    out = _Outbox(out_ring, out_bell)
+    out.push(bytes([K_INFO]) + json.dumps({"pid": os.getpid(), "rt": policy}).encode())
+    poller = _IsolatedPoller(
+        cmd_ring=cmd_ring,
+        cmd_bell=cmd_bell,
+        out=out,
+        simulation_mode=cfg.simulation_mode,
+        poll_hz=cfg.poll_hz,
+        bus=_TapBus(SimBus(utility_addr=cfg.utility_addr, delay_s=cfg.sim_delay_s), out),
+        registry=DeviceRegistry(lane_addrs=list(cfg.lane_addrs), utility_addr=cfg.utility_addr),
+    )
+    poller.start()
+    try:
+        while not stop.wait(0.25):
+            if not poller._thread.is_alive():
+                log.error("Poll thread died; exiting bus process")
+                break
+    finally:
+        poller.stop()
+        cmd_ring.close()
+        out_ring.close()
+
+
+# ---- services process side ----
+
+
+class _Waiter:
+    __slots__ = ("done", "ok")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.ok = False
+
+
+class BusProcess:
+    """
+    The bus poll loop (BusPollService, safety interlocks included) in its own
+    process, optionally pinned to a core and run SCHED_FIFO / reniced, so work
+    in the services process cannot add GIL jitter to bus timing.
+
+    Exchange is two shared-memory rings (ShmRing) with event doorbells:
+      commands  services -> bus: frames with a sequence number
+      out       bus -> services: raw status responses, command outcomes,
+                per-tick lateness, and the applied scheduling policy
+    A reader thread here stores status payloads in self.registry, completes jobs in
+    self.commands and mirrors tick lateness into self.jitter (each tick also
+    beats self.heartbeat).
+
+    Stands in for BusPollService in the services process: registry, commands,
+    submit_command() (CommandServer) and send_and_recv() (CycleRunner's bus;
+    waits for the bus process to report the frame's outcome). Interlocks are
+    evaluated in the bus process, where non-stop frames are refused while
+    tripped, so safety is None here.
+    """
+
+    def __init__(
+        self,
+        cfg: BusProcessConfig,
+        *,
+        registry: DeviceRegistry | None = None,
+        commands: CommandTracker | None = None,
+        alarm_rules: list[AlarmRule] | None = None,
+    ) -> None:
+        self.log = logging.getLogger("indigo.bus_process")
+        self.cfg = cfg
+        self.registry = registry if registry is not None else DeviceRegistry(
+            lane_addrs=list(cfg.lane_addrs), utility_addr=cfg.utility_addr
+        )
+        self.commands = commands if commands is not None else CommandTracker()
+        self.safety = None
+        # evaluated here, on the registry this process keeps, after every tick record
+        self.alarms = AlarmEngine(self.registry, alarm_rules) if alarm_rules else None
+        self.jitter = LatencyHistogram()
+        self.rt_policy: dict | None = None
+        self.child_pid: int | None = None
+        self.poll_period_s = 1.0 / max(float(cfg.poll_hz), 0.1)
+        # beats on every tick record from the bus process: stops if its loop (or this reader) hangs
+        self.heartbeat = Heartbeat("bus_poll", self.poll_period_s, fixed_rate=True)
+
+        self._ctx = mp.get_context("spawn")
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._pending: dict[int, CommandJob | _Waiter] = {}
+        self._proc = None
+        self._reader: threading.Thread | None = None
+        self._reader_stop = threading.Event()
+        self._cmd: ShmRing | None = None
+        self._out: ShmRing | None = None
+        self.statuses = 0
+
+    # ---- lifecycle ----
+
+    def start(self) -> None:
+        if self._proc is not None:
+            return
+        ctx = self._ctx
+        self._cmd = ShmRing.create(CMD_SLOTS, SLOT_BYTES, ctx.Lock())
+        self._out = ShmRing.create(OUT_SLOTS, SLOT_BYTES, ctx.Lock())
+        self._cmd_bell, self._out_bell, self._stop = ctx.Event(), ctx.Event(), ctx.Event()
+        self._proc = ctx.Process(
+            target=_bus_main,
+            args=(self.cfg, self._cmd.spec, self._out.spec, self._cmd_bell, self._out_bell, self._stop),
+            name="indigo-bus",
+            daemon=True,
+        )
+        self._proc.start()
+        self.child_pid = self._proc.pid
+        self._reader_stop.clear()
+        self._reader = threading.Thread(target=self._read_loop, name="BusProcessReader", daemon=True)
+        self._reader.start()
+        self.log.info("Bus process started (pid=%s poll_period=%.3fs)", self.child_pid, self.poll_period_s)
+
+    def stop(self) -> None:
+        if self._proc is None:
+            return
+        self._stop.set()
+        self._cmd_bell.set()
+        self._proc.join(timeout=3.0)
+        if self._proc.is_alive():
+            self._proc.terminate()
+            self._proc.join(timeout=1.0)
+        self._reader_stop.set()
+        self._out_bell.set()
+        if self._reader is not None:
+            self._reader.join(timeout=2.0)
+        self._drain()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for item in pending.values():
+            if isinstance(item, _Waiter):
+                item.done.set()
+            else:
+                self.commands.failed(item, "bus_process_stopped")
+        cmd, out, self._cmd, self._out = self._cmd, self._out, None, None
+        cmd.close()
+        out.close()
+        self._proc = None
+        self.log.info("Bus process stopped")
+
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.is_alive()
+
+    def run_forever(self) -> None:
+        """Like BusPollService.run_forever(); returns if the bus process dies."""
+        self.start()
+        try:
+            while self._proc.is_alive():
+                self._proc.join(timeout=0.25)
+            self.log.error("Bus process exited (code %s)", self._proc.exitcode)
+        except KeyboardInterrupt:
+            self.log.info("KeyboardInterrupt; stopping bus process")
+        finally:
+            self.stop()
+
+    # ---- commands ----
+
+    def submit_command(self, target: str, addr: int, command: str, args: dict | None = None) -> CommandJob:
+        """Same contract as BusPollService.submit_command (interlocks are checked in the bus process)."""
+        reg = self.registry
+        spec, frame = resolve_command(
+            target, addr, command, args, lane_addrs=reg.lane_addrs, utility_addr=reg.utility_addr
+        )
+        job = self.commands.new(target, addr, command, args or {})
+        if not self._push_command(frame, job, safe=spec.safe):
+            self.commands.failed(job, "command_queue_full")
+        return job
+
+    def send_and_recv(self, frame: Frame, timeout_s: float = 0.25) -> Frame | None:
+        """
+        Bus interface for CycleRunner: queue frame and wait for its outcome. Returns
+        an ACK frame if the board answered, None otherwise (as a bus would).
+        """
+        waiter = _Waiter()
+        if not self._push_command(frame, waiter, safe=is_stop_frame(frame)):
+            return None
+        # the bus process may be mid-tick (two status transactions) before it sees the frame
+        if not waiter.done.wait(3 * timeout_s + 0.05):
+            with self._lock:
+                self._pending = {k: v for k, v in self._pending.items() if v is not waiter}
+            return None
+        return Frame(addr=frame.addr, msg_type=RESP_ACK, payload=b"\x00") if waiter.ok else None
+
+    def _push_command(self, frame: Frame, item: CommandJob | _Waiter, *, safe: bool) -> bool:
+        if self._cmd is None:
+            return False
+        with self._lock:
+            self._seq = (self._seq + 1) & 0xFFFFFFFF
+            seq = self._seq
+            self._pending[seq] = item
+        record = _CMD.pack(seq, F_SAFE if safe else 0, frame.addr, frame.msg_type) + frame.payload
+        if not self._cmd.push(record):
+            with self._lock:
+                self._pending.pop(seq, None)
+            return False
+        self._cmd_bell.set()
+        return True
+
+    # ---- bus -> services ----
+
+    def _read_loop(self) -> None:
+        while not self._reader_stop.is_set():
+            if self._out_bell.wait(0.25):
+                self._out_bell.clear()
+            self._drain()
+
+    def _drain(self) -> None:
+        while True:
+            records = self._out.pop_many()
+            if not records:
+                return
+            for rec in records:
+                try:
+                    self._handle(rec)
+                except Exception as e:
+                    self.log.warning("Bad record from bus process (kind=%s): %s", rec[:1].hex(), e)
+
+    def _handle(self, rec: bytes) -> None:
+        kind = rec[0]
+        if kind == K_STATUS:
+            _, addr, msg_type, ts = _STATUS.unpack_from(rec)
+            self.registry.set_raw_status(addr, msg_type, rec[_STATUS.size :], ts)  # decoded when read
+            self.statuses += 1
+        elif kind == K_RESULT:
+            _, ok, seq, t_sent, t_done = _RESULT.unpack_from(rec)
+            with self._lock:
+                item = self._pending.pop(seq, None)
+            if isinstance(item, _Waiter):
+                item.ok = bool(ok)
+                item.done.set()
+            elif item is not None:
+                self.commands.sent(item, at=t_sent)
+                if ok:
+                    self.commands.acked(item, at=t_done)
+                else:
+                    self.commands.failed(item, rec[_RESULT.size :].decode(errors="replace"), at=t_done)
+        elif kind == K_TICK:
+            self.jitter.record(_TICK.unpack_from(rec)[1])
+            self.heartbeat.beat()
+            if self.alarms is not None:
+                self.alarms.evaluate()
+        elif kind == K_INFO:
+            info = json.loads(rec[1:])
+            self.rt_policy = info["rt"]
+            self.log.info("Bus process pid=%s scheduling: %s", info["pid"], self.rt_policy)
+
+    def stats(self) -> dict:
+        return {
+            "pid": self.child_pid,
+            "alive": self.alive(),
+            "rt": self.rt_policy,
+            "statuses": self.statuses,
+            "jitter_ms": self.jitter.snapshot(),
+            "dropped": {"commands": self._cmd.dropped, "out": self._out.dropped} if self._cmd is not None else None,
+        }
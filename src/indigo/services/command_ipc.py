@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Any
+
+from indigo.services.commands import CommandError
+
+# one request or reply per line; anything longer is not a command
+MAX_LINE_BYTES = 64 * 1024
+
+
+class CommandUnavailable(OSError):
+    """The services process could not be reached (not running, socket missing, timeout)."""
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: _UnixServer
+
+    def handle(self) -> None:
+        while True:
+            line = self.rfile.readline(MAX_LINE_BYTES)
+            if not line:
+                return
+            try:
+                req = json.loads(line)
+                reply = (
+                    self.server.owner.request(req)
+                    if isinstance(req, dict)
+                    else _error("bad_request", "not an object")
+                )
+            except ValueError as e:
+                reply = _error("bad_request", str(e))
+            self.wfile.write(json.dumps(reply, separators=(",", ":")).encode() + b"\n")
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    owner: CommandServer
+
+
+def _error(code: str, detail: str) -> dict:
+    return {"ok": False, "error": code, "detail": detail}
+
+
+class CommandServer:
+    """
+    Local IPC front of a BusPollService's command queue, for the API process.
+
+    Unix stream socket (mode 0660), one JSON object per line each way:
+      {"op": "submit", "target": "lane", "addr": 1, "command": "vac_valve", "args": {"open": true}}
+      {"op": "status", "id": "..."}     {"op": "recent", "limit": 50}     {"op": "stats"}
+      {"op": "health"}                  (HealthMonitor.check(), if one was given)
+      {"op": "lane_stats", "addr": 1}   (registry.stats; addr omitted = all lanes)
+      {"op": "alarms"}                  {"op": "alarm_ack", "rule": "...", "addr": 1}
+    Replies are {"ok": true, ...} or {"ok": false, "error": code, "detail": ...}.
+
+    submit validates and queues only: the reply never waits for the bus, the
+    poll thread sends the frame on its next tick and records sent/acked/failed.
+    request() is the same dispatch without the socket (in-process callers, tests).
+    """
+
+    def __init__(self, poller, path: Path | str, *, health=None) -> None:
+        self.poller = poller
+        self.health = health
+        self.path = Path(path)
+        self.log = logging.getLogger("indigo.command_ipc")
+        self._server: _UnixServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def request(self, req: dict[str, Any]) -> dict:
+        op = req.get("op")
+        tracker = self.poller.commands
+        if op == "submit":
+            try:
+                job = self.poller.submit_command(
+                    req.get("target"), req.get("addr"), req.get("command"), req.get("args")
+                )
+            except CommandError as e:
+                return _error(e.code, e.detail)
+            return {"ok": True, "job": job.as_dict()}
+        if op == "status":
+            job = tracker.get(str(req.get("id")))
+            return (
+                {"ok": True, "job": job}
+                if job is not None
+                else _error("command_not_found", str(req.get("id")))
+            )
+        if op == "recent":
+            return {"ok": True, "jobs": tracker.recent(int(req.get("limit", 50)))}
+        if op == "stats":
+            return {"ok": True, "stats": tracker.stats()}
+        if op == "health":
+            if self.health is None:
+                return _error("health_unavailable", "no health monitor")
+            return {"ok": True, "health": self.health.check()}
+        if op == "lane_stats":
+            stats = self.poller.registry.stats
+            if req.get("addr") is None:
+                return {"ok": True, "lanes": stats.snapshot()}
+            lane = stats.lane(req["addr"])
+            return {"ok": True, "lane": lane} if lane is not None else _error("unknown_lane", str(req["addr"]))
+        if op in ("alarms", "alarm_ack"):
+            return self._alarms(op, req)
+        return _error("bad_request", f"unknown op {op!r}")
+
+    def _alarms(self, op: str, req: dict[str, Any]) -> dict:
+        engine = getattr(self.poller, "alarms", None)
+        if engine is None:
+            return _error("alarms_unavailable", "alarms disabled")
+        if op == "alarms":
+            return {"ok": True, "active": engine.active(), "stats": engine.stats()}
+        rule, addr = req.get("rule"), req.get("addr")
+        if rule not in engine.rule_index:
+            return _error("unknown_alarm_rule", str(rule))
+        if addr not in engine.index:
+            return _error("unknown_lane", str(addr))
+        ev = engine.ack(rule, addr)
+        if ev is None:
+            return _error("alarm_not_active", f"{rule} on lane {addr} is not raised or already acknowledged")
+        return {"ok": True, "event": ev.as_dict()}
+
+    def start(self) -> None:
+        if self._server is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self.path.unlink()  # left behind by a previous run
+        server = _UnixServer(str(self.path), _Handler)
+        server.owner = self
+        os.chmod(self.path, 0o660)
+        self._server = server
+        self._thread = threading.Thread(
+            target=server.serve_forever, name="CommandServer", daemon=True
+        )
+        self._thread.start()
+        self.log.info("Command IPC listening on %s", self.path)
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self.path.unlink(missing_ok=True)
+
+
+class CommandClient:
+    """
+    API-process side of CommandServer: one short-lived connection per request
+    (a local socket connect is tens of microseconds), bounded by timeout_s.
+    """
+
+    def __init__(self, path: Path | str, *, timeout_s: float = 1.0) -> None:
+        self.path = str(path)
+        self.timeout_s = timeout_s
+
+    def request(self, req: dict[str, Any]) -> dict:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout_s)
+                sock.connect(self.path)
+                sock.sendall(json.dumps(req, separators=(",", ":")).encode() + b"\n")
+                with sock.makefile("rb") as f:
+                    line = f.readline(MAX_LINE_BYTES)
+        except OSError as e:
+            raise CommandUnavailable(f"{self.path}: {e}") from e
+        if not line:
+            raise CommandUnavailable(f"{self.path}: connection closed")
+        return json.loads(line)
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import secrets
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from indigo.hw.devices import LaneboardClient, UtilityBoardClient
+from indigo.hw.protocol.codec import Frame
+from indigo.services.safety import CYCLE_STOP
+from indigo.util.clock import SYSTEM_CLOCK, Clock
+from indigo.util.histogram import LatencyHistogram
+
+TARGET_LANE = "lane"
+TARGET_UTILITY = "utility"
+
+# job states
+QUEUED = "queued"
+SENT = "sent"
+ACKED = "acked"
+FAILED = "failed"
+
+_REQUIRED = object()
+
+
+@dataclass(frozen=True)
+class CommandSpec:
+    """
+    One API command: the client builder it maps to and its arguments, in the
+    builder's positional order as (name, type, default), after any fixed
+    leading values. safe commands (stops) are accepted while the target's
+    interlock is tripped.
+    """
+
+    builder: str
+    args: tuple[tuple[str, type, Any], ...] = ()
+    fixed: tuple[Any, ...] = ()
+    safe: bool = False
+
+
+def _flag(name: str) -> tuple[tuple[str, type, Any], ...]:
+    return ((name, bool, _REQUIRED),)
+
+
+LANE_COMMANDS: dict[str, CommandSpec] = {
+    "stop": CommandSpec("build_cycle", fixed=(CYCLE_STOP,), safe=True),
+    "recover": CommandSpec("build_recover"),
+    "cycle": CommandSpec("build_cycle", (("action", int, _REQUIRED),)),
+    "lid": CommandSpec("build_lid", _flag("extend")),
+    "arm": CommandSpec("build_arm", _flag("extend")),
+    "vac_valve": CommandSpec("build_vac_valve", _flag("open")),
+    "solvent_valve": CommandSpec("build_solvent_valve", _flag("open")),
+    "water_valve": CommandSpec("build_water_valve", _flag("open")),
+    "n2_valve": CommandSpec("build_n2_valve", _flag("open")),
+    "stir": CommandSpec("build_stir", (("on", bool, _REQUIRED), ("speed", int, 0))),
+    "pressure": CommandSpec("build_pressure", (("setpoint", float, _REQUIRED),)),
+    "thermal": CommandSpec(
+        "build_thermal", (("thermal_sp_c", float, _REQUIRED), ("reflux_sp_c", float, _REQUIRED))
+    ),
+    "thermal_only": CommandSpec("build_thermal_only", (("thermal_sp_c", float, _REQUIRED),)),
+    "reflux_only": CommandSpec("build_reflux_only", (("reflux_sp_c", float, _REQUIRED),)),
+}
+
+UTILITY_COMMANDS: dict[str, CommandSpec] = {
+    "stop": CommandSpec("build_stop", safe=True),
+    "initialize": CommandSpec("build_initialize"),
+    "main_solvent_valve": CommandSpec("build_main_solvent_valve", _flag("open")),
+    "main_n2_valve": CommandSpec("build_main_n2_valve", _flag("open")),
+    "main_water_valve": CommandSpec("build_main_water_valve", _flag("open")),
+    "main_vac_valve": CommandSpec("build_main_vac_valve", _flag("open")),
+    "waste_valve": CommandSpec("build_waste_valve", _flag("open")),
+    "vacuum_pump": CommandSpec("build_vacuum_pump", _flag("on")),
+    "waste_pump": CommandSpec("build_waste_pump", _flag("on")),
+}
+
+COMMANDS = {TARGET_LANE: LANE_COMMANDS, TARGET_UTILITY: UTILITY_COMMANDS}
+
+
+class CommandError(ValueError):
+    """A command request that cannot be queued; code is the API error code."""
+
+    def __init__(self, code: str, detail: str) -> None:
+        super().__init__(f"{code}: {detail}")
+        self.code = code
+        self.detail = detail
+
+
+def _coerce(name: str, kind: type, value: Any) -> Any:
+    # JSON gives bool for true/false and int/float for numbers; bool is not a number here
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        if kind is float:
+            return float(value)
+        if float(value).is_integer():
+            return int(value)
+    raise CommandError("invalid_args", f"{name} must be {kind.__name__}")
+
+
+def build_command(
+    target: str, addr: int, command: str, args: dict | None = None
+) -> tuple[CommandSpec, Frame]:
+    """Validate a command request and build its frame. Raises CommandError."""
+    specs = COMMANDS.get(target) if isinstance(target, str) else None
+    if specs is None:
+        raise CommandError("unknown_target", str(target))
+    spec = specs.get(command) if isinstance(command, str) else None
+    if spec is None:
+        raise CommandError("unknown_command", str(command))
+    args = args or {}
+    if not isinstance(args, dict):
+        raise CommandError("invalid_args", "args must be an object")
+    extra = set(args) - {name for name, _, _ in spec.args}
+    if extra:
+        raise CommandError("invalid_args", f"unexpected: {', '.join(sorted(extra))}")
+
+    values = list(spec.fixed)
+    for name, kind, default in spec.args:
+        if name not in args:
+            if default is _REQUIRED:
+                raise CommandError("invalid_args", f"{name} is required")
+            values.append(default)
+        else:
+            values.append(_coerce(name, kind, args[name]))
+
+    client = LaneboardClient(addr) if target == TARGET_LANE else UtilityBoardClient(addr)
+    return spec, getattr(client, spec.builder)(*values)
+
+
+def resolve_command(
+    target: str, addr: int, command: str, args: dict | None, *, lane_addrs: list[int], utility_addr: int
+) -> tuple[CommandSpec, Frame]:
+    """build_command() plus a check that addr is a configured lane / the utility board."""
+    spec, frame = build_command(target, addr, command, args)
+    known = lane_addrs if target == TARGET_LANE else [utility_addr]
+    if addr not in known:
+        raise CommandError(f"unknown_{target}", str(addr))
+    return spec, frame
+
+
+@dataclass(slots=True)
+class CommandJob:
+    id: str
+    target: str
+    addr: int
+    command: str
+    args: dict
+    queued_ts: float  # wall clock
+    t_queued: float  # perf_counter
+    state: str = QUEUED
+    t_sent: float | None = None
+    t_done: float | None = None
+    error: str | None = None
+
+    def as_dict(self) -> dict:
+        def ms(a: float | None, b: float | None) -> float | None:
+            return None if a is None or b is None else round((b - a) * 1000.0, 3)
+
+        return {
+            "id": self.id,
+            "target": self.target,
+            "addr": self.addr,
+            "command": self.command,
+            "args": self.args,
+            "state": self.state,
+            "error": self.error,
+            "queued_ts": self.queued_ts,
+            "timings_ms": {
+                "queued_to_sent": ms(self.t_queued, self.t_sent),
+                "sent_to_done": ms(self.t_sent, self.t_done),
+                "total": ms(self.t_queued, self.t_done),
+            },
+        }
+
+
+class CommandTracker:
+    """
+    Lifecycle of API-submitted commands: queued -> sent -> acked | failed.
+
+    The poll thread reports transitions (sent/acked/failed); readers get
+    as_dict() copies under the lock. The newest max_jobs jobs are kept.
+    End-to-end latency (queued -> acked) and its two legs are histogrammed.
+    """
+
+    def __init__(self, *, max_jobs: int = 1024, clock: Clock | None = None) -> None:
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.max_jobs = max_jobs
+        self.boot_id = secrets.token_hex(4)
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[str, CommandJob] = OrderedDict()
+        self._seq = 0
+        self.counts = {QUEUED: 0, SENT: 0, ACKED: 0, FAILED: 0}
+        self.queue_hist = LatencyHistogram()
+        self.bus_hist = LatencyHistogram()
+        self.total_hist = LatencyHistogram()
+
+    def new(self, target: str, addr: int, command: str, args: dict) -> CommandJob:
+        with self._lock:
+            self._seq += 1
+            job = CommandJob(
+                id=f"{self.boot_id}-{self._seq}",
+                target=target,
+                addr=addr,
+                command=command,
+                args=dict(args),
+                queued_ts=self.clock.time(),
+                t_queued=self.clock.perf_counter(),
+            )
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+            self.counts[QUEUED] += 1
+        return job
+
+    # at= is a perf_counter() reading taken elsewhere (e.g. the bus process;
+    # CLOCK_MONOTONIC is shared by all processes on the host)
+
+    def sent(self, job: CommandJob, at: float | None = None) -> None:
+        with self._lock:
+            job.t_sent = self.clock.perf_counter() if at is None else at
+            job.state = SENT
+            self.counts[SENT] += 1
+        self.queue_hist.record((job.t_sent - job.t_queued) * 1000.0)
+
+    def acked(self, job: CommandJob, at: float | None = None) -> None:
+        self._finish(job, ACKED, None, at)
+        self.bus_hist.record((job.t_done - job.t_sent) * 1000.0)
+        self.total_hist.record((job.t_done - job.t_queued) * 1000.0)
+
+    def failed(self, job: CommandJob, error: str, at: float | None = None) -> None:
+        self._finish(job, FAILED, error, at)
+
+    def _finish(self, job: CommandJob, state: str, error: str | None, at: float | None) -> None:
+        with self._lock:
+            job.t_done = self.clock.perf_counter() if at is None else at
+            if job.t_sent is None:
+                job.t_sent = job.t_done
+            job.state = state
+            job.error = error
+            self.counts[state] += 1
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.as_dict() if job is not None else None
+
+    def recent(self, limit: int = 50) -> list[dict]:
+        """Newest first."""
+        with self._lock:
+            jobs = list(self._jobs.values())[-limit:] if limit > 0 else []
+            return [j.as_dict() for j in reversed(jobs)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+            tracked = len(self._jobs)
+        return {
+            "counts": counts,
+            "tracked": tracked,
+            "latency_ms": {
+                "queued_to_sent": self.queue_hist.snapshot(),
+                "sent_to_acked": self.bus_hist.snapshot(),
+                "total": self.total_hist.snapshot(),
+            },
+        }
@@ -1,6 +1,274 @@
-"""
-CycleRunner will own automated recipe execution.
+from __future__ import annotations
 
-Intentionally empty for now.
-Implemented in Phase 3.x
-"""
+import heapq
+import logging
+import threading
+from dataclasses import dataclass
+
+from indigo.hw.bus.base import Bus
+from indigo.hw.protocol.codec import Frame
+from indigo.services.recipe_plan import PlanCache, RecipePlan
+from indigo.services.safety import SafetyEvaluator
+from indigo.util.clock import SYSTEM_CLOCK, Clock
+from indigo.util.heartbeat import Heartbeat
+from indigo.util.histogram import LatencyHistogram
+
+# Event kinds (also the per-phase histogram names)
+EV_START = "start"
+EV_STEP = "step"
+EV_COMPLETE = "complete"
+EV_STOP = "stop"
+
+# Longest idle wait of the scheduler thread (it re-checks the heap at least this often)
+IDLE_WAKE_S = 0.25
+
+# Lane run states
+RUNNING = "running"
+COMPLETE = "complete"
+ABORTED = "aborted"
+
+
+@dataclass(slots=True)
+class LaneRun:
+    lane_addr: int
+    plan: RecipePlan
+    t0: float  # clock.monotonic() at cycle start
+    gen: int
+    state: str = RUNNING
+    steps_sent: int = 0
+    failures: int = 0
+    reason: str | None = None
+
+
+class CycleRunner:
+    """
+    Runs compiled recipe plans on every lane from one scheduler thread.
+
+    Every frame group of every running plan is an entry in a single heap keyed
+    on its monotonic deadline; the thread sleeps until the earliest one (waking
+    early if a cycle is started or aborted), spins the last spin_s for precision,
+    and sends everything that is due, in deadline order, through the bus.
+
+    Cancellation is lazy: aborting a lane bumps its generation, and heap entries
+    from an older generation are dropped when they surface.
+
+    For each event, (first frame sent - deadline) is recorded in ms, overall and
+    per phase (start/step/complete/stop). A frame the bus does not acknowledge
+    aborts the lane. If a SafetyEvaluator is given, a lane (or the utility
+    board) that is tripped is stopped instead of advanced.
+
+    With a VirtualClock, run_until_idle() jumps from deadline to deadline, so
+    tests can run whole cycles (hours of attempttime) against SimBus instantly.
+    """
+
+    def __init__(
+        self,
+        bus: Bus,
+        *,
+        plans: PlanCache | None = None,
+        safety: SafetyEvaluator | None = None,
+        utility_addr: int | None = None,
+        clock: Clock | None = None,
+        spin_s: float = 0.002,
+        timeout_s: float = 0.25,
+    ) -> None:
+        self.log = logging.getLogger("indigo.cycle_runner")
+        self.bus = bus
+        self.plans = plans
+        self.safety = safety
+        self.utility_addr = utility_addr
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.spin_s = max(0.0, float(spin_s))
+        self.timeout_s = timeout_s
+
+        self._cond = threading.Condition()
+        self._heap: list[tuple[float, int, int, int, str, int, tuple[Frame, ...]]] = []
+        self._seq = 0
+        self._runs: dict[int, LaneRun] = {}
+        self._gen: dict[int, int] = {}
+
+        self.timing_error = LatencyHistogram()
+        self.phase_error = {k: LatencyHistogram() for k in (EV_START, EV_STEP, EV_COMPLETE, EV_STOP)}
+        self.events_sent = 0
+        self.frames_failed = 0
+        self.heartbeat = Heartbeat("cycle_runner", IDLE_WAKE_S, clock=self.clock)
+
+        self._stop_evt = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # ---- control (any thread) ----
+
+    def start_cycle(self, lane_addr: int, plan: RecipePlan | None = None) -> bool:
+        """Schedule a plan on a lane (its active recipe if plan is None). False if none/already running."""
+        if plan is None:
+            if self.plans is None:
+                raise ValueError("no plan given and no PlanCache configured")
+            plan = self.plans.plan_for_lane(lane_addr)
+            if plan is None:
+                return False
+
+        with self._cond:
+            run = self._runs.get(lane_addr)
+            if run is not None and run.state == RUNNING:
+                return False
+            gen = self._gen[lane_addr] = self._gen.get(lane_addr, 0) + 1
+            t0 = self.clock.monotonic()
+            self._runs[lane_addr] = LaneRun(lane_addr=lane_addr, plan=plan, t0=t0, gen=gen)
+
+            self._push(t0, lane_addr, gen, EV_START, -1, plan.start_frames)
+            for i, frames in enumerate(plan.step_frames):
+                self._push(t0 + plan.step_offset_ms[i] / 1000.0, lane_addr, gen, EV_STEP, i, frames)
+            self._push(t0 + plan.complete_offset_ms / 1000.0, lane_addr, gen, EV_COMPLETE, -1, plan.complete_frames)
+            self._cond.notify()
+        self.log.info("Cycle started on lane %s (%d steps)", lane_addr, plan.nsteps)
+        return True
+
+    def abort_cycle(self, lane_addr: int, reason: str = "aborted") -> bool:
+        """Cancel the lane's remaining events and send its stop frames next. False if not running."""
+        with self._cond:
+            aborted = self._abort_locked(lane_addr, reason)
+            if aborted:
+                self._cond.notify()
+        return aborted
+
+    def lane_state(self, lane_addr: int) -> str | None:
+        with self._cond:
+            run = self._runs.get(lane_addr)
+            return run.state if run else None
+
+    def running_lanes(self) -> list[int]:
+        with self._cond:
+            return [a for a, r in self._runs.items() if r.state == RUNNING]
+
+    # ---- scheduling ----
+
+    def next_deadline(self) -> float | None:
+        with self._cond:
+            return self._heap[0][0] if self._heap else None
+
+    def run_pending(self) -> int:
+        """Send every event whose deadline has passed, earliest first. Returns events sent."""
+        sent = 0
+        while True:
+            with self._cond:
+                if not self._heap or self._heap[0][0] > self.clock.monotonic():
+                    return sent
+                deadline, _, lane_addr, gen, kind, step, frames = heapq.heappop(self._heap)
+                if gen != self._gen.get(lane_addr):
+                    continue  # cancelled
+                run = self._runs.get(lane_addr)
+                if kind != EV_STOP and self._tripped(lane_addr):
+                    self._abort_locked(lane_addr, "interlock")
+                    continue
+
+            if self._send(deadline, kind, frames):
+                sent += 1
+                with self._cond:
+                    if run is not None and run.gen == gen:
+                        if kind == EV_STEP:
+                            run.steps_sent += 1
+                        elif kind == EV_COMPLETE:
+                            run.state = COMPLETE
+                            self.log.info("Cycle complete on lane %s", lane_addr)
+            elif kind != EV_STOP:
+                with self._cond:
+                    if run is not None:
+                        run.failures += 1
+                    self._abort_locked(lane_addr, f"{kind} not acknowledged")
+
+    def run_until_idle(self, max_s: float | None = None) -> None:
+        """Run (in the calling thread) until no events are left, or for at most max_s."""
+        end = None if max_s is None else self.clock.monotonic() + max_s
+        while True:
+            self.run_pending()
+            deadline = self.next_deadline()
+            if deadline is None or (end is not None and deadline > end):
+                return
+            self.clock.sleep_until(deadline, self.spin_s)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run, name="CycleRunner", daemon=True)
+        self._thread.start()
+        self.log.info("CycleRunner started (spin=%.1fms)", self.spin_s * 1000.0)
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        self.log.info("CycleRunner stopped")
+
+    def stats(self) -> dict:
+        with self._cond:
+            lanes = {
+                a: {"state": r.state, "steps_sent": r.steps_sent, "steps": r.plan.nsteps, "failures": r.failures, "reason": r.reason}
+                for a, r in self._runs.items()
+            }
+            pending = len(self._heap)
+        return {
+            "lanes": lanes,
+            "pending_events": pending,
+            "events_sent": self.events_sent,
+            "frames_failed": self.frames_failed,
+            "timing_error_ms": self.timing_error.snapshot(),
+            "timing_error_by_phase_ms": {k: h.snapshot() for k, h in self.phase_error.items()},
+        }
+
+    # ---- internals ----
+
+    def _run(self) -> None:
+        while not self._stop_evt.is_set():
+            self.heartbeat.beat()
+            self.run_pending()
+            with self._cond:
+                deadline = self._heap[0][0] if self._heap else None
+                coarse = None if deadline is None else deadline - self.clock.monotonic() - self.spin_s
+                if coarse is None or coarse > 0:
+                    # woken early by start/abort/stop; re-evaluate the heap
+                    self._cond.wait(timeout=IDLE_WAKE_S if coarse is None else min(coarse, IDLE_WAKE_S))
+                    continue
+            self.clock.sleep_until(deadline, self.spin_s)
+
+    def _send(self, deadline: float, kind: str, frames: tuple[Frame, ...]) -> bool:
+        ok = True
+        for i, frame in enumerate(frames):
+            if i == 0:
+                err_ms = (self.clock.monotonic() - deadline) * 1000.0
+                self.timing_error.record(err_ms)
+                self.phase_error[kind].record(err_ms)
+            try:
+                resp = self.bus.send_and_recv(frame, timeout_s=self.timeout_s)
+            except Exception as e:
+                self.log.warning("Cycle %s frame 0x%02X to addr=%s failed: %s", kind, frame.msg_type, frame.addr, e)
+                resp = None
+            if resp is None:
+                self.frames_failed += 1
+                ok = False
+        self.events_sent += 1
+        return ok
+
+    def _push(self, deadline: float, lane_addr: int, gen: int, kind: str, step: int, frames: tuple[Frame, ...]) -> None:
+        # caller holds self._cond
+        self._seq += 1
+        heapq.heappush(self._heap, (deadline, self._seq, lane_addr, gen, kind, step, frames))
+
+    def _abort_locked(self, lane_addr: int, reason: str) -> bool:
+        run = self._runs.get(lane_addr)
+        if run is None or run.state != RUNNING:
+            return False
+        gen = self._gen[lane_addr] = self._gen.get(lane_addr, 0) + 1
+        run.state = ABORTED
+        run.reason = reason
+        self._push(self.clock.monotonic(), lane_addr, gen, EV_STOP, -1, run.plan.stop_frames)
+        self.log.warning("Cycle on lane %s aborted: %s", lane_addr, reason)
+        return True
+
+    def _tripped(self, lane_addr: int) -> bool:
+        if self.safety is None:
+            return False
+        tripped = self.safety.tripped
+        return lane_addr in tripped or (self.utility_addr is not None and self.utility_addr in tripped)
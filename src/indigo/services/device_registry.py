@@ -1,49 +1,168 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import secrets
 
-from indigo.hw.devices import LaneStatus, UtilityStatus
+from indigo.hw.devices import LaneboardClient, LaneStatus, UtilityBoardClient, UtilityStatus
+from indigo.hw.devices.laneboard import LANE_STATUS_LEN, RESP_LANE_STATUS
+from indigo.hw.devices.utilityboard import RESP_UTILITY_STATUS, UTILITY_STATUS_MIN_LEN
+from indigo.hw.protocol.codec import Frame
+from indigo.services.lane_stats import LaneStats
 
 
-@dataclass
 class DeviceRegistry:
-    lane_addrs: list[int]
-    utility_addr: int
+    """
+    Latest status of every board, as the raw response payload.
 
-    lanes: dict[int, LaneStatus] = field(default_factory=dict)
-    utility: UtilityStatus | None = None
+    The poll path stores bytes (set_raw_status): comparing and assigning a
+    16-byte payload is all it costs. Readers (lane(), utility, snapshots)
+    decode on demand; each decoded status is memoized against the sequence
+    number of the payload it came from, so a board is decoded at most once per
+    change, and only if someone reads it.
 
-    last_seen_ts: dict[int, float] = field(default_factory=dict)
+    Per address: (seq, payload) where seq is the registry version at which the
+    payload last changed, plus last_seen_ts (receive time of the latest copy,
+    changed or not). The poll thread is the only writer; readers in other
+    threads see either the old or the new tuple (single dict assignments), and
+    a memo entry is only used if its seq matches, so a racing decode is at
+    worst repeated, never stale.
+    """
+
+    def __init__(self, lane_addrs: list[int], utility_addr: int, *, stats: LaneStats | None = None) -> None:
+        self.lane_addrs = lane_addrs
+        self.utility_addr = utility_addr
+        self._lane_set = frozenset(lane_addrs)
+        # per-lane temperature statistics, fed every lane sample (changed or not)
+        self.stats = stats if stats is not None else LaneStats(lane_addrs)
+
+        # addr -> (seq, payload); payload None for statuses stored already decoded
+        self._raw: dict[int, tuple[int, bytes | None]] = {}
+        # addr -> (seq, decoded status)
+        self._decoded: dict[int, tuple[int, LaneStatus | UtilityStatus | None]] = {}
+        self.decodes = 0
+
+        self.last_seen_ts: dict[int, float] = {}
+
+        # Bumped only when a status actually changes (not on every poll); readers use
+        # (boot_id, version) as a cheap change token (ETags). boot_id keeps tags from
+        # a previous process from matching after a restart resets version to 0.
+        self.version = 0
+        self.boot_id = secrets.token_hex(4)
+
+    # ---- writers (poll thread) ----
+
+    def set_raw_status(self, addr: int, msg_type: int, payload: bytes, ts: float) -> bool:
+        """
+        Store a status response payload as received. False (nothing stored) if
+        it is not a well-formed status response for a known board.
+        """
+        if addr == self.utility_addr:
+            if msg_type != RESP_UTILITY_STATUS or len(payload) < UTILITY_STATUS_MIN_LEN:
+                return False
+        elif addr not in self._lane_set or msg_type != RESP_LANE_STATUS or len(payload) < LANE_STATUS_LEN:
+            return False
+        prev = self._raw.get(addr)
+        if prev is None or prev[1] != payload:
+            self.version += 1
+            self._raw[addr] = (self.version, bytes(payload))
+        self.last_seen_ts[addr] = ts
+        if addr != self.utility_addr:
+            self.stats.update(addr, payload, ts)
+        return True
 
     def set_lane_status(self, status: LaneStatus, ts: float) -> None:
-        self.lanes[status.addr] = status
-        self.last_seen_ts[status.addr] = ts
+        self._set_decoded(status.addr, status, ts)
+        self.stats.update_values(
+            status.addr, status.reflux_temp_c, status.thermal_temp_c, status.reflux_sp_c, status.thermal_sp_c, ts
+        )
 
     def set_utility_status(self, status: UtilityStatus, ts: float) -> None:
-        self.utility = status
-        self.last_seen_ts[status.addr] = ts
+        self._set_decoded(status.addr, status, ts)
+
+    def _set_decoded(self, addr: int, status: LaneStatus | UtilityStatus, ts: float) -> None:
+        # already-decoded statuses (tests, tools) skip the payload
+        if self._status(addr) != status:
+            self.version += 1
+            self._decoded[addr] = (self.version, status)
+            self._raw[addr] = (self.version, None)
+        self.last_seen_ts[addr] = ts
+
+    # ---- readers ----
+
+    def seq(self, addr: int) -> int | None:
+        """Sequence number of addr's current status (changes only when it does)."""
+        entry = self._raw.get(addr)
+        return None if entry is None else entry[0]
 
-    def lane_snapshot(self) -> list[dict]:
+    def changed_since(self, version: int) -> list[int]:
+        """Addresses whose status changed after registry version `version`."""
+        return [addr for addr, (seq, _) in self._raw.items() if seq > version]
+
+    def raw(self, addr: int) -> bytes | None:
+        entry = self._raw.get(addr)
+        return None if entry is None else entry[1]
+
+    def _status(self, addr: int):
+        entry = self._raw.get(addr)
+        if entry is None:
+            return None
+        seq, payload = entry
+        memo = self._decoded.get(addr)
+        if memo is not None and memo[0] == seq:
+            return memo[1]
+        if addr == self.utility_addr:
+            st = UtilityBoardClient.parse_status_response(Frame(addr, RESP_UTILITY_STATUS, payload))
+        else:
+            st = LaneboardClient.parse_status_response(Frame(addr, RESP_LANE_STATUS, payload))
+        self.decodes += 1
+        self._decoded[addr] = (seq, st)
+        return st
+
+    def lane(self, addr: int) -> LaneStatus | None:
+        return self._status(addr) if addr in self._lane_set else None
+
+    @property
+    def utility(self) -> UtilityStatus | None:
+        return self._status(self.utility_addr)
+
+    @property
+    def lanes(self) -> dict[int, LaneStatus]:
+        """Every lane seen so far, decoded."""
+        return {a: st for a in self.lane_addrs if (st := self._status(a)) is not None}
+
+    def lane_stats(self, addr: int) -> dict | None:
+        """Streaming temperature statistics of one lane (services.lane_stats)."""
+        return self.stats.lane(addr)
+
+    def oldest_seen_ts(self, addrs: list[int]) -> float | None:
+        """Oldest last_seen_ts among addrs (None if any has never been seen)."""
+        seen = [self.last_seen_ts.get(a) for a in addrs]
+        if not seen or any(ts is None for ts in seen):
+            return None
+        return min(seen)
+
+    def lane_snapshot(self, *, include_seen: bool = True) -> list[dict]:
         out: list[dict] = []
         for addr in self.lane_addrs:
-            st = self.lanes.get(addr)
-            out.append(
-                {
-                    "addr": addr,
-                    "online": bool(st and st.online),
-                    "error_status": st.error_status if st else None,
-                    "status": st.__dict__ if st else None,
-                    "last_seen_ts": self.last_seen_ts.get(addr),
-                }
-            )
+            st = self._status(addr)
+            entry = {
+                "addr": addr,
+                "online": bool(st and st.online),
+                "error_status": st.error_status if st else None,
+                "status": st.__dict__ if st else None,
+            }
+            if include_seen:
+                entry["last_seen_ts"] = self.last_seen_ts.get(addr)
+            out.append(entry)
         return out
 
-    def utility_snapshot(self) -> dict:
+    def utility_snapshot(self, *, include_seen: bool = True) -> dict:
         st = self.utility
-        return {
+        out = {
             "addr": self.utility_addr,
             "online": bool(st and st.online),
             "error_status": st.error_status if st else None,
             "status": st.__dict__ if st else None,
-            "last_seen_ts": self.last_seen_ts.get(self.utility_addr),
         }
+        if include_seen:
+            out["last_seen_ts"] = self.last_seen_ts.get(self.utility_addr)
+        return out
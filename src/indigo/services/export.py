@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+import threading
+import time
+import zlib
+from collections import deque
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, func, select
+from sqlalchemy.orm import sessionmaker
+
+from indigo.db.orm.tables import BODY_COLUMNS, AlarmRecord, LaneTelemetry, Recipe, RecipeBody
+
+log = logging.getLogger("indigo.export")
+
+# format -> (mimetype, file extension)
+FORMATS: dict[str, tuple[str, str]] = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+@dataclass(frozen=True)
+class ExportSource:
+    """
+    One exportable table: the columns written (id first), and the id / time /
+    lane columns batches are keyed and filtered on. Time columns are epoch
+    floats, except DateTime ones (recipes.created_ts, naive UTC).
+    """
+
+    name: str
+    columns: tuple[Any, ...]
+    id: Any
+    ts: Any
+    lane: Any
+    join: tuple[Any, Any] | None = None
+
+    @property
+    def column_names(self) -> list[str]:
+        return [c.key for c in self.columns]
+
+    @property
+    def ts_is_datetime(self) -> bool:
+        return isinstance(self.ts.type, DateTime)
+
+
+SOURCES: dict[str, ExportSource] = {
+    "telemetry": ExportSource(
+        "telemetry",
+        tuple(LaneTelemetry.__table__.columns),
+        LaneTelemetry.id,
+        LaneTelemetry.ts,
+        LaneTelemetry.lane,
+    ),
+    "events": ExportSource(
+        "events",
+        tuple(AlarmRecord.__table__.columns),
+        AlarmRecord.id,
+        AlarmRecord.ts,
+        AlarmRecord.lane,
+    ),
+    "recipes": ExportSource(
+        "recipes",
+        (
+            Recipe.id,
+            Recipe.created_ts,
+            Recipe.lane,
+            Recipe.name,
+            Recipe.active,
+            Recipe.sha256,
+            RecipeBody.content_sha256,
+            *(getattr(RecipeBody, c) for c in BODY_COLUMNS),
+        ),
+        Recipe.id,
+        Recipe.created_ts,
+        Recipe.lane,
+        join=(RecipeBody, Recipe.body_id == RecipeBody.id),
+    ),
+}
+
+
+@dataclass(frozen=True)
+class ExportQuery:
+    """Rows of `source` with since <= ts < until (epoch seconds), on `lanes` (None = all)."""
+
+    source: str
+    since: float | None = None
+    until: float | None = None
+    lanes: tuple[int, ...] | None = None
+
+
+def parse_time(value: str) -> float:
+    """Epoch seconds, or ISO 8601 (naive = UTC). ValueError otherwise."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return dt.timestamp()
+
+
+def parse_lanes(value: str) -> tuple[int, ...]:
+    """"1,3,5-8" -> (1, 3, 5, 6, 7, 8). ValueError on anything else."""
+    lanes: set[int] = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, sep, hi = part.partition("-")
+        if sep:
+            a, b = int(lo), int(hi)
+            if a > b or b - a > 255:
+                raise ValueError(f"bad lane range {part!r}")
+            lanes.update(range(a, b + 1))
+        else:
+            lanes.add(int(part))
+    if not lanes:
+        raise ValueError("no lanes")
+    return tuple(sorted(lanes))
+
+
+# ---- batches (SQLite) ----
+
+
+def _bound(src: ExportSource, t: float) -> Any:
+    if src.ts_is_datetime:
+        return datetime.fromtimestamp(t, UTC).replace(tzinfo=None)
+    return t
+
+
+def _filters(src: ExportSource, q: ExportQuery) -> list[Any]:
+    out = []
+    if q.since is not None:
+        out.append(src.ts >= _bound(src, q.since))
+    if q.until is not None:
+        out.append(src.ts < _bound(src, q.until))
+    if q.lanes is not None:
+        out.append(src.lane.in_(q.lanes))
+    return out
+
+
+def iter_batches(
+    session_factory: sessionmaker, q: ExportQuery, *, batch_rows: int = 1000
+) -> Iterator[list[tuple]]:
+    """
+    Rows of q in id order, batch_rows at a time.
+
+    The id range of the time window is fixed up front (one covering scan of
+    the ts index), so rows appended while the export runs are not chased.
+    Each batch is then one keyset query (id > last, ORDER BY id LIMIT n) in
+    its own short session: nothing holds a read transaction open between
+    batches, so a slow client never pins the WAL, and only one batch of rows
+    is in memory at a time.
+    """
+    src = SOURCES[q.source]
+    time_filters = _filters(src, ExportQuery(q.source, q.since, q.until))
+    with session_factory() as session:  # type: Session
+        lo, hi = session.execute(select(func.min(src.id), func.max(src.id)).where(*time_filters)).one()
+    if lo is None:
+        return
+
+    where = _filters(src, q)
+    last = lo - 1
+    while True:
+        stmt = select(*src.columns)
+        if src.join is not None:
+            stmt = stmt.join(*src.join)
+        stmt = stmt.where(src.id > last, src.id <= hi, *where).order_by(src.id).limit(batch_rows)
+        with session_factory() as session:  # type: Session
+            # Core rows: skips the ORM loading layer
+            rows = session.connection().execute(stmt).all()
+        if not rows:
+            return
+        if src.ts_is_datetime:
+            rows = [tuple(v.isoformat() if isinstance(v, datetime) else v for v in r) for r in rows]
+        yield rows
+        if len(rows) < batch_rows:
+            return
+        last = rows[-1][0]
+
+
+# ---- encoders ----
+
+
+def encode_csv(columns: list[str], batches: Iterable[list[tuple]]) -> Iterator[bytes]:
+    """Header line, then one chunk per batch (the StringIO buffer is reused)."""
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    w.writerow(columns)
+    for rows in batches:
+        w.writerows(rows)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():  # header only (no rows)
+        yield buf.getvalue().encode()
+
+
+def encode_ndjson(columns: list[str], batches: Iterable[list[tuple]]) -> Iterator[bytes]:
+    """One JSON object per row, one chunk per batch."""
+    dumps = json.JSONEncoder(separators=(",", ":")).encode
+    for rows in batches:
+        yield "".join(dumps(dict(zip(columns, r, strict=True))) + "\n" for r in rows).encode()
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _ParquetSink:
+    """Write-only file for pyarrow: keeps the bytes written since the last take()."""
+
+    def __init__(self) -> None:
+        self.buf = bytearray()
+        self.pos = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.buf += data
+        self.pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        out = bytes(self.buf)
+        self.buf.clear()
+        return out
+
+
+def _arrow_type(pa, col):
+    t = col.type
+    if isinstance(t, Boolean):
+        return pa.bool_()
+    if isinstance(t, Integer):
+        return pa.int64()
+    if isinstance(t, Float):
+        return pa.float64()
+    return pa.string()  # strings; DateTime is exported as ISO text
+
+
+def encode_parquet(src: ExportSource, batches: Iterable[list[tuple]]) -> Iterator[bytes]:
+    """One Parquet row group per batch, written out as it is produced (needs pyarrow)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow: pip install 'indigo-machine[export]'") from e
+
+    schema = pa.schema([pa.field(c.key, _arrow_type(pa, c)) for c in src.columns])
+    names = schema.names
+    sink = _ParquetSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="snappy")
+    try:
+        for rows in batches:
+            cols = zip(*rows, strict=True)
+            arrays = [pa.array(c, type=t) for c, t in zip(cols, schema.types, strict=True)]
+            writer.write_table(pa.Table.from_arrays(arrays, names=names))
+            if chunk := sink.take():
+                yield chunk
+    finally:
+        writer.close()
+    if chunk := sink.take():
+        yield chunk  # footer
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream incrementally (one compressor, fixed-size state)."""
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if out := z.compress(chunk):
+            yield out
+    yield z.flush()
+
+
+# ---- runs / throughput ----
+
+
+@dataclass
+class ExportRun:
+    source: str
+    format: str
+    gzip: bool
+    started_ts: float = field(default_factory=time.time)
+    rows: int = 0
+    bytes_out: int = 0
+    elapsed_s: float = 0.0
+    state: str = "running"  # running | done | aborted | failed
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "source": self.source,
+            "format": self.format,
+            "gzip": self.gzip,
+            "started_ts": self.started_ts,
+            "state": self.state,
+            "rows": self.rows,
+            "bytes": self.bytes_out,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "rows_per_s": round(self.rows_per_s, 1),
+        }
+
+
+class ExportLog:
+    """Recent export runs (newest last) for GET /api/export."""
+
+    def __init__(self, maxlen: int = 20) -> None:
+        self._lock = threading.Lock()
+        self.runs: deque[ExportRun] = deque(maxlen=maxlen)
+
+    def add(self, run: ExportRun) -> None:
+        with self._lock:
+            self.runs.append(run)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [r.as_dict() for r in self.runs]
+
+
+def export_stream(
+    session_factory: sessionmaker,
+    q: ExportQuery,
+    fmt: str,
+    *,
+    batch_rows: int = 1000,
+    gzip_level: int | None = None,
+    run: ExportRun | None = None,
+) -> Iterator[bytes]:
+    """
+    The encoded (and, with gzip_level, gzipped) export of q as a chunk
+    generator: memory is one batch of rows plus the encoder / compressor
+    state, whatever the export size. Rows, bytes and rows/s go to `run` and
+    the log when the stream ends, is abandoned (client gone) or fails.
+    """
+    src = SOURCES[q.source]
+    run = run if run is not None else ExportRun(q.source, fmt, gzip_level is not None)
+    t0 = time.perf_counter()
+
+    def counted() -> Iterator[list[tuple]]:
+        for rows in iter_batches(session_factory, q, batch_rows=batch_rows):
+            run.rows += len(rows)
+            yield rows
+
+    if fmt == "csv":
+        chunks = encode_csv(src.column_names, counted())
+    elif fmt == "ndjson":
+        chunks = encode_ndjson(src.column_names, counted())
+    elif fmt == "parquet":
+        chunks = encode_parquet(src, counted())
+    else:
+        raise ValueError(f"unknown export format {fmt!r}")
+    if gzip_level is not None:
+        chunks = gzip_chunks(chunks, gzip_level)
+
+    try:
+        for chunk in chunks:
+            run.bytes_out += len(chunk)
+            run.elapsed_s = time.perf_counter() - t0
+            yield chunk
+        run.state = "done"
+    except GeneratorExit:
+        run.state = "aborted"
+        raise
+    except Exception:
+        run.state = "failed"
+        log.exception("Export %s/%s failed after %d rows", q.source, fmt, run.rows)
+        raise
+    finally:
+        run.elapsed_s = time.perf_counter() - t0
+        log.info(
+            "Export %s/%s%s %s: %d rows, %d bytes in %.2f s (%.0f rows/s)",
+            q.source,
+            fmt,
+            "+gzip" if run.gzip else "",
+            run.state,
+            run.rows,
+            run.bytes_out,
+            run.elapsed_s,
+            run.rows_per_s,
+        )
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from indigo.services.device_registry import DeviceRegistry
+from indigo.util.clock import SYSTEM_CLOCK, Clock
+from indigo.util.heartbeat import Heartbeat
+
+OK = "ok"
+DEGRADED = "degraded"
+FAILED = "failed"
+_RANK = {OK: 0, DEGRADED: 1, FAILED: 2}
+
+# never call a loop failed sooner than this (GC pauses, a slow bus transaction at high POLL_HZ)
+MIN_FAILED_AFTER_S = 1.0
+# a fixed-rate loop ticking below this fraction of its rate is degraded
+MIN_RATE_RATIO = 0.5
+
+
+def _worst(a: str, b: str) -> str:
+    return a if _RANK[a] >= _RANK[b] else b
+
+
+class HealthMonitor:
+    """
+    Runner-side health, from loop heartbeats and device freshness.
+
+    Loops (Heartbeat per service loop):
+      degraded  no beat for degraded_periods x period, or a fixed-rate loop
+                ticking below half its rate
+      failed    no beat for failed_periods x period (at least MIN_FAILED_AFTER_S),
+                or never beat that long after the monitor was created
+    Devices (registry.last_seen_ts; the utility board is polled every tick, a
+    lane every len(lanes) ticks):
+      degraded  a board not seen for degraded_periods of its interval (or never)
+      failed    the utility board not seen for failed_periods: the interlocks
+                are blind without it. Lanes alone only degrade.
+
+    loops_alive() looks at the loops only: it gates the systemd watchdog, and
+    restarting the runner does not bring back an unplugged board.
+    """
+
+    def __init__(
+        self,
+        *,
+        registry: DeviceRegistry | None,
+        poll_period_s: float,
+        heartbeats: list[Heartbeat],
+        degraded_periods: float = 3.0,
+        failed_periods: float = 10.0,
+        clock: Clock | None = None,
+    ) -> None:
+        self.registry = registry
+        self.poll_period_s = poll_period_s
+        self.heartbeats = list(heartbeats)
+        self.degraded_periods = degraded_periods
+        self.failed_periods = failed_periods
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.started = self.clock.monotonic()
+
+    def _thresholds(self, interval_s: float) -> tuple[float, float]:
+        return (
+            self.degraded_periods * interval_s,
+            max(self.failed_periods * interval_s, MIN_FAILED_AFTER_S),
+        )
+
+    def _loop(self, hb: Heartbeat, now: float) -> dict:
+        out = hb.snapshot()
+        degraded_after, failed_after = self._thresholds(hb.period_s)
+        age = hb.age_s(now)
+        if age is None:
+            out["state"] = FAILED if now - self.started > failed_after else OK
+            out["reason"] = "no_heartbeat" if out["state"] == FAILED else "starting"
+        elif age > failed_after:
+            out["state"], out["reason"] = FAILED, "stalled"
+        elif age > degraded_after:
+            out["state"], out["reason"] = DEGRADED, "late"
+        elif out["expected_hz"] and out["rate_hz"] is not None and out["rate_hz"] < MIN_RATE_RATIO * out["expected_hz"]:
+            out["state"], out["reason"] = DEGRADED, "slow"
+        else:
+            out["state"] = OK
+        return out
+
+    def _device(self, addr: int, interval_s: float, now_wall: float, *, critical: bool) -> dict:
+        degraded_after, failed_after = self._thresholds(interval_s)
+        ts = self.registry.last_seen_ts.get(addr)
+        age = None if ts is None else max(0.0, now_wall - ts)
+        out = {"addr": addr, "age_s": None if age is None else round(age, 3)}
+        if age is None:
+            # nothing read yet: only a problem once the first reads are overdue
+            overdue = self.clock.monotonic() - self.started > degraded_after
+            out["state"] = DEGRADED if overdue else OK
+            if overdue:
+                out["reason"] = "never_seen"
+        elif age > failed_after and critical:
+            out["state"], out["reason"] = FAILED, "stale"
+        elif age > degraded_after:
+            out["state"], out["reason"] = DEGRADED, "stale"
+        else:
+            out["state"] = OK
+        return out
+
+    def loops_alive(self) -> bool:
+        now = self.clock.monotonic()
+        return all(self._loop(hb, now)["state"] != FAILED for hb in self.heartbeats)
+
+    def check(self) -> dict:
+        now = self.clock.monotonic()
+        status = OK
+        loops = {}
+        for hb in self.heartbeats:
+            loops[hb.name] = entry = self._loop(hb, now)
+            status = _worst(status, entry["state"])
+        devices: dict = {}
+        reg = self.registry
+        if reg is not None:
+            wall = self.clock.time()
+            devices["utility"] = self._device(reg.utility_addr, self.poll_period_s, wall, critical=True)
+            lane_interval = self.poll_period_s * max(1, len(reg.lane_addrs))
+            devices["lanes"] = [self._device(a, lane_interval, wall, critical=False) for a in reg.lane_addrs]
+            for entry in (devices["utility"], *devices["lanes"]):
+                status = _worst(status, entry["state"])
+        return {"status": status, "loops": loops, "devices": devices}
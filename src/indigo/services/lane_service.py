@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import logging
+import threading
 from dataclasses import dataclass
 
 from indigo.hw.transport.base import LaneStatus, LaneTransport
+from indigo.util.clock import SYSTEM_CLOCK, Clock
 
 log = logging.getLogger(__name__)
 
@@ -11,32 +13,155 @@ log = logging.getLogger(__name__)
 @dataclass
 class LaneServiceConfig:
     poll_interval_sec: float = 1.0
+    # statuses younger than this are served as-is
+    cache_ttl_sec: float = 1.0
+    # older than ttl but younger than this: served, and a background refresh is started;
+    # older than this: the read waits for a refresh (staleness bound)
+    max_staleness_sec: float = 5.0
+
+
+class _Flight:
+    __slots__ = ("epoch", "done", "result", "error")
+
+    def __init__(self, epoch: int) -> None:
+        self.epoch = epoch
+        self.done = threading.Event()
+        self.result: list[LaneStatus] | None = None
+        self.error: BaseException | None = None
 
 
 class LaneService:
     """
-    Thin wrapper around transport that can evolve into:
-    - polling
-    - caching state
-    - eventing
-    - safety rules
+    Lane statuses served from memory, fetched in bulk via transport.get_lane_statuses().
+
+    Reads never cost a transport call while the snapshot is younger than
+    cache_ttl_sec. Between cache_ttl_sec and max_staleness_sec the cached
+    snapshot is returned immediately and a background refresh is started. Past
+    max_staleness_sec (or before the first fetch) the caller waits for fresh data.
+
+    Refreshes are single-flight: however many callers (or background triggers)
+    want fresh data at once, one fetch runs and they all share its result (or
+    exception). start/stop invalidate the snapshot.
     """
 
-    def __init__(self, transport: LaneTransport, cfg: LaneServiceConfig | None = None):
+    def __init__(self, transport: LaneTransport, cfg: LaneServiceConfig | None = None, *, clock: Clock | None = None):
         self.transport = transport
         self.cfg = cfg or LaneServiceConfig()
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+
+        self._lock = threading.Lock()
+        self._statuses: list[LaneStatus] | None = None
+        self._fetched_at = 0.0  # clock.monotonic() when the fetch that produced _statuses began
+        self._flight: _Flight | None = None
+        self._epoch = 0  # bumped by invalidate(); a fetch that raced it is not stored
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.coalesced = 0
+        self.errors = 0
 
     def list_lanes(self) -> list[str]:
         return self.transport.list_lanes()
 
     def get_all_statuses(self) -> list[LaneStatus]:
-        lanes = self.transport.list_lanes()
-        return [self.transport.get_lane_status(lane_id) for lane_id in lanes]
+        now = self.clock.monotonic()
+        with self._lock:
+            statuses = self._statuses
+            age = now - self._fetched_at
+            if statuses is not None and age < self.cfg.cache_ttl_sec:
+                self.hits += 1
+                return statuses
+            if statuses is not None and age < self.cfg.max_staleness_sec:
+                self.stale_hits += 1
+                flight, leader = self._join_locked()
+                if leader:
+                    threading.Thread(target=self._fetch, args=(flight,), name="LaneServiceRefresh", daemon=True).start()
+                return statuses
+            self.misses += 1
+            flight, leader = self._join_locked()
+        if leader:
+            self._fetch(flight)
+        return self._result(flight)
+
+    def refresh(self) -> list[LaneStatus]:
+        """Fetch now (joining a fetch already in flight) and return the fresh statuses."""
+        with self._lock:
+            flight, leader = self._join_locked()
+        if leader:
+            self._fetch(flight)
+        return self._result(flight)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._statuses = None
+            self._epoch += 1
+
+    def age_s(self) -> float | None:
+        """Age of the cached snapshot, None if there is none."""
+        with self._lock:
+            return None if self._statuses is None else self.clock.monotonic() - self._fetched_at
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+            }
 
     def start(self, lane_id: str) -> None:
         log.info("Starting lane %s", lane_id)
         self.transport.start_lane(lane_id)
+        self.invalidate()
 
     def stop(self, lane_id: str) -> None:
         log.info("Stopping lane %s", lane_id)
         self.transport.stop_lane(lane_id)
+        self.invalidate()
+
+    # ---- internals ----
+
+    def _join_locked(self) -> tuple[_Flight, bool]:
+        # caller holds self._lock; a fetch begun before the last invalidate() is not joined
+        flight = self._flight
+        if flight is not None and flight.epoch == self._epoch:
+            self.coalesced += 1
+            return flight, False
+        self._flight = _Flight(self._epoch)
+        return self._flight, True
+
+    def _fetch(self, flight: _Flight) -> None:
+        started = self.clock.monotonic()
+        try:
+            statuses = self.transport.get_lane_statuses()
+        except BaseException as e:
+            log.warning("Lane status refresh failed: %s", e)
+            with self._lock:
+                self.errors += 1
+                if self._flight is flight:
+                    self._flight = None
+            flight.error = e
+            flight.done.set()
+            return
+        with self._lock:
+            self.refreshes += 1
+            if flight.epoch == self._epoch:
+                self._statuses = statuses
+                self._fetched_at = started
+            if self._flight is flight:
+                self._flight = None
+        flight.result = statuses
+        flight.done.set()
+
+    @staticmethod
+    def _result(flight: _Flight) -> list[LaneStatus]:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        assert flight.result is not None
+        return flight.result
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import math
+import struct
+from array import array
+
+# reflux temp, thermal temp, reflux setpoint, thermal setpoint (i16 /100) at payload[2:10]
+_TEMPS = struct.Struct("<hhhh")
+_TEMPS_OFFSET = 2
+
+CHANNELS = ("reflux", "thermal")
+_NCH = len(CHANNELS)
+
+
+class LaneStats:
+    """
+    Streaming statistics per lane and temperature channel (reflux, thermal),
+    updated in O(1) per status sample straight from the raw payload.
+
+      mean_c, std_c     exponentially weighted mean / variance (weight alpha)
+      rate_c_per_min    least-squares slope over the last `window` samples;
+                        the regression sums are updated by adding the new
+                        sample and subtracting the evicted one
+      eta_s             time to setpoint at that slope (0 when within
+                        tolerance; None when not moving towards it)
+      in_tolerance      |temp - setpoint| <= tolerance_c
+      stable            in tolerance continuously for stable_s
+
+    State is preallocated flat arrays indexed by lane * 2 + channel (the ring
+    of recent samples is window slots per row), so memory and per-sample cost
+    do not grow with how long a lane runs. Sample times are kept relative to a
+    per-row origin that moves to the oldest sample each time the ring wraps
+    (the sums shift in O(1), the ring in one pass per `window` samples), which
+    keeps the sums small and precise however long the lane has been up.
+
+    Single writer (the poll thread / bus process reader); readers take a
+    snapshot of a few floats and may see a sample half-applied, which only
+    ever shows as one sample of lag.
+    """
+
+    def __init__(
+        self,
+        lane_addrs: list[int],
+        *,
+        alpha: float = 0.2,
+        window: int = 32,
+        tolerance_c: float = 0.5,
+        stable_s: float = 30.0,
+    ) -> None:
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")
+        if window < 2:
+            raise ValueError("window must be >= 2")
+        self.alpha = alpha
+        self.window = window
+        self.tolerance_c = tolerance_c
+        self.stable_s = stable_s
+        self.index = {a: i for i, a in enumerate(lane_addrs)}
+        rows = len(lane_addrs) * _NCH
+
+        def zeros(n: int = rows) -> array:
+            return array("d", bytes(8 * n))
+
+        self.samples = array("q", bytes(8 * rows))
+        self.last_ts = zeros()
+        self.temp = zeros()
+        self.sp = zeros()
+        self.mean = zeros()
+        self.var = zeros()
+        self.in_tol_since = array("d", [math.nan]) * rows
+        # windowed regression: ring of (t - origin, x), fill count, next slot, origin, sums
+        self.ring_t = zeros(rows * window)
+        self.ring_x = zeros(rows * window)
+        self.fill = array("q", bytes(8 * rows))
+        self.head = array("q", bytes(8 * rows))
+        self.origin = zeros()
+        self.st = zeros()
+        self.sx = zeros()
+        self.stt = zeros()
+        self.stx = zeros()
+
+    @staticmethod
+    def from_settings(lane_addrs: list[int], s) -> LaneStats:
+        return LaneStats(
+            lane_addrs,
+            alpha=s.LANE_STATS_ALPHA,
+            window=s.LANE_STATS_WINDOW,
+            tolerance_c=s.SETPOINT_TOLERANCE_C,
+            stable_s=s.SETPOINT_STABLE_S,
+        )
+
+    def update(self, addr: int, payload: bytes, ts: float) -> None:
+        """One lane status sample (the raw RESP_LANE_STATUS payload) received at ts."""
+        if addr in self.index:
+            reflux, thermal, reflux_sp, thermal_sp = _TEMPS.unpack_from(payload, _TEMPS_OFFSET)
+            self.update_values(addr, reflux / 100.0, thermal / 100.0, reflux_sp / 100.0, thermal_sp / 100.0, ts)
+
+    def update_values(
+        self, addr: int, reflux_c: float, thermal_c: float, reflux_sp_c: float, thermal_sp_c: float, ts: float
+    ) -> None:
+        lane = self.index.get(addr)
+        if lane is None:
+            return
+        self._push(lane * _NCH, reflux_c, reflux_sp_c, ts)
+        self._push(lane * _NCH + 1, thermal_c, thermal_sp_c, ts)
+
+    def _push(self, r: int, x: float, sp: float, ts: float) -> None:
+        n = self.samples[r]
+        # EWMA mean / variance (incremental form)
+        if n == 0:
+            self.mean[r] = x
+            self.var[r] = 0.0
+            self.origin[r] = ts
+        else:
+            diff = x - self.mean[r]
+            incr = self.alpha * diff
+            self.mean[r] += incr
+            self.var[r] = (1.0 - self.alpha) * (self.var[r] + diff * incr)
+        self.samples[r] = n + 1
+        self.last_ts[r] = ts
+        self.temp[r] = x
+        self.sp[r] = sp
+
+        # windowed regression sums
+        w = self.window
+        base = r * w
+        head = self.head[r]
+        if self.fill[r] == w:
+            ot, ox = self.ring_t[base + head], self.ring_x[base + head]
+            self.st[r] -= ot
+            self.sx[r] -= ox
+            self.stt[r] -= ot * ot
+            self.stx[r] -= ot * ox
+        else:
+            self.fill[r] += 1
+        t = ts - self.origin[r]
+        self.ring_t[base + head] = t
+        self.ring_x[base + head] = x
+        self.st[r] += t
+        self.sx[r] += x
+        self.stt[r] += t * t
+        self.stx[r] += t * x
+        head += 1
+        if head == w:
+            head = 0
+            self._rebase(r, self.ring_t[base])  # oldest sample becomes t = 0
+        self.head[r] = head
+
+        # tolerance / stability
+        if abs(x - sp) <= self.tolerance_c:
+            if math.isnan(self.in_tol_since[r]):
+                self.in_tol_since[r] = ts
+        else:
+            self.in_tol_since[r] = math.nan
+
+    def _rebase(self, r: int, d: float) -> None:
+        # shift every stored t by -d: O(1) on the sums, O(window) on the ring once per wrap
+        if d == 0.0:
+            return
+        n = self.fill[r]
+        st = self.st[r]
+        self.stt[r] += -2.0 * d * st + n * d * d
+        self.stx[r] -= d * self.sx[r]
+        self.st[r] = st - n * d
+        self.origin[r] += d
+        base = r * self.window
+        for i in range(base, base + n):
+            self.ring_t[i] -= d
+
+    def slope(self, r: int) -> float | None:
+        """Least-squares slope (deg C per second) over the ring; None with < 2 distinct times."""
+        n = self.fill[r]
+        if n < 2:
+            return None
+        denom = n * self.stt[r] - self.st[r] * self.st[r]
+        if denom <= 1e-12:
+            return None
+        return (n * self.stx[r] - self.st[r] * self.sx[r]) / denom
+
+    def _channel(self, r: int) -> dict:
+        if self.samples[r] == 0:
+            return {"samples": 0}
+        x, sp = self.temp[r], self.sp[r]
+        slope = self.slope(r)
+        since = self.in_tol_since[r]
+        in_tol = not math.isnan(since)
+        gap = sp - x
+        if in_tol:
+            eta = 0.0
+        elif slope is not None and slope * gap > 0:
+            eta = gap / slope
+        else:
+            eta = None
+        return {
+            "samples": self.samples[r],
+            "temp_c": x,
+            "setpoint_c": sp,
+            "mean_c": round(self.mean[r], 3),
+            "std_c": round(math.sqrt(max(self.var[r], 0.0)), 3),
+            "rate_c_per_min": None if slope is None else round(slope * 60.0, 3),
+            "eta_s": None if eta is None else round(eta, 1),
+            "in_tolerance": in_tol,
+            "stable": in_tol and self.last_ts[r] - since >= self.stable_s,
+            "last_ts": self.last_ts[r],
+        }
+
+    def lane(self, addr: int) -> dict | None:
+        lane = self.index.get(addr)
+        if lane is None:
+            return None
+        return {"addr": addr, **{name: self._channel(lane * _NCH + ch) for ch, name in enumerate(CHANNELS)}}
+
+    def snapshot(self) -> list[dict]:
+        return [self.lane(a) for a in self.index]
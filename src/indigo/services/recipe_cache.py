@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any
+
+from indigo.services.recipe_service import RecipeService
+
+
+def recipe_etag(lane_addr: int, recipe_id: int, sha256: str) -> str:
+    # recipe rows are immutable once written, so (lane, id, sha) pins the body
+    return f"recipe-{lane_addr}-{recipe_id}-{sha256}"
+
+
+@dataclass(frozen=True)
+class CachedRecipe:
+    lane_addr: int
+    recipe_id: int
+    sha256: str
+    etag: str
+    recipe: dict[str, Any]
+    body: bytes  # serialized {"ok": true, "recipe": ...} GET response
+    checked_at: float  # monotonic time of the last DB version check
+
+
+@dataclass(frozen=True)
+class ActiveVersions:
+    lane_addrs: tuple[int, ...]
+    versions: dict[int, tuple[int, str]]  # lane -> (recipe id, sha256); lanes without one absent
+    token: str  # changes whenever versions does
+    checked_at: float
+
+
+class RecipeCache:
+    """
+    Per-lane cache of the fully built active-recipe GET response.
+
+    Entries are keyed by lane and validated by (recipe id, sha256):
+      - writes through this process call invalidate(lane)
+      - other writers (another process) are caught by a one-row version
+        query, run at most once per revalidate_s per lane
+      - at most max_entries lanes are kept (LRU)
+
+    active_versions() keeps the (id, sha256) of every lane's active recipe
+    under the same rules (one query for all lanes, at most once per
+    revalidate_s; any invalidate() drops it).
+    """
+
+    def __init__(self, service: RecipeService, *, max_entries: int = 64, revalidate_s: float = 1.0) -> None:
+        self.service = service
+        self.max_entries = max(1, int(max_entries))
+        self.revalidate_s = max(0.0, float(revalidate_s))
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, CachedRecipe] = OrderedDict()
+        # bumped by invalidate(); a fill that raced an invalidation is dropped
+        self._generation: dict[int, int] = {}
+        self._epoch = 0  # bumped by invalidate() of everything
+        self._versions: ActiveVersions | None = None
+        self._versions_gen = 0  # bumped by every invalidate()
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, lane_addr: int) -> CachedRecipe | None:
+        now = time.monotonic()
+        with self._lock:
+            gen = self._gen(lane_addr)
+            entry = self._entries.get(lane_addr)
+            if entry is not None and now - entry.checked_at < self.revalidate_s:
+                self._entries.move_to_end(lane_addr)
+                self.hits += 1
+                return entry
+
+        if entry is not None:
+            version = self.service.get_active_version(lane_addr)
+            if version == (entry.recipe_id, entry.sha256):
+                entry = replace(entry, checked_at=now)
+                with self._lock:
+                    self.revalidations += 1
+                    self.hits += 1
+                    self._store(entry, gen)
+                return entry
+
+        with self._lock:
+            self.misses += 1
+
+        recipe = self.service.get_lane_recipe(lane_addr)
+        if recipe is None:
+            self.invalidate(lane_addr)
+            return None
+
+        entry = CachedRecipe(
+            lane_addr=lane_addr,
+            recipe_id=recipe["recipe_id"],
+            sha256=recipe["sha256"],
+            etag=recipe_etag(lane_addr, recipe["recipe_id"], recipe["sha256"]),
+            recipe=recipe,
+            body=json.dumps({"ok": True, "recipe": recipe}, separators=(",", ":")).encode("utf-8"),
+            checked_at=now,
+        )
+        with self._lock:
+            self._store(entry, gen)
+        return entry
+
+    def active_versions(self, lane_addrs: list[int]) -> ActiveVersions:
+        now = time.monotonic()
+        key = tuple(lane_addrs)
+        with self._lock:
+            cached = self._versions
+            if cached is not None and cached.lane_addrs == key and now - cached.checked_at < self.revalidate_s:
+                self.hits += 1
+                return cached
+            gen = self._versions_gen
+
+        versions = self.service.get_active_versions(list(key))
+        token = f"{zlib.crc32(repr(sorted(versions.items())).encode()):08x}"
+        entry = ActiveVersions(lane_addrs=key, versions=versions, token=token, checked_at=now)
+        with self._lock:
+            if cached is not None and cached.token == token:
+                self.revalidations += 1
+            else:
+                self.misses += 1
+            if gen == self._versions_gen:
+                self._versions = entry
+        return entry
+
+    def invalidate(self, lane_addr: int | None = None) -> None:
+        with self._lock:
+            self._versions = None
+            self._versions_gen += 1
+            if lane_addr is None:
+                self._epoch += 1
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                return
+            self._generation[lane_addr] = self._generation.get(lane_addr, 0) + 1
+            if self._entries.pop(lane_addr, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+    def _gen(self, lane_addr: int) -> tuple[int, int]:
+        return self._epoch, self._generation.get(lane_addr, 0)
+
+    def _store(self, entry: CachedRecipe, gen: tuple[int, int]) -> None:
+        # caller holds self._lock
+        if self._gen(entry.lane_addr) != gen:
+            return
+        self._entries[entry.lane_addr] = entry
+        self._entries.move_to_end(entry.lane_addr)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import math
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from indigo.hw.devices.laneboard import LaneboardClient
+from indigo.hw.protocol.codec import Frame
+from indigo.services.recipe_service import RecipeService
+
+CYCLE_STOP = 0
+CYCLE_START = 1
+CYCLE_COMPLETE = 2
+
+UNSET = math.nan  # float step value not given in the recipe
+UNSET_RPM = -1
+
+
+@dataclass(frozen=True, slots=True)
+class RecipePlan:
+    """
+    Immutable execution plan for one lane's recipe.
+
+    Everything the cycle runner needs while a cycle is running is precomputed
+    here: step timings and setpoints as flat arrays (index = step) and the exact
+    frames to send for each phase. Times are ms from cycle start.
+
+      start_frames        at 0: cycle start, thermal/reflux setpoints, stir, purge pressure
+      step_frames[i]      at step_offset_ms[i]: pin-break pressure, then post-step setpoints
+      complete_frames     at complete_offset_ms: cycle complete, stir off
+      stop_frames         on abort: cycle stop, stir off
+    """
+
+    lane_addr: int
+    content_sha256: str
+
+    # per-step arrays; UNSET / UNSET_RPM where the recipe left a value out
+    step_time_ms: array  # 'q': delay after the previous step (or cycle start)
+    step_offset_ms: array  # 'q': cumulative, from cycle start
+    step_pressure: array  # 'd'
+    step_post_thermal_c: array  # 'd'
+    step_post_reflux_c: array  # 'd'
+    step_post_pressure: array  # 'd'
+    step_post_stir_rpm: array  # 'i'
+
+    start_frames: tuple[Frame, ...]
+    step_frames: tuple[tuple[Frame, ...], ...]
+    complete_offset_ms: int
+    complete_frames: tuple[Frame, ...]
+    stop_frames: tuple[Frame, ...]
+
+    @property
+    def nsteps(self) -> int:
+        return len(self.step_frames)
+
+
+def compile_recipe(lane_addr: int, recipe: dict[str, Any]) -> RecipePlan:
+    """
+    Builds a RecipePlan from a recipe dict as returned by RecipeService.get_lane_recipe.
+
+    Pin-break steps are only planned when autopinbreak is enabled. The cycle
+    completes after attempttime seconds, or after the last step if that is later.
+    """
+    client = LaneboardClient(lane_addr)
+    reflux_enabled = bool(recipe.get("refluxenabled"))
+    thermal_sp = float(recipe.get("thermaltemp") or 0.0)
+    reflux_sp = float(recipe.get("refluxtemp") or 0.0)
+    stir_rpm = int(recipe.get("stirspeed") or 0)
+
+    start = [client.build_cycle(CYCLE_START), _setpoint_frame(client, thermal_sp, reflux_sp if reflux_enabled else None)]
+    start.append(client.build_stir(stir_rpm > 0, stir_rpm))
+    start.append(client.build_pressure(float(recipe.get("purgesetpressure") or 0.0)))
+
+    steps = (recipe.get("pinbreak_steps") or []) if recipe.get("autopinbreak") else []
+    step_time_ms = array("q")
+    step_offset_ms = array("q")
+    step_pressure = array("d")
+    post_thermal = array("d")
+    post_reflux = array("d")
+    post_pressure = array("d")
+    post_stir = array("i")
+    step_frames: list[tuple[Frame, ...]] = []
+
+    offset = 0
+    for st in steps:
+        dt = max(0, int(st.get("autopinbreaktime") or 0))
+        offset += dt
+        step_time_ms.append(dt)
+        step_offset_ms.append(offset)
+        step_pressure.append(_f(st.get("autopinbreakpressure")))
+        post_thermal.append(_f(st.get("postpinbreakthermaltemp")))
+        post_reflux.append(_f(st.get("postpinbreakrefluxtemp")))
+        post_pressure.append(_f(st.get("postpinbreakpressure")))
+        rpm = st.get("postpinbreakstirspeed")
+        post_stir.append(UNSET_RPM if rpm is None else int(rpm))
+
+        frames: list[Frame] = []
+        if not math.isnan(step_pressure[-1]):
+            frames.append(client.build_pressure(step_pressure[-1]))
+        if not math.isnan(post_thermal[-1]):
+            reflux = post_reflux[-1] if reflux_enabled and not math.isnan(post_reflux[-1]) else None
+            frames.append(_setpoint_frame(client, post_thermal[-1], reflux))
+        elif reflux_enabled and not math.isnan(post_reflux[-1]):
+            frames.append(client.build_reflux_only(post_reflux[-1]))
+        if not math.isnan(post_pressure[-1]):
+            frames.append(client.build_pressure(post_pressure[-1]))
+        if post_stir[-1] != UNSET_RPM:
+            frames.append(client.build_stir(post_stir[-1] > 0, post_stir[-1]))
+        step_frames.append(tuple(frames))
+
+    attempt_ms = max(0, int(recipe.get("attempttime") or 0)) * 1000
+    return RecipePlan(
+        lane_addr=lane_addr,
+        content_sha256=str(recipe.get("content_sha256") or ""),
+        step_time_ms=step_time_ms,
+        step_offset_ms=step_offset_ms,
+        step_pressure=step_pressure,
+        step_post_thermal_c=post_thermal,
+        step_post_reflux_c=post_reflux,
+        step_post_pressure=post_pressure,
+        step_post_stir_rpm=post_stir,
+        start_frames=tuple(start),
+        step_frames=tuple(step_frames),
+        complete_offset_ms=max(attempt_ms, offset),
+        complete_frames=(client.build_cycle(CYCLE_COMPLETE), client.build_stir(False)),
+        stop_frames=(client.build_cycle(CYCLE_STOP), client.build_stir(False)),
+    )
+
+
+class PlanCache:
+    """
+    Compiled plans keyed by (lane, content_sha256), LRU-bounded.
+
+    Frames carry the lane address, so identical content on two lanes compiles
+    to two plans; a lane re-assigned content it ran before gets its old plan back.
+    Lookups go through the DB only at cycle start (plan_for_lane); the running
+    cycle holds the RecipePlan itself.
+    """
+
+    def __init__(self, service: RecipeService, *, max_entries: int = 64) -> None:
+        self.service = service
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._plans: OrderedDict[tuple[int, str], RecipePlan] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def plan_for_lane(self, lane_addr: int) -> RecipePlan | None:
+        recipe = self.service.get_lane_recipe(lane_addr)
+        if recipe is None:
+            return None
+        return self.get(lane_addr, recipe)
+
+    def get(self, lane_addr: int, recipe: dict[str, Any]) -> RecipePlan:
+        content_sha256 = recipe.get("content_sha256")
+        if not content_sha256:
+            return compile_recipe(lane_addr, recipe)  # not from the DB: nothing to key on
+
+        key = (lane_addr, str(content_sha256))
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+
+        plan = compile_recipe(lane_addr, recipe)
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return plan
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._plans), "hits": self.hits, "misses": self.misses}
+
+
+def _setpoint_frame(client: LaneboardClient, thermal_c: float, reflux_c: float | None) -> Frame:
+    if reflux_c is None:
+        return client.build_thermal_only(thermal_c)
+    return client.build_thermal(thermal_c, reflux_c)
+
+
+def _f(v: Any) -> float:
+    return UNSET if v is None else float(v)
@@ -1,9 +1,21 @@
 from __future__ import annotations
 
+import base64
+import math
 from dataclasses import dataclass
 from typing import Any
 
-from indigo.db.orm.tables import Recipe, RecipePinBreakStep
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from indigo.db.orm.tables import BODY_COLUMNS, Recipe, RecipeBody, RecipePinBreakStep
+
+# Upper bound on pin-break steps per recipe (validation; keeps a bad payload
+# from building millions of step rows).
+MAX_PINBREAK_STEPS = 1000
+
+HISTORY_MAX_LIMIT = 200
 
 
 @dataclass(frozen=True)
@@ -14,13 +26,23 @@ class RecipeUpsertResult:
     updated_at_ts: bool
 
 
+class RecipeValidationError(ValueError):
+    """One or more payloads in a batch are malformed; errors maps lane -> messages."""
+
+    def __init__(self, errors: dict[int, list[str]]) -> None:
+        super().__init__(f"invalid recipe payload for lanes {sorted(errors)}")
+        self.errors = errors
+
+
 class RecipeService:
     """
     Owns recipe persistence and retrieval.
 
     Current DB schema (tables.py in this repo):
-      - recipes: versioned by sha256, with one active recipe per lane enforced in app logic
-      - recipe_pinbreak_steps: normalized rows (step_index 0..N-1)
+      - recipe_bodies: content-addressed (content_sha256), stored once however many lanes use it
+      - recipe_pinbreak_steps: normalized rows per body (step_index 0..N-1)
+      - recipes: lane assignments, versioned by payload sha256, with one active recipe
+        per lane enforced in app logic
 
     API payload is still "legacy-ish" keys (fixedholdtime, autopinbreaktime, etc.),
     but we map it into normalized DB columns.
@@ -33,37 +55,18 @@ class RecipeService:
         """
         Store a new active recipe version for this lane if payload changed.
         If the currently-active recipe has the same sha256, do nothing (idempotent).
-        """
-        sha = Recipe.compute_sha256_from_payload(payload)
-
-        # Scalars (legacy keys → new columns)
-        name = _get_str(payload, "name", default=None)
-        cycle_type = _get_str(payload, "cycletype", "cycle_type", default="full")
-        fixed_hold_time = _get_bool(payload, "fixedholdtime", "fixed_hold_time", default=False)
-
-        autopinbreak_enabled = _get_bool(payload, "autopinbreak", "autopinbreak_enabled", default=False)
-        num_autopinbreaks = _get_int(payload, "numberofautopinbreaks", "num_autopinbreaks", default=0)
 
-        attempt_time_s = _get_int(payload, "attempttime", "attempt_time_s", default=0)
-
-        thermal_temp_c = _get_float(payload, "thermaltemp", "thermal_temp_c", default=0.0)
-        reflux_enabled = _get_bool(payload, "refluxenabled", "reflux_enabled", default=False)
-        reflux_temp_c = _get_float(payload, "refluxtemp", "reflux_temp_c", default=0.0)
-
-        purge_vac_switchpoint = _get_float(payload, "purgevacswitchpoint", "purge_vac_switchpoint", default=0.0)
-        stir_speed_rpm = _get_int(payload, "stirspeed", "stir_speed_rpm", default=0)
-        purge_set_pressure = _get_float(payload, "purgesetpressure", "purge_set_pressure", default=0.0)
-
-        # Arrays (normalized into rows)
-        ap_time = _get_list(payload, "autopinbreaktime")
-        ap_press = _get_list(payload, "autopinbreakpressure")
-        post_th = _get_list(payload, "postpinbreakthermaltemp")
-        post_pr = _get_list(payload, "postpinbreakpressure")
-        post_rf = _get_list(payload, "postpinbreakrefluxtemp")
-        post_st = _get_list(payload, "postpinbreakstirspeed")
+        The body is stored once per distinct content; if another lane (or an
+        earlier version) already uses it, only the assignment row is inserted.
+        Raises RecipeValidationError for malformed payloads.
+        """
+        errors = validate_recipe_payload(payload)
+        if errors:
+            raise RecipeValidationError({lane_addr: errors})
 
-        inferred_n = max(len(ap_time), len(ap_press), len(post_th), len(post_pr), len(post_rf), len(post_st), 0)
-        nsteps = num_autopinbreaks if num_autopinbreaks > 0 else inferred_n
+        sha = Recipe.compute_sha256_from_payload(payload)
+        cols = _recipe_columns(payload)
+        steps = _step_rows(payload, cols["num_autopinbreaks"])
 
         with self._session_factory() as session:  # type: Session
             active: Recipe | None = (
@@ -76,83 +79,193 @@ class RecipeService:
             if active is not None and active.sha256 == sha:
                 return RecipeUpsertResult(lane_addr=lane_addr, recipe_id=active.id, sha256=sha, updated_at_ts=False)
 
+            body_id = ensure_recipe_body(session, cols, steps)
+
             # deactivate any existing active recipes for this lane
             session.query(Recipe).filter(Recipe.lane == lane_addr, Recipe.active.is_(True)).update({"active": False})
 
-            r = Recipe(
-                lane=lane_addr,
-                name=name,
-                cycle_type=cycle_type,
-                fixed_hold_time=fixed_hold_time,
-                autopinbreak_enabled=autopinbreak_enabled,
-                num_autopinbreaks=nsteps,
-                attempt_time_s=attempt_time_s,
-                thermal_temp_c=thermal_temp_c,
-                reflux_enabled=reflux_enabled,
-                reflux_temp_c=reflux_temp_c,
-                purge_vac_switchpoint=purge_vac_switchpoint,
-                stir_speed_rpm=stir_speed_rpm,
-                purge_set_pressure=purge_set_pressure,
-                sha256=sha,
-                active=True,
-            )
+            r = Recipe(lane=lane_addr, name=_get_str(payload, "name", default=None), body_id=body_id, sha256=sha, active=True)
             session.add(r)
-            session.flush()  # assigns r.id
-
-            # insert steps (0..nsteps-1)
-            for i in range(nsteps):
-                step = RecipePinBreakStep(
-                    recipe_id=r.id,
-                    step_index=i,
-                    autopinbreak_time_ms=_safe_int(ap_time, i),
-                    autopinbreak_pressure=_safe_float(ap_press, i),
-                    postpinbreak_thermal_temp_c=_safe_float(post_th, i),
-                    postpinbreak_pressure=_safe_float(post_pr, i),
-                    postpinbreak_reflux_temp_c=_safe_float(post_rf, i),
-                    postpinbreak_stir_speed_rpm=_safe_int(post_st, i),
-                )
-                session.add(step)
-
             session.commit()
             return RecipeUpsertResult(lane_addr=lane_addr, recipe_id=r.id, sha256=sha, updated_at_ts=True)
 
+    def bulk_upsert_lane_recipes(self, payloads: dict[int, dict[str, Any]]) -> list[RecipeUpsertResult]:
+        """
+        Upsert recipes for several lanes in ONE transaction (one commit / fsync).
+
+        Every payload is validated before the DB is touched; any error rejects the
+        whole batch with RecipeValidationError. Lanes whose active sha256 already
+        matches are left alone (same idempotency as upsert_lane_recipe). Lanes
+        sharing the same content share one body row.
+        """
+        errors = {lane: errs for lane, p in payloads.items() if (errs := validate_recipe_payload(p))}
+        if errors:
+            raise RecipeValidationError(errors)
+        if not payloads:
+            return []
+
+        prepared: dict[int, tuple[str, dict[str, Any], list[dict[str, Any]], dict[str, Any]]] = {}
+        for lane, p in payloads.items():
+            cols = _recipe_columns(p)
+            prepared[int(lane)] = (Recipe.compute_sha256_from_payload(p), cols, _step_rows(p, cols["num_autopinbreaks"]), p)
+
+        with self._session_factory() as session:  # type: Session
+            active = {
+                row.lane: row
+                for row in session.query(Recipe.id, Recipe.lane, Recipe.sha256).filter(
+                    Recipe.lane.in_(list(prepared)), Recipe.active.is_(True)
+                )
+            }
+
+            results: dict[int, RecipeUpsertResult] = {}
+            changed: list[int] = []
+            for lane, (sha, _, _, _) in prepared.items():
+                cur = active.get(lane)
+                if cur is not None and cur.sha256 == sha:
+                    results[lane] = RecipeUpsertResult(lane_addr=lane, recipe_id=cur.id, sha256=sha, updated_at_ts=False)
+                else:
+                    changed.append(lane)
+
+            if changed:
+                body_ids = ensure_recipe_bodies(session, [(prepared[lane][1], prepared[lane][2]) for lane in changed])
+
+                session.execute(
+                    update(Recipe).where(Recipe.lane.in_(changed), Recipe.active.is_(True)).values(active=False)
+                )
+                inserted = session.execute(
+                    insert(Recipe).returning(Recipe.id, Recipe.lane, sort_by_parameter_order=True),
+                    [
+                        {
+                            "lane": lane,
+                            "name": _get_str(prepared[lane][3], "name", default=None),
+                            "body_id": body_id,
+                            "sha256": prepared[lane][0],
+                            "active": True,
+                        }
+                        for lane, body_id in zip(changed, body_ids, strict=True)
+                    ],
+                ).all()
+                for recipe_id, lane in inserted:
+                    results[lane] = RecipeUpsertResult(
+                        lane_addr=lane, recipe_id=recipe_id, sha256=prepared[lane][0], updated_at_ts=True
+                    )
+
+                session.commit()
+
+            return [results[lane] for lane in prepared]
+
+    def list_lane_history(
+        self, lane_addr: int, *, limit: int = 50, cursor: str | None = None
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """
+        One page of a lane's recipe history, newest first, as summaries (no steps).
+
+        Keyset pagination on id over ix_recipes_lane_id, so the cost is O(limit)
+        however deep the page. Ids are assigned in insert order, so this is
+        creation order without created_ts ties (it only has second resolution).
+        Returns (items, next_cursor); next_cursor is None on the last page.
+        Raises ValueError on a bad cursor.
+        """
+        limit = max(1, min(int(limit), HISTORY_MAX_LIMIT))
+
+        with self._session_factory() as session:  # type: Session
+            q = (
+                session.query(
+                    Recipe.id,
+                    Recipe.name,
+                    Recipe.sha256,
+                    Recipe.created_ts,
+                    Recipe.active,
+                    RecipeBody.content_sha256,
+                )
+                .join(RecipeBody, Recipe.body_id == RecipeBody.id)
+                .filter(Recipe.lane == lane_addr)
+            )
+            if cursor:
+                q = q.filter(Recipe.id < decode_history_cursor(cursor))
+            rows = q.order_by(Recipe.id.desc()).limit(limit + 1).all()
+
+        page = rows[:limit]
+        next_cursor = encode_history_cursor(page[-1].id) if len(rows) > limit else None
+        items = [
+            {
+                "recipe_id": r.id,
+                "lane_addr": lane_addr,
+                "name": r.name,
+                "sha256": r.sha256,
+                "content_sha256": r.content_sha256,
+                "active": r.active,
+                "created_ts": r.created_ts.isoformat() if r.created_ts else None,
+            }
+            for r in page
+        ]
+        return items, next_cursor
+
+    def get_active_version(self, lane_addr: int) -> tuple[int, str] | None:
+        """
+        (recipe id, sha256) of the lane's active recipe, without loading the row or steps.
+        Cheap enough to use as a cache validator.
+        """
+        with self._session_factory() as session:  # type: Session
+            row = (
+                session.query(Recipe.id, Recipe.sha256)
+                .filter(Recipe.lane == lane_addr, Recipe.active.is_(True))
+                .order_by(Recipe.created_ts.desc())
+                .first()
+            )
+            return (row.id, row.sha256) if row is not None else None
+
+    def get_active_versions(self, lane_addrs: list[int]) -> dict[int, tuple[int, str]]:
+        """(recipe id, sha256) of the active recipe of every given lane that has one, in one query."""
+        with self._session_factory() as session:  # type: Session
+            rows = session.execute(
+                select(Recipe.lane, Recipe.id, Recipe.sha256).where(
+                    Recipe.lane.in_(list(lane_addrs)), Recipe.active.is_(True)
+                )
+            )
+            return {lane: (rid, sha) for lane, rid, sha in rows}
+
     def get_lane_recipe(self, lane_addr: int) -> dict[str, Any] | None:
         """
         Return the active recipe for a lane, shaped for API callers.
         """
         with self._session_factory() as session:  # type: Session
-            r: Recipe | None = (
-                session.query(Recipe)
+            row = (
+                session.query(Recipe, RecipeBody)
+                .join(RecipeBody, Recipe.body_id == RecipeBody.id)
                 .filter(Recipe.lane == lane_addr, Recipe.active.is_(True))
                 .order_by(Recipe.created_ts.desc())
                 .one_or_none()
             )
-            if r is None:
+            if row is None:
                 return None
+            r, b = row
 
             steps = (
                 session.query(RecipePinBreakStep)
-                .filter(RecipePinBreakStep.recipe_id == r.id)
+                .filter(RecipePinBreakStep.body_id == b.id)
                 .order_by(RecipePinBreakStep.step_index.asc())
                 .all()
             )
 
             # Return legacy-ish keys so old clients/tests are easy
             return {
+                "recipe_id": r.id,
                 "lane_addr": r.lane,
                 "name": r.name,
-                "cycletype": r.cycle_type,
-                "fixedholdtime": r.fixed_hold_time,
-                "autopinbreak": r.autopinbreak_enabled,
-                "numberofautopinbreaks": r.num_autopinbreaks,
-                "attempttime": r.attempt_time_s,
-                "thermaltemp": r.thermal_temp_c,
-                "refluxenabled": r.reflux_enabled,
-                "refluxtemp": r.reflux_temp_c,
-                "purgevacswitchpoint": r.purge_vac_switchpoint,
-                "stirspeed": r.stir_speed_rpm,
-                "purgesetpressure": r.purge_set_pressure,
+                "cycletype": b.cycle_type,
+                "fixedholdtime": b.fixed_hold_time,
+                "autopinbreak": b.autopinbreak_enabled,
+                "numberofautopinbreaks": b.num_autopinbreaks,
+                "attempttime": b.attempt_time_s,
+                "thermaltemp": b.thermal_temp_c,
+                "refluxenabled": b.reflux_enabled,
+                "refluxtemp": b.reflux_temp_c,
+                "purgevacswitchpoint": b.purge_vac_switchpoint,
+                "stirspeed": b.stir_speed_rpm,
+                "purgesetpressure": b.purge_set_pressure,
                 "sha256": r.sha256,
+                "content_sha256": b.content_sha256,
                 "active": r.active,
                 "created_ts": r.created_ts.isoformat() if r.created_ts else None,
                 "pinbreak_steps": [
@@ -170,6 +283,185 @@ class RecipeService:
             }
 
 
+# Scalar columns: (column, legacy/new payload keys, coercion, default)
+_SCALARS: tuple[tuple[str, tuple[str, ...], str, Any], ...] = (
+    ("cycle_type", ("cycletype", "cycle_type"), "str", "full"),
+    ("fixed_hold_time", ("fixedholdtime", "fixed_hold_time"), "bool", False),
+    ("autopinbreak_enabled", ("autopinbreak", "autopinbreak_enabled"), "bool", False),
+    ("num_autopinbreaks", ("numberofautopinbreaks", "num_autopinbreaks"), "int", 0),
+    ("attempt_time_s", ("attempttime", "attempt_time_s"), "int", 0),
+    ("thermal_temp_c", ("thermaltemp", "thermal_temp_c"), "float", 0.0),
+    ("reflux_enabled", ("refluxenabled", "reflux_enabled"), "bool", False),
+    ("reflux_temp_c", ("refluxtemp", "reflux_temp_c"), "float", 0.0),
+    ("purge_vac_switchpoint", ("purgevacswitchpoint", "purge_vac_switchpoint"), "float", 0.0),
+    ("stir_speed_rpm", ("stirspeed", "stir_speed_rpm"), "int", 0),
+    ("purge_set_pressure", ("purgesetpressure", "purge_set_pressure"), "float", 0.0),
+)
+
+# Arrays (normalized into step rows): (payload key, step column, coercion)
+_STEP_ARRAYS: tuple[tuple[str, str, str], ...] = (
+    ("autopinbreaktime", "autopinbreak_time_ms", "int"),
+    ("autopinbreakpressure", "autopinbreak_pressure", "float"),
+    ("postpinbreakthermaltemp", "postpinbreak_thermal_temp_c", "float"),
+    ("postpinbreakpressure", "postpinbreak_pressure", "float"),
+    ("postpinbreakrefluxtemp", "postpinbreak_reflux_temp_c", "float"),
+    ("postpinbreakstirspeed", "postpinbreak_stir_speed_rpm", "int"),
+)
+
+
+def encode_history_cursor(recipe_id: int) -> str:
+    # opaque to clients, so the paging key can change without breaking them
+    return base64.urlsafe_b64encode(f"r{recipe_id}".encode()).decode("ascii").rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        if not raw.startswith("r"):
+            raise ValueError(raw)
+        return int(raw[1:])
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+
+
+def ensure_recipe_body(session: Session, columns: dict[str, Any], steps: list[dict[str, Any]]) -> int:
+    """Id of the body with this content, inserting it (and its steps) if new."""
+    return ensure_recipe_bodies(session, [(columns, steps)])[0]
+
+
+def ensure_recipe_bodies(session: Session, bodies: list[tuple[dict[str, Any], list[dict[str, Any]]]]) -> list[int]:
+    """
+    Body ids for each (columns, steps), in order. Does not commit.
+
+    Existing content is found with one IN query. Missing bodies are inserted with
+    ON CONFLICT DO NOTHING on content_sha256, so a concurrent writer storing the
+    same content cannot fail this transaction; steps are only written for rows
+    this call actually inserted, and any that lost the race are read back.
+    """
+    shas = [RecipeBody.compute_content_sha256(cols, steps) for cols, steps in bodies]
+    ids = _body_ids(session, set(shas))
+
+    new: dict[str, tuple[dict[str, Any], list[dict[str, Any]]]] = {}
+    for sha, body in zip(shas, bodies, strict=True):
+        if sha not in ids:
+            new.setdefault(sha, body)
+
+    if new:
+        inserted = session.execute(
+            sqlite_insert(RecipeBody)
+            .on_conflict_do_nothing(index_elements=[RecipeBody.content_sha256])
+            .returning(RecipeBody.id, RecipeBody.content_sha256),
+            [{"content_sha256": sha, **{k: cols[k] for k in BODY_COLUMNS}} for sha, (cols, _) in new.items()],
+        ).all()
+        step_rows: list[dict[str, Any]] = []
+        for body_id, sha in inserted:
+            ids[sha] = body_id
+            step_rows.extend({"body_id": body_id, **st} for st in new[sha][1])
+        if step_rows:
+            session.execute(insert(RecipePinBreakStep), step_rows)
+        if len(inserted) < len(new):
+            ids.update(_body_ids(session, new.keys() - ids.keys()))
+
+    return [ids[sha] for sha in shas]
+
+
+def _body_ids(session: Session, shas: set[str]) -> dict[str, int]:
+    return dict(
+        session.execute(select(RecipeBody.content_sha256, RecipeBody.id).where(RecipeBody.content_sha256.in_(shas))).all()
+    )
+
+
+def _get_scalar(d: dict[str, Any], keys: tuple[str, ...], kind: str, default: Any) -> Any:
+    if kind == "str":
+        return _get_str(d, *keys, default=default)
+    if kind == "bool":
+        return _get_bool(d, *keys, default=default)
+    if kind == "int":
+        return _get_int(d, *keys, default=default)
+    return _get_float(d, *keys, default=default)
+
+
+def _recipe_columns(payload: dict[str, Any]) -> dict[str, Any]:
+    """RecipeBody columns from a (legacy-keyed) payload; num_autopinbreaks is resolved."""
+    cols = {col: _get_scalar(payload, keys, kind, default) for col, keys, kind, default in _SCALARS}
+    inferred_n = max((len(_get_list(payload, key)) for key, _, _ in _STEP_ARRAYS), default=0)
+    if cols["num_autopinbreaks"] <= 0:
+        cols["num_autopinbreaks"] = inferred_n
+    return cols
+
+
+def _step_rows(payload: dict[str, Any], nsteps: int) -> list[dict[str, Any]]:
+    arrays = [(col, _get_list(payload, key), kind) for key, col, kind in _STEP_ARRAYS]
+    return [
+        {
+            "step_index": i,
+            **{col: (_safe_int(arr, i) if kind == "int" else _safe_float(arr, i)) for col, arr, kind in arrays},
+        }
+        for i in range(nsteps)
+    ]
+
+
+def validate_recipe_payload(payload: Any) -> list[str]:
+    """
+    Human-readable problems with a recipe payload (empty list == OK).
+
+    Each value is checked with the coercion it will actually get when stored:
+    int fields must be whole numbers, float fields finite numbers, and the step
+    count is capped at MAX_PINBREAK_STEPS.
+    """
+    if not isinstance(payload, dict):
+        return ["payload must be a JSON object"]
+
+    errors: list[str] = []
+    for _, keys, kind, _ in _SCALARS:
+        if kind not in ("int", "float"):
+            continue
+        for k in keys:
+            v = payload.get(k)
+            if v is not None and _coerce(v, kind) is None:
+                errors.append(f"{k}: expected {'an integer' if kind == 'int' else 'a finite number'}, got {v!r}")
+
+    for key, _, kind in _STEP_ARRAYS:
+        v = payload.get(key)
+        if v is None:
+            continue
+        if not isinstance(v, (list, tuple)):
+            errors.append(f"{key}: expected a list")
+            continue
+        if len(v) > MAX_PINBREAK_STEPS:
+            errors.append(f"{key}: at most {MAX_PINBREAK_STEPS} values")
+            continue
+        bad = [i for i, x in enumerate(v) if x is not None and _coerce(x, kind) is None]
+        if bad:
+            errors.append(f"{key}: invalid {kind} values at indexes {bad}")
+
+    for k in ("numberofautopinbreaks", "num_autopinbreaks"):
+        n = _coerce(payload.get(k), "int")
+        if n is not None and not 0 <= n <= MAX_PINBREAK_STEPS:
+            errors.append(f"{k}: must be between 0 and {MAX_PINBREAK_STEPS}")
+    return errors
+
+
+def _coerce(v: Any, kind: str) -> int | float | None:
+    """v as an int/finite float the way it would be stored, or None if it can't be."""
+    if v is None or isinstance(v, bool):
+        return None
+    try:
+        f = float(v)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if not math.isfinite(f):
+        return None
+    if kind == "float":
+        return f
+    if isinstance(v, str):
+        try:
+            return int(v)
+        except ValueError:
+            return None
+    return int(f) if f.is_integer() else None
+
+
 def _get_str(d: dict[str, Any], *keys: str, default: str | None) -> str | None:
     for k in keys:
         if k in d and d[k] is not None:
@@ -4,17 +4,8 @@ from typing import Any
 
 from sqlalchemy.orm import Session
 
-from indigo.db.orm.tables import Recipe, RecipePinBreakStep
-
-
-def _get_arr(payload: dict[str, Any], key: str) -> list[Any]:
-    v = payload.get(key)
-    if v is None:
-        return []
-    if isinstance(v, list):
-        return v
-    # tolerate Mongo-ish types or single values
-    return [v]
+from indigo.db.orm.tables import Recipe
+from indigo.services.recipe_service import _recipe_columns, _step_rows, ensure_recipe_body
 
 
 class RecipeStore:
@@ -39,49 +30,13 @@ class RecipeStore:
         if activate:
             self.session.query(Recipe).filter(Recipe.lane == lane, Recipe.active.is_(True)).update({"active": False})
 
-        r = Recipe(
-            lane=lane,
-            name=name,
-            cycle_type=str(payload.get("cycletype", "full")),
-            fixed_hold_time=bool(payload.get("fixedholdtime", False)),
-            autopinbreak_enabled=bool(payload.get("autopinbreak", False)),
-            num_autopinbreaks=int(payload.get("numberofautopinbreaks", 0) or 0),
-            attempt_time_s=int(payload.get("attempttime", 0) or 0),
-            thermal_temp_c=float(payload.get("thermaltemp", 0) or 0),
-            reflux_enabled=bool(payload.get("refluxenabled", False)),
-            reflux_temp_c=float(payload.get("refluxtemp", 0) or 0),
-            purge_vac_switchpoint=float(payload.get("purgevacswitchpoint", 0) or 0),
-            stir_speed_rpm=int(payload.get("stirspeed", 0) or 0),
-            purge_set_pressure=float(payload.get("purgesetpressure", 0) or 0),
-            sha256=sha,
-            active=activate,
-        )
-
-        # Build steps from arrays (they must align by index)
-        t_ms = _get_arr(payload, "autopinbreaktime")
-        p = _get_arr(payload, "autopinbreakpressure")
-        post_t = _get_arr(payload, "postpinbreakthermaltemp")
-        post_p = _get_arr(payload, "postpinbreakpressure")
-        post_r = _get_arr(payload, "postpinbreakrefluxtemp")
-        post_s = _get_arr(payload, "postpinbreakstirspeed")
+        cols = _recipe_columns(payload)
+        steps = _step_rows(payload, cols["num_autopinbreaks"])
 
-        # Determine N: prefer explicit number, otherwise longest array
-        n = r.num_autopinbreaks
-        if n <= 0:
-            n = max(len(t_ms), len(p), len(post_t), len(post_p), len(post_r), len(post_s), 0)
-
-        for i in range(n):
-            step = RecipePinBreakStep(
-                step_index=i,
-                autopinbreak_time_ms=int(t_ms[i]) if i < len(t_ms) and t_ms[i] is not None else None,
-                autopinbreak_pressure=float(p[i]) if i < len(p) and p[i] is not None else None,
-                postpinbreak_thermal_temp_c=float(post_t[i]) if i < len(post_t) and post_t[i] is not None else None,
-                postpinbreak_pressure=float(post_p[i]) if i < len(post_p) and post_p[i] is not None else None,
-                postpinbreak_reflux_temp_c=float(post_r[i]) if i < len(post_r) and post_r[i] is not None else None,
-                postpinbreak_stir_speed_rpm=int(post_s[i]) if i < len(post_s) and post_s[i] is not None else None,
-            )
-            r.pinbreak_steps.append(step)
+        # Shared, content-addressed body: only inserted if no lane has this content yet
+        body_id = ensure_recipe_body(self.session, cols, steps)
 
+        r = Recipe(lane=lane, name=name, body_id=body_id, sha256=sha, active=activate)
         self.session.add(r)
         self.session.commit()
         return r
@@ -89,5 +44,15 @@ class RecipeStore:
     def get_active_recipe(self, lane: int) -> Recipe | None:
         return self.session.query(Recipe).filter(Recipe.lane == lane, Recipe.active.is_(True)).one_or_none()
 
-    def list_recipes(self, lane: int) -> list[Recipe]:
-        return self.session.query(Recipe).filter(Recipe.lane == lane).order_by(Recipe.created_ts.desc()).all()
+    def list_recipes(self, lane: int, *, limit: int | None = None, before: int | None = None) -> list[Recipe]:
+        """
+        Newest-first history for a lane. Pass limit (and the id of the last row
+        seen as before) to page through it without loading everything.
+        """
+        q = self.session.query(Recipe).filter(Recipe.lane == lane)
+        if before is not None:
+            q = q.filter(Recipe.id < before)
+        q = q.order_by(Recipe.id.desc())
+        if limit is not None:
+            q = q.limit(limit)
+        return q.all()
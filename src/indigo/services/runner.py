@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 import logging
-import sys
 from pathlib import Path
 
 from indigo.config.settings import get_settings
+from indigo.util.logging import configure_logging
+from indigo.util.profiler import install_profile_signal
+from indigo.util.startup import StartupPhases
+from indigo.util.trace import install_dump_signal
 
 
 def _ensure_dirs(*paths: Path) -> None:
@@ -12,23 +15,6 @@ def _ensure_dirs(*paths: Path) -> None:
         p.mkdir(parents=True, exist_ok=True)
 
 
-def _configure_logging(log_dir: Path, level: str) -> None:
-    _ensure_dirs(log_dir)
-
-    log_file = log_dir / "indigo.log"
-
-    handlers: list[logging.Handler] = [
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler(log_file, encoding="utf-8"),
-    ]
-
-    logging.basicConfig(
-        level=getattr(logging, level.upper(), logging.INFO),
-        format="%(asctime)s %(levelname)s %(name)s - %(message)s",
-        handlers=handlers,
-    )
-
-
 def run_services() -> None:
     """
     Used by: `make services` and systemd.
@@ -36,14 +22,110 @@ def run_services() -> None:
     """
     s = get_settings()
     _ensure_dirs(s.INDIGO_DATA_DIR, s.LOG_DIR)
-    _configure_logging(s.LOG_DIR, s.LOG_LEVEL)
+    configure_logging(
+        s.LOG_LEVEL,
+        log_dir=s.LOG_DIR,
+        max_bytes=s.LOG_MAX_BYTES,
+        backup_count=s.LOG_BACKUP_COUNT,
+        when=s.LOG_ROTATE_WHEN or None,
+        compress=s.LOG_COMPRESS,
+        rate_limit_burst=s.LOG_RATE_LIMIT_BURST,
+        rate_limit_window_s=s.LOG_RATE_LIMIT_WINDOW_S,
+    )
 
     log = logging.getLogger("indigo.runner")
+    # kill -USR1: phase trace dump, kill -USR2: 10 s sampling profile (both to LOG_DIR)
+    install_dump_signal(s.LOG_DIR)
+    install_profile_signal(s.LOG_DIR)
     log.info("Starting Indigo services...")
     log.info("SIMULATION_MODE=%s POLL_HZ=%s", s.SIMULATION_MODE, s.POLL_HZ)
 
+    boot = StartupPhases("services")
+
     # Import here to avoid side-effects during lint/test collection
-    from indigo.services.bus_poll_service import BusPollService
+    with boot.phase("imports"):
+        from indigo.db.engine import get_session_factory
+        from indigo.services.alarm_store import AlarmRecorder, AlarmStore
+        from indigo.services.alarms import load_rules
+        from indigo.services.bus_poll_service import BusPollService
+        from indigo.services.command_ipc import CommandServer
+        from indigo.services.commands import CommandTracker
+        from indigo.services.cycle_runner import CycleRunner
+        from indigo.services.health import HealthMonitor
+        from indigo.services.recipe_plan import PlanCache
+        from indigo.services.recipe_service import RecipeService
+        from indigo.services.telemetry import TelemetryRecorder
+        from indigo.util.sd_notify import Watchdog, notify
+
+    with boot.phase("db"):
+        plans = PlanCache(RecipeService(get_session_factory()))
+
+    with boot.phase("services"):
+        tracker = CommandTracker(max_jobs=s.COMMAND_JOBS_MAX)
+        if s.BUS_PROCESS:
+            from indigo.services.bus_process import BusProcess, BusProcessConfig
+
+            # poll loop + interlocks in their own (pinned / SCHED_FIFO) process;
+            # cycle frames go to it through the command ring
+            svc = BusProcess(
+                BusProcessConfig.from_settings(s),
+                commands=tracker,
+                alarm_rules=load_rules(s) if s.ALARMS else None,
+            )
+            bus = svc
+        else:
+            svc = BusPollService(simulation_mode=s.SIMULATION_MODE, poll_hz=s.POLL_HZ, commands=tracker)
+            bus = svc.bus
+        cycles = CycleRunner(
+            bus,
+            plans=plans,
+            safety=svc.safety,
+            utility_addr=svc.registry.utility_addr,
+            spin_s=s.CYCLE_SPIN_S,
+        )
+        health = HealthMonitor(
+            registry=svc.registry,
+            poll_period_s=svc.poll_period_s,
+            heartbeats=[svc.heartbeat, cycles.heartbeat],
+            degraded_periods=s.HEALTH_DEGRADED_PERIODS,
+            failed_periods=s.HEALTH_FAILED_PERIODS,
+        )
+        commands = CommandServer(svc, s.COMMAND_SOCKET, health=health)
+        # alarm transitions -> alarm_events, written off the poll thread
+        alarm_log = AlarmRecorder(svc.alarms, AlarmStore(get_session_factory())) if svc.alarms else None
+        # lane samples -> lane_telemetry (the source of GET /api/export/telemetry)
+        telemetry = (
+            TelemetryRecorder(svc.registry, get_session_factory(), interval_s=s.TELEMETRY_INTERVAL_S)
+            if s.TELEMETRY_INTERVAL_S > 0
+            else None
+        )
+        # WATCHDOG=1 only while the loops beat (no-op unless the unit sets WatchdogSec)
+        watchdog = Watchdog(health.loops_alive)
+
+    if s.STARTUP_WARMUP:
+        with boot.phase("warmup"):
+            # compile every lane's active recipe now rather than at its first cycle start
+            for lane in svc.registry.lane_addrs:
+                plans.plan_for_lane(lane)
 
-    svc = BusPollService(simulation_mode=s.SIMULATION_MODE, poll_hz=s.POLL_HZ)
-    svc.run_forever()
+    boot.log_summary(log)
+    svc.start()
+    cycles.start()
+    commands.start()
+    if alarm_log is not None:
+        alarm_log.start()
+    if telemetry is not None:
+        telemetry.start()
+    notify("READY=1")
+    watchdog.start()
+    try:
+        svc.run_forever()
+    finally:
+        notify("STOPPING=1")
+        watchdog.stop()
+        commands.stop()
+        if alarm_log is not None:
+            alarm_log.stop()
+        if telemetry is not None:
+            telemetry.stop()
+        cycles.stop()
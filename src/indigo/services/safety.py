@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+
+from indigo.config.settings import Settings
+from indigo.hw.devices import LaneboardClient, LaneStatus, UtilityBoardClient, UtilityStatus
+from indigo.hw.devices.laneboard import MSG_CYCLE
+from indigo.hw.devices.utilityboard import MSG_STOP
+from indigo.hw.protocol.codec import Frame
+from indigo.util.histogram import LatencyHistogram
+
+CYCLE_STOP = 0
+
+
+def is_stop_frame(frame: Frame) -> bool:
+    """A utility stop or a lane cycle stop: frames that are always allowed out, tripped or not."""
+    return frame.msg_type == MSG_STOP or (frame.msg_type == MSG_CYCLE and frame.payload[:1] == bytes([CYCLE_STOP]))
+
+
+@dataclass(frozen=True)
+class InterlockRules:
+    """
+    Which interlocks are armed.
+
+    Over-temperature is checked two ways:
+      - absolute: any probe above max_temp_c
+      - relative: heater relay on while a probe is more than overtemp_margin_c
+        above its setpoint (idle lanes sit above a 0.0 setpoint, so this
+        only applies while heating)
+    """
+
+    safe_chain: bool = True
+    error_status: bool = True
+    max_temp_c: float | None = 150.0
+    overtemp_margin_c: float | None = 10.0
+    switch_conflicts: bool = True
+
+    @staticmethod
+    def from_settings(s: Settings) -> InterlockRules:
+        return InterlockRules(
+            max_temp_c=s.SAFETY_MAX_TEMP_C,
+            overtemp_margin_c=s.SAFETY_OVERTEMP_MARGIN_C,
+        )
+
+
+@dataclass(frozen=True)
+class Violation:
+    addr: int
+    rule: str
+    detail: str
+
+
+class SafetyEvaluator:
+    """
+    Evaluates interlock rules against each status as it arrives.
+
+    Only the transition into a violation produces stop frames: an address stays
+    tripped (latched) until a status without violations is seen, so a fault
+    that persists across polls does not flood the bus with repeated stops.
+
+    The caller owns the bus; it puts the returned frames at the head of its
+    command queue, reports record_latency() once the first one is acknowledged,
+    and calls stop_failed() if any of them was not delivered.
+    """
+
+    def __init__(self, rules: InterlockRules, *, lane_addrs: list[int], utility_addr: int) -> None:
+        self.log = logging.getLogger("indigo.safety")
+        self.rules = rules
+        self._utility = UtilityBoardClient(utility_addr)
+        self._lanes = {a: LaneboardClient(a) for a in lane_addrs}
+
+        self.tripped: dict[int, list[Violation]] = {}
+        self.trip_count = 0
+        self.stop_failures = 0
+        self.latency = LatencyHistogram()
+
+    # ---- rules ----
+
+    def check_utility(self, st: UtilityStatus) -> list[Violation]:
+        r = self.rules
+        out: list[Violation] = []
+        if r.safe_chain and not st.safe_chain_ok:
+            out.append(Violation(st.addr, "safe_chain", "ESTOP / safety chain not OK"))
+        if r.error_status and st.error_status != 0:
+            out.append(Violation(st.addr, "error_status", f"error_status={st.error_status}"))
+        return out
+
+    def check_lane(self, st: LaneStatus) -> list[Violation]:
+        r = self.rules
+        out: list[Violation] = []
+        if r.error_status and st.error_status != 0:
+            out.append(Violation(st.addr, "error_status", f"error_status={st.error_status}"))
+
+        probes = (
+            ("thermal", st.thermal_temp_c, st.thermal_sp_c),
+            ("reflux", st.reflux_temp_c, st.reflux_sp_c),
+        )
+        for name, temp, sp in probes:
+            if r.max_temp_c is not None and temp > r.max_temp_c:
+                out.append(Violation(st.addr, "over_temp", f"{name} {temp:.2f}C > max {r.max_temp_c:.2f}C"))
+            elif r.overtemp_margin_c is not None and st.heater_relay_on and temp > sp + r.overtemp_margin_c:
+                out.append(
+                    Violation(st.addr, "over_temp", f"{name} {temp:.2f}C > setpoint {sp:.2f}C + {r.overtemp_margin_c:.2f}C")
+                )
+
+        if r.switch_conflicts:
+            if st.lid_switch_up and st.lid_switch_down:
+                out.append(Violation(st.addr, "lid_switch_conflict", "lid switches report up and down"))
+            if st.arm_switch_extend and st.arm_switch_retract:
+                out.append(Violation(st.addr, "arm_switch_conflict", "arm switches report extend and retract"))
+            if st.lid_solenoid_up and st.lid_solenoid_down:
+                out.append(Violation(st.addr, "lid_solenoid_conflict", "lid solenoid driven up and down"))
+            if st.arm_solenoid_extend and st.arm_solenoid_retract:
+                out.append(Violation(st.addr, "arm_solenoid_conflict", "arm solenoid driven extend and retract"))
+        return out
+
+    # ---- evaluation (hot path) ----
+
+    def on_utility_status(self, st: UtilityStatus) -> list[Frame]:
+        violations = self.check_utility(st)
+        if not self._latch(st.addr, violations):
+            return []
+        # Utility-level fault: stop the machine, then every lane.
+        return [self._utility.build_stop(), *(c.build_cycle(CYCLE_STOP) for c in self._lanes.values())]
+
+    def on_lane_status(self, st: LaneStatus) -> list[Frame]:
+        violations = self.check_lane(st)
+        if not self._latch(st.addr, violations):
+            return []
+        client = self._lanes.get(st.addr) or LaneboardClient(st.addr)
+        return [client.build_cycle(CYCLE_STOP)]
+
+    def record_latency(self, latency_ms: float) -> None:
+        self.latency.record(latency_ms)
+
+    def stop_failed(self, addr: int) -> None:
+        """The stops for addr did not all go out: un-latch so the next violating status re-sends them."""
+        self.stop_failures += 1
+        self.tripped.pop(addr, None)
+
+    def stats(self) -> dict:
+        return {
+            "trip_count": self.trip_count,
+            "stop_failures": self.stop_failures,
+            "tripped": {
+                addr: [{"rule": v.rule, "detail": v.detail} for v in vs] for addr, vs in self.tripped.items()
+            },
+            "detect_to_command_ms": self.latency.snapshot(),
+        }
+
+    def _latch(self, addr: int, violations: list[Violation]) -> bool:
+        """Returns True only when addr newly enters the tripped state."""
+        if not violations:
+            if addr in self.tripped:
+                self.log.warning("Interlock cleared on addr=%s", addr)
+                del self.tripped[addr]
+            return False
+
+        was_tripped = addr in self.tripped
+        self.tripped[addr] = violations
+        if was_tripped:
+            return False
+
+        self.trip_count += 1
+        self.log.error("Interlock tripped on addr=%s: %s", addr, "; ".join(v.detail for v in violations))
+        return True
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import logging
+import struct
+import threading
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from indigo.db.orm.tables import LaneTelemetry
+from indigo.hw.devices.laneboard import LaneboardClient
+
+# Lane status payload: output/input bit groups, temps and setpoints (i16 /100),
+# stir speed command and raw pressure (u16), stir running, error status
+_LANE = struct.Struct("<BBhhhhHHBB")
+
+
+def telemetry_row(addr: int, payload: bytes, ts: float) -> dict[str, Any]:
+    """One lane_telemetry row from a raw lane status payload."""
+    b0, b1, rt, tt, rsp, tsp, stir, pressure, running, err = _LANE.unpack_from(payload)
+    return {
+        "ts": ts,
+        "lane": addr,
+        "reflux_temp_c": rt / 100.0,
+        "thermal_temp_c": tt / 100.0,
+        "reflux_sp_c": rsp / 100.0,
+        "thermal_sp_c": tsp / 100.0,
+        "stir_speed_cmd": stir,
+        "pressure_raw": pressure,
+        "stir_running": bool(running & 1),
+        "error_status": err,
+        "io_bits": b0 | (b1 << 8),
+    }
+
+
+class TelemetryRecorder:
+    """
+    Samples every lane that answered since the last pass into lane_telemetry,
+    every interval_s, off the poll thread (one executemany per pass). Rows are
+    built straight from the registry's raw payloads; the sample ts is the time
+    the lane last answered. A pass that fails to write is logged and dropped.
+    """
+
+    def __init__(
+        self,
+        registry,
+        session_factory: sessionmaker,
+        *,
+        interval_s: float = 5.0,
+    ) -> None:
+        self.log = logging.getLogger("indigo.telemetry")
+        self.registry = registry
+        self._session_factory = session_factory
+        self.interval_s = interval_s
+        self.written = 0
+        self._last: dict[int, float] = {}
+        self._stop_evt = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sample(self) -> list[dict[str, Any]]:
+        reg = self.registry
+        rows: list[dict[str, Any]] = []
+        for addr in reg.lane_addrs:
+            ts = reg.last_seen_ts.get(addr)
+            if ts is None or ts == self._last.get(addr):
+                continue
+            payload = reg.raw(addr)
+            if payload is None:  # stored already decoded (tests, tools)
+                st = reg.lane(addr)
+                if st is None:
+                    continue
+                payload = LaneboardClient.encode_status_payload(st)
+            rows.append(telemetry_row(addr, payload, ts))
+            self._last[addr] = ts
+        return rows
+
+    def flush(self) -> int:
+        rows = self.sample()
+        if not rows:
+            return 0
+        try:
+            with self._session_factory() as session:  # type: Session
+                session.execute(insert(LaneTelemetry), rows)
+                session.commit()
+        except Exception as e:
+            self.log.warning("Telemetry write failed (%d samples dropped): %s", len(rows), e)
+            return 0
+        self.written += len(rows)
+        return len(rows)
+
+    def _run(self) -> None:
+        while not self._stop_evt.wait(self.interval_s):
+            self.flush()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run, name="TelemetryRecorder", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        self.flush()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import threading
+import time
+
+
+class Clock:
+    """
+    Time source for services, buses and simulators.
+
+    Everything that reads or waits on time takes a Clock, so the same code runs
+    on wall time (SystemClock) or on simulated time (VirtualClock).
+    """
+
+    def time(self) -> float:
+        """Wall-clock seconds since the epoch (timestamps)."""
+        raise NotImplementedError
+
+    def monotonic(self) -> float:
+        """Seconds on a clock that never goes backwards (deadlines, intervals)."""
+        raise NotImplementedError
+
+    def perf_counter(self) -> float:
+        """Highest-resolution monotonic seconds (latency measurement)."""
+        raise NotImplementedError
+
+    def sleep(self, seconds: float) -> None:
+        raise NotImplementedError
+
+    def sleep_until(self, deadline: float, spin_s: float = 0.0) -> None:
+        """Return once monotonic() >= deadline, busy-waiting the last spin_s where that matters."""
+        raise NotImplementedError
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """Event.wait(timeout) on this clock; True if the event is set."""
+        raise NotImplementedError
+
+
+class SystemClock(Clock):
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def perf_counter(self) -> float:
+        return time.perf_counter()
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def sleep_until(self, deadline: float, spin_s: float = 0.0) -> None:
+        # sleep() can overshoot by a scheduler tick, so the final spin_s is a busy wait
+        coarse = deadline - time.monotonic() - spin_s
+        if coarse > 0:
+            time.sleep(coarse)
+        while time.monotonic() < deadline:
+            time.sleep(0)
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        return event.wait(timeout)
+
+
+class VirtualClock(Clock):
+    """
+    Simulated time that only moves when someone waits.
+
+    sleep()/sleep_until()/wait() jump straight to the wake-up time instead of
+    blocking, so a loop of "do work, wait for the next deadline" runs as fast as
+    the work allows and is fully deterministic. Meant for single-threaded
+    drivers (tests, offline simulation); the three time readings all advance
+    together, and time() starts at wall_start.
+    """
+
+    def __init__(self, start: float = 0.0, *, wall_start: float = 1_700_000_000.0) -> None:
+        self._now = float(start)
+        self._wall_offset = wall_start - self._now
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        return self._now + self._wall_offset
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def perf_counter(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float) -> None:
+        if seconds > 0:
+            with self._lock:
+                self._now += seconds
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    def sleep_until(self, deadline: float, spin_s: float = 0.0) -> None:
+        with self._lock:
+            if deadline > self._now:
+                self._now = deadline
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        if not event.is_set():
+            self.advance(timeout)
+        return event.is_set()
+
+
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from indigo.util.clock import SYSTEM_CLOCK, Clock
+
+# weight of the newest interval in the tick-rate estimate
+_RATE_ALPHA = 0.1
+
+
+class Heartbeat:
+    """
+    Progress marker for a service loop: the loop calls beat() once per pass,
+    anyone may read it.
+
+    period_s is the longest gap between beats of a healthy loop (its poll
+    period, or its idle wake-up bound). fixed_rate loops (the poll loop) also
+    get their beat rate compared with 1 / period_s; the rate is an EWMA of the
+    intervals, so beat() is O(1). Reads are plain attribute loads, safe from
+    other threads without a lock.
+    """
+
+    __slots__ = ("name", "period_s", "fixed_rate", "clock", "count", "last", "_interval_s")
+
+    def __init__(self, name: str, period_s: float, *, fixed_rate: bool = False, clock: Clock | None = None) -> None:
+        self.name = name
+        self.period_s = float(period_s)
+        self.fixed_rate = fixed_rate
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.count = 0
+        self.last: float | None = None  # clock.monotonic() of the latest beat
+        self._interval_s: float | None = None
+
+    def beat(self) -> None:
+        now = self.clock.monotonic()
+        last = self.last
+        if last is not None:
+            dt = now - last
+            iv = self._interval_s
+            self._interval_s = dt if iv is None else iv + _RATE_ALPHA * (dt - iv)
+        self.last = now
+        self.count += 1
+
+    def age_s(self, now: float | None = None) -> float | None:
+        """Seconds since the latest beat (None before the first)."""
+        last = self.last
+        if last is None:
+            return None
+        return max(0.0, (self.clock.monotonic() if now is None else now) - last)
+
+    def rate_hz(self) -> float | None:
+        iv = self._interval_s
+        return None if not iv else 1.0 / iv
+
+    def snapshot(self) -> dict:
+        age, rate = self.age_s(), self.rate_hz()
+        return {
+            "count": self.count,
+            "age_s": None if age is None else round(age, 3),
+            "period_s": self.period_s,
+            "rate_hz": None if rate is None else round(rate, 3),
+            "expected_hz": round(1.0 / self.period_s, 3) if self.fixed_rate and self.period_s > 0 else None,
+        }
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+
+# Upper bucket edges in milliseconds (last bucket is open-ended).
+DEFAULT_EDGES_MS: tuple[float, ...] = (
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 1000.0,
+)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram (ms). O(log buckets) per sample, no allocation.
+
+    Values can be negative (e.g. "sent early" scheduling error); they are
+    bucketed on their absolute value, with min/max keeping the sign.
+    """
+
+    def __init__(self, edges_ms: tuple[float, ...] = DEFAULT_EDGES_MS) -> None:
+        self.edges_ms = tuple(edges_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = [0] * (len(self.edges_ms) + 1)
+            self.count = 0
+            self.total_ms = 0.0
+            self.min_ms: float | None = None
+            self.max_ms: float | None = None
+
+    def record(self, value_ms: float) -> None:
+        idx = bisect_left(self.edges_ms, abs(value_ms))
+        with self._lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.total_ms += value_ms
+            if self.min_ms is None or value_ms < self.min_ms:
+                self.min_ms = value_ms
+            if self.max_ms is None or value_ms > self.max_ms:
+                self.max_ms = value_ms
+
+    def percentile(self, q: float) -> float | None:
+        """Upper edge of the bucket holding the q-th percentile (0..100)."""
+        with self._lock:
+            if self.count == 0:
+                return None
+            target = max(1, int(round(self.count * q / 100.0)))
+            seen = 0
+            for i, c in enumerate(self.counts):
+                seen += c
+                if seen >= target:
+                    return self.edges_ms[i] if i < len(self.edges_ms) else abs(self.max_ms or 0.0)
+        return None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            buckets = [
+                {"le_ms": (self.edges_ms[i] if i < len(self.edges_ms) else None), "count": c}
+                for i, c in enumerate(self.counts)
+            ]
+            count, total, lo, hi = self.count, self.total_ms, self.min_ms, self.max_ms
+        return {
+            "count": count,
+            "mean_ms": (total / count) if count else None,
+            "min_ms": lo,
+            "max_ms": hi,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "buckets": buckets,
+        }
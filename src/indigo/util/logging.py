@@ -1,27 +1,192 @@
 from __future__ import annotations
 
+import atexit
+import gzip
 import logging
+import logging.handlers
+import os
+import queue
+import shutil
 import sys
+import threading
+from pathlib import Path
 
+from indigo.util.clock import SYSTEM_CLOCK, Clock
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s - %(message)s"
+LOG_FILE = "indigo.log"
+
+_listener: LogQueueListener | None = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `burst` records per (logger, level, message template) through
+    every `window_s`; the rest are dropped and counted. The first record let
+    through after a suppression carries "(+N similar suppressed)".
+
+    Only records at max_level or below are limited (ERROR and up always pass
+    by default). Runs in the emitting thread, so it must stay cheap.
+    """
+
+    def __init__(
+        self,
+        burst: int = 5,
+        window_s: float = 60.0,
+        *,
+        max_level: int = logging.WARNING,
+        clock: Clock | None = None,
+    ) -> None:
+        super().__init__()
+        self.burst = max(1, int(burst))
+        self.window_s = float(window_s)
+        self.max_level = max_level
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self._lock = threading.Lock()
+        # key -> [window start, passed in window, suppressed since last pass]
+        self._windows: dict[tuple[str, int, object], list] = {}
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level or self.window_s <= 0:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = self.clock.monotonic()
+        with self._lock:
+            w = self._windows.get(key)
+            if w is None:
+                self._windows[key] = [now, 1, 0]
+                return True
+            if now - w[0] >= self.window_s:
+                w[0], w[1] = now, 0
+            if w[1] >= self.burst:
+                w[2] += 1
+                self.suppressed += 1
+                return False
+            w[1] += 1
+            dropped, w[2] = w[2], 0
+        if dropped:
+            record.msg = f"{record.msg} (+{dropped} similar suppressed)"
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full."""
+
+    def __init__(self, q: queue.Queue) -> None:
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room for its sentinel instead of raising on a full queue."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def _gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _file_handler(
+    log_dir: Path,
+    *,
+    max_bytes: int,
+    backup_count: int,
+    when: str | None,
+    compress: bool,
+) -> logging.Handler:
+    path = log_dir / LOG_FILE
+    if when:
+        handler: logging.handlers.BaseRotatingHandler = logging.handlers.TimedRotatingFileHandler(
+            path, when=when, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+    if compress:
+        handler.namer = _gzip_namer
+        handler.rotator = _gzip_rotator
+    return handler
+
+
+def configure_logging(
+    level: str = "INFO",
+    *,
+    log_dir: Path | None = None,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    when: str | None = None,
+    compress: bool = True,
+    rate_limit_burst: int = 5,
+    rate_limit_window_s: float = 60.0,
+    queue_size: int = 10000,
+) -> LogQueueListener:
+    """
+    Route all logging through a queue so emitting never blocks on I/O.
+
+    The root logger gets a single non-blocking QueueHandler (with the rate
+    limiter); a QueueListener thread writes to stdout and, if log_dir is given,
+    to log_dir/indigo.log, rotated by size (max_bytes) or by time (when=, e.g.
+    "midnight"), rotated files gzipped. Calling it again replaces the previous
+    pipeline; the listener is flushed and stopped at exit.
+    """
+    global _listener
+    shutdown_logging()
 
-def configure_logging(level: str = "INFO") -> None:
     lvl = getattr(logging, level.upper(), logging.INFO)
-    root = logging.getLogger()
-    root.setLevel(lvl)
+    fmt = logging.Formatter(fmt=LOG_FORMAT)
 
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(lvl)
+    handlers: list[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    if log_dir is not None:
+        log_dir.mkdir(parents=True, exist_ok=True)
+        handlers.append(
+            _file_handler(log_dir, max_bytes=max_bytes, backup_count=backup_count, when=when, compress=compress)
+        )
+    for h in handlers:
+        h.setFormatter(fmt)
 
-    fmt = logging.Formatter(
-        fmt="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    handler.setFormatter(fmt)
+    qh = NonBlockingQueueHandler(queue.Queue(maxsize=max(0, int(queue_size))))
+    qh.addFilter(RateLimitFilter(rate_limit_burst, rate_limit_window_s))
 
+    root = logging.getLogger()
+    root.setLevel(lvl)
     # Avoid duplicate handlers when reloading
     root.handlers.clear()
-    root.addHandler(handler)
+    root.addHandler(qh)
 
     # Quiet noisy libs a bit
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
     logging.getLogger("werkzeug").setLevel(logging.INFO)
+
+    _listener = LogQueueListener(qh.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush and stop the listener started by configure_logging() (no-op if none)."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is None:
+        return
+    listener.stop()
+    for h in listener.handlers:
+        h.close()
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+MAX_PROFILE_S = 60.0
+
+_busy = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+class SampleProfile:
+    """
+    Result of sample(): stack counts across all threads except the sampler.
+
+    collapsed() is the flamegraph.pl / speedscope "collapsed stack" format
+    (thread;outer;...;inner count); top() is a pstats-like table of self and
+    cumulative samples per function.
+    """
+
+    def __init__(self, stacks: Counter[tuple[str, ...]], samples: int, seconds: float, interval_s: float) -> None:
+        self.stacks = stacks
+        self.samples = samples
+        self.seconds = seconds
+        self.interval_s = interval_s
+
+    def collapsed(self) -> str:
+        return "".join(f"{';'.join(stack)} {n}\n" for stack, n in self.stacks.most_common())
+
+    def top(self, limit: int = 40) -> str:
+        self_n: Counter[str] = Counter()
+        cum_n: Counter[str] = Counter()
+        for stack, n in self.stacks.items():
+            frames = stack[1:]  # drop the thread name
+            if frames:
+                self_n[frames[-1]] += n
+            for fn in set(frames):
+                cum_n[fn] += n
+        total = max(1, sum(self.stacks.values()))
+        lines = [
+            f"{self.samples} samples of {len(self.stacks)} distinct stacks over {self.seconds:.1f}s "
+            f"(interval {self.interval_s * 1000.0:.1f}ms)",
+            "",
+            f"{'self':>8} {'self%':>6} {'cum':>8} {'cum%':>6}  function",
+        ]
+        for fn, n in cum_n.most_common(limit):
+            s = self_n.get(fn, 0)
+            lines.append(f"{s:>8} {100.0 * s / total:>5.1f}% {n:>8} {100.0 * n / total:>5.1f}%  {fn}")
+        return "\n".join(lines) + "\n"
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def sample(seconds: float, interval_s: float = 0.005) -> SampleProfile:
+    """
+    Statistical profile of every thread in this process for `seconds`.
+
+    A sampler thread reads sys._current_frames() every interval_s; the
+    profiled threads run unmodified (no tracing hooks), so the cost is the
+    sampler's own CPU time. One profile at a time per process (ProfilerBusy).
+    cProfile is not used because it only sees the thread that enables it.
+    """
+    seconds = min(max(0.0, float(seconds)), MAX_PROFILE_S)
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy("a profile is already running")
+    try:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks: Counter[tuple[str, ...]] = Counter()
+        samples = 0
+        end = time.monotonic() + seconds
+        while True:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(names.get(ident, str(ident)))
+                stacks[tuple(reversed(stack))] += 1
+            samples += 1
+            if time.monotonic() >= end:
+                break
+            time.sleep(interval_s)
+        return SampleProfile(stacks, samples, seconds, interval_s)
+    finally:
+        _busy.release()
+
+
+def install_profile_signal(out_dir: Path, seconds: float = 10.0, signum: int | None = None) -> bool:
+    """
+    On SIGUSR2, sample the process for `seconds` and write collapsed stacks to
+    out_dir/profile-<pid>-<time>.collapsed (in a background thread).
+
+    Returns False where the signal does not exist (Windows).
+    """
+    signum = signum if signum is not None else getattr(signal, "SIGUSR2", None)
+    if signum is None:
+        return False
+
+    def _run() -> None:
+        try:
+            prof = sample(seconds)
+        except ProfilerBusy:
+            log.warning("Profile requested while one is running; ignored")
+            return
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+        path.write_text(prof.collapsed(), encoding="utf-8")
+        log.warning("Profile (%d samples) written to %s", prof.samples, path)
+
+    def _handler(_signum, _frame) -> None:
+        threading.Thread(target=_run, name="Profiler", daemon=True).start()
+
+    signal.signal(signum, _handler)
+    return True
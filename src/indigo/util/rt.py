@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import os
+
+
+def apply_rt_policy(*, cpu: int | None = None, fifo_priority: int | None = None, nice: int | None = None) -> dict:
+    """
+    Best-effort scheduling policy for the calling thread (and threads it starts
+    afterwards, which inherit it): pin to one CPU, SCHED_FIFO at fifo_priority
+    (1..99), and/or an absolute nice value.
+
+    Each step is independent; one that is unsupported (non-Linux) or not
+    permitted (SCHED_FIFO and negative nice need CAP_SYS_NICE or an rtprio
+    limit) is reported in "errors" rather than raised, so the caller still runs.
+    """
+    out: dict = {"cpu": None, "policy": "other", "fifo_priority": None, "nice": None, "errors": []}
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+            out["cpu"] = cpu
+        except (AttributeError, OSError, ValueError) as e:
+            out["errors"].append(f"affinity cpu={cpu}: {e}")
+    if fifo_priority:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(fifo_priority))
+            out["policy"] = "fifo"
+            out["fifo_priority"] = fifo_priority
+        except (AttributeError, OSError, ValueError) as e:
+            out["errors"].append(f"SCHED_FIFO priority={fifo_priority}: {e}")
+    if nice is not None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, nice)
+            out["nice"] = nice
+        except (AttributeError, OSError, ValueError) as e:
+            out["errors"].append(f"nice={nice}: {e}")
+    return out
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+from collections.abc import Callable
+
+log = logging.getLogger("indigo.sd_notify")
+
+
+def notify(state: str, *, path: str | None = None) -> bool:
+    """
+    Send a systemd notification ("READY=1", "WATCHDOG=1", "STOPPING=1", ...)
+    to $NOTIFY_SOCKET (or path): one datagram on an AF_UNIX socket, which is
+    the whole sd_notify protocol. "@name" is a Linux abstract socket.
+
+    Returns False when not run under systemd (no socket) or the send failed.
+    """
+    path = path if path is not None else os.environ.get("NOTIFY_SOCKET")
+    if not path:
+        return False
+    addr = "\0" + path[1:] if path.startswith("@") else path
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC) as sock:
+            sock.connect(addr)
+            sock.sendall(state.encode())
+    except OSError as e:
+        log.debug("sd_notify %r to %s failed: %s", state, path, e)
+        return False
+    return True
+
+
+def watchdog_interval_s() -> float | None:
+    """
+    WatchdogSec of the unit, from $WATCHDOG_USEC (None if the watchdog is off,
+    or $WATCHDOG_PID names another process, e.g. our parent).
+    """
+    pid = os.environ.get("WATCHDOG_PID")
+    if pid and pid.strip() != str(os.getpid()):
+        return None
+    try:
+        usec = int(os.environ.get("WATCHDOG_USEC", ""))
+    except ValueError:
+        return None
+    return usec / 1_000_000 if usec > 0 else None
+
+
+class Watchdog:
+    """
+    Sends WATCHDOG=1 every interval_s (default: half of WatchdogSec) but only
+    while alive() says the process is making progress. A stalled loop thus
+    stops the keepalives and systemd kills and restarts the unit once
+    WatchdogSec has passed without one, i.e. within WatchdogSec + interval_s
+    of the stall.
+
+    start() is a no-op when the unit has no watchdog (and no interval_s is given).
+    """
+
+    def __init__(self, alive: Callable[[], bool], *, interval_s: float | None = None, path: str | None = None) -> None:
+        if interval_s is None:
+            wd = watchdog_interval_s()
+            interval_s = None if wd is None else wd / 2.0
+        self.alive = alive
+        self.interval_s = interval_s
+        self.path = path
+        self.sent = 0
+        self.skipped = 0
+        self._stop_evt = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval_s is not None
+
+    def ping(self) -> bool:
+        """One keepalive if alive(); returns whether it was sent."""
+        try:
+            ok = bool(self.alive())
+        except Exception as e:
+            log.warning("Watchdog liveness check failed: %s", e)
+            ok = False
+        if not ok:
+            self.skipped += 1
+            log.warning("Watchdog keepalive withheld: service loop not making progress")
+            return False
+        if notify("WATCHDOG=1", path=self.path):
+            self.sent += 1
+            return True
+        return False
+
+    def start(self) -> None:
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run, name="Watchdog", daemon=True)
+        self._thread.start()
+        log.info("Watchdog keepalive every %.2fs", self.interval_s)
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def _run(self) -> None:
+        while not self._stop_evt.wait(self.interval_s):
+            self.ping()
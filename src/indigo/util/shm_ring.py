@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import struct
+from multiprocessing import shared_memory
+
+# head (records written), tail (records read), dropped (pushes refused while full)
+_HEADER = struct.Struct("<QQQ")
+_LEN = struct.Struct("<I")
+
+
+class ShmRing:
+    """
+    Bounded queue of byte records between processes, in one SharedMemory block.
+
+    Layout: header (head, tail, dropped as u64 counters), then `slots` slots of
+    [u32 length][slot_size bytes]. head/tail only grow; head - tail is the fill.
+    A push into a full ring is refused and counted rather than blocking, so a
+    stalled reader can never stall the writer (the bus loop).
+
+    push/pop copy under a multiprocessing lock: a semaphore, i.e. also the
+    memory barrier that makes the record visible before the counter moves.
+    It is held for one small copy only.
+
+    The creating process owns the block (close() unlinks it); others attach()
+    with spec, from processes started by it (they share its resource tracker).
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, slots: int, slot_size: int, lock, *, owner: bool) -> None:
+        self.shm = shm
+        self.slots = slots
+        self.slot_size = slot_size
+        self.lock = lock
+        self.owner = owner
+        self._buf = shm.buf
+        self._stride = _LEN.size + slot_size
+
+    @classmethod
+    def create(cls, slots: int, slot_size: int, lock) -> ShmRing:
+        size = _HEADER.size + slots * (_LEN.size + slot_size)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        _HEADER.pack_into(shm.buf, 0, 0, 0, 0)
+        return cls(shm, slots, slot_size, lock, owner=True)
+
+    @property
+    def spec(self) -> tuple:
+        """Picklable handle for attach() in another process (pass it as a Process arg)."""
+        return (self.shm.name, self.slots, self.slot_size, self.lock)
+
+    @classmethod
+    def attach(cls, spec: tuple) -> ShmRing:
+        name, slots, slot_size, lock = spec
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, slots, slot_size, lock, owner=False)
+
+    def push(self, data: bytes) -> bool:
+        n = len(data)
+        if n > self.slot_size:
+            raise ValueError(f"record of {n} bytes exceeds slot_size {self.slot_size}")
+        with self.lock:
+            head, tail, dropped = _HEADER.unpack_from(self._buf, 0)
+            if head - tail >= self.slots:
+                _HEADER.pack_into(self._buf, 0, head, tail, dropped + 1)
+                return False
+            off = _HEADER.size + (head % self.slots) * self._stride
+            _LEN.pack_into(self._buf, off, n)
+            self._buf[off + _LEN.size : off + _LEN.size + n] = data
+            _HEADER.pack_into(self._buf, 0, head + 1, tail, dropped)
+        return True
+
+    def pop_many(self, limit: int = 256) -> list[bytes]:
+        """Up to limit records, oldest first (empty list if none)."""
+        with self.lock:
+            head, tail, dropped = _HEADER.unpack_from(self._buf, 0)
+            n = min(head - tail, limit)
+            out = []
+            for i in range(n):
+                off = _HEADER.size + ((tail + i) % self.slots) * self._stride
+                (size,) = _LEN.unpack_from(self._buf, off)
+                out.append(bytes(self._buf[off + _LEN.size : off + _LEN.size + size]))
+            if n:
+                _HEADER.pack_into(self._buf, 0, head, tail + n, dropped)
+        return out
+
+    def pop(self) -> bytes | None:
+        got = self.pop_many(1)
+        return got[0] if got else None
+
+    def __len__(self) -> int:
+        with self.lock:
+            head, tail, _ = _HEADER.unpack_from(self._buf, 0)
+        return head - tail
+
+    @property
+    def dropped(self) -> int:
+        with self.lock:
+            return _HEADER.unpack_from(self._buf, 0)[2]
+
+    def close(self) -> None:
+        self._buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class StartupPhases:
+    """
+    Named, timed boot phases of one process (API app or services runner).
+
+    with boot.phase("db"): ...  records the wall time of each phase; the
+    summary is logged once and kept for /api/_meta.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.phases: list[tuple[str, float]] = []
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - t) * 1000.0))
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000.0
+
+    def as_dict(self) -> dict:
+        return {"total_ms": round(self.total_ms(), 3), "phases_ms": {n: round(ms, 3) for n, ms in self.phases}}
+
+    def log_summary(self, log: logging.Logger) -> None:
+        parts = " ".join(f"{n}={ms:.1f}ms" for n, ms in self.phases)
+        log.info("%s startup %.1fms: %s", self.name, self.total_ms(), parts)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import signal
+import threading
+import time
+import weakref
+from array import array
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+_TRACERS: weakref.WeakSet[PhaseTracer] = weakref.WeakSet()
+
+
+class PhaseTracer:
+    """
+    Always-on span recorder for one hot loop, in a fixed-size ring buffer.
+
+    The loop calls t = tracer.begin_tick() and then t = tracer.span(phase, t)
+    at each phase boundary: one perf_counter_ns() and four array stores per
+    span, no allocation, no lock. There must be a single writer thread; readers
+    copy the arrays, so a snapshot taken mid-tick may include a torn last span.
+
+    Tracers register themselves (weakly) so dump_all() / the admin endpoint /
+    SIGUSR1 can find every tracer in the process.
+    """
+
+    def __init__(self, name: str, phases: tuple[str, ...], capacity: int = 8192) -> None:
+        if len(phases) > 255:
+            raise ValueError("at most 255 phases")
+        self.name = name
+        self.phases = tuple(phases)
+        self.capacity = max(1, int(capacity))
+        self._tick = array("q", bytes(8 * self.capacity))
+        self._phase = array("B", bytes(self.capacity))
+        self._start = array("q", bytes(8 * self.capacity))
+        self._dur = array("q", bytes(8 * self.capacity))
+        self._pos = 0  # total spans ever recorded; slot = _pos % capacity
+        self.ticks = 0
+        _TRACERS.add(self)
+
+    def phase_id(self, phase: str) -> int:
+        return self.phases.index(phase)
+
+    now = staticmethod(time.perf_counter_ns)
+
+    def begin_tick(self) -> int:
+        self.ticks += 1
+        return time.perf_counter_ns()
+
+    def span(self, phase_id: int, start_ns: int) -> int:
+        """Record [start_ns, now) as phase_id of the current tick; returns now (the next span's start)."""
+        now = time.perf_counter_ns()
+        i = self._pos % self.capacity
+        self._tick[i] = self.ticks
+        self._phase[i] = phase_id
+        self._start[i] = start_ns
+        self._dur[i] = now - start_ns
+        self._pos += 1
+        return now
+
+    def snapshot(self, last: int | None = None) -> dict:
+        """Spans oldest -> newest (at most `last`), plus per-phase duration summaries in us."""
+        pos = self._pos
+        tick, phase, start, dur = array("q", self._tick), array("B", self._phase), array("q", self._start), array("q", self._dur)
+        n = min(pos, self.capacity)
+        if last is not None:
+            n = min(n, max(0, int(last)))
+        slots = [(pos - n + k) % self.capacity for k in range(n)]
+
+        per_phase: dict[int, list[int]] = {}
+        for i in slots:
+            per_phase.setdefault(phase[i], []).append(dur[i])
+        summary = {}
+        for pid, durs in sorted(per_phase.items()):
+            durs.sort()
+            summary[self._name(pid)] = {
+                "count": len(durs),
+                "mean_us": round(sum(durs) / len(durs) / 1000.0, 3),
+                "p50_us": round(durs[len(durs) // 2] / 1000.0, 3),
+                "p99_us": round(durs[min(len(durs) - 1, (len(durs) * 99) // 100)] / 1000.0, 3),
+                "max_us": round(durs[-1] / 1000.0, 3),
+            }
+        return {
+            "name": self.name,
+            "capacity": self.capacity,
+            "recorded": pos,
+            "ticks": self.ticks,
+            "summary": summary,
+            "spans": [
+                {"tick": tick[i], "phase": self._name(phase[i]), "start_ns": start[i], "dur_ns": dur[i]}
+                for i in slots
+            ],
+        }
+
+    def _name(self, pid: int) -> str:
+        return self.phases[pid] if pid < len(self.phases) else str(pid)
+
+
+def tracers() -> list[PhaseTracer]:
+    return sorted(_TRACERS, key=lambda t: t.name)
+
+
+def dump_all(last: int | None = None) -> dict:
+    return {"pid": os.getpid(), "ts": time.time(), "tracers": [t.snapshot(last) for t in tracers()]}
+
+
+def write_dump(out_dir: Path, last: int | None = None) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"trace-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.write_text(json.dumps(dump_all(last)), encoding="utf-8")
+    return path
+
+
+def install_dump_signal(out_dir: Path, signum: int | None = None) -> bool:
+    """
+    Dump every tracer to out_dir/trace-<pid>-<time>.json on SIGUSR1 (main thread only).
+
+    The handler only starts a thread; the snapshot and file write happen there.
+    Returns False where the signal does not exist (Windows).
+    """
+    signum = signum if signum is not None else getattr(signal, "SIGUSR1", None)
+    if signum is None:
+        return False
+
+    def _write() -> None:
+        try:
+            log.warning("Trace dump written to %s", write_dump(out_dir))
+        except Exception as e:
+            log.error("Trace dump failed: %s", e)
+
+    def _handler(_signum, _frame) -> None:
+        threading.Thread(target=_write, name="TraceDump", daemon=True).start()
+
+    signal.signal(signum, _handler)
+    return True
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import pytest
+
+import indigo.config.settings as settings_mod
+import indigo.db.engine as engine_mod
+
+
+@pytest.fixture(autouse=True)
+def _isolated_settings(tmp_path, monkeypatch):
+    """
+    Each test gets fresh settings and a throwaway data dir / sqlite file, so tests
+    never write into the checked-in .indigo_data or leak cached engines.
+    """
+    monkeypatch.setenv("INDIGO_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("INDIGO_LOG_DIR", raising=False)
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setattr(settings_mod, "_SETTINGS", None)
+    monkeypatch.setattr(engine_mod, "_SESSION_FACTORY", None)
+    yield
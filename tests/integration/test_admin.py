@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from indigo.api.app import create_app
+from indigo.services.bus_poll_service import BusPollService
+from indigo.util.clock import VirtualClock
+
+
+def test_trace_and_profile_endpoints():
+    svc = BusPollService(simulation_mode=True, poll_hz=10.0, clock=VirtualClock())
+    svc.run_for(1.0)
+    client = create_app(svc.registry).test_client()
+
+    data = client.get("/api/admin/trace?last=7").get_json()
+    poll = next(t for t in data["tracers"] if t["name"] == "bus_poll" and t["ticks"] == 10)
+    assert len(poll["spans"]) == 7
+
+    resp = client.get("/api/admin/profile?seconds=0.1&format=top")
+    assert resp.status_code == 200 and resp.mimetype == "text/plain"
+    assert "function" in resp.get_data(as_text=True)
+    assert client.get("/api/admin/profile?seconds=600").status_code == 400
+    assert client.get("/api/admin/profile?format=svg").status_code == 400
+
+
+def test_admin_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("ENABLE_ADMIN", "0")
+    assert create_app().test_client().get("/api/admin/trace").status_code == 404
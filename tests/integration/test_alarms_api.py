@@ -0,0 +1,89 @@
+from dataclasses import replace
+
+from indigo.api.app import create_app
+from indigo.db.engine import get_session_factory
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.hw.devices.laneboard import LANE_STATUS_LEN, RESP_LANE_STATUS, LaneboardClient
+from indigo.hw.protocol.codec import Frame
+from indigo.services.alarm_store import AlarmRecorder, AlarmStore
+from indigo.services.alarms import AlarmEngine, AlarmRule
+from indigo.services.bus_poll_service import BusPollService
+from indigo.services.command_ipc import CommandServer
+from indigo.services.device_registry import DeviceRegistry
+from indigo.util.clock import VirtualClock
+
+HOT = {"name": "hot", "field": "reflux_temp_c", "op": ">", "value": 100, "latch": True, "severity": "critical"}
+
+
+def _hot_lane(addr: int) -> bytes:
+    st = LaneboardClient.parse_status_response(Frame(addr, RESP_LANE_STATUS, bytes(LANE_STATUS_LEN)))
+    return LaneboardClient.encode_status_payload(replace(st, reflux_temp_c=120.0))
+
+
+def _service():
+    clock = VirtualClock()
+    bus = SimBus(delay_s=0.0, clock=clock)
+    reg = DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)
+    svc = BusPollService(
+        simulation_mode=True,
+        poll_hz=10,
+        bus=bus,
+        registry=reg,
+        clock=clock,
+        alarms=AlarmEngine(reg, [AlarmRule.from_dict(HOT)], clock=clock),
+    )
+    return svc, bus
+
+
+def test_poll_loop_raises_alarm_and_api_acks_it():
+    svc, bus = _service()
+    bus.set_lane_payload(2, _hot_lane(2))
+    svc.run_for(1.0)
+    client = create_app(svc.registry, commands=CommandServer(svc, "unused.sock")).test_client()
+
+    resp = client.get("/api/alarms")
+    assert resp.status_code == 200 and resp.headers["Cache-Control"] == "no-store"
+    data = resp.get_json()
+    assert [(a["rule"], a["addr"], a["acked"]) for a in data["active"]] == [("hot", 2, False)]
+    assert data["stats"]["evaluations"] == 10
+    assert "alarms" in svc.tracer.snapshot()["summary"]
+
+    bus.set_lane_payload(2, bytes(LANE_STATUS_LEN))  # cooled down: still latched
+    svc.run_for(1.0)
+    assert len(client.get("/api/alarms").get_json()["active"]) == 1
+
+    ack = client.post("/api/alarms/ack", json={"rule": "hot", "lane": 2})
+    assert ack.status_code == 200 and ack.get_json()["event"]["state"] == "acked"
+    assert client.post("/api/alarms/ack", json={"rule": "hot", "lane": 2}).status_code == 409
+    assert client.post("/api/alarms/ack", json={"rule": "cold", "lane": 2}).status_code == 404
+    assert client.post("/api/alarms/ack", json={"rule": "hot"}).status_code == 400
+
+    svc.run_for(0.2)
+    assert client.get("/api/alarms").get_json()["active"] == []
+
+
+def test_recorder_writes_history_pages():
+    svc, bus = _service()
+    bus.set_lane_payload(1, _hot_lane(1))
+    bus.set_lane_payload(2, _hot_lane(2))
+    svc.run_for(1.0)
+    svc.alarms.ack("hot", 1)
+    recorder = AlarmRecorder(svc.alarms, AlarmStore(get_session_factory()))
+    assert recorder.flush() == 3
+
+    client = create_app().test_client()
+    page = client.get("/api/alarms/history?limit=2").get_json()
+    assert [(i["state"], i["addr"]) for i in page["items"]] == [("acked", 1), ("raised", 2)]
+    rest = client.get(f"/api/alarms/history?limit=2&cursor={page['next_cursor']}").get_json()
+    assert [(i["state"], i["addr"]) for i in rest["items"]] == [("raised", 1)]
+    assert rest["next_cursor"] is None
+
+    lane2 = client.get("/api/alarms/history?lane=2").get_json()["items"]
+    assert [i["rule"] for i in lane2] == ["hot"] and lane2[0]["severity"] == "critical"
+    assert client.get("/api/alarms/history?lane=x").status_code == 400
+    assert client.get("/api/alarms/history?cursor=zz").status_code == 400
+
+
+def test_alarms_without_runner():
+    resp = create_app().test_client().get("/api/alarms")
+    assert resp.status_code == 503
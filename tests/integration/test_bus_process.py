@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import os
+import time
+
+from indigo.hw.devices import LaneboardClient
+from indigo.hw.devices.laneboard import RESP_ACK
+from indigo.services.bus_process import BusProcess, BusProcessConfig
+
+
+def _wait_for(cond, timeout_s: float = 10.0) -> None:
+    end = time.monotonic() + timeout_s
+    while not cond():
+        assert time.monotonic() < end
+        time.sleep(0.01)
+
+
+def test_bus_process_polls_and_runs_commands():
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    cfg = BusProcessConfig(
+        poll_hz=50, lane_addrs=(1, 2), utility_addr=9, cpu=cpus[0] if cpus else None, sim_delay_s=0.001
+    )
+    bp = BusProcess(cfg)
+    bp.start()
+    try:
+        # statuses read in the bus process land in this process's registry
+        _wait_for(lambda: bp.registry.utility is not None and len(bp.registry.lanes) == 2)
+        _wait_for(lambda: bp.rt_policy is not None)
+        if cpus:
+            assert bp.rt_policy["cpu"] == cpus[0]
+
+        job = bp.submit_command("lane", 1, "vac_valve", {"open": True})
+        _wait_for(lambda: job.state in ("acked", "failed"))
+        assert job.state == "acked"
+        assert job.as_dict()["timings_ms"]["total"] is not None
+
+        resp = bp.send_and_recv(LaneboardClient(2).build_cycle(0))
+        assert resp is not None and resp.msg_type == RESP_ACK
+
+        _wait_for(lambda: bp.jitter.snapshot()["count"] > 0)
+        st = bp.stats()
+        assert st["alive"] and st["statuses"] > 0
+        assert st["dropped"] == {"commands": 0, "out": 0}
+    finally:
+        bp.stop()
+    assert not bp.alive()
+    assert bp.stats()["dropped"] is None
+    assert bp.send_and_recv(LaneboardClient(2).build_cycle(0)) is None
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from indigo.api.app import create_app
+from indigo.api.coalesce import COALESCE_EXT
+from indigo.services import recipe_service
+
+PAYLOAD = {
+    "cycletype": "full",
+    "numberofautopinbreaks": 2,
+    "autopinbreaktime": [100, 200],
+    "attempttime": 60,
+    "thermaltemp": -10,
+}
+
+
+def test_identical_concurrent_reads_run_one_query(monkeypatch):
+    app = create_app()
+    flight = app.extensions[COALESCE_EXT]
+    client = app.test_client()
+    client.post("/api/lanes/3/recipe", json=PAYLOAD)
+
+    queries = []
+    original = recipe_service.RecipeService.list_lane_history
+
+    def slow_history(self, *a, **k):
+        queries.append(1)
+        end = time.monotonic() + 5.0
+        while flight.coalesced < 5 and time.monotonic() < end:  # until the others have piled up
+            time.sleep(0.001)
+        return original(self, *a, **k)
+
+    monkeypatch.setattr(recipe_service.RecipeService, "list_lane_history", slow_history)
+
+    responses = []
+
+    def get():
+        responses.append(app.test_client().get("/api/lanes/3/recipes?limit=5"))
+
+    threads = [threading.Thread(target=get) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(queries) == 1
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.data for r in responses}) == 1
+    assert responses[0].get_json()["items"][0]["lane_addr"] == 3
+
+    # different arguments are different reads
+    client.get("/api/lanes/3/recipes?limit=1")
+    assert len(queries) == 2
+
+    stats = client.get("/api/admin/coalescing").get_json()
+    assert stats["coalesced"] == 5
+    assert stats["coalesced_by_endpoint"] == {"recipes.lane_recipe_history": 5}
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from indigo.api.app import create_app
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.services.bus_poll_service import BusPollService
+from indigo.services.command_ipc import CommandServer
+from indigo.services.device_registry import DeviceRegistry
+from indigo.util.clock import VirtualClock
+
+
+def _setup(tmp_path):
+    reg = DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)
+    svc = BusPollService(
+        simulation_mode=True,
+        poll_hz=10.0,
+        bus=SimBus(delay_s=0.0),
+        registry=reg,
+        clock=VirtualClock(),
+    )
+    server = CommandServer(svc, tmp_path / "commands.sock")
+    return svc, server
+
+
+def test_lane_command_is_accepted_then_acked(tmp_path):
+    svc, server = _setup(tmp_path)
+    client = create_app(svc.registry, commands=server).test_client()
+
+    resp = client.post("/api/lanes/1/commands", json={"command": "lid", "args": {"extend": True}})
+    assert resp.status_code == 202
+    job = resp.get_json()["job"]
+    assert job["state"] == "queued" and resp.headers["Location"] == f"/api/commands/{job['id']}"
+    assert client.get(resp.headers["Location"]).get_json()["job"]["state"] == "queued"
+
+    svc.tick()
+    done = client.get(f"/api/commands/{job['id']}").get_json()["job"]
+    assert done["state"] == "acked" and done["timings_ms"]["total"] is not None
+
+    recent = client.get("/api/commands").get_json()
+    assert recent["jobs"][0]["id"] == job["id"]
+    assert recent["stats"]["latency_ms"]["total"]["count"] == 1
+
+
+def test_utility_command_over_the_socket(tmp_path, monkeypatch):
+    svc, server = _setup(tmp_path)
+    monkeypatch.setenv("COMMAND_SOCKET", str(server.path))
+    server.start()
+    try:
+        client = create_app(svc.registry).test_client()
+        resp = client.post("/api/utility/commands", json={"command": "stop"})
+        assert resp.status_code == 202 and resp.get_json()["job"]["addr"] == 9
+    finally:
+        server.stop()
+
+    assert client.post("/api/utility/commands", json={"command": "stop"}).status_code == 503
+
+
+def test_command_errors(tmp_path):
+    svc, server = _setup(tmp_path)
+    client = create_app(svc.registry, commands=server).test_client()
+
+    bad = client.post("/api/lanes/1/commands", json={"command": "vac_valve"})
+    assert bad.status_code == 400 and bad.get_json()["error"] == "invalid_args"
+    assert "vac_valve" in bad.get_json()["commands"]
+    assert client.post("/api/lanes/1/commands", data="nope").status_code == 400
+    assert client.post("/api/lanes/7/commands", json={"command": "stop"}).status_code == 404
+    assert client.get("/api/commands/unknown").status_code == 404
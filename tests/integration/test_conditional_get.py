@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from indigo.api.app import create_app
+from indigo.hw.devices import UtilityBoardClient
+from indigo.hw.protocol.codec import Frame
+from indigo.services.device_registry import DeviceRegistry
+
+PAYLOAD = {
+    "cycletype": "full",
+    "numberofautopinbreaks": 2,
+    "autopinbreaktime": [100, 200],
+    "attempttime": 60,
+    "thermaltemp": -10,
+}
+
+
+def test_recipe_get_returns_304_without_touching_db(monkeypatch):
+    app = create_app()
+    client = app.test_client()
+    assert client.post("/api/lanes/1/recipe", json=PAYLOAD).status_code == 200
+
+    first = client.get("/api/lanes/1/recipe")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    # A revalidation with a known tag must not reach the service layer at all.
+    from indigo.services import recipe_service
+
+    def _boom(*a, **k):
+        raise AssertionError("DB touched on a 304 path")
+
+    monkeypatch.setattr(recipe_service.RecipeService, "get_lane_recipe", _boom)
+    again = client.get("/api/lanes/1/recipe", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+
+
+def test_recipe_etag_changes_after_upsert():
+    client = create_app().test_client()
+    client.post("/api/lanes/2/recipe", json=PAYLOAD)
+    etag1 = client.get("/api/lanes/2/recipe").headers["ETag"]
+
+    client.post("/api/lanes/2/recipe", json={**PAYLOAD, "thermaltemp": -12})
+    resp = client.get("/api/lanes/2/recipe", headers={"If-None-Match": etag1})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag1
+    assert resp.get_json()["recipe"]["thermaltemp"] == -12
+
+
+def test_status_etag_tracks_registry_version():
+    reg = DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)
+    client = create_app(registry=reg).test_client()
+
+    resp = client.get("/api/lanes")
+    etag = resp.headers["ETag"]
+    assert len(resp.get_json()["lanes"]) == 2
+    assert client.get("/api/lanes", headers={"If-None-Match": etag}).status_code == 304
+
+    ust = UtilityBoardClient.parse_status_response(Frame(addr=9, msg_type=0x83, payload=bytes([0, 1, 0])))
+    reg.set_utility_status(ust, 1.0)
+    assert client.get("/api/lanes", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/api/devices").get_json()["devices"][0]["online"] is True
+
+
+def test_status_etag_stable_while_polls_repeat_and_unique_per_boot():
+    reg = DeviceRegistry(lane_addrs=[1], utility_addr=9)
+    client = create_app(registry=reg).test_client()
+    ust = UtilityBoardClient.parse_status_response(Frame(addr=9, msg_type=0x83, payload=bytes([0, 1, 0])))
+
+    reg.set_utility_status(ust, 1.0)
+    resp = client.get("/api/devices")
+    etag = resp.headers["ETag"]
+    assert "last_seen_ts" not in resp.get_json()["devices"][0]
+    assert resp.headers["X-Indigo-Staleness-S"] == "unknown"  # lane 1 never seen
+
+    # same status polled again: only freshness moves, the tag does not
+    reg.set_utility_status(ust, 2.0)
+    again = client.get("/api/devices", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+
+    # a restarted process starts at version 0 again but must not match old tags
+    reg2 = DeviceRegistry(lane_addrs=[1], utility_addr=9)
+    reg2.set_utility_status(ust, 3.0)
+    client2 = create_app(registry=reg2).test_client()
+    assert client2.get("/api/devices", headers={"If-None-Match": etag}).status_code == 200
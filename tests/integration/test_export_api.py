@@ -0,0 +1,82 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from sqlalchemy import insert
+
+from indigo.api.app import create_app
+from indigo.db.engine import get_session_factory
+from indigo.db.orm.tables import LaneTelemetry
+from indigo.hw.devices.laneboard import LANE_STATUS_LEN
+from indigo.services.alarm_store import AlarmStore
+from indigo.services.alarms import AlarmEvent
+from indigo.services.export import parquet_available
+from indigo.services.telemetry import telemetry_row
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("EXPORT_BATCH_ROWS", "100")
+    factory = get_session_factory()
+    rows = [telemetry_row(1 + i % 4, bytes(LANE_STATUS_LEN), 1_700_000_000.0 + i) for i in range(1000)]
+    with factory() as session:
+        session.execute(insert(LaneTelemetry), rows)
+        session.commit()
+    AlarmStore(factory).record(
+        [AlarmEvent(1_700_000_010.0 + i, "hot", 2, "critical", "raised", 120.0, "too hot") for i in range(3)]
+    )
+    return create_app(warmup=False).test_client()
+
+
+def test_streams_csv_for_a_time_and_lane_range(client):
+    resp = client.get("/api/export/telemetry?since=1700000100&until=2023-11-14T22:21:40Z&lanes=2-3")
+    assert resp.status_code == 200 and resp.is_streamed
+    assert resp.mimetype == "text/csv" and resp.headers["Cache-Control"] == "no-store"
+    assert "Content-Length" not in resp.headers
+    assert resp.headers["Content-Disposition"].startswith('attachment; filename="indigo-telemetry-')
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert len(rows) == 200 and {r["lane"] for r in rows} == {"2", "3"}
+    ts = [float(r["ts"]) for r in rows]
+    assert min(ts) >= 1_700_000_100.0 and max(ts) < 1_700_000_500.0
+
+
+def test_gzip_file_and_content_encoding(client):
+    resp = client.get("/api/export/events?format=ndjson&gzip=1")
+    assert resp.mimetype == "application/gzip" and resp.headers["Content-Disposition"].endswith('.ndjson.gz"')
+    events = [json.loads(line) for line in gzip.decompress(resp.data).splitlines()]
+    assert [(e["rule"], e["lane"], e["state"]) for e in events] == [("hot", 2, "raised")] * 3
+
+    resp = client.get("/api/export/telemetry", headers={"Accept-Encoding": "gzip, deflate"})
+    assert resp.headers["Content-Encoding"] == "gzip" and resp.headers["Vary"] == "Accept-Encoding"
+    assert len(gzip.decompress(resp.data).splitlines()) == 1001
+    assert "Content-Encoding" not in client.get("/api/export/telemetry?gzip=0").headers
+
+
+def test_index_reports_recent_runs_with_throughput(client):
+    client.get("/api/export/telemetry?format=ndjson").get_data()
+    data = client.get("/api/export").get_json()
+    assert data["sources"] == ["telemetry", "events", "recipes"]
+    assert data["batch_rows"] == 100
+    run = data["recent"][-1]
+    assert (run["source"], run["format"], run["state"], run["rows"]) == ("telemetry", "ndjson", "done", 1000)
+    assert run["rows_per_s"] > 0 and run["bytes"] > 0
+
+
+def test_bad_requests(client):
+    assert client.get("/api/export/nope").status_code == 404
+    assert client.get("/api/export/telemetry?format=xml").get_json()["error"] == "invalid_format"
+    assert client.get("/api/export/telemetry?since=soon").get_json()["error"] == "invalid_time"
+    assert client.get("/api/export/telemetry?lanes=a-b").get_json()["error"] == "invalid_lanes"
+    if not parquet_available():
+        assert client.get("/api/export/telemetry?format=parquet").status_code == 501
+
+
+def test_parquet(client):
+    pq = pytest.importorskip("pyarrow.parquet")
+    resp = client.get("/api/export/telemetry?format=parquet&lanes=1")
+    assert resp.status_code == 200 and "Content-Encoding" not in resp.headers
+    table = pq.read_table(io.BytesIO(resp.data))
+    assert table.num_rows == 250 and table.num_row_groups == 3
+    assert set(table.column("lane").to_pylist()) == {1}
@@ -1,4 +1,10 @@
 from indigo.api.app import create_app
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.services.bus_poll_service import BusPollService
+from indigo.services.command_ipc import CommandClient, CommandServer
+from indigo.services.device_registry import DeviceRegistry
+from indigo.services.health import HealthMonitor
+from indigo.util.clock import VirtualClock
 
 
 def test_health_endpoint():
@@ -10,3 +16,37 @@ def test_health_endpoint():
     data = resp.get_json()
     assert isinstance(data, dict)
     assert data.get("ok") is (True)
+
+
+def test_health_reports_runner_loops_and_devices():
+    clock = VirtualClock()
+    reg = DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)
+    svc = BusPollService(
+        simulation_mode=True, poll_hz=10, bus=SimBus(delay_s=0.0, clock=clock), registry=reg, clock=clock
+    )
+    health = HealthMonitor(registry=reg, poll_period_s=svc.poll_period_s, heartbeats=[svc.heartbeat], clock=clock)
+    client = create_app(reg, commands=CommandServer(svc, "unused.sock", health=health)).test_client()
+
+    svc.run_for(1.0)
+    resp = client.get("/api/health")
+    data = resp.get_json()
+    assert resp.status_code == 200 and data["ok"] is True
+    assert data["status"] == "ok"
+    assert data["loops"]["bus_poll"]["rate_hz"] == 10.0
+    assert data["devices"]["utility"]["state"] == "ok"
+    assert resp.headers["Cache-Control"] == "no-store"
+
+    clock.advance(5.0)  # the poll loop hangs
+    resp = client.get("/api/health")
+    data = resp.get_json()
+    assert resp.status_code == 503 and data["ok"] is False
+    assert data["status"] == "failed"
+    assert data["loops"]["bus_poll"]["reason"] == "stalled"
+
+
+def test_health_degraded_without_runner(tmp_path):
+    app = create_app(commands=CommandClient(tmp_path / "missing.sock"))
+    resp = app.test_client().get("/api/health")
+    assert resp.status_code == 200
+    assert resp.get_json()["status"] == "degraded"
+    assert resp.get_json()["services"] == "services_unavailable"
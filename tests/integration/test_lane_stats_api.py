@@ -0,0 +1,51 @@
+from indigo.api.app import create_app
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.services.bus_poll_service import BusPollService
+from indigo.services.command_ipc import CommandServer, CommandUnavailable
+from indigo.services.device_registry import DeviceRegistry
+from indigo.util.clock import VirtualClock
+
+
+def _service():
+    clock = VirtualClock()
+    reg = DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)
+    svc = BusPollService(
+        simulation_mode=True, poll_hz=10, bus=SimBus(delay_s=0.0, clock=clock), registry=reg, clock=clock
+    )
+    svc.run_for(1.0)
+    return svc
+
+
+def test_lane_stats_from_attached_registry():
+    svc = _service()
+    client = create_app(svc.registry).test_client()
+
+    resp = client.get("/api/lanes/stats")
+    assert resp.status_code == 200 and resp.headers["Cache-Control"] == "no-store"
+    lanes = resp.get_json()["lanes"]
+    assert [lane["addr"] for lane in lanes] == [1, 2]
+    assert lanes[0]["reflux"]["samples"] > 1
+    assert lanes[0]["reflux"]["rate_c_per_min"] == 0.0
+
+    one = client.get("/api/lanes/2/stats").get_json()
+    assert one["lane"]["thermal"]["in_tolerance"] is True
+    assert client.get("/api/lanes/7/stats").status_code == 404
+
+
+def test_lane_stats_from_runner_over_command_channel():
+    svc = _service()
+    client = create_app(commands=CommandServer(svc, "unused.sock")).test_client()
+
+    assert client.get("/api/lanes/1/stats").get_json()["lane"]["reflux"]["samples"] > 1
+    assert client.get("/api/lanes/9/stats").get_json()["error"] == "unknown_lane"
+
+
+def test_lane_stats_without_runner():
+    client = create_app(commands=_Unreachable()).test_client()
+    resp = client.get("/api/lanes/stats")
+    assert resp.status_code == 503 and resp.get_json()["error"] == "services_unavailable"
+
+
+class _Unreachable:
+    def request(self, req):
+        raise CommandUnavailable("no runner")
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import http.client
+import threading
+
+from indigo.api.app import create_app, make_server
+
+
+def test_waitress_server_is_tuned_from_settings(monkeypatch):
+    monkeypatch.setenv("API_THREADS", "3")
+    monkeypatch.setenv("API_CHANNEL_TIMEOUT_S", "7")
+    server = make_server(create_app(), host="127.0.0.1", port=0)
+    assert server.adj.threads == 3
+    assert server.adj.channel_timeout == 7
+    assert server.adj.connection_limit == 64
+
+    threading.Thread(target=server.run, daemon=True).start()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", server.effective_port, timeout=5)
+        for _ in range(3):  # one keep-alive connection
+            conn.request("GET", "/api/health")
+            resp = conn.getresponse()
+            assert resp.status == 200 and resp.getheader("Server") == "indigo"
+            resp.read()
+        # declared size alone is refused; sending the body would race the server's close
+        conn.putrequest("POST", "/api/recipes/bulk")
+        conn.putheader("Content-Type", "application/json")
+        conn.putheader("Content-Length", str(2 * 1024 * 1024))
+        conn.endheaders()
+        assert conn.getresponse().status == 413
+        conn.close()
+    finally:
+        server.close()
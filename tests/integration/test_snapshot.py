@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import time
+
+from indigo.api.app import create_app
+from indigo.api.blueprints.snapshot import SNAPSHOT_EXT
+from indigo.hw.devices import UtilityBoardClient
+from indigo.hw.protocol.codec import Frame
+from indigo.services.device_registry import DeviceRegistry
+
+PAYLOAD = {
+    "cycletype": "full",
+    "numberofautopinbreaks": 2,
+    "autopinbreaktime": [100, 200],
+    "attempttime": 60,
+    "thermaltemp": -10,
+}
+
+
+def _utility(online_chain: int = 1):
+    return UtilityBoardClient.parse_status_response(
+        Frame(addr=9, msg_type=0x83, payload=bytes([0, online_chain, 0]))
+    )
+
+
+def test_snapshot_aggregates_status_recipes_and_meta():
+    reg = DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)
+    reg.set_utility_status(_utility(), time.time() - 2.0)
+    client = create_app(registry=reg).test_client()
+    recipe_id = client.post("/api/lanes/1/recipe", json=PAYLOAD).get_json()["recipe_id"]
+
+    body = client.get("/api/snapshot").get_json()
+    assert body["system"] == {"ready": True, "reason": "OK"}
+    assert body["utility"]["online"] is True and 1.9 < body["utility"]["staleness_s"] < 10.0
+    lanes = {lane["addr"]: lane for lane in body["lanes"]}
+    assert lanes[1]["recipe"]["recipe_id"] == recipe_id and len(lanes[1]["recipe"]["sha256"]) == 64
+    assert lanes[2]["recipe"] is None
+    assert lanes[2]["staleness_s"] is None and lanes[2]["online"] is False
+    assert body["meta"]["utility_addr"] == 9
+
+
+def test_fields_projection():
+    client = create_app(registry=DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)).test_client()
+
+    body = client.get("/api/snapshot?fields=system,lanes.addr,lanes.recipe").get_json()
+    assert set(body) == {"ok", "generated_ts", "system", "lanes"}
+    assert body["lanes"] == [{"addr": 1, "recipe": None}, {"addr": 2, "recipe": None}]
+
+    bad = client.get("/api/snapshot?fields=lanes.bogus")
+    assert bad.status_code == 400 and bad.get_json()["error"] == "invalid_fields"
+    assert client.get("/api/snapshot?fields=nope").status_code == 400
+
+
+def test_etag_tracks_status_and_recipe_changes_not_staleness():
+    reg = DeviceRegistry(lane_addrs=[1], utility_addr=9)
+    app = create_app(registry=reg)
+    client = app.test_client()
+    reg.set_utility_status(_utility(), time.time())
+
+    first = client.get("/api/snapshot")
+    etag = first.headers["ETag"]
+    reg.set_utility_status(_utility(), time.time())  # same status, fresher sample
+    again = client.get("/api/snapshot", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and "X-Indigo-Staleness-S" in again.headers
+    # a different projection is a different representation
+    assert (
+        client.get("/api/snapshot?fields=system", headers={"If-None-Match": etag}).status_code
+        == 200
+    )
+
+    client.post("/api/lanes/1/recipe", json=PAYLOAD)
+    after_recipe = client.get("/api/snapshot", headers={"If-None-Match": etag})
+    assert (
+        after_recipe.status_code == 200
+        and after_recipe.get_json()["lanes"][0]["recipe"] is not None
+    )
+
+    etag = after_recipe.headers["ETag"]
+    reg.set_utility_status(_utility(online_chain=0), time.time())  # safety chain opens
+    changed = client.get("/api/snapshot", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.get_json()["system"]["ready"] is False
+    assert app.extensions[SNAPSHOT_EXT].builds == 3
+
+
+def test_repeated_snapshots_do_not_query_the_db(monkeypatch):
+    client = create_app(registry=DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)).test_client()
+    client.get("/api/snapshot")
+
+    from indigo.services import recipe_service
+
+    def _boom(*a, **k):
+        raise AssertionError("DB touched within the revalidation window")
+
+    monkeypatch.setattr(recipe_service.RecipeService, "get_active_versions", _boom)
+    for _ in range(5):
+        assert client.get("/api/snapshot").status_code == 200
+
+
+def test_snapshot_without_registry():
+    body = create_app().test_client().get("/api/snapshot").get_json()
+    assert body["system"] == {"ready": False, "reason": "UtilityBoard not detected"}
+    assert [lane["addr"] for lane in body["lanes"]] == body["meta"]["lane_addrs"]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import indigo.db.engine as engine_mod
+
+# Generous enough for a loaded CI runner; an SBC boot is ~3x a dev laptop.
+IMPORT_BUDGET_S = 2.0
+FIRST_RESPONSE_BUDGET_S = 4.0
+
+_BOOT = """
+import json, sys, time
+t0 = time.perf_counter()
+import indigo.api.app
+t1 = time.perf_counter()
+app = indigo.api.app.create_app()
+resp = app.test_client().get("/api/health")
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_s": t1 - t0,
+    "first_response_s": t2 - t0,
+    "status": resp.status_code,
+    "alembic": "alembic" in sys.modules,
+    "sqlalchemy": "sqlalchemy" in sys.modules,
+    "startup": app.extensions["indigo.startup"].as_dict(),
+}))
+"""
+
+
+def _boot(**env: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _BOOT], env={**os.environ, **env}, capture_output=True, text=True, timeout=60, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_boot_budgets_and_deferred_imports(tmp_path):
+    data_dir = str(tmp_path / "boot")
+    first = _boot(INDIGO_DATA_DIR=data_dir)
+    assert first["status"] == 200
+    assert set(first["startup"]["phases_ms"]) == {"blueprints", "db", "warmup"}
+
+    # restart on an up-to-date database: no alembic, within budget
+    again = _boot(INDIGO_DATA_DIR=data_dir)
+    assert again["alembic"] is False
+    assert again["import_s"] < IMPORT_BUDGET_S
+    assert again["first_response_s"] < FIRST_RESPONSE_BUDGET_S
+
+    # features that are off are never imported
+    bare = _boot(INDIGO_DATA_DIR=data_dir, ENABLE_API="0", ENABLE_ADMIN="0")
+    assert bare["sqlalchemy"] is False
+    assert bare["status"] == 200
+
+
+def test_concurrent_first_callers_build_one_engine(monkeypatch):
+    calls = []
+    gate = threading.Event()
+    real = engine_mod.init_db
+
+    def slow_init(settings):
+        calls.append(1)
+        gate.wait(5.0)
+        return real(settings)
+
+    monkeypatch.setattr(engine_mod, "init_db", slow_init)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(engine_mod.get_session_factory())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8 and all(r is results[0] for r in results)
@@ -0,0 +1,199 @@
+import json
+import time
+from dataclasses import replace
+
+import pytest
+
+from indigo.config.settings import get_settings
+from indigo.hw.devices.laneboard import LANE_STATUS_LEN, RESP_LANE_STATUS, LaneboardClient
+from indigo.hw.protocol.codec import Frame
+from indigo.services.alarms import FIELDS, AlarmEngine, AlarmRule, default_rules, load_rules
+from indigo.services.device_registry import DeviceRegistry
+
+
+def _status(addr, **kw):
+    st = LaneboardClient.parse_status_response(Frame(addr, RESP_LANE_STATUS, bytes(LANE_STATUS_LEN)))
+    return replace(st, **kw)
+
+
+def _engine(rules, lanes=(1, 2, 3)):
+    reg = DeviceRegistry(lane_addrs=list(lanes), utility_addr=9)
+    return reg, AlarmEngine(reg, [AlarmRule.from_dict(r) for r in rules])
+
+
+def _set(reg, addr, ts=0.0, **kw):
+    reg.set_raw_status(addr, RESP_LANE_STATUS, LaneboardClient.encode_status_payload(_status(addr, **kw)), ts)
+
+
+OVERTEMP = {"name": "hot", "field": "reflux_temp_c", "op": ">", "value": 100, "hysteresis": 2}
+
+
+def test_raise_and_clear_with_hysteresis():
+    reg, eng = _engine([OVERTEMP])
+    _set(reg, 2, reflux_temp_c=101.0)
+    events = eng.evaluate(1.0)
+    assert [(e.rule, e.addr, e.state, e.value) for e in events] == [("hot", 2, "raised", 101.0)]
+    assert eng.is_active("hot", 2) and not eng.is_active("hot", 1)
+
+    _set(reg, 2, reflux_temp_c=99.0)  # below the raise threshold, inside the hysteresis band
+    assert eng.evaluate(2.0) == []
+    _set(reg, 2, reflux_temp_c=97.9)
+    assert [e.state for e in eng.evaluate(3.0)] == ["cleared"]
+    assert eng.active() == []
+
+
+def test_debounce_on_and_off_delays():
+    reg, eng = _engine([{**OVERTEMP, "on_delay_s": 2.0, "off_delay_s": 1.0}])
+    _set(reg, 1, reflux_temp_c=120.0)
+    assert eng.evaluate(10.0) == [] and eng.evaluate(11.0) == []
+    _set(reg, 1, reflux_temp_c=90.0)  # blip shorter than on_delay: never raised
+    assert eng.evaluate(11.5) == []
+    _set(reg, 1, reflux_temp_c=120.0)
+    eng.evaluate(12.0)
+    assert [e.state for e in eng.evaluate(14.0)] == ["raised"]
+
+    _set(reg, 1, reflux_temp_c=50.0)
+    assert eng.evaluate(14.5) == []
+    assert [e.state for e in eng.evaluate(15.5)] == ["cleared"]
+
+
+def test_latched_alarm_holds_until_acked():
+    reg, eng = _engine([{**OVERTEMP, "latch": True}])
+    _set(reg, 3, reflux_temp_c=150.0)
+    eng.evaluate(0.0)
+    _set(reg, 3, reflux_temp_c=20.0)
+    assert eng.evaluate(1.0) == [] and eng.is_active("hot", 3)
+    assert eng.active()[0]["acked"] is False
+
+    ack = eng.ack("hot", 3, ts=2.0)
+    assert ack.state == "acked"
+    assert eng.ack("hot", 3) is None  # already acked
+    assert [e.state for e in eng.evaluate(3.0)] == ["cleared"]
+    assert eng.ack("hot", 3) is None  # not active
+    with pytest.raises(KeyError):
+        eng.ack("nope", 3)
+
+
+def test_acked_alarm_with_condition_still_present_stays_raised():
+    reg, eng = _engine([{**OVERTEMP, "latch": True}])
+    _set(reg, 1, reflux_temp_c=150.0)
+    eng.evaluate(0.0)
+    eng.ack("hot", 1)
+    assert eng.evaluate(1.0) == []
+    assert eng.active()[0]["acked"] is True
+    _set(reg, 1, reflux_temp_c=10.0)
+    assert [e.state for e in eng.evaluate(2.0)] == ["cleared"]
+
+
+def test_conjunction_reference_and_band_conditions():
+    reg, eng = _engine(
+        [
+            {
+                "name": "stir",
+                "when": [
+                    {"field": "stir_speed_cmd", "op": ">", "value": 0},
+                    {"field": "stir_running", "op": "==", "value": 0},
+                ],
+            },
+            {"name": "over_sp", "field": "thermal_temp_c", "op": ">", "ref": "thermal_sp_c", "value": 10},
+            {"name": "pressure", "field": "pressure_raw", "op": "outside", "low": 100, "high": 900},
+        ]
+    )
+    _set(reg, 1, stir_speed_cmd=300, stir_running=False, thermal_temp_c=75.0, thermal_sp_c=60.0, pressure_raw=500)
+    _set(reg, 2, stir_speed_cmd=300, stir_running=True, thermal_temp_c=65.0, thermal_sp_c=60.0, pressure_raw=50)
+    raised = {(e.rule, e.addr) for e in eng.evaluate(0.0)}
+    assert raised == {("stir", 1), ("over_sp", 1), ("pressure", 2)}
+
+
+def test_unseen_lanes_never_alarm():
+    reg, eng = _engine([{"name": "not_one", "field": "reflux_temp_c", "op": "!=", "value": 1}])
+    _set(reg, 1)
+    assert [e.addr for e in eng.evaluate(0.0)] == [1]
+
+
+def test_stale_lane_via_age_field():
+    reg, eng = _engine([{"name": "stale", "field": "age_s", "op": ">", "value": 5}], lanes=(1,))
+    _set(reg, 1, ts=100.0)
+    assert eng.evaluate(104.0) == []
+    assert [e.state for e in eng.evaluate(106.0)] == ["raised"]
+    _set(reg, 1, ts=107.0)
+    assert [e.state for e in eng.evaluate(107.0)] == ["cleared"]
+
+
+def test_events_go_to_recent_and_outbox():
+    reg, eng = _engine([OVERTEMP])
+    _set(reg, 1, reflux_temp_c=150.0)
+    eng.evaluate(0.0)
+    eng.ack("hot", 1)
+    assert [e.state for e in eng.recent] == ["raised", "acked"]
+    assert [e.state for e in eng.drain()] == ["raised", "acked"]
+    assert eng.drain() == []
+
+
+def test_rule_validation():
+    with pytest.raises(ValueError, match="unknown field"):
+        AlarmRule.from_dict({"name": "x", "field": "nope", "op": ">"})
+    with pytest.raises(ValueError, match="unknown op"):
+        AlarmRule.from_dict({"name": "x", "field": "pressure_raw", "op": "~"})
+    with pytest.raises(ValueError, match="severity"):
+        AlarmRule.from_dict({**OVERTEMP, "severity": "loud"})
+    with pytest.raises(ValueError, match="low > high"):
+        AlarmRule.from_dict({"name": "x", "field": "pressure_raw", "op": "inside", "low": 5, "high": 1})
+    with pytest.raises(ValueError, match="duplicate"):
+        _engine([OVERTEMP, OVERTEMP])
+
+
+def test_load_rules_from_file(tmp_path):
+    s = get_settings()
+    assert [r.name for r in load_rules(s)] == [r.name for r in default_rules(s)]
+
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([OVERTEMP, {**OVERTEMP, "name": "cold", "op": "<", "value": -40}]))
+    rules = load_rules(replace(s, ALARM_RULES_FILE=str(path)))
+    assert [(r.name, r.when[0].op) for r in rules] == [("hot", ">"), ("cold", "<")]
+
+
+def test_default_rules_on_a_simulated_fault():
+    s = get_settings()
+    reg = DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)
+    eng = AlarmEngine(reg, default_rules(s))
+    _set(reg, 1, lid_solenoid_down=True, lid_switch_down=False)
+    _set(reg, 2, reflux_temp_c=s.ALARM_MAX_TEMP_C + 5)
+    eng.evaluate(0.0)
+    raised = {(e.rule, e.addr) for e in eng.evaluate(5.0)}
+    assert raised == {("lid_down_mismatch", 1), ("reflux_over_temp", 2)}
+
+
+def test_evaluation_cost_with_many_lanes_and_rules():
+    lanes = list(range(1, 65))
+    reg = DeviceRegistry(lane_addrs=lanes, utility_addr=0)
+    rules = [
+        AlarmRule.from_dict({"name": f"r{i}", "field": FIELDS[i % 8], "op": ">", "value": 1000, "hysteresis": 1})
+        for i in range(50)
+    ]
+    eng = AlarmEngine(reg, rules)
+    for a in lanes:
+        _set(reg, a)
+    eng.evaluate(0.0)
+
+    t0 = time.perf_counter()
+    for i in range(200):
+        _set(reg, lanes[i % 64], reflux_temp_c=float(i % 50))  # one lane's temperature moves per tick
+        eng.evaluate(float(i))
+    per_pass_ms = (time.perf_counter() - t0) / 200 * 1000
+    assert per_pass_ms < 1.0
+    assert eng.stats()["evaluations"] == 201
+
+
+def test_reference_rule_rechecked_when_only_one_side_changes():
+    reg, eng = _engine(
+        [{"name": "over_sp", "field": "thermal_temp_c", "op": ">", "ref": "thermal_sp_c", "value": 10}],
+        lanes=list(range(1, 17)),
+    )
+    for a in range(1, 17):
+        _set(reg, a, thermal_temp_c=60.0, thermal_sp_c=60.0)
+    assert eng.evaluate(0.0) == []
+    _set(reg, 5, thermal_temp_c=71.0, thermal_sp_c=60.0)  # one lane, temperature column only
+    assert [(e.addr, e.state) for e in eng.evaluate(1.0)] == [(5, "raised")]
+    _set(reg, 5, thermal_temp_c=71.0, thermal_sp_c=65.0)  # setpoint column only
+    assert [(e.addr, e.state) for e in eng.evaluate(2.0)] == [(5, "cleared")]
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.hw.devices import LaneboardClient
+from indigo.hw.protocol import bulk
+from indigo.hw.protocol.bulk import TransferError
+from indigo.hw.protocol.codec import Frame
+from indigo.util.clock import VirtualClock
+
+IMAGE = os.urandom(20_000)
+
+
+def _bus(**kw) -> tuple[SimBus, VirtualClock]:
+    clock = VirtualClock()
+    return SimBus(delay_s=0.002, clock=clock, **kw), clock
+
+
+def test_upload_then_download_round_trip():
+    bus, clock = _bus()
+    lane = LaneboardClient(2)
+    up = lane.upload_firmware(bus, IMAGE, clock=clock, window=8)
+    assert bus.bulk[2].images[bulk.KIND_FIRMWARE] == IMAGE
+    assert up.chunks == 84 and up.frames_sent == 84 and up.retransmits == 0
+    assert up.windows == 11  # ceil(84 / 8): one ack per window
+
+    down = lane.download_firmware(bus, clock=clock, window=16)
+    assert down.data == IMAGE and down.sha256 == up.sha256
+    assert down.windows == 6 and down.retransmits == 0
+
+    table = bytes(range(256)) * 3
+    lane.upload_cal_params(bus, table, clock=clock)
+    assert lane.download_cal_params(bus, clock=clock).data == table
+    assert lane.download_firmware(bus, clock=clock).data == IMAGE  # kinds are separate
+
+
+def test_lossy_line_retransmits_only_missing_chunks():
+    bus, clock = _bus(drop_rate=0.1, seed=7)
+    up = bulk.upload(bus, 1, bulk.KIND_FIRMWARE, IMAGE, clock=clock, retries=20)
+    assert bus.frames_dropped > 0 and up.retransmits > 0
+    assert up.frames_sent < 2 * up.chunks
+    assert bus.bulk[1].images[bulk.KIND_FIRMWARE] == IMAGE
+    down = bulk.download(bus, 1, bulk.KIND_FIRMWARE, clock=clock, retries=20)
+    assert down.data == IMAGE
+
+
+class CorruptingBus(SimBus):
+    """Flips a bit in one chunk: the wire CRC would normally catch it, the sha256 must too."""
+
+    def burst(self, frames, timeout_s=0.25):
+        out = []
+        for f in frames:
+            p = f.payload
+            if p[0] == bulk.OP_DATA and int.from_bytes(p[2:4], "little") == 3 and f.msg_type == bulk.MSG_BULK:
+                p = p[:-1] + bytes([p[-1] ^ 1])
+            out.append(Frame(f.addr, f.msg_type, p))
+        return super().burst(out, timeout_s)
+
+
+def test_end_to_end_sha_rejects_corruption():
+    clock = VirtualClock()
+    bus = CorruptingBus(delay_s=0.0, clock=clock)
+    with pytest.raises(TransferError) as e:
+        bulk.upload(bus, 1, bulk.KIND_CAL, IMAGE[:4000], clock=clock)
+    assert e.value.code == "sha_mismatch"
+    assert bulk.KIND_CAL not in bus.bulk[1].images
+
+
+def test_board_refusals():
+    bus, clock = _bus()
+    with pytest.raises(TransferError) as e:
+        bulk.download(bus, 1, bulk.KIND_CAL, clock=clock)
+    assert e.value.code == "not_found"
+    with pytest.raises(TransferError) as e:
+        bulk.upload(bus, 1, bulk.KIND_CAL, bytes(bulk.KIND_MAX_BYTES[bulk.KIND_CAL] + 1), clock=clock)
+    assert e.value.code == "too_large"
+    with pytest.raises(ValueError):
+        bulk.upload(bus, 1, bulk.KIND_CAL, b"x", window=bulk.MAX_WINDOW + 1)
+
+
+def test_upload_to_all_lanes_reports_each():
+    class DeadLane(SimBus):
+        def burst(self, frames, timeout_s=0.25):
+            return [] if frames[0].addr == 3 else super().burst(frames, timeout_s)
+
+    clock = VirtualClock()
+    bus = DeadLane(delay_s=0.0, clock=clock)
+    out = LaneboardClient.upload_cal_params_all(bus, [1, 2, 3], b"cal" * 100, clock=clock, retries=2)
+    assert out[1].nbytes == 300 and out[2].nbytes == 300
+    assert isinstance(out[3], TransferError) and out[3].code == "timeout"
+
+
+def test_throughput_tracks_baud():
+    bus, clock = _bus(baud=115_200)
+    res = bulk.upload(bus, 1, bulk.KIND_FIRMWARE, IMAGE, clock=clock, window=16)
+    line_Bps = 115_200 / 10
+    # chunk headers, framing, acks and turnarounds cost about 10% at this window
+    assert 0.8 * line_Bps < res.throughput_Bps < line_Bps
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from indigo.api.coalesce import SingleFlight
+
+
+def _wait_for(cond, timeout_s: float = 5.0) -> None:
+    end = time.monotonic() + timeout_s
+    while not cond():
+        assert time.monotonic() < end
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def work():
+        calls.append(1)
+        _wait_for(lambda: flight.coalesced == 4)  # everyone else is waiting on us
+        return object()
+
+    results: list[tuple[object, bool]] = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", work, name="ep"))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len({id(r) for r, _ in results}) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    st = flight.stats()
+    assert st["executions"] == 1 and st["coalesced"] == 4 and st["in_flight"] == 0
+    assert st["coalesced_by_endpoint"] == {"ep": 4} and st["max_waiters"] == 4
+
+    # finished calls are not cached
+    flight.do("k", lambda: 1)
+    assert flight.executions == 2
+
+
+def test_waiters_get_the_leaders_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def boom():
+        started.set()
+        _wait_for(lambda: flight.coalesced == 1)
+        raise RuntimeError("db down")
+
+    errors: list[BaseException] = []
+
+    def call():
+        try:
+            flight.do("k", boom)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5.0)
+    follower = threading.Thread(target=call)
+    follower.start()
+    leader.join()
+    follower.join()
+
+    assert len(errors) == 2 and errors[0] is errors[1]
+    assert flight.stats()["errors"] == 1
+    with pytest.raises(ValueError):
+        flight.do("k", lambda: int("x"))  # the key is free again
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import pytest
+
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.hw.devices.laneboard import MSG_STIR, MSG_VAC_VALVE
+from indigo.hw.protocol.codec import Frame
+from indigo.services.bus_poll_service import BusPollService
+from indigo.services.command_ipc import CommandClient, CommandServer, CommandUnavailable
+from indigo.services.commands import CommandError, build_command
+from indigo.services.device_registry import DeviceRegistry
+from indigo.services.safety import InterlockRules, SafetyEvaluator
+from indigo.util.clock import VirtualClock
+
+
+class RecordingBus(SimBus):
+    def __init__(self, *, drop: int | None = None) -> None:
+        super().__init__(utility_addr=9, delay_s=0.0)
+        self.sent: list[Frame] = []
+        self.drop = drop  # msg_type that never gets an answer
+
+    def send_and_recv(self, frame: Frame, timeout_s: float = 0.25) -> Frame | None:
+        self.sent.append(frame)
+        if frame.msg_type == self.drop:
+            return None
+        return super().send_and_recv(frame, timeout_s)
+
+
+def _service(bus: RecordingBus, **kw) -> BusPollService:
+    reg = DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)
+    return BusPollService(
+        simulation_mode=True, poll_hz=10.0, bus=bus, registry=reg, clock=VirtualClock(), **kw
+    )
+
+
+def test_build_command_validates_arguments():
+    _, frame = build_command("lane", 2, "stir", {"on": True, "speed": 500})
+    assert (frame.addr, frame.msg_type, frame.payload) == (2, MSG_STIR, bytes([1, 0xF4, 0x01]))
+    assert build_command("lane", 2, "stop")[1].payload == b"\x00"
+    assert build_command("utility", 9, "vacuum_pump", {"on": False})[1].payload == b"\x00"
+
+    for target, command, args, code in [
+        ("lane", "warp", {}, "unknown_command"),
+        ("shuttle", "stop", {}, "unknown_target"),
+        ("lane", "vac_valve", {}, "invalid_args"),
+        ("lane", "vac_valve", {"open": 1}, "invalid_args"),
+        ("lane", "vac_valve", {"open": True, "force": True}, "invalid_args"),
+        ("lane", "stir", {"on": True, "speed": 1.5}, "invalid_args"),
+    ]:
+        with pytest.raises(CommandError) as e:
+            build_command(target, 1, command, args)
+        assert e.value.code == code
+
+
+def test_command_lifecycle_and_timings():
+    bus = RecordingBus()
+    svc = _service(bus)
+    job = svc.submit_command("lane", 1, "vac_valve", {"open": True})
+    assert svc.commands.get(job.id)["state"] == "queued"
+
+    svc.clock.advance(0.05)
+    svc.tick()
+    assert bus.sent[0].msg_type == MSG_VAC_VALVE  # commands go out before the polls
+
+    status = svc.commands.get(job.id)
+    assert status["state"] == "acked" and status["error"] is None
+    assert status["timings_ms"]["queued_to_sent"] == pytest.approx(50.0)
+    assert status["timings_ms"]["total"] >= status["timings_ms"]["queued_to_sent"]
+    stats = svc.commands.stats()
+    assert stats["counts"]["acked"] == 1 and stats["latency_ms"]["total"]["count"] == 1
+
+
+def test_unanswered_command_fails():
+    svc = _service(RecordingBus(drop=MSG_VAC_VALVE))
+    job = svc.submit_command("lane", 2, "vac_valve", {"open": False})
+    svc.tick()
+    assert svc.commands.get(job.id)["state"] == "failed"
+    assert svc.commands.get(job.id)["error"] == "no_response"
+
+
+def test_unknown_address_and_tripped_interlock_are_rejected():
+    bus = RecordingBus()
+    safety = SafetyEvaluator(InterlockRules(), lane_addrs=[1, 2], utility_addr=9)
+    svc = _service(bus, safety=safety)
+    with pytest.raises(CommandError, match="unknown_lane"):
+        svc.submit_command("lane", 7, "stop")
+
+    bus.set_safe_chain(False)
+    svc.tick()
+    with pytest.raises(CommandError, match="interlock_tripped"):
+        svc.submit_command("lane", 1, "vac_valve", {"open": True})
+    assert svc.submit_command("lane", 1, "stop").state == "queued"  # stops are always allowed
+
+
+def test_ipc_round_trip(tmp_path):
+    svc = _service(RecordingBus())
+    server = CommandServer(svc, tmp_path / "cmd.sock")
+    server.start()
+    try:
+        client = CommandClient(tmp_path / "cmd.sock")
+        reply = client.request(
+            {
+                "op": "submit",
+                "target": "utility",
+                "addr": 9,
+                "command": "main_n2_valve",
+                "args": {"open": True},
+            }
+        )
+        assert reply["ok"] and reply["job"]["state"] == "queued"
+        svc.tick()
+        assert client.request({"op": "status", "id": reply["job"]["id"]})["job"]["state"] == "acked"
+        assert client.request({"op": "status", "id": "nope"})["error"] == "command_not_found"
+        assert (
+            client.request({"op": "submit", "target": "lane", "addr": 9, "command": "stop"})[
+                "error"
+            ]
+            == "unknown_lane"
+        )
+        assert client.request({"op": "stats"})["stats"]["counts"]["acked"] == 1
+    finally:
+        server.stop()
+
+    assert not (tmp_path / "cmd.sock").exists()
+    with pytest.raises(CommandUnavailable):
+        CommandClient(tmp_path / "cmd.sock").request({"op": "stats"})
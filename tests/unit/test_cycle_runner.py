@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.hw.devices.laneboard import MSG_CYCLE
+from indigo.hw.protocol.codec import Frame
+from indigo.services.cycle_runner import ABORTED, COMPLETE, CycleRunner
+from indigo.services.recipe_plan import CYCLE_STOP, compile_recipe
+from indigo.services.safety import InterlockRules, SafetyEvaluator
+from indigo.util.clock import SYSTEM_CLOCK, Clock, VirtualClock
+
+
+class RecordingBus(SimBus):
+    def __init__(self, clock: Clock = SYSTEM_CLOCK) -> None:
+        super().__init__(delay_s=0.0, clock=clock)
+        self.sent: list[tuple[float, Frame]] = []
+        self.fail_addr: int | None = None
+
+    def send_and_recv(self, frame: Frame, timeout_s: float = 0.25) -> Frame | None:
+        self.sent.append((self.clock.monotonic(), frame))
+        if frame.addr == self.fail_addr:
+            return None
+        return super().send_and_recv(frame, timeout_s)
+
+
+def _recipe(times_ms: list[int]) -> dict:
+    n = len(times_ms)
+    return {
+        "content_sha256": f"c{n}",
+        "autopinbreak": True,
+        "attempttime": 0,
+        "thermaltemp": -10,
+        "stirspeed": 500,
+        "pinbreak_steps": [{"autopinbreaktime": t, "autopinbreakpressure": 1.0} for t in times_ms],
+    }
+
+
+def test_all_lanes_run_from_one_scheduler_on_virtual_time():
+    clock = VirtualClock()
+    bus = RecordingBus(clock)
+    runner = CycleRunner(bus, clock=clock)
+
+    for lane in range(1, 10):
+        assert runner.start_cycle(lane, compile_recipe(lane, _recipe([100 * lane, 250, 5])))
+    assert not runner.start_cycle(1, compile_recipe(1, _recipe([1])))  # already running
+
+    runner.run_until_idle()
+
+    assert all(runner.lane_state(lane) == COMPLETE for lane in range(1, 10))
+    per_lane = {lane: [f for _, f in bus.sent if f.addr == lane] for lane in range(1, 10)}
+    assert all(len(fs) == 4 + 3 + 2 for fs in per_lane.values())
+    # sends happen in deadline order across lanes
+    times = [t for t, _ in bus.sent]
+    assert times == sorted(times)
+
+    stats = runner.stats()
+    assert stats["timing_error_by_phase_ms"]["step"]["count"] == 27
+    assert stats["timing_error_ms"]["max_ms"] == 0.0
+
+
+def test_real_time_step_jitter_is_recorded():
+    bus = RecordingBus()
+    runner = CycleRunner(bus, spin_s=0.002)
+    for lane in (1, 2, 3):
+        runner.start_cycle(lane, compile_recipe(lane, _recipe([5] * 10)))
+    runner.run_until_idle(max_s=5.0)
+
+    assert runner.running_lanes() == []
+    step = runner.stats()["timing_error_by_phase_ms"]["step"]
+    assert step["count"] == 30
+    assert step["min_ms"] >= 0.0  # never early
+    assert step["p99_ms"] <= 25.0  # generous: shared CI runners
+
+
+def test_abort_and_unacknowledged_frames_stop_the_lane():
+    clock = VirtualClock()
+    bus = RecordingBus(clock)
+    runner = CycleRunner(bus, clock=clock)
+    runner.start_cycle(1, compile_recipe(1, _recipe([100, 100])))
+    runner.start_cycle(2, compile_recipe(2, _recipe([100, 100])))
+    runner.run_pending()  # start frames
+
+    assert runner.abort_cycle(1)
+    bus.fail_addr = 2
+    runner.run_until_idle()
+
+    assert runner.lane_state(1) == ABORTED
+    assert runner.lane_state(2) == ABORTED
+    lane1 = [f for _, f in bus.sent if f.addr == 1]
+    assert lane1[-2] == Frame(1, MSG_CYCLE, bytes([CYCLE_STOP]))
+    assert runner.stats()["lanes"][1]["steps_sent"] == 0
+
+
+def test_interlock_trip_stops_running_lane():
+    clock = VirtualClock()
+    bus = RecordingBus(clock)
+    safety = SafetyEvaluator(InterlockRules(), lane_addrs=[1], utility_addr=9)
+    runner = CycleRunner(bus, safety=safety, utility_addr=9, clock=clock)
+    runner.start_cycle(1, compile_recipe(1, _recipe([100, 100])))
+    runner.run_pending()
+
+    safety.tripped[9] = []  # utility board tripped by the poll loop
+    runner.run_until_idle()
+    assert runner.stats()["lanes"][1]["reason"] == "interlock"
+    assert runner.stats()["lanes"][1]["steps_sent"] == 0
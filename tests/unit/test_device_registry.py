@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.hw.devices import LaneboardClient, UtilityBoardClient
+from indigo.hw.devices.laneboard import RESP_LANE_STATUS
+from indigo.hw.devices.utilityboard import RESP_UTILITY_STATUS
+from indigo.hw.protocol.codec import Frame
+from indigo.services.bus_poll_service import BusPollService
+from indigo.services.device_registry import DeviceRegistry
+from indigo.util.clock import VirtualClock
+
+LANE = bytes([0x01, 0x80]) + bytes(13) + b"\x00"  # thermal cooling valve, heater relay
+
+
+def test_raw_payload_decoded_once_per_change():
+    reg = DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)
+    assert reg.set_raw_status(1, RESP_LANE_STATUS, LANE, 10.0)
+    assert reg.decodes == 0 and reg.seq(1) == 1 and reg.raw(1) == LANE
+
+    st = reg.lane(1)
+    assert st == LaneboardClient.parse_status_response(Frame(1, RESP_LANE_STATUS, LANE))
+    assert st.cooling_valve_thermal and st.heater_relay_on
+    assert reg.lane(1) is st and reg.lanes == {1: st}
+    assert reg.decodes == 1
+
+    # same bytes again: fresher timestamp, same seq, no decode
+    reg.set_raw_status(1, RESP_LANE_STATUS, LANE, 11.0)
+    assert reg.seq(1) == 1 and reg.version == 1 and reg.last_seen_ts[1] == 11.0
+    assert reg.lane(1) is st and reg.decodes == 1
+
+    changed = LANE[:15] + b"\x04"
+    reg.set_raw_status(1, RESP_LANE_STATUS, changed, 12.0)
+    reg.set_raw_status(1, RESP_LANE_STATUS, LANE, 13.0)
+    assert reg.seq(1) == 3 and reg.version == 3
+    assert reg.decodes == 1  # nobody looked at the intermediate status
+    assert reg.lane(1).error_status == 0 and reg.decodes == 2
+
+
+def test_rejects_what_it_could_not_decode():
+    reg = DeviceRegistry(lane_addrs=[1], utility_addr=9)
+    assert not reg.set_raw_status(1, RESP_LANE_STATUS, LANE[:8], 1.0)  # short
+    assert not reg.set_raw_status(1, RESP_UTILITY_STATUS, LANE, 1.0)  # wrong type for a lane
+    assert not reg.set_raw_status(5, RESP_LANE_STATUS, LANE, 1.0)  # unknown board
+    assert reg.version == 0 and reg.last_seen_ts == {}
+    assert reg.set_raw_status(9, RESP_UTILITY_STATUS, b"\x00\x01\x00", 1.0)
+    assert reg.utility.safe_chain_ok and reg.lane(9) is None
+
+
+def test_decoded_status_writers_share_the_memo():
+    reg = DeviceRegistry(lane_addrs=[1], utility_addr=9)
+    ust = UtilityBoardClient.parse_status_response(Frame(9, RESP_UTILITY_STATUS, b"\x00\x01\x00"))
+    reg.set_utility_status(ust, 1.0)
+    assert reg.utility is ust and reg.raw(9) is None and reg.decodes == 0
+    reg.set_utility_status(ust, 2.0)
+    assert reg.version == 1
+    reg.set_raw_status(9, RESP_UTILITY_STATUS, b"\x00\x01\x00", 3.0)  # new bytes entry, same status
+    assert reg.utility == ust and reg.version == 2
+
+
+def test_poll_loop_without_readers_never_decodes():
+    clock = VirtualClock()
+    reg = DeviceRegistry(lane_addrs=[1, 2, 3], utility_addr=9)
+    svc = BusPollService(
+        simulation_mode=True,
+        poll_hz=10,
+        bus=SimBus(delay_s=0.0, clock=clock),
+        registry=reg,
+        clock=clock,
+    )
+    svc.safety = None  # SAFETY_INTERLOCKS defaults on; the evaluator reads decoded statuses
+    svc.run_for(5.0)
+    assert reg.decodes == 0 and len(reg.last_seen_ts) == 4
+    assert [e["online"] for e in reg.lane_snapshot()] == [True, True, True]
+    assert reg.decodes == 3
@@ -0,0 +1,148 @@
+import csv
+import gzip
+import io
+import json
+import tracemalloc
+
+import pytest
+from sqlalchemy import insert
+
+from indigo.db.engine import get_session_factory
+from indigo.db.orm.tables import LaneTelemetry
+from indigo.hw.devices.laneboard import LANE_STATUS_LEN, RESP_LANE_STATUS
+from indigo.services.device_registry import DeviceRegistry
+from indigo.services.export import (
+    ExportQuery,
+    ExportRun,
+    export_stream,
+    iter_batches,
+    parse_lanes,
+    parse_time,
+)
+from indigo.services.telemetry import TelemetryRecorder, telemetry_row
+
+
+def _fill(factory, n, lanes=(1, 2, 3), t0=1000.0):
+    payload = bytes(LANE_STATUS_LEN)
+    rows = [telemetry_row(lanes[i % len(lanes)], payload, t0 + i) for i in range(n)]
+    with factory() as session:
+        for i in range(0, n, 5000):
+            session.execute(insert(LaneTelemetry), rows[i : i + 5000])
+        session.commit()
+
+
+def _read(chunks) -> bytes:
+    return b"".join(chunks)
+
+
+def test_batches_are_keyset_pages_over_the_time_and_lane_range():
+    factory = get_session_factory()
+    _fill(factory, 100)
+    q = ExportQuery("telemetry", since=1010.0, until=1060.0, lanes=(1, 3))
+    batches = list(iter_batches(factory, q, batch_rows=7))
+    rows = [r for b in batches for r in b]
+    assert all(len(b) <= 7 for b in batches)
+    assert [r[1] for r in rows] == [1000.0 + i for i in range(10, 60) if i % 3 != 1]
+    assert {r[2] for r in rows} == {1, 3}
+    assert list(iter_batches(factory, ExportQuery("telemetry", since=5000.0))) == []
+
+
+def test_csv_and_ndjson_encoding():
+    factory = get_session_factory()
+    _fill(factory, 5)
+    q = ExportQuery("telemetry", lanes=(2,))
+    table = list(csv.reader(io.StringIO(_read(export_stream(factory, q, "csv")).decode())))
+    assert table[0][:3] == ["id", "ts", "lane"] and table[0][-1] == "io_bits"
+    assert [r[2] for r in table[1:]] == ["2", "2"]
+
+    lines = _read(export_stream(factory, q, "ndjson")).decode().splitlines()
+    first = json.loads(lines[0])
+    assert len(lines) == 2 and first["lane"] == 2 and first["stir_running"] is False
+
+    empty = ExportQuery("telemetry", lanes=(9,))
+    assert _read(export_stream(factory, empty, "csv")).decode().startswith("id,ts,lane")
+    assert _read(export_stream(factory, empty, "ndjson")) == b""
+
+
+def test_gzip_round_trip_and_throughput_report():
+    factory = get_session_factory()
+    _fill(factory, 3000)
+    run = ExportRun("telemetry", "csv", True)
+    body = _read(export_stream(factory, ExportQuery("telemetry"), "csv", batch_rows=500, gzip_level=6, run=run))
+    assert len(gzip.decompress(body).decode().splitlines()) == 3001
+    assert run.state == "done" and run.rows == 3000 and run.bytes_out == len(body)
+    assert run.rows_per_s > 0 and run.as_dict()["rows_per_s"] > 0
+
+
+def test_abandoned_stream_is_reported_as_aborted():
+    factory = get_session_factory()
+    _fill(factory, 50)
+    run = ExportRun("telemetry", "ndjson", False)
+    stream = export_stream(factory, ExportQuery("telemetry"), "ndjson", batch_rows=10, run=run)
+    next(stream)
+    stream.close()
+    assert run.state == "aborted" and run.rows == 10
+
+
+def test_memory_stays_flat_as_exports_grow():
+    factory = get_session_factory()
+
+    def peak():
+        tracemalloc.start()
+        try:
+            size = 0
+            q = ExportQuery("telemetry")
+            for chunk in export_stream(factory, q, "csv", batch_rows=500, gzip_level=6):
+                size += len(chunk)
+            return tracemalloc.get_traced_memory()[1], size
+        finally:
+            tracemalloc.stop()
+
+    _fill(factory, 5000)
+    small, _ = peak()
+    _fill(factory, 45000, t0=10_000.0)
+    large, size = peak()
+    assert size > 0
+    assert large < small * 1.5 + 256 * 1024
+
+
+def test_recipe_history_export_joins_the_body():
+    from indigo.services.recipe_service import RecipeService
+
+    factory = get_session_factory()
+    svc = RecipeService(factory)
+    svc.upsert_lane_recipe(1, {"name": "a", "thermal_temp_c": 60.0})
+    svc.upsert_lane_recipe(2, {"name": "b", "thermal_temp_c": 70.0})
+    body = _read(export_stream(factory, ExportQuery("recipes", lanes=(2,)), "csv")).decode()
+    rows = list(csv.DictReader(io.StringIO(body)))
+    assert [(r["lane"], r["name"], r["thermal_temp_c"]) for r in rows] == [("2", "b", "70.0")]
+    assert "T" in rows[0]["created_ts"]
+
+
+def test_query_parsing():
+    assert parse_lanes("1, 3,5-7") == (1, 3, 5, 6, 7)
+    assert parse_time("1700000000.5") == 1700000000.5
+    assert parse_time("2026-01-01T00:00:00Z") == parse_time("2026-01-01T00:00:00") == 1767225600.0
+    for bad in ("", "x", "5-2"):
+        with pytest.raises(ValueError):
+            parse_lanes(bad)
+    with pytest.raises(ValueError):
+        parse_time("yesterday")
+
+
+def test_recorder_samples_lanes_that_answered():
+    factory = get_session_factory()
+    reg = DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)
+    rec = TelemetryRecorder(reg, factory)
+    assert rec.flush() == 0
+    payload = bytearray(LANE_STATUS_LEN)
+    payload[2:4] = (2512).to_bytes(2, "little")
+    reg.set_raw_status(1, RESP_LANE_STATUS, bytes(payload), 10.0)
+    reg.set_raw_status(2, RESP_LANE_STATUS, bytes(LANE_STATUS_LEN), 10.5)
+    assert rec.flush() == 2
+    assert rec.flush() == 0  # nothing new since
+    reg.set_raw_status(1, RESP_LANE_STATUS, bytes(payload), 11.0)
+    assert rec.flush() == 1 and rec.written == 3
+
+    rows = [r for b in iter_batches(factory, ExportQuery("telemetry", lanes=(1,))) for r in b]
+    assert [(r[1], r[3]) for r in rows] == [(10.0, 25.12), (11.0, 25.12)]
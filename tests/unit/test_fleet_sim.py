@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from indigo.hw.bus.fleet_sim import FleetFaults, FleetSimulator  # noqa: E402
+from indigo.hw.devices.laneboard import LaneboardClient  # noqa: E402
+from indigo.hw.transport.fleet_sim import FleetLaneTransport  # noqa: E402
+from indigo.services.bus_poll_service import BusPollService  # noqa: E402
+from indigo.services.device_registry import DeviceRegistry  # noqa: E402
+from indigo.services.safety import InterlockRules, SafetyEvaluator  # noqa: E402
+from indigo.util.clock import VirtualClock  # noqa: E402
+
+
+def _status(bus, addr):
+    return LaneboardClient.parse_status_response(bus.send_and_recv(LaneboardClient(addr).build_status_request()))
+
+
+def test_lanes_follow_commands_with_first_order_dynamics():
+    clock = VirtualClock()
+    sim = FleetSimulator(machines=2, lanes_per_machine=4, clock=clock)
+    bus = sim.bus(1)
+    lane = LaneboardClient(3)
+    for frame in (lane.build_cycle(1), lane.build_thermal(-10.0, 5.0), lane.build_stir(True, 500)):
+        assert bus.send_and_recv(frame) is not None
+
+    st = _status(bus, 3)
+    assert st.heater_relay_on is False and st.thermal_sp_c == -10.0 and st.reflux_sp_c == 5.0
+
+    clock.sleep(1.0)
+    st = _status(bus, 3)
+    assert st.cooling_valve_thermal and st.stir_running
+    clock.sleep(1200.0)
+    st = _status(bus, 3)
+    assert st.thermal_temp_c == pytest.approx(-10.0, abs=0.2)
+    assert st.reflux_temp_c == pytest.approx(5.0, abs=0.2)
+
+    # the same lane address on machine 0 is untouched
+    assert _status(sim.bus(0), 3).thermal_temp_c == pytest.approx(20.0, abs=0.2)
+
+
+def test_fault_injection_trips_interlocks_through_the_poller():
+    clock = VirtualClock()
+    sim = FleetSimulator(machines=1, lanes_per_machine=4, clock=clock)
+    registry = DeviceRegistry(lane_addrs=sim.lane_addrs, utility_addr=sim.utility_addr)
+    safety = SafetyEvaluator(InterlockRules(), lane_addrs=sim.lane_addrs, utility_addr=sim.utility_addr)
+    svc = BusPollService(simulation_mode=True, poll_hz=10.0, bus=sim.bus(0), registry=registry, safety=safety, clock=clock)
+
+    sim.set_heater_stuck(sim.index(0, 2))
+    svc.run_for(600.0)
+    assert "over_temp" in {v.rule for v in safety.tripped.get(2, [])}
+
+    sim.set_safe_chain(0, False)
+    svc.run_for(1.0)
+    assert sim.utility_addr in safety.tripped
+
+
+def test_random_faults_and_drops_are_seeded():
+    def run() -> tuple[int, int]:
+        clock = VirtualClock()
+        sim = FleetSimulator(machines=10, lanes_per_machine=8, clock=clock, faults=FleetFaults(drop_rate=0.1, error_rate_per_s=0.01))
+        bus = sim.bus(0)
+        drops = 0
+        for _ in range(200):
+            clock.sleep(0.5)
+            drops += _status_raw(bus) is None
+        return drops, int((sim.error_status != 0).sum())
+
+    first = run()
+    assert first == run()
+    assert first[0] > 0 and first[1] > 0
+
+
+def _status_raw(bus):
+    return bus.send_and_recv(LaneboardClient(1).build_status_request())
+
+
+def test_lane_transport_over_fleet():
+    sim = FleetSimulator(machines=3, lanes_per_machine=2, clock=VirtualClock())
+    transport = FleetLaneTransport(sim)
+    assert len(transport.list_lanes()) == 6
+
+    transport.start_lane("m2-lane1")
+    assert transport.get_lane_status("m2-lane1").state == "running"
+    sim.inject_error(sim.index(2, 2))
+    assert transport.get_lane_status("m2-lane2").state == "error"
+    assert transport.get_lane_status("m0-lane1").state == "idle"
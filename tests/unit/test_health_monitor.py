@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import os
+import socket
+
+import pytest
+
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.services.bus_poll_service import BusPollService
+from indigo.services.device_registry import DeviceRegistry
+from indigo.services.health import DEGRADED, FAILED, OK, HealthMonitor
+from indigo.util.clock import VirtualClock
+from indigo.util.heartbeat import Heartbeat
+from indigo.util.sd_notify import Watchdog, notify, watchdog_interval_s
+
+
+def _poller(clock: VirtualClock) -> BusPollService:
+    reg = DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)
+    bus = SimBus(utility_addr=9, delay_s=0.0, clock=clock)
+    return BusPollService(simulation_mode=True, poll_hz=10, bus=bus, registry=reg, clock=clock)
+
+
+def _monitor(svc: BusPollService, clock: VirtualClock) -> HealthMonitor:
+    return HealthMonitor(
+        registry=svc.registry, poll_period_s=svc.poll_period_s, heartbeats=[svc.heartbeat], clock=clock
+    )
+
+
+def test_heartbeat_age_and_rate():
+    clock = VirtualClock()
+    hb = Heartbeat("loop", 0.1, fixed_rate=True, clock=clock)
+    assert hb.age_s() is None and hb.rate_hz() is None
+    for _ in range(20):
+        hb.beat()
+        clock.advance(0.1)
+    assert hb.count == 20
+    assert hb.age_s() == pytest.approx(0.1)
+    assert hb.rate_hz() == pytest.approx(10.0)
+    assert hb.snapshot()["expected_hz"] == 10.0
+
+
+def test_poll_loop_progress_and_stall():
+    clock = VirtualClock()
+    svc = _poller(clock)
+    mon = _monitor(svc, clock)
+    assert mon.check()["status"] == OK  # starting: nothing overdue yet
+
+    svc.run_for(1.0)
+    h = mon.check()
+    assert h["status"] == OK
+    assert h["loops"]["bus_poll"]["count"] == 10
+    assert h["devices"]["utility"]["state"] == OK
+    assert [d["state"] for d in h["devices"]["lanes"]] == [OK, OK]
+
+    clock.advance(0.5)  # > 3 periods without a tick
+    h = mon.check()
+    assert h["status"] == DEGRADED and h["loops"]["bus_poll"]["reason"] == "late"
+    assert mon.loops_alive()
+
+    clock.advance(1.0)  # > 10 periods (and MIN_FAILED_AFTER_S)
+    h = mon.check()
+    assert h["status"] == FAILED and h["loops"]["bus_poll"]["reason"] == "stalled"
+    assert not mon.loops_alive()
+
+    svc.run_for(0.5)
+    assert mon.check()["status"] == OK
+
+
+def test_slow_tick_rate_degrades():
+    clock = VirtualClock()
+    hb = Heartbeat("bus_poll", 0.1, fixed_rate=True, clock=clock)
+    mon = HealthMonitor(registry=None, poll_period_s=0.1, heartbeats=[hb], clock=clock)
+    for _ in range(50):
+        hb.beat()
+        clock.advance(0.25)  # 4 Hz against 10 Hz expected; each gap still under 3 periods
+    hb.beat()
+    h = mon.check()
+    assert h["status"] == DEGRADED and h["loops"]["bus_poll"]["reason"] == "slow"
+
+
+def test_device_freshness():
+    clock = VirtualClock()
+    svc = _poller(clock)
+    mon = _monitor(svc, clock)
+    svc.run_for(1.0)
+    hb = svc.heartbeat
+
+    # loop alive, lane 2 not answering: degraded, watchdog still fed
+    svc.registry.last_seen_ts[2] -= 5.0
+    h = mon.check()
+    assert h["status"] == DEGRADED and h["devices"]["lanes"][1]["reason"] == "stale"
+    assert mon.loops_alive()
+
+    # utility board gone for > 10 periods: the interlocks are blind
+    svc.registry.last_seen_ts[9] -= 5.0
+    hb.beat()
+    h = mon.check()
+    assert h["status"] == FAILED and h["devices"]["utility"]["state"] == FAILED
+    assert mon.loops_alive()
+
+
+def test_never_beating_loop_fails_after_grace():
+    clock = VirtualClock()
+    hb = Heartbeat("cycle_runner", 0.25, clock=clock)
+    mon = HealthMonitor(registry=None, poll_period_s=0.5, heartbeats=[hb], clock=clock)
+    assert mon.check()["loops"]["cycle_runner"]["reason"] == "starting"
+    clock.advance(3.0)
+    assert mon.check()["loops"]["cycle_runner"]["reason"] == "no_heartbeat"
+    assert not mon.loops_alive()
+
+
+@pytest.fixture
+def notify_socket(tmp_path):
+    path = str(tmp_path / "notify.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.bind(path)
+        sock.settimeout(1.0)
+        yield path, sock
+
+
+def test_notify_sends_one_datagram(notify_socket, monkeypatch):
+    path, sock = notify_socket
+    monkeypatch.setenv("NOTIFY_SOCKET", path)
+    assert notify("READY=1")
+    assert sock.recv(64) == b"READY=1"
+
+    monkeypatch.delenv("NOTIFY_SOCKET")
+    assert not notify("READY=1")  # not under systemd
+    assert not notify("READY=1", path=path + ".missing")
+
+
+def test_watchdog_interval_from_env(monkeypatch):
+    monkeypatch.setenv("WATCHDOG_USEC", "10000000")
+    monkeypatch.delenv("WATCHDOG_PID", raising=False)
+    assert watchdog_interval_s() == 10.0
+    assert Watchdog(lambda: True).interval_s == 5.0
+    monkeypatch.setenv("WATCHDOG_PID", "1")  # meant for another process
+    assert watchdog_interval_s() is None
+    monkeypatch.delenv("WATCHDOG_USEC")
+    monkeypatch.delenv("WATCHDOG_PID")
+    assert not Watchdog(lambda: True).enabled
+
+
+def test_watchdog_withholds_keepalive_while_stalled(notify_socket):
+    path, sock = notify_socket
+    alive = [True]
+    wd = Watchdog(lambda: alive[0], interval_s=0.01, path=path)
+    assert wd.ping()
+    assert sock.recv(64) == b"WATCHDOG=1"
+
+    alive[0] = False
+    assert not wd.ping()
+    assert wd.sent == 1 and wd.skipped == 1
+    sock.settimeout(0.05)
+    with pytest.raises(TimeoutError):
+        sock.recv(64)
+
+    alive[0] = True
+    wd.start()
+    sock.settimeout(1.0)
+    assert sock.recv(64) == b"WATCHDOG=1"
+    wd.stop()
+
+
+def test_abstract_socket_name():
+    name = f"indigo-test-notify-{os.getpid()}"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.bind("\0" + name)
+        sock.settimeout(1.0)
+        assert notify("WATCHDOG=1", path="@" + name)
+        assert sock.recv(64) == b"WATCHDOG=1"
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.hw.transport.base import LaneStatus
+from indigo.hw.transport.bus import BusLaneTransport
+from indigo.hw.transport.sim import SimLaneTransport
+from indigo.services.lane_service import LaneService, LaneServiceConfig
+from indigo.util.clock import VirtualClock
+
+
+class CountingTransport(SimLaneTransport):
+    def __init__(self, **kw) -> None:
+        super().__init__(**kw)
+        self.fetches = 0
+        self.gate: threading.Event | None = None
+        self.fail = False
+
+    def get_lane_statuses(self, lane_ids: list[str] | None = None) -> list[LaneStatus]:
+        self.fetches += 1
+        if self.gate is not None:
+            self.gate.wait(5.0)
+        if self.fail:
+            raise TimeoutError("bus timeout")
+        return super().get_lane_statuses(lane_ids)
+
+
+def _wait_for(cond) -> None:
+    end = time.monotonic() + 5.0
+    while not cond():
+        assert time.monotonic() < end
+        time.sleep(0.001)
+
+
+def test_ttl_stale_and_staleness_bound():
+    clock = VirtualClock()
+    transport = CountingTransport(clock=clock)
+    svc = LaneService(transport, LaneServiceConfig(cache_ttl_sec=1.0, max_staleness_sec=5.0), clock=clock)
+
+    first = svc.get_all_statuses()
+    assert [s.lane_id for s in first] == ["lane1", "lane2", "lane3", "lane4"]
+    clock.advance(0.5)
+    assert svc.get_all_statuses() is first
+    assert transport.fetches == 1
+
+    # past the ttl: served from memory, refreshed in the background
+    clock.advance(1.0)
+    assert svc.get_all_statuses() is first
+    _wait_for(lambda: svc.stats()["refreshes"] == 2)
+    assert svc.get_all_statuses() is not first
+    assert svc.age_s() == pytest.approx(0.0)
+
+    # past the staleness bound: the read waits for fresh data
+    clock.advance(10.0)
+    transport.stop_lane("lane1")
+    assert svc.get_all_statuses()[0].extra["last_change_ts"] == clock.time()
+    assert svc.stats() == {"hits": 2, "stale_hits": 1, "misses": 2, "refreshes": 3, "coalesced": 0, "errors": 0}
+
+
+def test_concurrent_readers_share_one_fetch():
+    transport = CountingTransport()
+    transport.gate = threading.Event()
+    svc = LaneService(transport)
+
+    results: list[list[LaneStatus]] = []
+    threads = [threading.Thread(target=lambda: results.append(svc.get_all_statuses())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    _wait_for(lambda: svc.stats()["coalesced"] == 7)
+    transport.gate.set()
+    for t in threads:
+        t.join()
+
+    assert transport.fetches == 1
+    assert len(results) == 8 and all(r is results[0] for r in results)
+
+
+def test_errors_propagate_and_commands_invalidate():
+    transport = CountingTransport()
+    svc = LaneService(transport)
+    transport.fail = True
+    with pytest.raises(TimeoutError):
+        svc.get_all_statuses()
+    assert svc.stats()["errors"] == 1
+
+    transport.fail = False
+    assert svc.get_all_statuses()[1].state == "idle"
+    svc.start("lane2")
+    assert svc.age_s() is None
+    assert svc.get_all_statuses()[1].state in ("running", "error")
+    assert transport.fetches == 3
+
+
+def test_bus_lane_transport():
+    bus = SimBus(delay_s=0.0)
+    transport = BusLaneTransport(bus, [1, 2, 3])
+    assert transport.list_lanes() == ["lane1", "lane2", "lane3"]
+
+    transport.start_lane("lane2")
+    bus.set_lane_payload(3, bytes(15) + b"\x04")
+    statuses = transport.get_lane_statuses()
+    assert [s.state for s in statuses] == ["idle", "running", "error"]
+    assert statuses[2].message == "error_status=4"
+    assert transport.get_lane_statuses(["lane9"])[0].connected is False
+
+    transport.stop_lane("lane2")
+    assert transport.get_lane_status("lane2").state == "idle"
@@ -0,0 +1,123 @@
+import math
+import struct
+import time
+
+import pytest
+
+from indigo.services.device_registry import DeviceRegistry
+from indigo.services.lane_stats import LaneStats
+
+
+def _payload(reflux, thermal, reflux_sp=0.0, thermal_sp=0.0) -> bytes:
+    temps = (round(v * 100) for v in (reflux, thermal, reflux_sp, thermal_sp))
+    return bytes(2) + struct.pack("<hhhh", *temps) + bytes(6)
+
+
+def test_linear_ramp_slope_and_eta():
+    st = LaneStats([1], window=8, tolerance_c=0.5)
+    for i in range(20):
+        st.update(1, _payload(20.0 + 0.5 * i, 50.0, 80.0, 50.0), 1000.0 + i)
+
+    reflux = st.lane(1)["reflux"]
+    assert reflux["samples"] == 20
+    assert reflux["rate_c_per_min"] == pytest.approx(30.0)
+    assert reflux["eta_s"] == pytest.approx((80.0 - 29.5) / 0.5, abs=0.1)
+    assert reflux["in_tolerance"] is False
+
+    thermal = st.lane(1)["thermal"]
+    assert thermal["rate_c_per_min"] == 0.0
+    assert thermal["eta_s"] == 0.0 and thermal["in_tolerance"] is True
+
+
+def test_moving_away_from_setpoint_has_no_eta():
+    st = LaneStats([1], window=4)
+    for i in range(6):
+        st.update_values(1, 30.0 - i, 0.0, 80.0, 0.0, float(i))
+    assert st.lane(1)["reflux"]["eta_s"] is None
+
+
+def test_ewma_mean_and_variance():
+    alpha = 0.3
+    st = LaneStats([1], alpha=alpha)
+    xs = [10.0, 12.0, 11.0, 15.0, 9.0, 10.5]
+    mean, var = xs[0], 0.0
+    for x in xs[1:]:
+        diff = x - mean
+        mean += alpha * diff
+        var = (1 - alpha) * (var + alpha * diff * diff)
+    for i, x in enumerate(xs):
+        st.update_values(1, x, 0.0, 0.0, 0.0, float(i))
+
+    reflux = st.lane(1)["reflux"]
+    assert reflux["mean_c"] == pytest.approx(mean, abs=1e-3)
+    assert reflux["std_c"] == pytest.approx(math.sqrt(var), abs=1e-3)
+
+
+def test_stable_after_hold_time_and_reset_on_excursion():
+    st = LaneStats([1], tolerance_c=0.5, stable_s=10.0)
+    for t in range(10):
+        st.update_values(1, 80.2, 0.0, 80.0, 0.0, float(t))
+    assert st.lane(1)["reflux"]["stable"] is False
+    st.update_values(1, 79.8, 0.0, 80.0, 0.0, 10.0)
+    assert st.lane(1)["reflux"]["stable"] is True
+
+    st.update_values(1, 81.0, 0.0, 80.0, 0.0, 11.0)
+    assert st.lane(1)["reflux"]["in_tolerance"] is False
+    st.update_values(1, 80.0, 0.0, 80.0, 0.0, 12.0)
+    assert st.lane(1)["reflux"]["stable"] is False
+
+
+def test_slope_stays_exact_after_a_long_run():
+    # a week of 10 Hz samples at epoch timestamps: the rebased sums must not drift
+    st = LaneStats([1], window=16)
+    t0 = 1.7e9
+    n = 7 * 86400 * 10
+    step = 10_000
+    for i in range(0, n, step):
+        for j in range(i, i + 16):
+            st.update_values(1, 0.001 * j, 0.0, 0.0, 0.0, t0 + j * 0.1)
+    assert st.lane(1)["reflux"]["rate_c_per_min"] == pytest.approx(0.6, rel=1e-6)
+    assert st.origin[0] > t0 + (n - step) * 0.1
+
+
+def test_update_cost_does_not_grow_with_history():
+    st = LaneStats([1, 2], window=32)
+    payload = _payload(20.0, 30.0, 80.0, 50.0)
+
+    def cost(start):
+        t = time.perf_counter()
+        for i in range(start, start + 2000):
+            st.update(1, payload, float(i))
+        return time.perf_counter() - t
+
+    first = cost(0)
+    for i in range(2000, 50_000):
+        st.update(1, payload, float(i))
+    assert cost(50_000) < first * 3
+    assert len(st.ring_t) == 2 * 2 * 32
+
+
+def test_unknown_lane_and_empty_channel():
+    st = LaneStats([1])
+    st.update(5, _payload(1.0, 2.0), 0.0)
+    assert st.lane(5) is None
+    assert st.lane(1) == {"addr": 1, "reflux": {"samples": 0}, "thermal": {"samples": 0}}
+
+
+def test_rejects_bad_parameters():
+    with pytest.raises(ValueError):
+        LaneStats([1], alpha=0.0)
+    with pytest.raises(ValueError):
+        LaneStats([1], window=1)
+
+
+def test_registry_feeds_stats_on_every_sample():
+    reg = DeviceRegistry(lane_addrs=[1, 2], utility_addr=9)
+    payload = _payload(25.0, 40.0, 25.0, 60.0)
+    for t in range(3):
+        reg.set_raw_status(1, 0x80, payload, float(t))  # unchanged payload: version moves once
+    assert reg.version == 1
+    assert reg.lane_stats(1)["thermal"]["samples"] == 3
+    assert reg.lane_stats(1)["reflux"]["in_tolerance"] is True
+    assert reg.lane_stats(2)["reflux"] == {"samples": 0}
+    assert reg.lane_stats(9) is None
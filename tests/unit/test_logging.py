@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import gzip
+import logging
+import queue
+import threading
+import time
+
+import pytest
+
+from indigo.util.clock import VirtualClock
+from indigo.util.logging import (
+    LOG_FILE,
+    LogQueueListener,
+    NonBlockingQueueHandler,
+    RateLimitFilter,
+    configure_logging,
+    shutdown_logging,
+)
+
+
+@pytest.fixture
+def restore_root_logging():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def _record(msg: str, *args, level: int = logging.WARNING) -> logging.LogRecord:
+    return logging.LogRecord("indigo.bus_poll", level, __file__, 1, msg, args, None)
+
+
+def test_rate_limit_per_message_template():
+    clock = VirtualClock()
+    f = RateLimitFilter(burst=2, window_s=10.0, clock=clock)
+
+    passed = [f.filter(_record("Lane %s poll: no response", addr)) for addr in (1, 2, 3, 4, 5)]
+    assert passed == [True, True, False, False, False]
+    assert f.filter(_record("Utility poll: no response"))  # different template
+    assert f.filter(_record("Lane %s poll: no response", 1, level=logging.ERROR))  # errors never limited
+
+    clock.advance(10.0)
+    r = _record("Lane %s poll: no response", 6)
+    assert f.filter(r)
+    assert r.getMessage() == "Lane 6 poll: no response (+3 similar suppressed)"
+    assert f.suppressed == 3
+
+
+def test_emit_never_blocks_on_a_stalled_writer():
+    gate = threading.Event()
+
+    class StalledHandler(logging.Handler):
+        def emit(self, record: logging.LogRecord) -> None:
+            gate.wait(5.0)
+
+    q: queue.Queue = queue.Queue(maxsize=4)
+    qh = NonBlockingQueueHandler(q)
+    listener = LogQueueListener(q, StalledHandler())
+    listener.start()
+    log = logging.getLogger("indigo.test.stalled")
+    log.propagate = False
+    log.addHandler(qh)
+    try:
+        t0 = time.perf_counter()
+        for i in range(100):
+            log.warning("tick %d", i)
+        assert time.perf_counter() - t0 < 0.5
+        assert qh.dropped >= 100 - 4 - 1
+    finally:
+        gate.set()
+        log.removeHandler(qh)
+        listener.stop()
+
+
+def test_rotated_files_are_gzipped(tmp_path, restore_root_logging):
+    configure_logging("INFO", log_dir=tmp_path, max_bytes=2000, backup_count=3, rate_limit_window_s=0)
+    log = logging.getLogger("indigo.test.rotate")
+    for i in range(200):
+        log.info("line %04d %s", i, "x" * 40)
+    shutdown_logging()
+
+    rotated = sorted(p.name for p in tmp_path.iterdir() if p.name != LOG_FILE)
+    assert rotated == [f"{LOG_FILE}.{n}.gz" for n in (1, 2, 3)]
+    newest = gzip.decompress((tmp_path / f"{LOG_FILE}.1.gz").read_bytes()).decode()
+    assert "indigo.test.rotate - line" in newest
+    assert (tmp_path / LOG_FILE).read_text().rstrip().endswith("line 0199 " + "x" * 40)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from sqlalchemy import create_engine, inspect, text
+
+from indigo.config.settings import get_settings
+from indigo.db.engine import MIGRATIONS_DIR, SCHEMA_HEAD, init_db, schema_is_current
+from indigo.services.recipe_service import RecipeService
+
+# Schema written by create_all() before migrations existed (recipe bodies inline).
+LEGACY_DDL = (
+    """
+    CREATE TABLE recipes (
+        id INTEGER NOT NULL PRIMARY KEY, lane INTEGER NOT NULL, name VARCHAR(200),
+        cycle_type VARCHAR(32) NOT NULL, fixed_hold_time BOOLEAN NOT NULL,
+        autopinbreak_enabled BOOLEAN NOT NULL, num_autopinbreaks INTEGER NOT NULL,
+        attempt_time_s INTEGER NOT NULL, thermal_temp_c FLOAT NOT NULL, reflux_enabled BOOLEAN NOT NULL,
+        reflux_temp_c FLOAT NOT NULL, purge_vac_switchpoint FLOAT NOT NULL, stir_speed_rpm INTEGER NOT NULL,
+        purge_set_pressure FLOAT NOT NULL, sha256 VARCHAR(64) NOT NULL,
+        created_ts DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, active BOOLEAN NOT NULL,
+        CONSTRAINT uq_recipe_id_lane UNIQUE (id, lane)
+    )
+    """,
+    "CREATE INDEX ix_recipes_active ON recipes (active)",
+    "CREATE INDEX ix_recipes_lane ON recipes (lane)",
+    """
+    CREATE TABLE recipe_pinbreak_steps (
+        id INTEGER NOT NULL PRIMARY KEY, recipe_id INTEGER NOT NULL REFERENCES recipes (id) ON DELETE CASCADE,
+        step_index INTEGER NOT NULL, autopinbreak_time_ms INTEGER, autopinbreak_pressure FLOAT,
+        postpinbreak_thermal_temp_c FLOAT, postpinbreak_pressure FLOAT, postpinbreak_reflux_temp_c FLOAT,
+        postpinbreak_stir_speed_rpm INTEGER,
+        CONSTRAINT uq_recipe_step_index UNIQUE (recipe_id, step_index)
+    )
+    """,
+    "CREATE INDEX ix_recipe_pinbreak_steps_recipe_id ON recipe_pinbreak_steps (recipe_id)",
+)
+
+
+def _legacy_recipe(conn, rid: int, lane: int, temp: float, times: list[int], active: bool) -> None:
+    conn.execute(
+        text(
+            "INSERT INTO recipes VALUES (:id, :lane, NULL, 'full', 0, 1, :n, 60, :t, 0, 0.0, 0.0, 500, 0.0, 'x', "
+            "CURRENT_TIMESTAMP, :active)"
+        ),
+        {"id": rid, "lane": lane, "n": len(times), "t": temp, "active": active},
+    )
+    for i, ms in enumerate(times):
+        conn.execute(
+            text("INSERT INTO recipe_pinbreak_steps (recipe_id, step_index, autopinbreak_time_ms) VALUES (:r, :i, :ms)"),
+            {"r": rid, "i": i, "ms": ms},
+        )
+
+
+def test_legacy_database_is_migrated_into_shared_bodies():
+    settings = get_settings()
+    engine = create_engine(settings.DATABASE_URL)
+    with engine.begin() as conn:
+        for ddl in LEGACY_DDL:
+            conn.execute(text(ddl))
+        _legacy_recipe(conn, 1, 1, -10.0, [100, 200], active=False)
+        _legacy_recipe(conn, 2, 1, -10.0, [100, 200], active=True)
+        _legacy_recipe(conn, 3, 2, -12.0, [300], active=True)
+        _legacy_recipe(conn, 4, 2, -12.0, [300], active=True)  # duplicate active: cleaned up
+    engine.dispose()
+
+    factory = init_db(settings)
+    bind = factory.kw["bind"]
+    assert "thermal_temp_c" not in {c["name"] for c in inspect(bind).get_columns("recipes")}
+    with bind.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM recipe_bodies")).scalar_one() == 2
+        assert conn.execute(text("SELECT count(*) FROM recipe_pinbreak_steps")).scalar_one() == 3
+        assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar_one() == SCHEMA_HEAD
+        assert conn.execute(text("SELECT count(*) FROM alarm_events")).scalar_one() == 0
+        assert conn.execute(text("SELECT id FROM recipes WHERE lane = 2 AND active = 1")).scalars().all() == [4]
+
+    svc = RecipeService(factory)
+    r1 = svc.get_lane_recipe(1)
+    assert r1["recipe_id"] == 2
+    assert [s["autopinbreaktime"] for s in r1["pinbreak_steps"]] == [100, 200]
+    assert svc.get_lane_recipe(2)["thermaltemp"] == -12.0
+
+    # migrated content hashes exactly like freshly stored content
+    svc.upsert_lane_recipe(3, {"autopinbreak": True, "attempttime": 60, "thermaltemp": -12.0, "stirspeed": 500, "autopinbreaktime": [300]})
+    assert svc.get_lane_recipe(3)["content_sha256"] == svc.get_lane_recipe(2)["content_sha256"]
+
+    # running it again is a no-op
+    init_db(settings)
+
+
+def test_schema_head_matches_the_newest_revision():
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    cfg = Config()
+    cfg.set_main_option("script_location", str(MIGRATIONS_DIR))
+    assert ScriptDirectory.from_config(cfg).get_current_head() == SCHEMA_HEAD
+
+    # a database at head is recognized without running alembic
+    factory = init_db(get_settings())
+    assert schema_is_current(factory.kw["bind"])
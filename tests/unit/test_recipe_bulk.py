@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import event
+
+from indigo.api.app import create_app
+from indigo.config.settings import get_settings
+from indigo.db.engine import init_db
+from indigo.services.recipe_service import RecipeService, RecipeValidationError
+
+
+def _payload(temp: float) -> dict:
+    return {
+        "numberofautopinbreaks": 3,
+        "autopinbreaktime": [100, 200, 300],
+        "postpinbreakstirspeed": [400, 500, 600],
+        "thermaltemp": temp,
+    }
+
+
+def test_bulk_upsert_single_commit_and_skips_unchanged():
+    factory = init_db(get_settings())
+    svc = RecipeService(factory)
+    svc.upsert_lane_recipe(2, _payload(5))
+
+    commits = []
+    event.listen(factory.kw["bind"], "commit", lambda conn: commits.append(1))
+
+    res = svc.bulk_upsert_lane_recipes({lane: _payload(5) for lane in range(1, 10)})
+    assert len(commits) == 1
+    assert [r.lane_addr for r in res] == list(range(1, 10))
+    assert [r.updated_at_ts for r in res] == [lane != 2 for lane in range(1, 10)]
+
+    r7 = svc.get_lane_recipe(7)
+    assert r7["thermaltemp"] == 5
+    assert [s["autopinbreaktime"] for s in r7["pinbreak_steps"]] == [100, 200, 300]
+    assert r7["pinbreak_steps"][2]["postpinbreakstirspeed"] == 600
+
+    # replacing deactivates the previous version
+    svc.bulk_upsert_lane_recipes({7: _payload(6)})
+    assert svc.get_lane_recipe(7)["thermaltemp"] == 6
+
+
+def test_bulk_upsert_validates_everything_first():
+    svc = RecipeService(init_db(get_settings()))
+    with pytest.raises(RecipeValidationError) as ei:
+        svc.bulk_upsert_lane_recipes({1: _payload(1), 2: {"autopinbreaktime": [1, "x"]}, 3: {"thermaltemp": "hot"}})
+    assert sorted(ei.value.errors) == [2, 3]
+    assert svc.get_lane_recipe(1) is None
+
+
+def test_bulk_endpoint():
+    client = create_app().test_client()
+    resp = client.post("/api/recipes/bulk", json={"recipes": {"1": _payload(1), "2": _payload(2)}})
+    assert resp.status_code == 200
+    assert [r["lane_addr"] for r in resp.get_json()["results"]] == [1, 2]
+    assert client.get("/api/lanes/2/recipe").get_json()["recipe"]["thermaltemp"] == 2
+
+    bad = client.post("/api/recipes/bulk", json={"recipes": {"3": {"attempttime": "soon"}}})
+    assert bad.status_code == 400
+    assert bad.get_json()["errors"]["3"]
+
+
+def test_validation_uses_storage_coercion_and_caps_steps():
+    from indigo.services.recipe_service import validate_recipe_payload
+
+    assert validate_recipe_payload({"attempttime": 60, "stirspeed": "500", "thermaltemp": "-10.5"}) == []
+    for bad in ({"attempttime": "1.5"}, {"stirspeed": 2.5}, {"thermaltemp": "nan"}, {"refluxtemp": float("inf")}):
+        assert validate_recipe_payload(bad), bad
+    assert validate_recipe_payload({"numberofautopinbreaks": 1e9})
+    assert validate_recipe_payload({"autopinbreaktime": [1.5]})
+
+
+def test_bulk_endpoint_rejects_duplicate_lanes():
+    client = create_app().test_client()
+    resp = client.post("/api/recipes/bulk", json={"recipes": {"1": _payload(1), "01": _payload(2)}})
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "duplicate_lane_addr"
+    assert client.post("/api/lanes/1/recipe", json={"numberofautopinbreaks": 1e9}).status_code == 400
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from indigo.config.settings import get_settings
+from indigo.db.engine import init_db
+from indigo.services.recipe_cache import RecipeCache
+from indigo.services.recipe_service import RecipeService
+
+PAYLOAD = {"cycletype": "full", "numberofautopinbreaks": 1, "autopinbreaktime": [100], "thermaltemp": -10}
+
+
+def _service() -> RecipeService:
+    return RecipeService(init_db(get_settings()))
+
+
+def test_hit_miss_and_invalidate():
+    svc = _service()
+    cache = RecipeCache(svc, revalidate_s=60.0)
+    assert cache.get(1) is None
+
+    svc.upsert_lane_recipe(1, PAYLOAD)
+    first = cache.get(1)
+    assert first is not None and first.recipe["thermaltemp"] == -10
+    assert cache.get(1) is first
+    assert cache.stats()["hits"] == 1
+
+    svc.upsert_lane_recipe(1, {**PAYLOAD, "thermaltemp": -20})
+    assert cache.get(1) is first  # still trusted inside the revalidate window
+    cache.invalidate(1)
+    assert cache.get(1).recipe["thermaltemp"] == -20
+
+
+def test_version_check_catches_other_writers():
+    svc = _service()
+    cache = RecipeCache(svc, revalidate_s=0.0)
+    svc.upsert_lane_recipe(2, PAYLOAD)
+    first = cache.get(2)
+
+    # unchanged: revalidated with the one-row version query, body reused
+    again = cache.get(2)
+    assert again.body is first.body
+    assert cache.stats()["revalidations"] == 1
+
+    # a writer that never calls invalidate() (e.g. another process)
+    RecipeService(svc._session_factory).upsert_lane_recipe(2, {**PAYLOAD, "thermaltemp": 5})
+    changed = cache.get(2)
+    assert changed.sha256 != first.sha256
+    assert changed.etag != first.etag
+
+
+def test_bounded_lru():
+    svc = _service()
+    cache = RecipeCache(svc, max_entries=2, revalidate_s=60.0)
+    for lane in (1, 2, 3):
+        svc.upsert_lane_recipe(lane, PAYLOAD)
+        cache.get(lane)
+    st = cache.stats()
+    assert st["entries"] == 2
+    assert st["evictions"] == 1
+
+
+def test_active_versions_for_all_lanes():
+    svc = _service()
+    cache = RecipeCache(svc, revalidate_s=60.0)
+    empty = cache.active_versions([1, 2])
+    assert empty.versions == {}
+
+    res = svc.upsert_lane_recipe(2, PAYLOAD)
+    assert cache.active_versions([1, 2]) is empty  # trusted inside the revalidate window
+    cache.invalidate(2)
+    fresh = cache.active_versions([1, 2])
+    assert fresh.versions[2][0] == res.recipe_id and 1 not in fresh.versions
+    assert fresh.token != empty.token
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from indigo.api.app import create_app
+from indigo.config.settings import get_settings
+from indigo.db.engine import init_db
+from indigo.db.orm.tables import Recipe
+from indigo.services.recipe_service import RecipeService, ensure_recipe_body
+from indigo.services.recipe_store import RecipeStore
+
+
+def test_schema_allows_only_one_active_recipe_per_lane():
+    factory = init_db(get_settings())
+    with factory() as s:
+        body_id = ensure_recipe_body(s, {"num_autopinbreaks": 0, "cycle_type": "full", **_zeros()}, [])
+        s.add(Recipe(lane=1, body_id=body_id, sha256="a", active=True))
+        s.add(Recipe(lane=2, body_id=body_id, sha256="a", active=True))
+        s.add(Recipe(lane=1, body_id=body_id, sha256="b", active=False))
+        s.commit()
+
+        s.add(Recipe(lane=1, body_id=body_id, sha256="c", active=True))
+        with pytest.raises(IntegrityError):
+            s.commit()
+
+
+def test_history_keyset_pages_cover_everything_once():
+    factory = init_db(get_settings())
+    svc = RecipeService(factory)
+    for i in range(7):
+        svc.upsert_lane_recipe(3, {"thermaltemp": i})
+    svc.upsert_lane_recipe(4, {"thermaltemp": 99})
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = svc.list_lane_history(3, limit=3, cursor=cursor)
+        seen.extend(items)
+        if cursor is None:
+            break
+
+    assert len(seen) == 7
+    assert len({it["recipe_id"] for it in seen}) == 7
+    assert [it["active"] for it in seen] == [True] + [False] * 6
+    assert seen[0]["recipe_id"] > seen[-1]["recipe_id"]
+    assert "pinbreak_steps" not in seen[0]
+
+    with factory() as s:
+        assert [r.id for r in RecipeStore(s).list_recipes(3, limit=2)] == [it["recipe_id"] for it in seen[:2]]
+
+
+def test_history_pages_terminate_when_timestamps_tie():
+    factory = init_db(get_settings())
+    svc = RecipeService(factory)
+    for i in range(5):
+        svc.upsert_lane_recipe(6, {"thermaltemp": i})
+    with factory() as s:
+        s.execute(text("UPDATE recipes SET created_ts = '2026-01-01 00:00:00'"))
+        s.commit()
+
+    seen, cursor = [], None
+    for _ in range(10):
+        items, cursor = svc.list_lane_history(6, limit=2, cursor=cursor)
+        seen.extend(it["recipe_id"] for it in items)
+        if cursor is None:
+            break
+    assert cursor is None
+    assert seen == sorted(seen, reverse=True) and len(set(seen)) == 5
+
+    with factory() as s:
+        store = RecipeStore(s)
+        first = store.list_recipes(6, limit=3)
+        rest = store.list_recipes(6, limit=3, before=first[-1].id)
+    assert [r.id for r in first + rest] == seen
+
+
+def test_history_query_uses_lane_id_index():
+    factory = init_db(get_settings())
+    with factory() as s:
+        plan = s.execute(
+            text("EXPLAIN QUERY PLAN SELECT id FROM recipes WHERE lane = 1 AND id < 5 ORDER BY id DESC LIMIT 10")
+        ).all()
+    detail = " ".join(str(row[-1]) for row in plan)
+    assert "ix_recipes_lane_id" in detail
+    assert "TEMP B-TREE" not in detail
+
+
+def test_history_endpoint():
+    client = create_app().test_client()
+    for i in range(3):
+        client.post("/api/lanes/5/recipe", json={"thermaltemp": i})
+
+    page = client.get("/api/lanes/5/recipes?limit=2").get_json()
+    assert len(page["items"]) == 2 and page["next_cursor"]
+    rest = client.get(f"/api/lanes/5/recipes?limit=2&cursor={page['next_cursor']}").get_json()
+    assert len(rest["items"]) == 1 and rest["next_cursor"] is None
+
+    assert client.get("/api/lanes/5/recipes?cursor=garbage").status_code == 400
+
+
+def _zeros() -> dict:
+    return {
+        "fixed_hold_time": False,
+        "autopinbreak_enabled": False,
+        "attempt_time_s": 0,
+        "thermal_temp_c": 0.0,
+        "reflux_enabled": False,
+        "reflux_temp_c": 0.0,
+        "purge_vac_switchpoint": 0.0,
+        "stir_speed_rpm": 0,
+        "purge_set_pressure": 0.0,
+    }
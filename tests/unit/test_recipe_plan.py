@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import math
+
+from indigo.config.settings import get_settings
+from indigo.db.engine import init_db
+from indigo.hw.devices.laneboard import (
+    MSG_CYCLE,
+    MSG_PRESSURE,
+    MSG_STIR,
+    MSG_THERMAL,
+    MSG_THERMAL_ONLY,
+)
+from indigo.services.recipe_plan import CYCLE_COMPLETE, CYCLE_START, PlanCache, compile_recipe
+from indigo.services.recipe_service import RecipeService
+
+PAYLOAD = {
+    "autopinbreak": True,
+    "numberofautopinbreaks": 3,
+    "autopinbreaktime": [250, 500, 125],
+    "autopinbreakpressure": [1.5, None, 2.0],
+    "postpinbreakthermaltemp": [22.0, 23.0, None],
+    "postpinbreakstirspeed": [600, None, 0],
+    "attempttime": 60,
+    "thermaltemp": -10,
+    "stirspeed": 500,
+}
+
+
+def test_compiled_plan_has_timings_and_frames():
+    factory = init_db(get_settings())
+    svc = RecipeService(factory)
+    svc.upsert_lane_recipe(2, PAYLOAD)
+    plan = compile_recipe(2, svc.get_lane_recipe(2))
+
+    assert plan.nsteps == 3
+    assert list(plan.step_time_ms) == [250, 500, 125]
+    assert list(plan.step_offset_ms) == [250, 750, 875]
+    assert plan.step_pressure[0] == 1.5 and math.isnan(plan.step_pressure[1])
+    assert list(plan.step_post_stir_rpm) == [600, -1, 0]
+    assert plan.complete_offset_ms == 60_000
+
+    assert [f.msg_type for f in plan.start_frames] == [MSG_CYCLE, MSG_THERMAL_ONLY, MSG_STIR, MSG_PRESSURE]
+    assert plan.start_frames[0].payload == bytes([CYCLE_START])
+    assert [f.msg_type for f in plan.step_frames[0]] == [MSG_PRESSURE, MSG_THERMAL_ONLY, MSG_STIR]
+    assert [f.msg_type for f in plan.step_frames[1]] == [MSG_THERMAL_ONLY]
+    assert plan.complete_frames[0].payload == bytes([CYCLE_COMPLETE])
+    assert all(f.addr == 2 for fs in plan.step_frames for f in fs)
+    assert not hasattr(plan, "__dict__")
+
+
+def test_reflux_setpoints_and_disabled_pinbreak():
+    plan = compile_recipe(1, {"refluxenabled": True, "thermaltemp": 5, "refluxtemp": 1, "attempttime": 1})
+    assert plan.start_frames[1].msg_type == MSG_THERMAL
+    assert plan.start_frames[1].payload == (500).to_bytes(2, "little") + (100).to_bytes(2, "little")
+
+    off = compile_recipe(1, {**PAYLOAD, "autopinbreak": False, "pinbreak_steps": [{"autopinbreaktime": 5}]})
+    assert off.nsteps == 0
+
+
+def test_plan_cache_is_keyed_by_lane_and_content():
+    factory = init_db(get_settings())
+    svc = RecipeService(factory)
+    cache = PlanCache(svc)
+    svc.bulk_upsert_lane_recipes({1: PAYLOAD, 2: PAYLOAD})
+
+    p1 = cache.plan_for_lane(1)
+    assert cache.plan_for_lane(1) is p1
+    assert cache.plan_for_lane(2) is not p1
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 2}
+
+    svc.upsert_lane_recipe(1, {**PAYLOAD, "thermaltemp": -11})
+    assert cache.plan_for_lane(1) is not p1
+    svc.upsert_lane_recipe(1, {**PAYLOAD, "name": "same content, new name"})
+    assert cache.plan_for_lane(1) is p1
+    assert cache.plan_for_lane(3) is None
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+
+import pytest
+
+from indigo.util.rt import apply_rt_policy
+from indigo.util.shm_ring import ShmRing
+
+
+def test_push_pop_in_order_and_wraparound():
+    ring = ShmRing.create(4, 16, mp.Lock())
+    try:
+        assert ring.pop() is None and len(ring) == 0
+        for round_ in range(3):  # head/tail run past the slot count
+            for i in range(3):
+                assert ring.push(bytes([round_, i]))
+            assert len(ring) == 3
+            assert ring.pop_many() == [bytes([round_, i]) for i in range(3)]
+        assert ring.dropped == 0
+    finally:
+        ring.close()
+
+
+def test_full_ring_refuses_and_counts():
+    ring = ShmRing.create(2, 8, mp.Lock())
+    try:
+        assert ring.push(b"a") and ring.push(b"bb")
+        assert not ring.push(b"c")
+        assert ring.dropped == 1
+        assert ring.pop_many(1) == [b"a"]
+        assert ring.push(b"")
+        assert ring.pop_many() == [b"bb", b""]
+        with pytest.raises(ValueError):
+            ring.push(bytes(9))
+    finally:
+        ring.close()
+
+
+def test_attach_shares_the_block():
+    ring = ShmRing.create(4, 8, mp.Lock())
+    other = ShmRing.attach(ring.spec)
+    try:
+        ring.push(b"hi")
+        assert other.pop() == b"hi"
+        assert len(ring) == 0
+    finally:
+        other.close()
+        ring.close()
+
+
+def test_rt_policy_reports_instead_of_raising():
+    out = apply_rt_policy(cpu=10_000)
+    assert out["cpu"] is None and out["policy"] == "other"
+    assert len(out["errors"]) == 1 and "cpu=10000" in out["errors"][0]
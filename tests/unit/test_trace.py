@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from indigo.services.bus_poll_service import POLL_PHASES, BusPollService
+from indigo.util.clock import VirtualClock
+from indigo.util.profiler import ProfilerBusy, sample
+from indigo.util.trace import PhaseTracer, dump_all, install_dump_signal
+
+
+def test_ring_buffer_keeps_the_newest_spans():
+    tr = PhaseTracer("t", ("a", "b"), capacity=5)
+    for _ in range(4):
+        t = tr.begin_tick()
+        t = tr.span(0, t)
+        tr.span(1, t)
+
+    snap = tr.snapshot()
+    assert snap["recorded"] == 8 and snap["ticks"] == 4
+    assert [(s["tick"], s["phase"]) for s in snap["spans"]] == [(2, "b"), (3, "a"), (3, "b"), (4, "a"), (4, "b")]
+    assert snap["summary"]["a"]["count"] == 2 and snap["summary"]["b"]["count"] == 3
+    assert [s["tick"] for s in tr.snapshot(last=2)["spans"]] == [4, 4]
+
+
+def test_poll_ticks_are_traced_by_phase():
+    svc = BusPollService(simulation_mode=True, poll_hz=10.0, clock=VirtualClock())
+    svc.run_for(5.0)
+
+    snap = svc.tracer.snapshot()
+    assert snap["ticks"] == 50
+    assert set(snap["summary"]) == set(POLL_PHASES)
+    # utility + lane per tick; sleep only between ticks
+    assert snap["summary"]["io"]["count"] == 100
+    assert snap["summary"]["sleep"]["count"] == 49
+    assert any(t["name"] == "bus_poll" for t in dump_all(last=0)["tracers"])
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="no SIGUSR1")
+def test_sigusr1_writes_a_dump(tmp_path):
+    tr = PhaseTracer("sig", ("x",))
+    tr.span(0, tr.begin_tick())
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        assert install_dump_signal(tmp_path)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        end = time.monotonic() + 5.0
+        while not list(tmp_path.glob("trace-*.json")):
+            assert time.monotonic() < end
+            time.sleep(0.01)
+        time.sleep(0.05)
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+
+    dump = json.loads(next(tmp_path.glob("trace-*.json")).read_text())
+    assert dump["pid"] == os.getpid()
+    assert any(t["name"] == "sig" and t["recorded"] == 1 for t in dump["tracers"])
+
+
+def _busy_loop_for_profile(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profile_sees_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop_for_profile, args=(stop,), name="Busy")
+    worker.start()
+    try:
+        prof = sample(0.3, interval_s=0.002)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert prof.samples > 10
+    busy = [line for line in prof.collapsed().splitlines() if line.startswith("Busy;")]
+    assert busy and all("test_trace.py:_busy_loop_for_profile" in line for line in busy)
+    assert "test_trace.py:_busy_loop_for_profile" in prof.top()
+
+
+def test_one_profile_at_a_time():
+    results: list[object] = []
+    t = threading.Thread(target=lambda: results.append(sample(0.3)))
+    t.start()
+    time.sleep(0.05)
+    with pytest.raises(ProfilerBusy):
+        sample(0.1)
+    t.join()
+    assert results
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.hw.transport.sim import SimLaneTransport
+from indigo.services.bus_poll_service import BusPollService
+from indigo.services.cycle_runner import COMPLETE, CycleRunner
+from indigo.services.recipe_plan import compile_recipe
+from indigo.util.clock import VirtualClock
+
+
+def test_virtual_clock_jumps_instead_of_blocking():
+    clock = VirtualClock(10.0, wall_start=1000.0)
+    t = time.perf_counter()
+    clock.sleep(3600.0)
+    clock.sleep_until(clock.monotonic() - 5.0)  # past deadline: no-op
+    assert not clock.wait(threading.Event(), 60.0)
+    assert time.perf_counter() - t < 0.1
+
+    assert clock.monotonic() == clock.perf_counter() == 10.0 + 3660.0
+    assert clock.time() == 1000.0 + 3660.0
+
+
+def test_full_length_recipe_runs_in_virtual_time():
+    clock = VirtualClock()
+    bus = SimBus(delay_s=0.01, clock=clock)  # per-transaction bus delay is simulated too
+    runner = CycleRunner(bus, clock=clock)
+    recipe = {
+        "content_sha256": "long",
+        "autopinbreak": True,
+        "attempttime": 52_200,
+        "pinbreak_steps": [{"autopinbreaktime": 1000, "autopinbreakpressure": 1.0}] * 10,
+    }
+    for lane in range(1, 10):
+        runner.start_cycle(lane, compile_recipe(lane, recipe))
+
+    t = time.perf_counter()
+    runner.run_until_idle()
+    assert time.perf_counter() - t < 2.0
+
+    assert [runner.lane_state(lane) for lane in range(1, 10)] == [COMPLETE] * 9
+    assert 52_200 <= clock.monotonic() < 52_201
+
+
+def test_poller_soak_in_virtual_time():
+    clock = VirtualClock()
+    svc = BusPollService(simulation_mode=True, poll_hz=2.0, clock=clock)
+
+    ticks = svc.run_for(6 * 3600)  # six hours of polling
+
+    assert ticks == 6 * 3600 * 2
+    assert clock.monotonic() >= 6 * 3600 - 0.5
+    lane = svc.registry.lane_snapshot()[0]
+    assert lane["online"]
+    assert lane["last_seen_ts"] >= clock.time() - 10
+
+
+def test_sim_lane_transport_stamps_clock_time():
+    clock = VirtualClock(wall_start=5000.0)
+    transport = SimLaneTransport(lane_count=1, clock=clock)
+    clock.sleep(30.0)
+    transport.stop_lane("lane1")
+    assert transport.get_lane_status("lane1").extra["last_change_ts"] == 5030.0
@@ -0,0 +1,44 @@
+# tools/bench_bulk_transfer.py
+#
+# Bulk transfer (hw.protocol.bulk) throughput against SimBus at a given baud
+# rate: firmware upload + download to one lane for each window size, on a
+# VirtualClock (wire time and turnarounds are simulated, so this runs in
+# seconds and is deterministic). drop_rate loses that fraction of frames.
+#
+#   python tools/bench_bulk_transfer.py [size_kb] [baud] [drop_rate] [turnaround_ms]
+
+from __future__ import annotations
+
+import os
+import sys
+
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.hw.protocol import bulk
+from indigo.util.clock import VirtualClock
+
+
+def main() -> None:
+    size_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    baud = int(sys.argv[2]) if len(sys.argv) > 2 else 115_200
+    drop_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    turnaround_ms = float(sys.argv[4]) if len(sys.argv) > 4 else 2.0
+    image = os.urandom(size_kb * 1024)
+
+    print(f"image={size_kb} KiB baud={baud} (line {baud / 10 / 1024:.1f} KiB/s) drop_rate={drop_rate:g}")
+    print(f"  {'window':>6} {'dir':<8} {'KiB/s':>7} {'eff':>5} {'windows':>7} {'retx':>5} {'time_s':>7}")
+    for window in (1, 4, 8, 16, 32):
+        clock = VirtualClock()
+        bus = SimBus(delay_s=turnaround_ms / 1000.0, clock=clock, baud=baud, drop_rate=drop_rate, seed=1)
+        up = bulk.upload(bus, 1, bulk.KIND_FIRMWARE, image, window=window, clock=clock, retries=50)
+        down = bulk.download(bus, 1, bulk.KIND_FIRMWARE, window=window, clock=clock, retries=50)
+        assert down.data == image
+        for r in (up, down):
+            eff = r.throughput_Bps / (baud / 10)
+            print(
+                f"  {window:>6} {r.direction:<8} {r.throughput_Bps / 1024:>7.2f} {eff:>5.0%} {r.windows:>7}"
+                f" {r.retransmits:>5} {r.elapsed_s:>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
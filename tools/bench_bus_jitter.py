@@ -0,0 +1,85 @@
+# tools/bench_bus_jitter.py
+#
+# Poll-loop jitter (how late each tick starts vs its fixed-rate schedule) with
+# the bus loop as a thread of this process vs isolated in its own process
+# (BusProcess: pinned to the last allowed core, SCHED_FIFO if permitted).
+# `load_threads` pure-Python threads in this process stand in for other
+# services work competing for the GIL. Prints p50/p99/max lateness per mode.
+#
+#   python tools/bench_bus_jitter.py [seconds] [poll_hz] [load_threads]
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.services.bus_poll_service import BusPollService
+from indigo.services.bus_process import BusProcess, BusProcessConfig
+from indigo.services.device_registry import DeviceRegistry
+
+LANES = (1, 2, 3, 4)
+SIM_DELAY_S = 0.001
+
+
+def _burn(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(i * i for i in range(20_000))
+
+
+def _run(mode: str, seconds: float, poll_hz: float, load_threads: int) -> dict:
+    stop = threading.Event()
+    load = [threading.Thread(target=_burn, args=(stop,), daemon=True) for _ in range(load_threads)]
+    if mode == "thread":
+        reg = DeviceRegistry(lane_addrs=list(LANES), utility_addr=9)
+        svc = BusPollService(simulation_mode=True, poll_hz=poll_hz, bus=SimBus(delay_s=SIM_DELAY_S), registry=reg)
+    else:
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        cfg = BusProcessConfig(
+            poll_hz=poll_hz,
+            lane_addrs=LANES,
+            utility_addr=9,
+            cpu=cpus[-1] if cpus else None,
+            fifo_priority=50,
+            sim_delay_s=SIM_DELAY_S,
+        )
+        svc = BusProcess(cfg)
+    svc.start()
+    time.sleep(0.5)  # process start / warm up; not measured
+    svc.jitter.reset()
+    for t in load:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    snap = svc.jitter.snapshot()
+    rt = getattr(svc, "rt_policy", None)
+    svc.stop()
+    for t in load:
+        t.join()
+    return {"snap": snap, "rt": rt}
+
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    poll_hz = float(sys.argv[2]) if len(sys.argv) > 2 else 100.0
+    load_threads = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+    print(f"poll_hz={poll_hz:g} ({1000.0 / poll_hz:.1f} ms period), {seconds:g}s per run")
+    print(f"  {'mode':<10} {'load':>4} {'ticks':>6} {'mean_ms':>8} {'p50_ms':>8} {'p99_ms':>8} {'max_ms':>8}")
+    for mode in ("thread", "process"):
+        for load in (0, load_threads):
+            res = _run(mode, seconds, poll_hz, load)
+            h = res["snap"]
+            print(
+                f"  {mode:<10} {load:>4} {h['count']:>6} {h['mean_ms'] or 0:>8.3f} {h['p50_ms'] or 0:>8.3f}"
+                f" {h['p99_ms'] or 0:>8.3f} {h['max_ms'] or 0:>8.3f}"
+            )
+            if res["rt"] and res["rt"]["errors"]:
+                print(f"             (scheduling: {'; '.join(res['rt']['errors'])})")
+    print("  p50/p99 are histogram bucket upper edges")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# tools/bench_commands.py
+#
+# End-to-end command latency through the same path the API uses: a
+# BusPollService on SimBus (real clock, poll_hz) behind a CommandServer on a
+# temporary unix socket, and a CommandClient that submits `count` lane commands
+# one at a time and polls each job until it is acked. Prints the submit round
+# trip (what an API worker waits for) and the tracker's queued -> sent -> acked
+# legs. queued_to_sent is bounded by one poll period: commands go out at the
+# start of the next tick.
+#
+#   python tools/bench_commands.py [count] [poll_hz]
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.services.bus_poll_service import BusPollService
+from indigo.services.command_ipc import CommandClient, CommandServer
+from indigo.services.device_registry import DeviceRegistry
+
+
+def _pct(sorted_ms: list[float], q: float) -> float:
+    return sorted_ms[min(len(sorted_ms) - 1, int(len(sorted_ms) * q / 100.0))] if sorted_ms else float("nan")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    poll_hz = float(sys.argv[2]) if len(sys.argv) > 2 else 50.0
+
+    reg = DeviceRegistry(lane_addrs=[1, 2, 3, 4], utility_addr=9)
+    svc = BusPollService(simulation_mode=True, poll_hz=poll_hz, bus=SimBus(delay_s=0.001), registry=reg)
+    with tempfile.TemporaryDirectory() as tmp:
+        server = CommandServer(svc, Path(tmp) / "commands.sock")
+        server.start()
+        svc.start()
+        client = CommandClient(server.path)
+        submit_ms: list[float] = []
+        failed = 0
+        try:
+            for i in range(count):
+                t = time.perf_counter()
+                reply = client.request(
+                    {"op": "submit", "target": "lane", "addr": 1 + i % 4, "command": "vac_valve", "args": {"open": i % 2 == 0}}
+                )
+                submit_ms.append((time.perf_counter() - t) * 1000.0)
+                while True:
+                    job = client.request({"op": "status", "id": reply["job"]["id"]})["job"]
+                    if job["state"] in ("acked", "failed"):
+                        failed += job["state"] == "failed"
+                        break
+                    time.sleep(0.0005)
+            stats = client.request({"op": "stats"})["stats"]
+        finally:
+            svc.stop()
+            server.stop()
+
+    submit_ms.sort()
+    print(f"{count} commands, poll_hz={poll_hz:g} (period {1000.0 / poll_hz:.1f} ms), {failed} failed")
+    print(f"  {'leg':<16} {'p50_ms':>8} {'p99_ms':>8} {'max_ms':>8}")
+    print(f"  {'submit (IPC)':<16} {_pct(submit_ms, 50):>8.3f} {_pct(submit_ms, 99):>8.3f} {submit_ms[-1]:>8.3f}")
+    # tracker histograms report bucket upper edges for percentiles
+    for leg, h in stats["latency_ms"].items():
+        print(f"  {leg:<16} {h['p50_ms'] or 0:>8.3f} {h['p99_ms'] or 0:>8.3f} {h['max_ms'] or 0:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# tools/bench_cycle_jitter.py
+#
+# CycleRunner scheduling error on real time against SimBus: every lane runs a
+# pin-break recipe with short steps at once; prints the per-phase error
+# histograms (first frame sent - scheduled, ms).
+#
+#   python tools/bench_cycle_jitter.py [lanes] [steps] [step_ms] [spin_ms]
+
+from __future__ import annotations
+
+import sys
+
+from indigo.hw.bus.sim_bus import SimBus
+from indigo.services.cycle_runner import CycleRunner
+from indigo.services.recipe_plan import compile_recipe
+
+
+def main() -> None:
+    lanes = int(sys.argv[1]) if len(sys.argv) > 1 else 9
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    step_ms = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    spin_ms = float(sys.argv[4]) if len(sys.argv) > 4 else 2.0
+
+    runner = CycleRunner(SimBus(delay_s=0.0), spin_s=spin_ms / 1000.0)
+    recipe = {
+        "content_sha256": "bench",
+        "autopinbreak": True,
+        "thermaltemp": -10,
+        "stirspeed": 500,
+        "pinbreak_steps": [{"autopinbreaktime": step_ms, "autopinbreakpressure": 1.0}] * steps,
+    }
+    for lane in range(1, lanes + 1):
+        runner.start_cycle(lane, compile_recipe(lane, recipe))
+    runner.run_until_idle()
+
+    print(f"lanes={lanes} steps={steps} step_ms={step_ms} spin_ms={spin_ms}")
+    for phase, snap in runner.stats()["timing_error_by_phase_ms"].items():
+        if not snap["count"]:
+            continue
+        print(
+            f"{phase:>9}: n={snap['count']:5d} mean={snap['mean_ms']:.3f} "
+            f"p50<={snap['p50_ms']} p99<={snap['p99_ms']} max={snap['max_ms']:.3f} ms"
+        )
+        for b in snap["buckets"]:
+            if b["count"]:
+                print(f"           <= {b['le_ms'] if b['le_ms'] is not None else 'inf':>7} ms: {b['count']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# tools/bench_export.py
+#
+# Export throughput (rows/s) and peak Python heap per format, over a throwaway
+# SQLite file filled with N lane_telemetry rows. Peak memory is measured in a
+# second pass under tracemalloc (which slows the first one down too much to
+# time) and should not move with N.
+#
+#   python tools/bench_export.py [rows] [batch_rows]
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import insert
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    batch_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    os.environ["INDIGO_DATA_DIR"] = tempfile.mkdtemp(prefix="indigo-bench-export-")
+
+    from indigo.db.engine import get_session_factory
+    from indigo.db.orm.tables import LaneTelemetry
+    from indigo.hw.devices.laneboard import LANE_STATUS_LEN
+    from indigo.services.export import ExportQuery, export_stream, parquet_available
+    from indigo.services.telemetry import telemetry_row
+
+    factory = get_session_factory()
+    payload = bytes(LANE_STATUS_LEN)
+    t0 = time.time() - n
+    with factory() as session:
+        for i in range(0, n, 10_000):
+            rows = [telemetry_row(1 + j % 9, payload, t0 + j) for j in range(i, min(i + 10_000, n))]
+            session.execute(insert(LaneTelemetry), rows)
+        session.commit()
+
+    cases = [("csv", None), ("csv", 6), ("ndjson", None), ("ndjson", 6)]
+    if parquet_available():
+        cases.append(("parquet", None))
+    q = ExportQuery("telemetry")
+
+    print(f"rows={n} batch_rows={batch_rows}")
+    print(f"  {'format':>12}  {'rows/s':>9}  {'MB out':>8}  {'peak KiB':>8}")
+    for fmt, level in cases:
+        t = time.perf_counter()
+        size = sum(len(c) for c in export_stream(factory, q, fmt, batch_rows=batch_rows, gzip_level=level))
+        rate = n / (time.perf_counter() - t)
+
+        tracemalloc.start()
+        for _ in export_stream(factory, q, fmt, batch_rows=batch_rows, gzip_level=level):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        name = fmt + ("+gzip" if level is not None else "")
+        print(f"  {name:>12}  {rate:>9.0f}  {size / 1e6:>8.1f}  {peak / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
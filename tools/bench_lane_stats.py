@@ -0,0 +1,40 @@
+# tools/bench_lane_stats.py
+#
+# LaneStats.update cost per lane status sample as a lane's history grows: the
+# per-sample time should be the same after 1k samples as after millions.
+#
+#   python tools/bench_lane_stats.py [samples] [window]
+
+from __future__ import annotations
+
+import struct
+import sys
+import time
+
+from indigo.services.lane_stats import LaneStats
+
+
+def main() -> None:
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    window = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    st = LaneStats([1], window=window)
+    payloads = [bytes(2) + struct.pack("<hhhh", 2000 + i, 5000, 8000, 5000) + bytes(6) for i in range(256)]
+
+    print(f"samples={samples} window={window}")
+    print(f"  {'history':>10}  {'update_us':>9}")
+    done = 0
+    mark = 1000
+    while done < samples:
+        n = min(mark, samples) - done
+        t0 = time.perf_counter()
+        for i in range(done, done + n):
+            st.update(1, payloads[i & 0xFF], 1.7e9 + i * 0.1)
+        dt = time.perf_counter() - t0
+        done += n
+        print(f"  {done:>10}  {dt / n * 1e6:>9.3f}")
+        mark *= 10
+    print(f"  reflux: {st.lane(1)['reflux']}")
+
+
+if __name__ == "__main__":
+    main()
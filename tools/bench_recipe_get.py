@@ -0,0 +1,70 @@
+# tools/bench_recipe_get.py
+#
+# GET /api/lanes/<lane>/recipe throughput: uncached (new RecipeService + two ORM
+# queries + jsonify per request) vs. the in-process RecipeCache.
+#
+#   python tools/bench_recipe_get.py [requests]
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+
+from flask import jsonify
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    tmp = tempfile.mkdtemp(prefix="indigo-bench-")
+    os.environ["INDIGO_DATA_DIR"] = tmp
+    os.environ.pop("DATABASE_URL", None)
+
+    from indigo.api.app import create_app
+    from indigo.api.blueprints.recipes import RECIPE_CACHE_EXT
+    from indigo.db.engine import get_session_factory
+    from indigo.services.recipe_service import RecipeService
+
+    app = create_app()
+
+    def uncached():
+        r = RecipeService(get_session_factory()).get_lane_recipe(1)
+        return jsonify({"ok": True, "recipe": r})
+
+    app.add_url_rule("/bench/uncached", "bench_uncached", uncached)
+    client = app.test_client()
+    payload = {
+        "numberofautopinbreaks": 10,
+        "autopinbreak": True,
+        "autopinbreaktime": [1000] * 10,
+        "autopinbreakpressure": [1.0] * 10,
+        "postpinbreakthermaltemp": [22.0] * 10,
+        "postpinbreakpressure": [1.0] * 10,
+        "postpinbreakrefluxtemp": [1.0] * 10,
+        "postpinbreakstirspeed": [500] * 10,
+        "attempttime": 52200,
+        "thermaltemp": -10,
+        "name": "bench",
+    }
+    client.post("/api/lanes/1/recipe", json=payload)
+
+    def run(url: str) -> float:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            resp = client.get(url)
+            assert resp.status_code == 200
+        return n / (time.perf_counter() - t0)
+
+    before = run("/bench/uncached")
+    after = run("/api/lanes/1/recipe")
+    print("=== RECIPE GET BENCH ===")
+    print(f"requests={n}")
+    print(f"uncached: {before:10.0f} req/s")
+    print(f"cached:   {after:10.0f} req/s  ({after / before:.1f}x)")
+    print(f"cache stats: {app.extensions[RECIPE_CACHE_EXT].stats()}")
+
+
+if __name__ == "__main__":
+    main()
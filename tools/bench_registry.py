@@ -0,0 +1,65 @@
+# tools/bench_registry.py
+#
+# DeviceRegistry write path (per status response) and read path: decoding every
+# response on arrival (parse + set_*_status) vs storing the raw payload
+# (set_raw_status) and decoding on read. `change_every` is how many polls of a
+# board pass between payload changes; `reads_per_poll` API reads of it per poll.
+#
+#   python tools/bench_registry.py [polls] [change_every] [reads_per_poll]
+
+from __future__ import annotations
+
+import sys
+import time
+
+from indigo.hw.devices import LaneboardClient
+from indigo.hw.devices.laneboard import RESP_LANE_STATUS
+from indigo.hw.protocol.codec import Frame
+from indigo.services.device_registry import DeviceRegistry
+
+
+def _frames(polls: int, change_every: int) -> list[Frame]:
+    out = []
+    for i in range(polls):
+        temp = (i // change_every) & 0xFF  # reflux temp low byte moves every change_every polls
+        out.append(Frame(1, RESP_LANE_STATUS, bytes([0, 0, temp]) + bytes(13)))
+    return out
+
+
+def main() -> None:
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    change_every = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    reads_per_poll = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+    frames = _frames(polls, change_every)
+    read_every = max(1, round(1 / reads_per_poll)) if reads_per_poll > 0 else 0
+
+    def run(eager: bool) -> tuple[float, float, int]:
+        reg = DeviceRegistry(lane_addrs=[1], utility_addr=9)
+        write_s = read_s = 0.0
+        for i, f in enumerate(frames):
+            t0 = time.perf_counter()
+            if eager:
+                st = LaneboardClient.parse_status_response(f)
+                if st:
+                    reg.set_lane_status(st, 0.0)
+            else:
+                reg.set_raw_status(f.addr, f.msg_type, f.payload, 0.0)
+            t1 = time.perf_counter()
+            write_s += t1 - t0
+            if read_every and i % read_every == 0:
+                reg.lane(1)
+                read_s += time.perf_counter() - t1
+        return write_s, read_s, reg.decodes
+
+    print(f"polls={polls} change_every={change_every} reads_per_poll={reads_per_poll:g}")
+    print(f"  {'mode':<12} {'write_us':>9} {'read_us':>8} {'decodes':>8}")
+    for name, eager in (("decode-eager", True), ("raw+lazy", False)):
+        w, r, d = run(eager)
+        reads = (polls + read_every - 1) // read_every if read_every else 0
+        decodes = polls if eager else d
+        print(f"  {name:<12} {w / polls * 1e6:>9.3f} {(r / reads * 1e6 if reads else 0):>8.3f} {decodes:>8}")
+    print("  write_us per poll, read_us per reader call")
+
+
+if __name__ == "__main__":
+    main()
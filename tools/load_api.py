@@ -0,0 +1,131 @@
+# tools/load_api.py
+#
+# HTTP load against the API: `concurrency` client threads, each on its own
+# keep-alive connection, cycle through the health, status and recipe endpoints
+# for `seconds`; prints per-endpoint and overall p50/p99 latency and req/s.
+#
+# base_url "local" boots create_app() on the production waitress server
+# (make_server, tuned from API_* settings) on a free port in this process,
+# with a recipe on lane 1, and a BusPollService feeding its registry. The
+# clients then share the server's GIL; for server-only numbers start `make prod`
+# (or the systemd unit) and pass its URL.
+#
+#   python tools/load_api.py [base_url|local] [concurrency] [seconds]
+
+from __future__ import annotations
+
+import http.client
+import json
+import logging
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+PATHS = ("/api/health", "/api/lanes", "/api/devices", "/api/lanes/1/recipe")
+
+RECIPE = {
+    "cycletype": "full",
+    "numberofautopinbreaks": 3,
+    "autopinbreak": True,
+    "autopinbreaktime": [1000] * 3,
+    "autopinbreakpressure": [1.0] * 3,
+    "attempttime": 52200,
+    "thermaltemp": -10,
+    "stirspeed": 500,
+}
+
+
+def _pct(sorted_ms: list[float], q: float) -> float:
+    if not sorted_ms:
+        return float("nan")
+    return sorted_ms[min(len(sorted_ms) - 1, int(len(sorted_ms) * q / 100.0))]
+
+
+def _start_local():
+    from indigo.api.app import create_app, make_server
+    from indigo.services.bus_poll_service import BusPollService
+
+    # "Task queue depth is N" on every saturated request; that is the point of a load run
+    logging.getLogger("waitress.queue").setLevel(logging.ERROR)
+    poller = BusPollService(simulation_mode=True, poll_hz=20.0)
+    poller.start()
+    server = make_server(create_app(poller.registry), host="127.0.0.1", port=0)
+    threading.Thread(target=server.run, name="waitress", daemon=True).start()
+    base = f"http://127.0.0.1:{server.effective_port}"
+
+    conn = http.client.HTTPConnection("127.0.0.1", server.effective_port, timeout=10)
+    conn.request("POST", "/api/lanes/1/recipe", body=json.dumps(RECIPE), headers={"Content-Type": "application/json"})
+    conn.getresponse().read()
+    conn.close()
+    return base, server, poller
+
+
+def _worker(host: str, port: int, end: float, offset: int, lat: dict[str, list[float]], errors: list[int]) -> None:
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    i = offset
+    while time.perf_counter() < end:
+        path = PATHS[i % len(PATHS)]
+        i += 1
+        t = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            resp = conn.getresponse()
+            resp.read()
+            ok = resp.status < 500
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            ok = False
+        if ok:
+            lat[path].append((time.perf_counter() - t) * 1000.0)
+        else:
+            errors[0] += 1
+    conn.close()
+
+
+def main() -> None:
+    base = sys.argv[1] if len(sys.argv) > 1 else "local"
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+
+    server = poller = None
+    if base == "local":
+        base, server, poller = _start_local()
+    url = urlsplit(base)
+    host, port = url.hostname or "127.0.0.1", url.port or 80
+
+    per_thread = [{p: [] for p in PATHS} for _ in range(concurrency)]
+    errors = [[0] for _ in range(concurrency)]
+    end = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=_worker, args=(host, port, end, k, per_thread[k], errors[k])) for k in range(concurrency)
+    ]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    print(f"{base}: concurrency={concurrency} for {wall:.1f}s")
+    print(f"  {'endpoint':<24} {'requests':>9} {'p50_ms':>8} {'p99_ms':>8} {'max_ms':>8}")
+    everything: list[float] = []
+    for path in PATHS:
+        ms = sorted(x for lat in per_thread for x in lat[path])
+        everything.extend(ms)
+        print(f"  {path:<24} {len(ms):>9} {_pct(ms, 50):>8.2f} {_pct(ms, 99):>8.2f} {(ms[-1] if ms else float('nan')):>8.2f}")
+    everything.sort()
+    n_err = sum(e[0] for e in errors)
+    print(
+        f"  {'all':<24} {len(everything):>9} {_pct(everything, 50):>8.2f} {_pct(everything, 99):>8.2f}"
+        f"   {len(everything) / wall:,.0f} req/s, {n_err} errors"
+    )
+
+    if server is not None:
+        server.close()
+        poller.stop()
+
+
+if __name__ == "__main__":
+    main()